@@ -0,0 +1,829 @@
+# backends.py
+
+"""
+This module defines the pluggable cluster access backends used by kubectl_utils.
+
+Every backend exposes the same methods, so kubectl_utils (and the handlers on top of it)
+do not care whether data comes from a forked kubectl process or from the API server directly.
+
+Classes:
+    ClusterCallError: Raised when a cluster call fails.
+    ClusterCallTimeout: Raised when a cluster call exceeds its time budget.
+    CancelToken: Cleanup hooks that abort an in-flight call (e.g., kill the kubectl process).
+    ClusterBackend: Interface implemented by every backend.
+    KubectlBackend: Runs the kubectl binary once per call (the original behaviour).
+    NativeBackend: Talks to the Kubernetes API server over one long-lived, pooled HTTP session.
+"""
+
+import contextvars
+import json
+import os
+import re
+import socket
+import subprocess
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+import metrics
+from utils import parse_duration
+
+
+class ClusterCallError(Exception):
+    """Raised when a kubectl command or Kubernetes API request fails."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ClusterCallTimeout(ClusterCallError):
+    """Raised when a cluster call does not finish within its time budget."""
+
+
+class CancelToken:
+    """
+    Lets an async caller abort a blocking cluster call running in a worker thread.
+
+    Backends register cleanup callbacks (kill the kubectl process, close the HTTP response)
+    on the token of the current call; cancel() runs them once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.cancelled = False
+
+    def add_callback(self, callback) -> None:
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+
+# Token of the cluster call running in the current context (set by cluster_exec.run_cluster_call).
+current_cancel_token: contextvars.ContextVar = contextvars.ContextVar("current_cancel_token", default=None)
+
+
+def command_verb(command: list) -> str:
+    """
+    Low-cardinality name of a kubectl command, used as a metrics label: the verb, plus the
+    resource type for get/describe (e.g. "logs", "describe pod", "get svc", "get --raw").
+    """
+    args = command[1:]
+    if not args:
+        return "unknown"
+    if args[0] in ("get", "describe") and len(args) > 1:
+        return f"{args[0]} {args[1]}"
+    return args[0]
+
+
+def run_command(command: list) -> str:
+    """
+    Helper function to run a command via subprocess.
+    Raises an exception if the command fails.
+    The process is killed if the current cluster call is cancelled.
+    """
+    with metrics.cluster_call("kubectl", command_verb(command)) as call:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        token = current_cancel_token.get()
+        if token is not None:
+            token.add_callback(process.kill)
+        stdout, stderr = process.communicate()
+        if token is not None and token.cancelled:
+            call.status = "cancelled"
+            raise ClusterCallError(f"Command '{' '.join(command)}' was cancelled")
+        call.status = str(process.returncode)
+        if process.returncode != 0:
+            raise ClusterCallError(f"Command '{' '.join(command)}' failed with error: {stderr.strip()}")
+        return stdout.strip()
+
+
+def stream_command(command: list) -> Iterator[str]:
+    """
+    Runs a command and yields its stdout line by line as it is produced.
+    The process is killed when the generator is closed early or the current call is cancelled.
+    """
+    with metrics.cluster_call("kubectl", command_verb(command)) as call:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1)
+        token = current_cancel_token.get()
+        if token is not None:
+            token.add_callback(process.kill)
+        try:
+            for line in process.stdout:
+                yield line.rstrip("\n")
+            stderr = process.stderr.read()
+            process.wait()
+            if token is not None and token.cancelled:
+                call.status = "cancelled"
+                raise ClusterCallError(f"Command '{' '.join(command)}' was cancelled")
+            call.status = str(process.returncode)
+            if process.returncode != 0:
+                raise ClusterCallError(f"Command '{' '.join(command)}' failed with error: {stderr.strip()}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            process.stderr.close()
+
+
+def abort_response(response: requests.Response) -> None:
+    """
+    Unblocks a thread that is reading a streamed response, from any other thread.
+
+    response.close() would wait for the reader's lock, so the underlying socket is shut
+    down instead; the blocked read then returns and the reader cleans up.
+    """
+    sock = getattr(getattr(getattr(response, "raw", None), "_connection", None), "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+# --- Rendering helpers (structured objects -> kubectl-like text) ---
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parses an RFC3339 timestamp from the API (None if missing or malformed).
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+
+
+def normalize_timestamp(value: str) -> str:
+    """
+    Rewrites an RFC3339(Nano) UTC timestamp as "YYYY-MM-DDTHH:MM:SS.nnnnnnnnnZ", so timestamps
+    compare correctly as strings (the API server trims trailing zeros from the fraction).
+
+    Raises:
+        ValueError: If the value is not an RFC3339 timestamp.
+    """
+    if not value.endswith("Z") or "T" not in value:
+        moment = parse_timestamp(value)
+        if moment is None or moment.tzinfo is None:
+            raise ValueError(f"Invalid timestamp: {value!r}")
+        return format_timestamp(moment.timestamp())
+    seconds, _, fraction = value[:-1].partition(".")
+    if len(seconds) != 19 or not fraction.isdigit() and fraction:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    return f"{seconds}.{fraction[:9].ljust(9, '0')}Z"
+
+
+def format_timestamp(epoch: float) -> str:
+    """
+    Formats a POSIX time as a normalized RFC3339Nano UTC timestamp (see normalize_timestamp).
+    """
+    moment = datetime.fromtimestamp(epoch, timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond * 1000:09d}Z"
+
+
+def format_age(value: Optional[str]) -> str:
+    """
+    Formats an RFC3339 timestamp as a kubectl-style age (e.g., "42s", "5m", "3h", "2d").
+    """
+    ts = parse_timestamp(value)
+    if ts is None:
+        return "<unknown>"
+    seconds = max(0, int((datetime.now(timezone.utc) - ts).total_seconds()))
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+def event_timestamp(event: dict) -> str:
+    """
+    Returns the most relevant timestamp of a Kubernetes event object.
+    """
+    return (
+        event.get("lastTimestamp")
+        or event.get("eventTime")
+        or event.get("firstTimestamp")
+        or event.get("metadata", {}).get("creationTimestamp")
+        or ""
+    )
+
+
+def container_state(state: dict) -> str:
+    """
+    One container state (or lastState) as in 'kubectl describe pod', e.g. "Waiting (CrashLoopBackOff)".
+    """
+    if "running" in state:
+        return f"Running (started {state['running'].get('startedAt', '?')})"
+    if "waiting" in state:
+        waiting = state["waiting"]
+        detail = f": {waiting['message']}" if waiting.get("message") else ""
+        return f"Waiting ({waiting.get('reason', 'Unknown')}{detail})"
+    if "terminated" in state:
+        terminated = state["terminated"]
+        return f"Terminated ({terminated.get('reason', 'Unknown')}, exit code {terminated.get('exitCode', '?')})"
+    return "Unknown"
+
+
+def render_events_table(events: List[dict]) -> str:
+    """
+    Renders Kubernetes event objects as a 'kubectl get events'-style table.
+    """
+    if not events:
+        return "No resources found."
+    rows = [("LAST SEEN", "TYPE", "REASON", "OBJECT", "MESSAGE")]
+    for event in sorted(events, key=event_timestamp):
+        involved = event.get("involvedObject", {})
+        rows.append((
+            format_age(event_timestamp(event)),
+            event.get("type", ""),
+            event.get("reason", ""),
+            f"{involved.get('kind', '').lower()}/{involved.get('name', '')}",
+            (event.get("message") or "").strip(),
+        ))
+    widths = [max(len(row[i]) for row in rows) for i in range(4)]
+    return "\n".join(
+        "   ".join(col.ljust(widths[i]) for i, col in enumerate(row[:4])) + "   " + row[4]
+        for row in rows
+    )
+
+
+def event_line(event: dict) -> str:
+    """
+    One event as "<type>  <reason>  <age>  <message>", as listed under a pod description's Events.
+    """
+    return (f"{event.get('type', '')}  {event.get('reason', '')}  {format_age(event_timestamp(event))}  "
+            f"{(event.get('message') or '').strip()}")
+
+
+def render_pod_description(pod: dict, events: Optional[List[dict]] = None) -> str:
+    """
+    Renders a pod object (plus its events) as compact 'kubectl describe pod'-style text.
+    """
+    meta = pod.get("metadata", {})
+    spec = pod.get("spec", {})
+    status = pod.get("status", {})
+    labels = ",".join(f"{k}={v}" for k, v in sorted(meta.get("labels", {}).items())) or "<none>"
+    lines = [
+        f"Name:         {meta.get('name', '')}",
+        f"Namespace:    {meta.get('namespace', '')}",
+        f"Node:         {spec.get('nodeName', '<none>')}",
+        f"Start Time:   {status.get('startTime', '<unknown>')}",
+        f"Labels:       {labels}",
+        f"Status:       {status.get('phase', 'Unknown')}",
+        f"IP:           {status.get('podIP', '<none>')}",
+        "Containers:",
+    ]
+    statuses = {cs.get("name"): cs for cs in status.get("containerStatuses", [])}
+    for container in spec.get("containers", []):
+        cs = statuses.get(container.get("name"), {})
+        lines.append(f"  {container.get('name')}:")
+        lines.append(f"    Image:          {container.get('image', '')}")
+        lines.append(f"    State:          {container_state(cs.get('state', {}))}")
+        if cs.get("lastState"):
+            lines.append(f"    Last State:     {container_state(cs['lastState'])}")
+        lines.append(f"    Ready:          {cs.get('ready', False)}")
+        lines.append(f"    Restart Count:  {cs.get('restartCount', 0)}")
+    lines.append("Conditions:")
+    for condition in status.get("conditions", []):
+        lines.append(f"  {condition.get('type', '')}: {condition.get('status', '')}")
+    lines.append("Events:")
+    if events:
+        for event in sorted(events, key=event_timestamp):
+            lines.append(f"  {event_line(event)}")
+    else:
+        lines.append("  <none>")
+    return "\n".join(lines)
+
+
+def render_object(obj: dict) -> str:
+    """
+    Renders an API object as YAML (if PyYAML is installed) or indented JSON.
+    """
+    return render_yaml(_without_managed_fields(obj))
+
+
+def render_yaml(data: dict) -> str:
+    """
+    Renders a dict as YAML (if PyYAML is installed) or indented JSON.
+    """
+    try:
+        import yaml
+    except ImportError:
+        return json.dumps(data, indent=2)
+
+    class Dumper(yaml.SafeDumper):
+        # Projections share dicts between fields (e.g. containers and status.containerStatuses);
+        # write each out in full rather than as &id001 / *id001.
+        def ignore_aliases(self, data):
+            return True
+
+    return yaml.dump(data, Dumper=Dumper, sort_keys=False).strip()
+
+
+def _without_managed_fields(obj: dict) -> dict:
+    obj = dict(obj)
+    obj["metadata"] = {k: v for k, v in obj.get("metadata", {}).items() if k != "managedFields"}
+    return obj
+
+
+# --- Field projection (fields=status,containers.state,events) ---
+
+# Short names accepted as the first part of a field path, per resource.
+FIELD_ALIASES = {
+    "pods": {"containers": "status.containerStatuses", "initContainers": "status.initContainerStatuses"},
+}
+# Where a first part that is not a top-level key is looked up, in order (e.g. "ports" -> spec.ports).
+_FIELD_SECTIONS = ("spec", "status", "metadata")
+_FIELD_PATH = re.compile(r"^[A-Za-z0-9_-]+(\.[A-Za-z0-9_-]+)*$")
+MAX_FIELDS = 20
+
+
+def parse_fields(fields: str) -> Tuple[str, ...]:
+    """
+    Parses a comma-separated field list such as "status,containers.state,events".
+
+    Raises:
+        ValueError: If a path is malformed or more than MAX_FIELDS are given.
+    """
+    paths = tuple(dict.fromkeys(part.strip() for part in fields.split(",") if part.strip()))
+    if not paths:
+        raise ValueError("fields must name at least one field, e.g. 'status,containers.state,events'")
+    if len(paths) > MAX_FIELDS:
+        raise ValueError(f"At most {MAX_FIELDS} fields may be selected")
+    for path in paths:
+        if not _FIELD_PATH.match(path):
+            raise ValueError(f"Invalid field path '{path}' (use dotted names such as 'containers.state')")
+    return paths
+
+
+def _select(value, parts: List[str]):
+    """
+    The part of value under the path parts, with the same nesting; list items keep their "name".
+    Returns None if the path does not exist.
+    """
+    if not parts:
+        return value
+    if isinstance(value, list):
+        items = []
+        for item in value:
+            selected = _select(item, parts)
+            if isinstance(item, dict) and "name" in item:
+                selected = {"name": item["name"], **(selected or {})}
+            items.append(selected)
+        return items
+    if isinstance(value, dict) and parts[0] in value:
+        selected = _select(value[parts[0]], parts[1:])
+        return None if selected is None else {parts[0]: selected}
+    return None
+
+
+def _merge(into, value):
+    if isinstance(into, dict) and isinstance(value, dict):
+        for key, item in value.items():
+            into[key] = _merge(into[key], item) if key in into else item
+        return into
+    if isinstance(into, list) and isinstance(value, list) and len(into) == len(value):
+        return [_merge(a, b) for a, b in zip(into, value)]
+    return value
+
+
+def project_object(obj: dict, fields: Tuple[str, ...], aliases: Optional[Dict[str, str]] = None,
+                   extra: Optional[Dict[str, object]] = None) -> dict:
+    """
+    Keeps only the selected fields of an API object.
+
+    The first part of each path is resolved, in order, from 'extra' (computed fields such as a pod's
+    events), 'aliases', the object's top level, and then its spec, status and metadata; the rest of
+    the path is followed from there, through every item of a list. The result is keyed by the names
+    the caller used, e.g. "containers.state" -> {"containers": [{"name": "app", "state": {...}}]}.
+    A path that does not exist maps its first part to None.
+
+    Args:
+        obj (dict): The API object.
+        fields (Tuple[str, ...]): Dotted paths, as returned by parse_fields.
+        aliases (Optional[Dict[str, str]]): First part -> dotted path in obj (see FIELD_ALIASES).
+        extra (Optional[Dict[str, object]]): First part -> value not taken from obj.
+
+    Returns:
+        dict: The projection.
+    """
+    obj = _without_managed_fields(obj)
+    aliases, extra = aliases or {}, extra or {}
+    projection: dict = {}
+    for path in fields:
+        head, *rest = path.split(".")
+        if head in extra:
+            root = extra[head]
+        elif head in aliases:
+            root = obj
+            for part in aliases[head].split("."):
+                root = root.get(part) if isinstance(root, dict) else None
+        else:
+            section = next((s for s in _FIELD_SECTIONS if head not in obj and head in obj.get(s, {})), None)
+            root = (obj.get(section) if section else obj).get(head)
+        selected = _select(root, rest) if root is not None else None
+        projection[head] = _merge(projection[head], selected) if projection.get(head) is not None else selected
+    return projection
+
+
+# --- Backends ---
+
+class ClusterBackend:
+    """
+    Interface for cluster access backends.
+
+    Text methods (get_logs, describe_pod, get_service_info) return what the bridge endpoints
+    send back. Structured methods (get_pod, get_service, list_events) return decoded
+    Kubernetes API objects.
+    """
+
+    name = "base"
+
+    def get_logs(self, pod_name: str, namespace: str, since_time: Optional[str], tail_lines: Optional[int]) -> str:
+        raise NotImplementedError
+
+    def describe_pod(self, pod_name: str, namespace: str) -> str:
+        raise NotImplementedError
+
+    def get_service_info(self, service_name: str, namespace: str) -> str:
+        raise NotImplementedError
+
+    def get_pod(self, pod_name: str, namespace: str) -> dict:
+        raise NotImplementedError
+
+    def get_service(self, service_name: str, namespace: str) -> dict:
+        raise NotImplementedError
+
+    def list_events(self, namespace: Optional[str], field_selector: Optional[str] = None,
+                    limit: Optional[int] = None, continue_token: Optional[str] = None) -> dict:
+        """
+        Returns one page of events as a decoded EventList ({"items": [...], "metadata": {"continue": ...}}).
+        namespace=None lists events in all namespaces.
+        """
+        raise NotImplementedError
+
+    def list_objects(self, resource: str, namespace: Optional[str] = None, field_selector: Optional[str] = None,
+                     limit: Optional[int] = None, continue_token: Optional[str] = None,
+                     label_selector: Optional[str] = None) -> dict:
+        """
+        Returns one page of a resource (e.g. "nodes", "pods", "deployments") as a decoded List object.
+        namespace=None lists all namespaces (and is the only choice for cluster-scoped resources).
+        """
+        raise NotImplementedError
+
+    def get_object(self, resource: str, name: str, namespace: Optional[str] = None) -> dict:
+        """
+        Returns one object of a resource (e.g. "deployments", "statefulsets") as a decoded API object.
+        """
+        raise NotImplementedError
+
+    def server_version(self) -> dict:
+        """
+        Returns the API server's /version; the cheapest authenticated call, used as a health probe.
+        """
+        raise NotImplementedError
+
+    def stream_logs(self, pod_name: str, namespace: str, since_time: Optional[str], tail_lines: Optional[int],
+                    follow: bool = False) -> Iterator[str]:
+        raise NotImplementedError
+
+    def stream_log_records(self, pod_name: str, namespace: str, container: Optional[str] = None,
+                           since: Optional[str] = None, previous: bool = False,
+                           tail_lines: Optional[int] = None) -> Iterator[str]:
+        """
+        Yields a container's log lines, each prefixed with its RFC3339Nano timestamp and a space,
+        from the absolute time 'since' (RFC3339) on, at most the last tail_lines of them.
+        previous=True reads the last terminated container.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class KubectlBackend(ClusterBackend):
+    """
+    Backend that forks the kubectl binary for every call.
+    Each call pays for process start-up, kubeconfig loading and TLS/auth discovery.
+    """
+
+    name = "kubectl"
+
+    def __init__(self, binary: Optional[str] = None):
+        self.binary = binary or config.KUBECTL_BINARY
+
+    def _kubectl(self, *args: str) -> str:
+        return run_command([self.binary, *args])
+
+    def get_logs(self, pod_name, namespace, since_time, tail_lines):
+        # Example: kubectl logs <pod_name> -n <namespace> --since=5m --tail=100
+        return self._kubectl("logs", pod_name, "-n", namespace, f"--since={since_time}", f"--tail={tail_lines}")
+
+    def stream_logs(self, pod_name, namespace, since_time, tail_lines, follow=False):
+        command = [self.binary, "logs", pod_name, "-n", namespace, f"--since={since_time}", f"--tail={tail_lines}"]
+        if follow:
+            command.append("--follow")
+        return stream_command(command)
+
+    def stream_log_records(self, pod_name, namespace, container=None, since=None, previous=False, tail_lines=None):
+        command = [self.binary, "logs", pod_name, "-n", namespace, "--timestamps"]
+        if container:
+            command += ["-c", container]
+        if since:
+            command.append(f"--since-time={since}")
+        if previous:
+            command.append("--previous")
+        if tail_lines is not None:
+            command.append(f"--tail={tail_lines}")
+        return stream_command(command)
+
+    def describe_pod(self, pod_name, namespace):
+        return self._kubectl("describe", "pod", pod_name, "-n", namespace)
+
+    def get_service_info(self, service_name, namespace):
+        # Return output in YAML format for better readability
+        return self._kubectl("get", "svc", service_name, "-n", namespace, "-o", "yaml")
+
+    def get_pod(self, pod_name, namespace):
+        return json.loads(self._kubectl("get", "pod", pod_name, "-n", namespace, "-o", "json"))
+
+    def get_service(self, service_name, namespace):
+        return json.loads(self._kubectl("get", "svc", service_name, "-n", namespace, "-o", "json"))
+
+    def list_events(self, namespace, field_selector=None, limit=None, continue_token=None):
+        return self.list_objects("events", namespace, field_selector, limit, continue_token)
+
+    def list_objects(self, resource, namespace=None, field_selector=None, limit=None, continue_token=None,
+                     label_selector=None):
+        # 'kubectl get' cannot resume from a continue token, so page through the raw API path.
+        query = _list_query(field_selector, limit, continue_token, label_selector)
+        path = resource_path(resource, namespace) + (f"?{urlencode(query)}" if query else "")
+        return json.loads(self._kubectl("get", "--raw", path))
+
+    def get_object(self, resource, name, namespace=None):
+        return json.loads(self._kubectl("get", "--raw", f"{resource_path(resource, namespace)}/{name}"))
+
+    def server_version(self):
+        return json.loads(self._kubectl("get", "--raw", "/version"))
+
+
+# Resources outside the core API group, by their group/version
+API_GROUPS = {
+    "deployments": "apps/v1",
+    "statefulsets": "apps/v1",
+    "daemonsets": "apps/v1",
+    "replicasets": "apps/v1",
+}
+
+
+def resource_path(resource: str, namespace: Optional[str] = None) -> str:
+    """
+    API path for a resource in a namespace, or in all namespaces when namespace is None.
+    """
+    group = API_GROUPS.get(resource)
+    prefix = f"/apis/{group}" if group else "/api/v1"
+    return f"{prefix}/namespaces/{namespace}/{resource}" if namespace else f"{prefix}/{resource}"
+
+
+def events_path(namespace: Optional[str]) -> str:
+    """
+    API path for events in a namespace, or in all namespaces when namespace is None.
+    """
+    return resource_path("events", namespace)
+
+
+def _list_query(field_selector: Optional[str], limit: Optional[int], continue_token: Optional[str],
+                label_selector: Optional[str] = None) -> dict:
+    query = {}
+    if field_selector:
+        query["fieldSelector"] = field_selector
+    if label_selector:
+        query["labelSelector"] = label_selector
+    if limit:
+        query["limit"] = limit
+    if continue_token:
+        query["continue"] = continue_token
+    return query
+
+
+def api_verb(path: str) -> str:
+    """
+    Low-cardinality name of an API server GET, used as a metrics label:
+    "list <resource>", "get <resource>" or "get <resource>/<subresource>" (e.g. "get pods/log").
+    """
+    parts = path.split("?", 1)[0].strip("/").split("/")
+    if parts[0] not in ("api", "apis"):
+        return f"get /{parts[0]}"  # e.g. /version
+    # /api/<version>/... or /apis/<group>/<version>/..., then an optional namespaces/<namespace>
+    parts = parts[2:] if parts[0] == "api" else parts[3:]
+    if len(parts) > 2 and parts[0] == "namespaces":
+        parts = parts[2:]
+    if not parts:
+        return "get"
+    if len(parts) == 1:
+        return f"list {parts[0]}"
+    return f"get {parts[0]}" + (f"/{parts[2]}" if len(parts) > 2 else "")
+
+
+def _resolve_api_url() -> str:
+    if config.KUBE_API_URL:
+        return config.KUBE_API_URL
+    host = os.environ.get("KUBERNETES_SERVICE_HOST")
+    if host:
+        port = os.environ.get("KUBERNETES_SERVICE_PORT", "443")
+        return f"https://{host}:{port}"
+    # Fall back to a local `kubectl proxy`, which handles auth for us.
+    return "http://127.0.0.1:8001"
+
+
+class NativeBackend(ClusterBackend):
+    """
+    Backend that talks to the Kubernetes API server directly.
+
+    One requests.Session is created per backend instance and reused for every call, so
+    TCP connections, TLS sessions and auth headers are set up once and kept alive in a pool.
+    """
+
+    name = "native"
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        token: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.base_url = (base_url or _resolve_api_url()).rstrip("/")
+        self.timeout = timeout or config.KUBE_REQUEST_TIMEOUT
+        pool_size = pool_size or config.KUBE_POOL_SIZE
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if token is None and config.KUBE_TOKEN_FILE and os.path.exists(config.KUBE_TOKEN_FILE):
+            with open(config.KUBE_TOKEN_FILE) as f:
+                token = f.read().strip()
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+        if not config.KUBE_VERIFY_TLS:
+            self.session.verify = False
+        elif config.KUBE_CA_FILE and os.path.exists(config.KUBE_CA_FILE):
+            self.session.verify = config.KUBE_CA_FILE
+
+    def request(self, path: str, params: Optional[dict] = None, stream: bool = False,
+                timeout=None) -> requests.Response:
+        """
+        Issues a GET against the API server and raises ClusterCallError on failure.
+        timeout may be a number or a (connect, read) tuple; it defaults to KUBE_REQUEST_TIMEOUT.
+        Non-streamed requests are recorded in the cluster-call metrics; streamed ones are timed
+        by their reader, since the body is still being read when this returns.
+        """
+        if stream:
+            return self._get(path, params, stream, timeout)
+        with metrics.cluster_call(self.name, api_verb(path)) as call:
+            response = self._get(path, params, stream, timeout)
+            call.status = str(response.status_code)
+            return response
+
+    def _get(self, path: str, params: Optional[dict], stream: bool, timeout) -> requests.Response:
+        try:
+            response = self.session.get(
+                f"{self.base_url}{path}", params=params, stream=stream, timeout=timeout or self.timeout
+            )
+        except requests.RequestException as e:
+            raise ClusterCallError(f"Request to {path} failed: {e}")
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            response.close()
+            raise ClusterCallError(f"GET {path} failed ({response.status_code}): {message}", response.status_code)
+        return response
+
+    def get_json(self, path: str, params: Optional[dict] = None) -> dict:
+        return self.request(path, params=params).json()
+
+    def get_logs(self, pod_name, namespace, since_time, tail_lines):
+        params = {}
+        if since_time:
+            params["sinceSeconds"] = parse_duration(since_time)
+        if tail_lines is not None:
+            params["tailLines"] = tail_lines
+        return self.request(f"/api/v1/namespaces/{namespace}/pods/{pod_name}/log", params=params).text.strip()
+
+    def stream_logs(self, pod_name, namespace, since_time, tail_lines, follow=False):
+        params = {}
+        if since_time:
+            params["sinceSeconds"] = parse_duration(since_time)
+        if tail_lines is not None:
+            params["tailLines"] = tail_lines
+        if follow:
+            params["follow"] = "true"
+        return self._stream_log_lines(pod_name, namespace, params, follow)
+
+    def stream_log_records(self, pod_name, namespace, container=None, since=None, previous=False, tail_lines=None):
+        params = {"timestamps": "true"}
+        if container:
+            params["container"] = container
+        if since:
+            params["sinceTime"] = since
+        if previous:
+            params["previous"] = "true"
+        if tail_lines is not None:
+            params["tailLines"] = tail_lines
+        return self._stream_log_lines(pod_name, namespace, params, follow=False)
+
+    def _stream_log_lines(self, pod_name, namespace, params, follow):
+        # A followed log may stay quiet for a long time, so only the connect phase is timed.
+        timeout = (self.timeout, None) if follow else self.timeout
+        with metrics.cluster_call(self.name, "get pods/log") as call:
+            response = self.request(f"/api/v1/namespaces/{namespace}/pods/{pod_name}/log",
+                                    params=params, stream=True, timeout=timeout)
+            token = current_cancel_token.get()
+            if token is not None:
+                token.add_callback(lambda: abort_response(response))
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    yield line
+                call.status = str(response.status_code)
+            except requests.RequestException as e:
+                if token is None or not token.cancelled:
+                    raise ClusterCallError(f"Log stream for {namespace}/{pod_name} failed: {e}")
+                call.status = "cancelled"
+            finally:
+                response.close()
+
+    def get_pod(self, pod_name, namespace):
+        return self.get_json(f"/api/v1/namespaces/{namespace}/pods/{pod_name}")
+
+    def get_service(self, service_name, namespace):
+        return self.get_json(f"/api/v1/namespaces/{namespace}/services/{service_name}")
+
+    def list_events(self, namespace, field_selector=None, limit=None, continue_token=None):
+        return self.list_objects("events", namespace, field_selector, limit, continue_token)
+
+    def list_objects(self, resource, namespace=None, field_selector=None, limit=None, continue_token=None,
+                     label_selector=None):
+        return self.get_json(resource_path(resource, namespace),
+                             params=_list_query(field_selector, limit, continue_token, label_selector))
+
+    def get_object(self, resource, name, namespace=None):
+        return self.get_json(f"{resource_path(resource, namespace)}/{name}")
+
+    def server_version(self):
+        return self.get_json("/version")
+
+    def describe_pod(self, pod_name, namespace):
+        pod = self.get_pod(pod_name, namespace)
+        events = self.list_events(namespace, field_selector=f"involvedObject.name={pod_name}")
+        return render_pod_description(pod, events.get("items", []))
+
+    def get_service_info(self, service_name, namespace):
+        return render_object(self.get_service(service_name, namespace))
+
+    def close(self):
+        self.session.close()
+
+
+BACKENDS = {
+    KubectlBackend.name: KubectlBackend,
+    NativeBackend.name: NativeBackend,
+}
+
+
+def create_backend(name: Optional[str] = None) -> ClusterBackend:
+    """
+    Creates the backend selected by name (defaults to config.CLUSTER_BACKEND).
+    """
+    name = name or config.CLUSTER_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown cluster backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
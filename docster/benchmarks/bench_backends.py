@@ -0,0 +1,68 @@
+# bench_backends.py
+
+"""
+Compares the "kubectl" and "native" cluster backends against a local FakeKubeAPI.
+
+The kubectl backend runs fake_kubectl.py, so each call pays for a process start and a fresh
+HTTP connection just like real kubectl. The native backend reuses one pooled session.
+
+Usage:
+    python benchmarks/bench_backends.py [--iterations 50] [--delay 0.0]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from fakes import FakeKubeAPI, fake_kubectl_path
+
+import config
+from backends import KubectlBackend, NativeBackend
+
+
+def measure(func, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated API server latency in seconds")
+    args = parser.parse_args()
+
+    api = FakeKubeAPI(delay=args.delay).start()
+    os.environ["FAKE_KUBE_API"] = api.url
+    config.KUBE_TOKEN_FILE = None
+
+    backends = [KubectlBackend(binary=fake_kubectl_path()), NativeBackend(base_url=api.url)]
+    operations = {
+        "get_logs": lambda b: b.get_logs("backend-pod-0", "default", "5m", 100),
+        "describe_pod": lambda b: b.describe_pod("backend-pod-0", "default"),
+        "list_events": lambda b: b.list_events("default", limit=100),
+        "get_service_info": lambda b: b.get_service_info("svc-0", "default"),
+    }
+
+    print(f"{'operation':<18}{'backend':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for op_name, op in operations.items():
+        for backend in backends:
+            stats = measure(lambda: op(backend), args.iterations)
+            print(f"{op_name:<18}{backend.name:<10}{stats['mean_ms']:>10.2f}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}")
+
+    for backend in backends:
+        backend.close()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
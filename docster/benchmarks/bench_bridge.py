@@ -0,0 +1,279 @@
+# bench_bridge.py
+
+"""
+Load and latency benchmark for the whole bridge.
+
+Starts main.app in a child process against fake_kubectl.py (backed by a FakeKubeAPI whose output
+size and latency are set on the command line) and a FakeOllama. Then drives each /api endpoint,
+and a scripted chat_terminal diagnosis turn, at each concurrency level. For each
+(scenario, concurrency) pair it reports:
+    - throughput,
+    - mean/p50/p95/p99/max latency,
+    - errors,
+    - requests that reached the (fake) API server,
+    - the bridge's current and peak RSS (summed over its workers).
+
+Results can be saved as JSON (--output) and compared with an earlier run (--compare), so changes
+to kubectl_utils/handler can be measured before and after.
+
+--workers N runs the production mode (python main.py --workers N) instead of a single uvicorn
+process. To compare it with the single-process setup:
+    python benchmarks/bench_bridge.py --cached --output single.json
+    python benchmarks/bench_bridge.py --cached --workers 4 --compare single.json
+
+Chat turns run in worker processes, one per concurrent user, since chat_terminal keeps its
+conversation in module state. Each turn starts with an empty conversation. chat_turn asks about a
+different pod each turn with the diagnosis cache off; chat_repeat asks the same question every
+turn with the cache in a temporary directory, so after the warm-up its turns reuse the diagnosis.
+
+Usage:
+    python benchmarks/bench_bridge.py [--concurrency 1 4 16] [--requests 100] [--backend kubectl]
+        [--delay 0.0] [--log-lines 2000] [--log-line-bytes 120] [--scenarios describe_pod chat_turn]
+        [--workers 4] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+from fakes import DOCSTER_DIR, BridgeProcess, FakeKubeAPI, FakeOllama, fake_kubectl_path
+
+
+def _logs(**params):
+    def run(session, api, i, opts):
+        response = session.get(f"{api}/get-logs", params=dict(
+            pod_name=f"backend-pod-{i % opts.pods}", tail_lines=opts.log_lines, since_time="1h", **params), stream=True)
+        for _ in response.iter_content(65536):
+            pass
+        return response.status_code
+    return run
+
+
+def _get(path, **params):
+    def run(session, api, i, opts):
+        query = {key: value.format(i=i % opts.pods) for key, value in params.items()}
+        if not opts.cached:
+            query["fresh"] = "true"
+        return session.get(f"{api}{path}", params=query).status_code
+    return run
+
+
+def _batch(session, api, i, opts):
+    pod = f"backend-pod-{i % opts.pods}"
+    calls = [
+        {"name": "describe_pod_api", "arguments": {"pod_name": pod, "fresh": not opts.cached}},
+        {"name": "get_events_api", "arguments": {"event_type": "Warning", "fresh": not opts.cached}},
+        {"name": "get_service_info_api", "arguments": {"service_name": f"svc-{i % opts.pods}", "fresh": not opts.cached}},
+        {"name": "get_logs_api", "arguments": {"pod_name": pod, "tail_lines": opts.log_lines, "compact": True}},
+    ]
+    response = session.post(f"{api}/batch", json=[{"function_call": call} for call in calls])
+    if response.status_code == 200 and any(r["error"] for r in response.json()["results"]):
+        return 500
+    return response.status_code
+
+
+# name -> request function(session, api base url, request index, options) -> HTTP status
+HTTP_SCENARIOS = {
+    "logs_ndjson": _logs(),
+    "logs_json": _logs(format="json"),
+    "logs_compact": _logs(compact="true"),
+    "describe_pod": _get("/describe-pod", pod_name="backend-pod-{i}"),
+    "get_events": _get("/get-events", event_type="Warning"),
+    "get_svc": _get("/get-svc", service_name="svc-{i}"),
+    "batch": _batch,
+}
+SCENARIOS = list(HTTP_SCENARIOS) + ["chat_turn", "chat_repeat"]
+
+
+def percentile(samples: list, fraction: float) -> float:
+    # Nearest-rank percentile of sorted samples.
+    return samples[min(len(samples) - 1, max(0, int(round(fraction * len(samples) + 0.5)) - 1))]
+
+
+def run_http(scenario, api: str, concurrency: int, total: int, opts) -> tuple:
+    local = threading.local()
+
+    def one(i):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            status = scenario(local.session, api, i, opts)
+        except requests.RequestException:
+            status = None
+        return (time.perf_counter() - start) * 1000, status == 200
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        for _ in pool.map(one, range(concurrency)):  # Warm-up: connections, imports, first kubectl runs
+            pass
+        start = time.perf_counter()
+        outcomes = list(pool.map(one, range(total)))
+    return outcomes, time.perf_counter() - start
+
+
+_chat_question = None
+
+
+def _chat_worker_init(api: str, ollama_url: str, question: str, cache_dir: str) -> None:
+    global _chat_question
+    import chat_terminal
+    from diagnosis_cache import DiagnosisCache
+
+    chat_terminal.BRIDGE_BASE_URL = api
+    chat_terminal.llm_config.update(base_url=ollama_url, stream=True)
+    chat_terminal.diagnosis_cache = DiagnosisCache(cache_dir) if cache_dir else None
+    _chat_question = question
+
+
+def _chat_turn(i: int) -> tuple:
+    import chat_terminal
+
+    chat_terminal.conversation.clear()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        reply = chat_terminal.process_llm_response(_chat_question.format(i=i))
+    return (time.perf_counter() - start) * 1000, bool(reply) and not reply.startswith("Error")
+
+
+def run_chat(api: str, ollama_url: str, concurrency: int, total: int, repeat: bool = False) -> tuple:
+    # repeat: the same question every turn, with a diagnosis cache shared by the workers.
+    cache_dir = tempfile.mkdtemp(prefix="bench-diagnoses-") if repeat else None
+    question = "Why is backend-pod-0 failing?" if repeat else "Why is backend-pod-{i} failing?"
+    try:
+        with ProcessPoolExecutor(concurrency, initializer=_chat_worker_init,
+                                 initargs=(api, ollama_url, question, cache_dir)) as pool:
+            list(pool.map(_chat_turn, range(concurrency)))
+            start = time.perf_counter()
+            outcomes = list(pool.map(_chat_turn, range(total)))
+    finally:
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    return outcomes, time.perf_counter() - start
+
+
+def summarize(name: str, concurrency: int, outcomes: list, elapsed: float, memory: dict,
+              cluster_requests: int) -> dict:
+    latencies = sorted(ms for ms, _ in outcomes)
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(outcomes),
+        "errors": sum(1 for _, ok in outcomes if not ok),
+        "throughput_rps": round(len(outcomes) / elapsed, 2),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2),
+        "cluster_requests": cluster_requests,
+        "bridge_rss_kb": memory.get("rss_kb"),
+        "bridge_peak_rss_kb": memory.get("peak_rss_kb"),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DOCSTER_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _kb(value) -> str:
+    return "-" if value is None else f"{value / 1024:.0f}M"
+
+
+def print_row(row: dict, baseline: dict = None) -> None:
+    line = (f"{row['scenario']:<14}{row['concurrency']:>5}{row['throughput_rps']:>9.1f}{row['p50_ms']:>9.1f}"
+            f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['errors']:>6}{row['cluster_requests']:>8}"
+            f"{_kb(row['bridge_peak_rss_kb']):>7}")
+    if baseline:
+        def change(key):
+            return f"{(row[key] - baseline[key]) / baseline[key] * 100:+.0f}%" if baseline[key] else "-"
+        line += f"   vs baseline: rps {change('throughput_rps')}, p50 {change('p50_ms')}, p95 {change('p95_ms')}"
+    print(line, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests per scenario and level")
+    parser.add_argument("--chat-requests", type=int, default=20, help="Measured chat turns per level")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--backend", choices=["kubectl", "native"], default="kubectl")
+    parser.add_argument("--pods", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated API server latency per request (s)")
+    parser.add_argument("--log-lines", type=int, default=2000, help="Log lines returned per pod")
+    parser.add_argument("--log-line-bytes", type=int, default=120, help="Approximate size of each log line")
+    parser.add_argument("--cached", action="store_true", help="Allow the result cache (default: fresh=true)")
+    parser.add_argument("--llm-ttft", type=float, default=0.05)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--workers", type=int, help="Run the bridge in production mode with this many workers")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier --output file to compare against")
+    opts = parser.parse_args()
+
+    api = FakeKubeAPI(pods=opts.pods, delay=opts.delay, log_lines=opts.log_lines,
+                      log_line_bytes=opts.log_line_bytes).start()
+    ollama = FakeOllama(ttft=opts.llm_ttft, tokens_per_second=opts.llm_tokens_per_second).start()
+    bridge = BridgeProcess(overrides={"CLUSTER_BACKEND": opts.backend, "KUBECTL_BINARY": fake_kubectl_path(),
+                                      "KUBE_API_URL": api.url, "KUBE_TOKEN_FILE": None},
+                           env={"FAKE_KUBE_API": api.url}, workers=opts.workers).start()
+    base = f"{bridge.url}/api"
+
+    baseline = {}
+    if opts.compare:
+        with open(opts.compare) as f:
+            baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    print(f"bridge pid {bridge.process.pid}, backend={opts.backend}, workers={opts.workers or 'single process'}, "
+          f"start RSS {_kb(bridge.memory().get('rss_kb'))}")
+    print(f"{'scenario':<14}{'conc':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errs':>6}"
+          f"{'cluster':>8}{'peak':>7}")
+    results = []
+    try:
+        for name in opts.scenarios:
+            for concurrency in opts.concurrency:
+                served = api.requests_served
+                if name in ("chat_turn", "chat_repeat"):
+                    outcomes, elapsed = run_chat(base, ollama.url, concurrency, opts.chat_requests,
+                                                 repeat=name == "chat_repeat")
+                else:
+                    outcomes, elapsed = run_http(HTTP_SCENARIOS[name], base, concurrency, opts.requests, opts)
+                row = summarize(name, concurrency, outcomes, elapsed, bridge.memory(), api.requests_served - served)
+                results.append(row)
+                print_row(row, baseline.get((name, concurrency)))
+    finally:
+        bridge.stop()
+        ollama.stop()
+        api.stop()
+
+    if opts.output:
+        meta = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "options": {key: value for key, value in vars(opts).items() if key not in ("output", "compare")},
+        }
+        with open(opts.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"results written to {opts.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# bench_cluster_summary.py
+
+"""
+Measures /api/cluster-summary against a FakeKubeAPI with a share of broken objects.
+
+Reports:
+    - live summary latency (nodes, pods, deployments and Warning events listed concurrently),
+      for the kubectl and native backends,
+    - the summary's size next to the raw lists it replaces (what an LLM would otherwise read),
+    - summary latency from the informer-maintained health state, and how long a pod change
+      takes to show up in it.
+
+Usage:
+    python benchmarks/bench_cluster_summary.py [--pods 2000] [--nodes 50] [--broken 0.05] [--delay 0.02]
+"""
+
+import argparse
+import copy
+import json
+import os
+import statistics
+import time
+
+import requests
+
+from fakes import BridgeServer, FakeKubeAPI, fake_kubectl_path, make_deployment, make_event, make_node
+
+import config
+import informer
+import kubectl_utils
+from handler import SUMMARY_LISTS
+
+
+def break_objects(api: FakeKubeAPI, share: float) -> None:
+    # Crash-looping, pending, OOM-killed and failed pods; a NotReady node; a degraded deployment.
+    pods = sorted(api.stores["pods"])
+    for i, key in enumerate(pods[:max(1, int(len(pods) * share))]):
+        pod = copy.deepcopy(api.stores["pods"][key])
+        status = pod["status"]
+        container = status["containerStatuses"][0]
+        if i % 4 == 0:
+            container.update(restartCount=12, ready=False, state={"waiting": {"reason": "CrashLoopBackOff"}},
+                             lastState={"terminated": {"exitCode": 1, "reason": "Error"}})
+            pod["metadata"]["ownerReferences"] = [{"kind": "ReplicaSet", "name": "backend-7d9f8"}]
+        elif i % 4 == 1:
+            status.update(phase="Pending", conditions=[{"type": "PodScheduled", "status": "False",
+                                                        "reason": "Unschedulable",
+                                                        "message": "0/50 nodes are available: insufficient memory."}])
+            pod["metadata"]["creationTimestamp"] = "2020-01-01T00:00:00Z"
+        elif i % 4 == 2:
+            container.update(restartCount=4, lastState={"terminated": {"exitCode": 137, "reason": "OOMKilled"}})
+        else:
+            status.update(phase="Failed", reason="Evicted")
+        api.upsert("pods", pod)
+        api.upsert("events", make_event(100000 + i, key[1], key[0], event_type="Warning", reason="BackOff"))
+    api.upsert("nodes", make_node("node-1", ready=False))
+    api.upsert("deployments", make_deployment("backend", replicas=len(pods), available=len(pods) // 2))
+
+
+def timed_gets(session, url, params, count) -> float:
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        session.get(url, params=params).raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def raw_size(api: FakeKubeAPI) -> int:
+    total = 0
+    for resource, selector in SUMMARY_LISTS.items():
+        items = api.stores[resource].values()
+        if selector:
+            items = [obj for obj in items if obj.get("type") == "Warning"]
+        total += len(json.dumps(list(items)))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pods", type=int, default=2000)
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--broken", type=float, default=0.05, help="Share of pods made unhealthy")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.02, help="Simulated API server latency in seconds")
+    args = parser.parse_args()
+
+    api = FakeKubeAPI(pods=args.pods, nodes=args.nodes, events_per_pod=1).start()
+    break_objects(api, args.broken)
+    api.delay = args.delay
+    config.KUBECTL_BINARY = fake_kubectl_path()
+    config.KUBE_API_URL = api.url
+    config.KUBE_TOKEN_FILE = None
+    os.environ["FAKE_KUBE_API"] = api.url
+    bridge = BridgeServer().start()
+    session = requests.Session()
+    url = f"{bridge.url}/api/cluster-summary"
+
+    for backend in ("kubectl", "native"):
+        kubectl_utils.set_backend(backend)
+        live_ms = timed_gets(session, url, {"fresh": "true"}, args.requests)
+        print(f"live summary p50 ({backend}): {live_ms:.1f} ms")
+
+    summary = session.get(url, params={"fresh": "true"}).json()
+    print(f"summary: {len(json.dumps(summary))} bytes JSON, {len(summary['text'])} chars of text "
+          f"vs {raw_size(api)} bytes of raw lists")
+    print(summary["text"])
+
+    config.INFORMER_ENABLED = True
+    informers = informer.start_informers()
+    for inf in informers.values():
+        inf.wait_for_sync(60)
+    cached_ms = timed_gets(session, url, {}, args.requests * 10)
+    print(f"informer summary p50: {cached_ms:.2f} ms (version {session.get(url).json()['version']})")
+
+    pod = copy.deepcopy(api.stores["pods"][("default", "backend-pod-0")])
+    pod["status"]["containerStatuses"][0].update(state={"waiting": {"reason": "ImagePullBackOff"}})
+    pod["metadata"]["name"] = "canary-pod"
+    version = session.get(url).json()["version"]
+    start = time.perf_counter()
+    api.upsert("pods", pod)
+    while session.get(url).json()["version"] == version:
+        time.sleep(0.002)
+    visible_ms = (time.perf_counter() - start) * 1000
+    listed = any(entry["name"] == "canary-pod" for entry in session.get(url).json()["unhealthy"])
+    print(f"pod change visible in the summary after {visible_ms:.1f} ms (listed: {listed})")
+
+    informer.stop_informers()
+    bridge.stop()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
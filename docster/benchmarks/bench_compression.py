@@ -0,0 +1,156 @@
+# bench_compression.py
+
+"""
+Measures what response compression, the fast JSON path and field projection save on the bridge,
+against a FakeKubeAPI holding a realistically sized pod (several containers, managedFields,
+last-applied annotation, many events) and service.
+
+Reports:
+    - bytes on the wire per endpoint for identity, gzip and (if 'zstandard' is installed) zstd,
+      with and without fields=... on /describe-pod and /get-svc,
+    - serialization time of a large LogResponse the old way (jsonable_encoder + json.dumps, what
+      FastAPI does for a route without a response model) and through the response model
+      (pydantic's JSON serializer), and of one streamed chunk with json.dumps and pydantic_core.to_json,
+    - the time gzip/zstd add per MB of response.
+
+Usage:
+    python benchmarks/bench_compression.py [--lines 5000] [--events 60] [--repeat 50]
+"""
+
+import argparse
+import json
+import time
+import zlib
+
+import requests
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from fakes import BridgeServer, FakeKubeAPI, make_event, make_pod, make_service
+
+import compression
+import config
+import kubectl_utils
+from models import LogChunk, LogResponse
+
+ENCODINGS = ["identity", "gzip"] + (["zstd"] if compression.zstandard is not None else [])
+
+
+def large_pod(name):
+    containers = ("app", "sidecar-proxy", "log-shipper", "metrics")
+    pod = make_pod(name, containers=containers, restarts=4)
+    for container in pod["spec"]["containers"]:
+        container.update(
+            env=[{"name": f"SETTING_{i}", "value": f"value-{i}"} for i in range(25)],
+            resources={"requests": {"cpu": "250m", "memory": "256Mi"}, "limits": {"cpu": "1", "memory": "1Gi"}},
+            volumeMounts=[{"name": f"vol-{i}", "mountPath": f"/mnt/vol-{i}", "readOnly": True} for i in range(6)],
+            livenessProbe={"httpGet": {"path": "/healthz", "port": 8080}, "periodSeconds": 10},
+        )
+    pod["spec"]["volumes"] = [{"name": f"vol-{i}", "configMap": {"name": f"config-{i}"}} for i in range(6)]
+    pod["metadata"]["annotations"] = {f"example.com/annotation-{i}": "x" * 40 for i in range(10)}
+    pod["metadata"]["managedFields"] = [{"manager": "kubectl", "operation": "Update",
+                                         "fieldsV1": {f"f:field-{i}": {} for i in range(200)}}]
+    status = pod["status"]["containerStatuses"][0]
+    status["state"] = {"waiting": {"reason": "CrashLoopBackOff", "message": "back-off 5m0s restarting failed container"}}
+    status["lastState"] = {"terminated": {"reason": "Error", "exitCode": 1, "startedAt": "2024-01-01T00:00:00Z"}}
+    return pod
+
+
+def large_service(name):
+    service = make_service(name)
+    service["spec"]["ports"] = [{"name": f"port-{i}", "port": 8000 + i, "targetPort": 9000 + i, "protocol": "TCP"}
+                                for i in range(12)]
+    service["metadata"]["annotations"] = {
+        "kubectl.kubernetes.io/last-applied-configuration": json.dumps(service),
+        **{f"example.com/annotation-{i}": "y" * 60 for i in range(10)},
+    }
+    service["metadata"]["managedFields"] = [{"manager": "kubectl", "operation": "Update",
+                                             "fieldsV1": {f"f:field-{i}": {} for i in range(200)}}]
+    return service
+
+
+def wire_bytes(session, url, params, encoding):
+    response = session.get(url, params=params, headers={"Accept-Encoding": encoding}, stream=True)
+    response.raise_for_status()
+    raw = response.raw.read(decode_content=False)
+    return len(raw), response.headers.get("content-encoding", "identity")
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=5000, help="Log lines per response")
+    parser.add_argument("--events", type=int, default=60, help="Events of the described pod")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    api = FakeKubeAPI(pods=0).start()
+    api.upsert("pods", large_pod("web-0"))
+    api.upsert("services", large_service("web"))
+    for i in range(args.events):
+        api.upsert("events", make_event(i, "web-0", event_type="Warning" if i % 2 else "Normal",
+                                        reason="BackOff" if i % 2 else "Pulled"))
+    api.log_lines = args.lines
+    config.KUBE_API_URL = api.url
+    config.KUBE_TOKEN_FILE = None
+    kubectl_utils.set_backend("native")
+    bridge = BridgeServer().start()
+    session = requests.Session()
+
+    cases = {
+        "/describe-pod": ("describe-pod", {"pod_name": "web-0"}),
+        "/describe-pod fields": ("describe-pod", {"pod_name": "web-0", "fields": "status.phase,containers.state,events"}),
+        "/get-svc": ("get-svc", {"service_name": "web"}),
+        "/get-svc fields": ("get-svc", {"service_name": "web", "fields": "ports,selector,type"}),
+        "/get-logs json": ("get-logs", {"pod_name": "web-0", "tail_lines": args.lines, "since_time": "24h",
+                                        "format": "json"}),
+        "/get-logs ndjson": ("get-logs", {"pod_name": "web-0", "tail_lines": args.lines, "since_time": "24h"}),
+        "/cluster-summary": ("cluster-summary", {}),
+    }
+    print("bytes on the wire: " + "  ".join(f"{encoding:>10}" for encoding in ENCODINGS))
+    for name, (path, params) in cases.items():
+        sizes = []
+        for encoding in ENCODINGS:
+            size, sent = wire_bytes(session, f"{bridge.url}/api/{path}", params, encoding)
+            sizes.append(f"{size:>10}" + ("" if sent == encoding else f" ({sent})"))
+        print(f"{name:<22}  " + "  ".join(sizes))
+
+    lines = [f"2024-01-01T00:00:{i % 60:02d}.{i:06d}Z INFO GET /api/v1/items/{i} status=200 latency={i % 97}ms"
+             for i in range(args.lines)]
+    chunks = [LogChunk(chunk_index=i, lines=lines[start:start + config.LOG_CHUNK_SIZE])
+              for i, start in enumerate(range(0, len(lines), config.LOG_CHUNK_SIZE))]
+    model = LogResponse(pod_name="web-0", namespace="default", logs=chunks, metadata={"total_chunks": len(chunks)})
+    adapter = TypeAdapter(LogResponse)
+    old = best_time(lambda: json.dumps(jsonable_encoder(model), ensure_ascii=False, separators=(",", ":")).encode(),
+                    args.repeat)
+    new = best_time(lambda: adapter.dump_json(model), args.repeat)
+    print(f"LogResponse of {args.lines} lines: jsonable_encoder + json.dumps {old:.2f} ms, "
+          f"response model {new:.2f} ms ({old / new:.1f}x)")
+    record = chunks[0].model_dump()
+    old = best_time(lambda: json.dumps(record), args.repeat * 10)
+    new = best_time(lambda: to_json(record), args.repeat * 10)
+    print(f"one streamed chunk of {len(record['lines'])} lines: json.dumps {old * 1000:.0f} us, "
+          f"to_json {new * 1000:.0f} us ({old / new:.1f}x)")
+
+    body = adapter.dump_json(model)
+    for encoding in ENCODINGS[1:]:
+        level = config.COMPRESSION_LEVELS[encoding]
+        compress = (lambda: zlib.compress(body, level)) if encoding == "gzip" else \
+            (lambda: compression.zstandard.ZstdCompressor(level=level).compress(body))
+        print(f"{encoding} level {level}: {best_time(compress, 10) / (len(body) / 1e6):.1f} ms per MB")
+
+    bridge.stop()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
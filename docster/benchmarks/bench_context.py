@@ -0,0 +1,78 @@
+# bench_context.py
+
+"""
+Prompt size and time to first token over a long chat session, unbounded history vs. token-budgeted.
+
+Each simulated turn pastes a large /logs output into the conversation and then asks the LLM a
+question, as a user working through an incident would. "unbounded" keeps everything inline (the old
+behaviour); "budgeted" uses the chat client's ConversationContext settings. FakeOllama charges
+prompt evaluation only for tokens outside the prefix shared with the previous request, like
+Ollama's KV cache.
+
+Usage:
+    python benchmarks/bench_context.py [--turns 20] [--log-lines 400] [--prefill 4000]
+"""
+
+import argparse
+import time
+
+from fakes import FakeOllama
+
+import chat_terminal
+from conversation import ConversationContext
+
+
+def log_dump(turn: int, lines: int) -> str:
+    return "\n".join(f"2026-01-01T00:{turn:02d}:{i % 60:02d}Z ERROR backend-pod-{turn} request {i} failed: "
+                     f"upstream connect error or disconnect/reset before headers" for i in range(lines))
+
+
+def run_session(ollama: FakeOllama, context: ConversationContext, turns: int, log_lines: int) -> list:
+    chat_terminal.conversation = context
+    rows = []
+    for turn in range(1, turns + 1):
+        context.add("user", f"/logs backend-pod-{turn}")
+        context.add("assistant", log_dump(turn, log_lines))
+        prompt = f"Why is backend-pod-{turn} failing?"
+        start = time.perf_counter()
+        sent = sum(len(m["content"]) for m in context.messages(prompt)) // 4
+        build_ms = (time.perf_counter() - start) * 1000
+        reply = chat_terminal.call_llm(prompt)
+        context.add("user", prompt)
+        context.add("assistant", reply)
+        rows.append({"turn": turn, "sent_tokens": sent, "evaluated_tokens": ollama.prompt_evals[-1],
+                     "ttft_ms": chat_terminal.llm_call_stats[-1]["ttft_ms"], "build_ms": build_ms})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--log-lines", type=int, default=400)
+    parser.add_argument("--prefill", type=float, default=4000.0, help="Prompt evaluation rate in tokens/sec")
+    args = parser.parse_args()
+
+    ollama = FakeOllama(reply=lambda prompt: "The upstream service is refusing connections.", ttft=0.01,
+                        tokens_per_second=1000.0, prefill_tokens_per_second=args.prefill).start()
+    chat_terminal.llm_config.update(base_url=ollama.url, stream=True)
+    config = chat_terminal.llm_config
+    sessions = {
+        "unbounded": ConversationContext(chat_terminal.system_message, token_budget=10 ** 9,
+                                         inline_output_tokens=10 ** 9),
+        "budgeted": ConversationContext(chat_terminal.system_message, token_budget=config["history_token_budget"],
+                                        inline_output_tokens=config["inline_output_tokens"]),
+    }
+
+    print(f"{'session':<11}{'turn':>5}{'sent tokens':>13}{'evaluated':>11}{'ttft ms':>10}{'build ms':>10}")
+    for name, context in sessions.items():
+        ollama._kv = ""  # Each session starts with a cold KV cache
+        for row in run_session(ollama, context, args.turns, args.log_lines):
+            if row["turn"] in (1, 2, 5, 10, args.turns):
+                print(f"{name:<11}{row['turn']:>5}{row['sent_tokens']:>13}{row['evaluated_tokens']:>11}"
+                      f"{row['ttft_ms']:>10.1f}{row['build_ms']:>10.2f}")
+        print(f"{name:<11} final: {context.stats()}")
+    ollama.stop()
+
+
+if __name__ == "__main__":
+    main()
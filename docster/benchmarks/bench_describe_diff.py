@@ -0,0 +1,80 @@
+# bench_describe_diff.py
+
+"""
+Payload and prompt tokens of repeated describes in one chat session, whole objects vs. changes.
+
+A pod with --events events is described --followups + 1 times, as a user asking "is it still
+failing?" would. Between describes its container restarts every --change-every follow-ups and gains
+a BackOff event. "full" is /describe-pod as before; "diff" passes diff=true with a session id
+(object_diff.py). Tokens are estimated as the chat client does (conversation.estimate_tokens).
+
+Usage:
+    python benchmarks/bench_describe_diff.py [--events 40] [--followups 10] [--change-every 3]
+"""
+
+import argparse
+import copy
+
+import requests
+
+from fakes import BridgeServer, FakeKubeAPI, make_event
+
+import config
+import kubectl_utils
+from conversation import estimate_tokens
+
+POD = "backend-pod-0"
+
+
+def restart(api: FakeKubeAPI, index: int) -> None:
+    pod = copy.deepcopy(api.stores["pods"][("default", POD)])
+    status = pod["status"]["containerStatuses"][0]
+    status["restartCount"] += 1
+    status["state"] = {"waiting": {"reason": "CrashLoopBackOff"}}
+    api.upsert("pods", pod)
+    api.upsert("events", make_event(1000 + index, POD, event_type="Warning", reason="BackOff"))
+
+
+def run(bridge: BridgeServer, api: FakeKubeAPI, followups: int, change_every: int, diff: bool) -> list:
+    rows = []
+    for i in range(followups + 1):
+        if i and i % change_every == 0:
+            restart(api, i)
+        params = {"pod_name": POD, "fresh": "true"}
+        if diff:
+            params["diff"] = "true"
+        response = requests.get(f"{bridge.url}/api/describe-pod", params=params,
+                                headers={config.SESSION_HEADER: "bench"}, timeout=30)
+        response.raise_for_status()
+        rows.append((len(response.content), estimate_tokens(response.json()["description"])))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=40, help="Events about the pod")
+    parser.add_argument("--followups", type=int, default=10)
+    parser.add_argument("--change-every", type=int, default=3, help="Follow-ups between container restarts")
+    args = parser.parse_args()
+
+    config.CACHE_TTLS = {}
+    config.COMPRESSION_ENABLED = False  # Compare payloads as the chat client's prompt sees them
+    results = {}
+    for mode in ("full", "diff"):
+        api = FakeKubeAPI(pods=1, events_per_pod=args.events).start()
+        config.KUBE_API_URL = api.url
+        config.KUBE_TOKEN_FILE = None
+        kubectl_utils.set_backend("native")
+        bridge = BridgeServer().start()
+        results[mode] = run(bridge, api, args.followups, args.change_every, diff=mode == "diff")
+        bridge.stop()
+        api.stop()
+
+    print(f"{'mode':<6}{'first bytes':>13}{'follow-up bytes':>17}{'follow-up tokens':>18}")
+    for mode, rows in results.items():
+        followups = rows[1:]
+        print(f"{mode:<6}{rows[0][0]:>13}{sum(b for b, _ in followups):>17}{sum(t for _, t in followups):>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# bench_event_stream.py
+
+"""
+Measures event delivery through /api/subscribe-events against a FakeKubeAPI.
+
+Opens N subscribers, then writes events to the fake API server: new events, repeats (count + 1)
+and no-op updates that only change the resourceVersion. Then ends the upstream watch with 410 Gone,
+which forces a relist. Reports:
+    - delivery latency from the API write to each subscriber (p50/p95/max),
+    - deltas delivered vs expected, duplicates and no-op updates that leaked through,
+    - upstream watch connections opened for all subscribers together,
+    - bytes received per subscriber vs re-polling /get-events every --poll-interval seconds.
+
+Usage:
+    python benchmarks/bench_event_stream.py [--subscribers 20] [--events 200] [--rate 100]
+"""
+
+import argparse
+import copy
+import json
+import statistics
+import threading
+import time
+
+import requests
+
+from fakes import BridgeServer, FakeKubeAPI, make_event
+
+import config
+import kubectl_utils
+from backends import abort_response
+
+
+class Subscriber(threading.Thread):
+    def __init__(self, url: str):
+        super().__init__(daemon=True)
+        self.url = url
+        self.ready = threading.Event()
+        self.received = []  # (arrival perf_counter, uid, count)
+        self.bytes = 0
+        self.response = None
+        self.stopping = False
+
+    def run(self):
+        try:
+            self._read()
+        except Exception:
+            if not self.stopping:
+                raise
+
+    def stop(self):
+        self.stopping = True
+        if self.response is not None:
+            abort_response(self.response)
+
+    def _read(self):
+        with requests.get(self.url, params={"all_namespaces": "true"}, stream=True) as self.response:
+            for line in self.response.iter_lines(decode_unicode=True):
+                self.bytes += len(line) + 1
+                if line.startswith("event: ready"):
+                    self.ready.set()
+                elif line.startswith("data:") and self.ready.is_set():
+                    data = json.loads(line[5:])
+                    if "event" in data:
+                        event = data["event"]
+                        self.received.append((time.perf_counter(), event["uid"], event["count"]))
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=20)
+    parser.add_argument("--events", type=int, default=200, help="Event writes (new, repeated or no-op)")
+    parser.add_argument("--rate", type=float, default=100.0, help="Event writes per second")
+    parser.add_argument("--pods", type=int, default=50)
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="Interval of the polling it replaces")
+    args = parser.parse_args()
+
+    api = FakeKubeAPI(pods=args.pods).start()
+    config.KUBE_API_URL = api.url
+    config.KUBE_TOKEN_FILE = None
+    kubectl_utils.set_backend("native")
+    bridge = BridgeServer().start()
+    url = f"{bridge.url}/api/subscribe-events"
+
+    subscribers = [Subscriber(url) for _ in range(args.subscribers)]
+    for subscriber in subscribers:
+        subscriber.start()
+    for subscriber in subscribers:
+        subscriber.ready.wait(10)
+    time.sleep(0.5)  # Let the hub's informer finish its first list
+    watches_before = api.watch_requests
+
+    written = {}  # (uid, count) -> write time
+    noops = 0
+    events = []
+    for i in range(args.events):
+        if i % 5 == 3 and events:
+            event = copy.deepcopy(events[i % len(events)])
+            api.upsert("events", event)  # Same content, new resourceVersion: must not be delivered
+            noops += 1
+        elif i % 5 == 4 and events:
+            event = copy.deepcopy(events[i % len(events)])
+            event["count"] += 1
+            event["lastTimestamp"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            events[i % len(events)] = event
+            written[(event["metadata"]["uid"], event["count"])] = time.perf_counter()
+            api.upsert("events", event)
+        else:
+            event = make_event(10_000_000 + i, f"backend-pod-{i % args.pods}", event_type="Warning", reason="BackOff")
+            events.append(event)
+            written[(event["metadata"]["uid"], 1)] = time.perf_counter()
+            api.upsert("events", event)
+        time.sleep(1 / args.rate)
+
+    # Force a relist (410 Gone): the hub must deliver only the event written after it.
+    api.expire_watches()
+    time.sleep(0.5)
+    event = make_event(20_000_000, "backend-pod-0", event_type="Warning", reason="Relisted")
+    api.upsert("events", event)
+    written[(event["metadata"]["uid"], 1)] = time.perf_counter()
+    time.sleep(2.0)
+
+    latencies, duplicates, unexpected, missing = [], 0, 0, 0
+    for subscriber in subscribers:
+        seen = set()
+        for arrival, uid, count in subscriber.received:
+            key = (uid, count)
+            if key in seen:
+                duplicates += 1
+            elif key not in written:
+                unexpected += 1
+            else:
+                latencies.append((arrival - written[key]) * 1000)
+            seen.add(key)
+        missing += len(set(written) - seen)
+        subscriber.stop()
+    latencies.sort()
+    expected = len(written) * len(subscribers)
+    print(f"{len(subscribers)} subscribers, {args.events} writes ({noops} no-op updates) + relist")
+    print(f"delivered {len(latencies)}/{expected} deltas, missing {missing}, duplicates {duplicates}, "
+          f"unexpected {unexpected}")
+    if latencies:
+        print(f"delivery latency: p50 {percentile(latencies, 0.5):.1f} ms, p95 {percentile(latencies, 0.95):.1f} ms, "
+              f"max {latencies[-1]:.1f} ms")
+    print(f"upstream watch connections opened while streaming: {api.watch_requests - watches_before} "
+          f"(1, after the forced relist)")
+
+    duration = max(1.0, args.events / args.rate)
+    poll = requests.get(f"{bridge.url}/api/get-events", params={"namespace": "default", "fresh": "true"})
+    poll_bytes = len(poll.content) * max(1.0, duration / args.poll_interval)
+    stream_bytes = statistics.mean(subscriber.bytes for subscriber in subscribers)
+    print(f"bytes per subscriber: stream {stream_bytes:.0f}, polling every {args.poll_interval:.0f}s "
+          f"over {duration:.0f}s: {poll_bytes:.0f} (one poll returns {len(poll.content)} bytes)")
+
+    bridge.stop()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
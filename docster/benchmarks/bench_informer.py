@@ -0,0 +1,107 @@
+# bench_informer.py
+
+"""
+Exercises the informer cache against a FakeKubeAPI with watch support.
+
+Reports:
+    - /api/describe-pod latency served live vs. from the informer cache,
+    - how long a pod change takes to show up through the watch,
+    - how long recovery takes after the watch's resourceVersion is compacted (410 Gone -> relist).
+
+Usage:
+    python benchmarks/bench_informer.py [--pods 2000] [--requests 200] [--delay 0.02]
+"""
+
+import argparse
+import copy
+import statistics
+import time
+
+import requests
+
+from fakes import BridgeServer, FakeKubeAPI
+
+import config
+import informer
+import kubectl_utils
+
+
+def timed_gets(session, url, params, count) -> float:
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        session.get(url, params=params).raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def wait_for(predicate, timeout=10.0) -> float:
+    start = time.perf_counter()
+    while not predicate():
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError("change never became visible")
+        time.sleep(0.005)
+    return (time.perf_counter() - start) * 1000
+
+
+def restart_pod(api: FakeKubeAPI, name: str, restarts: int) -> None:
+    pod = copy.deepcopy(api.stores["pods"][("default", name)])
+    pod["status"]["containerStatuses"][0]["restartCount"] = restarts
+    api.upsert("pods", pod)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pods", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.02, help="Simulated API server latency in seconds")
+    args = parser.parse_args()
+
+    api = FakeKubeAPI(pods=args.pods, delay=0.0).start()
+    config.CLUSTER_BACKEND = "native"
+    config.KUBE_API_URL = api.url
+    config.KUBE_TOKEN_FILE = None
+    config.INFORMER_ENABLED = True
+    kubectl_utils.set_backend("native")
+    bridge = BridgeServer().start()
+    informers = informer.start_informers()  # already started by the bridge; returns the running set
+    for inf in informers.values():
+        inf.wait_for_sync(30)
+    print(f"synced {len(informers['pods'].store)} pods, {len(informers['events'].store)} events")
+
+    session = requests.Session()
+    url = f"{bridge.url}/api/describe-pod"
+    params = {"pod_name": "backend-pod-7", "namespace": "default"}
+    api.delay = args.delay  # only affects requests that reach the API server
+
+    cached_ms = timed_gets(session, url, params, args.requests)
+    informer.stop_informers()
+    live_ms = timed_gets(session, url, dict(params, fresh="true"), max(10, args.requests // 10))
+    print(f"describe-pod p50: live {live_ms:.2f} ms, cached {cached_ms:.2f} ms")
+
+    api.delay = 0.0
+    informers = informer.start_informers()
+    for inf in informers.values():
+        inf.wait_for_sync(30)
+    pods = informers["pods"]
+
+    def restart_count():
+        pod = pods.store.get("default", "backend-pod-7")
+        return pod["status"]["containerStatuses"][0]["restartCount"]
+
+    restart_pod(api, "backend-pod-7", 1)
+    print(f"watch propagation: {wait_for(lambda: restart_count() == 1):.1f} ms")
+
+    with api.lock:
+        restart_pod(api, "backend-pod-7", 2)
+        api.compact()
+    recovery_ms = wait_for(lambda: restart_count() == 2)
+    print(f"410 recovery (relist): {recovery_ms:.1f} ms, relists={pods.relists}")
+    print("freshness:", session.get(url, params=params).json()["freshness"])
+
+    bridge.stop()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# bench_llm_stream.py
+
+"""
+Time to first visible token for the chat client's LLM calls, streamed vs. not, against a FakeOllama.
+
+Also checks cancellation: a KeyboardInterrupt raised mid-generation (what Ctrl-C does) must return
+the partial text and drop the connection so the server stops generating.
+
+Usage:
+    python benchmarks/bench_llm_stream.py [--ttft 0.3] [--tokens-per-second 40]
+"""
+
+import argparse
+import time
+
+from fakes import DEFAULT_DIAGNOSIS, FakeOllama
+
+import chat_terminal
+
+
+def timed_call(prompt: str, stream: bool, on_token=None) -> dict:
+    chat_terminal.llm_config["stream"] = stream
+    shown = {}
+
+    def first_visible(token):
+        shown.setdefault("at", time.perf_counter())
+        if on_token:
+            on_token(token)
+
+    start = time.perf_counter()
+    text = chat_terminal.call_llm(prompt, on_token=first_visible)
+    end = time.perf_counter()
+    visible_at = shown.get("at", end)  # Without streaming nothing is shown until the reply is complete
+    return dict(chat_terminal.llm_call_stats[-1], visible_ms=round((visible_at - start) * 1000, 1),
+                chars=len(text), cancelled_text=text.endswith("[generation cancelled]"))
+
+
+def _num(value) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ttft", type=float, default=0.3, help="Simulated prompt evaluation time in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    args = parser.parse_args()
+
+    ollama = FakeOllama(reply=lambda prompt: DEFAULT_DIAGNOSIS, ttft=args.ttft,
+                        tokens_per_second=args.tokens_per_second).start()
+    chat_terminal.llm_config["base_url"] = ollama.url
+
+    print(f"{'mode':<10}{'first shown ms':>16}{'ttft ms':>10}{'tok/s':>8}{'tokens':>8}{'total ms':>10}")
+    for stream in (False, True):
+        stats = timed_call("Why is backend-pod-0 restarting?", stream)
+        print(f"{'stream' if stream else 'buffered':<10}{stats['visible_ms']:>16.1f}{_num(stats['ttft_ms']):>10}"
+              f"{_num(stats['tokens_per_sec']):>8}{stats['tokens']:>8}{stats['total_ms']:>10.1f}")
+
+    received = []
+
+    def interrupt_after_ten(token):
+        received.append(token)
+        if len(received) == 10:
+            raise KeyboardInterrupt
+
+    stats = timed_call("Why is backend-pod-0 restarting?", True, on_token=interrupt_after_ten)
+    deadline = time.monotonic() + 2.0
+    while ollama.disconnects == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)  # The server notices the closed connection on its next write
+    print(f"cancel after 10 tokens: returned in {stats['total_ms']:.1f} ms, partial text kept="
+          f"{stats['cancelled_text']}, server saw disconnect={ollama.disconnects == 1}")
+    ollama.stop()
+
+
+if __name__ == "__main__":
+    main()
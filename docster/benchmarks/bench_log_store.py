@@ -0,0 +1,130 @@
+# bench_log_store.py
+
+"""
+Measures the on-disk log store (/api/search-logs) against a FakeKubeAPI whose pods have logged
+one line every --log-interval seconds for the last --history seconds (every 97th line an ERROR).
+
+Reports:
+    - ingestion: lines and bytes stored per second for the first pass, and the cost of an
+      incremental pass (only lines newer than the stored ones are fetched),
+    - search latency through the bridge, for a word found in the index, a query the index cannot
+      narrow down (digits only), a label selector, and a short time window,
+    - the same question answered without the store: fetching every pod's log through /api/get-logs
+      and searching it on the client,
+    - retention: the store stays under LOG_STORE_MAX_BYTES while ingesting more than that.
+
+Usage:
+    python benchmarks/bench_log_store.py [--pods 50] [--history 600] [--log-interval 0.05] [--delay 0.01]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import requests
+
+from fakes import BridgeServer, FakeKubeAPI
+
+import config
+import kubectl_utils
+import log_store
+
+
+def timed_search(session, url, params, count):
+    samples, body = [], None
+    for _ in range(count):
+        start = time.perf_counter()
+        response = session.get(url, params=params)
+        response.raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+        body = response.json()
+    return statistics.median(samples), body
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pods", type=int, default=50)
+    parser.add_argument("--history", type=float, default=600, help="Seconds of log each pod has written")
+    parser.add_argument("--log-interval", type=float, default=0.05, help="Seconds between a pod's log lines")
+    parser.add_argument("--delay", type=float, default=0.01, help="Simulated API server latency in seconds")
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    api = FakeKubeAPI(pods=args.pods).start()
+    api.log_interval = args.log_interval
+    api.log_lines = int(args.history / args.log_interval)
+    api.log_epoch = time.time() - args.history
+    api.delay = args.delay
+    config.KUBE_API_URL = api.url
+    config.KUBE_TOKEN_FILE = None
+    kubectl_utils.set_backend("native")
+
+    root = tempfile.mkdtemp(prefix="log-store-")
+    config.LOG_STORE_DIR = root
+    config.LOG_STORE_INTERVAL = 3600  # After the first pass, passes are run below one at a time
+    bridge = BridgeServer().start()
+
+    start = time.perf_counter()
+    ingester = log_store.start_ingestion()
+    while ingester.passes == 0:
+        time.sleep(0.01)
+    first = time.perf_counter() - start
+    lines, stored = ingester.lines, log_store.get_store().stats()
+    print(f"first pass: {lines} lines from {args.pods} pods in {first:.2f} s ({lines / first:.0f} lines/s), "
+          f"{stored['bytes'] / 1e6:.1f} MB in {stored['segments']} segments, "
+          f"{directory_size(root) / 1e6:.1f} MB on disk with indexes")
+    time.sleep(1.0)
+    start = time.perf_counter()
+    added = ingester.ingest_once()
+    print(f"incremental pass after 1 s: {added} new lines in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    session = requests.Session()
+    url = f"{bridge.url}/api/search-logs"
+    queries = {
+        "indexed word": {"q": "upstream timeout", "limit": 1000},
+        "digits only": {"q": "=00000", "limit": 1000},
+        "label selector": {"q": "upstream timeout", "selector": "app=backend-pod", "limit": 1000},
+        "one pod, last 60s": {"q": "upstream timeout", "pod": "backend-pod-7", "since": "60s"},
+    }
+    for name, params in queries.items():
+        ms, body = timed_search(session, url, params, args.requests)
+        stats = body["stats"]
+        print(f"search {name:<18} p50 {ms:6.1f} ms: {len(body['matches'])} matches, "
+              f"{stats['blocks_read']} blocks / {stats['bytes_scanned'] / 1e3:.0f} KB read")
+
+    # Without the store: every pod's log through the bridge, searched on the client.
+    start = time.perf_counter()
+    fetched = 0
+    for i in range(args.pods):
+        response = session.get(f"{bridge.url}/api/get-logs", params={
+            "pod_name": f"backend-pod-{i}", "since_time": f"{int(args.history)}s", "tail_lines": api.log_lines,
+            "format": "json"})
+        fetched += len(response.content)
+    print(f"without the store: {args.pods} log fetches, {fetched / 1e6:.1f} MB, "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Retention: ingest into a store capped at a quarter of what the pods have written.
+    log_store.stop_ingestion()
+    bridge.stop()
+    capped_root = tempfile.mkdtemp(prefix="log-store-capped-")
+    cap = stored["bytes"] // 4
+    capped = log_store.LogStore(capped_root, segment_bytes=max(cap // 8, 65536), max_bytes=cap)
+    log_store.LogIngester(capped).ingest_once()
+    print(f"retention: {capped.size / 1e6:.2f} MB kept (cap {cap / 1e6:.2f} MB), "
+          f"{capped.deleted_segments} segments deleted, {capped.stats()['segments']} left")
+    capped.close()
+
+    api.stop()
+    shutil.rmtree(root, ignore_errors=True)
+    shutil.rmtree(capped_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
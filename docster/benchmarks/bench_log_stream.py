@@ -0,0 +1,62 @@
+# bench_log_stream.py
+
+"""
+Time-to-first-byte and total time for a large /api/get-logs tail, streamed vs. buffered.
+
+"ndjson" streams LogChunks while the log is read; "json" collects the whole tail into a
+single LogResponse before sending anything (the old behaviour).
+
+Usage:
+    python benchmarks/bench_log_stream.py [--lines 200000] [--backend native]
+"""
+
+import argparse
+import os
+import time
+
+import requests
+
+from fakes import BridgeServer, FakeKubeAPI, fake_kubectl_path
+
+import config
+import kubectl_utils
+
+
+def fetch(url: str, params: dict) -> tuple:
+    start = time.perf_counter()
+    ttfb = None
+    received = 0
+    with requests.get(url, params=params, stream=True) as response:
+        response.raise_for_status()
+        for block in response.iter_content(chunk_size=65536):
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            received += len(block)
+    return ttfb * 1000, (time.perf_counter() - start) * 1000, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--backend", choices=["kubectl", "native"], default="native")
+    args = parser.parse_args()
+
+    api = FakeKubeAPI(log_lines=args.lines).start()
+    os.environ["FAKE_KUBE_API"] = api.url
+    config.KUBECTL_BINARY = fake_kubectl_path()
+    config.KUBE_API_URL = api.url
+    config.KUBE_TOKEN_FILE = None
+    kubectl_utils.set_backend(args.backend)
+    bridge = BridgeServer().start()
+
+    params = {"pod_name": "backend-pod-0", "tail_lines": args.lines}
+    for fmt in ("json", "ndjson"):
+        ttfb, total, size = fetch(f"{bridge.url}/api/get-logs", dict(params, format=fmt))
+        print(f"{fmt:<8} ttfb={ttfb:9.1f} ms  total={total:9.1f} ms  bytes={size}")
+
+    bridge.stop()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
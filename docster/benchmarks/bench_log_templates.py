@@ -0,0 +1,103 @@
+# bench_log_templates.py
+
+"""
+Throughput and compaction of log template mining on a large synthetic log.
+
+The log mixes request/access lines with variable ids and latencies, health checks, a crash loop
+that prints the same stack trace over and over, and a few one-off lines. Reports lines/s
+at increasing sizes (mining should scale linearly), the number of templates, the size before and
+after compaction, and whether every one-off line survived verbatim.
+
+Usage:
+    python benchmarks/bench_log_templates.py [--lines 500000] [--seed 7]
+"""
+
+import argparse
+import random
+import time
+
+import fakes  # noqa: F401  (puts the bridge modules on sys.path)
+from conversation import estimate_tokens
+from log_templates import LogTemplateMiner
+
+STACK = [
+    "Traceback (most recent call last):",
+    '  File "/app/server.py", line 214, in handle',
+    "    response = self.dispatch(request)",
+    '  File "/app/db.py", line 88, in query',
+    "    raise ConnectionError(f'could not connect to {host}')",
+    "ConnectionError: could not connect to postgres-0.postgres:5432",
+]
+
+
+ONE_OFF = [
+    "WARN Liveness probe failed: HTTP probe failed with statuscode: 500",
+    "INFO received SIGTERM, draining connections before shutdown",
+    "WARN certificate for api.example.com expires in 6 days",
+    "INFO leader election won by replica backend-2",
+    "ERROR OOMKilled: container main exceeded its memory limit of 512Mi",
+    "INFO configuration reloaded from /etc/app/config.yaml",
+    "WARN clock skew of 2.3s detected against ntp server",
+    "ERROR disk pressure on node-17, evicting best-effort pods",
+]
+
+
+def synthetic_log(lines: int, seed: int) -> tuple:
+    rng = random.Random(seed)
+    methods, paths = ["GET", "POST", "PUT"], ["/api/orders", "/api/users", "/api/cart", "/healthz", "/api/items"]
+    out = []
+    second = 0
+    while len(out) < lines:
+        second += 1
+        ts = f"2026-10-17T{(second // 3600) % 24:02d}:{(second // 60) % 60:02d}:{second % 60:02d}.{rng.randrange(1000):03d}Z"
+        roll = rng.random()
+        if roll < 0.55:
+            out.append(f"{ts} INFO {rng.choice(methods)} {rng.choice(paths)} status={rng.choice([200, 200, 201, 404])} "
+                       f"latency={rng.randrange(1, 900)}ms request_id={rng.getrandbits(64):016x}")
+        elif roll < 0.70:
+            out.append(f"{ts} DEBUG cache hit key=user:{rng.randrange(100000)} ttl={rng.randrange(60)}s")
+        elif roll < 0.80:
+            out.append(f"{ts} INFO health check ok from 10.0.{rng.randrange(255)}.{rng.randrange(255)}:{rng.randrange(65535)}")
+        elif roll < 0.88:
+            out.append(f"{ts} WARN slow query took {rng.randrange(1000, 9000)}ms rows={rng.randrange(10000)}")
+        else:
+            out.append(f"{ts} ERROR request failed, restarting worker {rng.randrange(16)}")
+            out.extend(STACK)
+    out = out[:lines]
+    # One-off lines at random places: each must survive compaction verbatim.
+    rare = []
+    for i, (message, position) in enumerate(zip(ONE_OFF, sorted(rng.sample(range(lines), len(ONE_OFF))))):
+        line = f"2026-10-17T12:00:{i:02d}.000Z {message}"
+        out.insert(position, line)
+        rare.append(line)
+    return out, rare
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=500000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    lines, rare = synthetic_log(args.lines, args.seed)
+    print(f"{'lines':>9}{'seconds':>10}{'lines/s':>12}{'templates':>11}")
+    for size in (args.lines // 4, args.lines // 2, args.lines):
+        miner = LogTemplateMiner()
+        start = time.perf_counter()
+        miner.add_lines(lines[:size])
+        elapsed = time.perf_counter() - start
+        print(f"{size:>9}{elapsed:>10.2f}{size / elapsed:>12.0f}{len(miner.clusters):>11}")
+
+    start = time.perf_counter()
+    rendered = miner.render()
+    render_ms = (time.perf_counter() - start) * 1000
+    raw = "\n".join(lines)
+    kept = sum(1 for line in rare if line in rendered)
+    print(f"raw: {len(raw)} chars (~{estimate_tokens(raw)} tokens); compacted: {len(rendered)} chars "
+          f"(~{estimate_tokens(rendered)} tokens), {len(raw) / len(rendered):.0f}x smaller, rendered in {render_ms:.1f} ms")
+    print(f"one-off lines kept verbatim: {kept}/{len(rare)}")
+    print("\n".join(rendered.splitlines()[:15]))
+
+
+if __name__ == "__main__":
+    main()
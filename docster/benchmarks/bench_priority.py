@@ -0,0 +1,85 @@
+# bench_priority.py
+
+"""
+Latency of an operator's queries while background work floods the bridge, with and without
+priority classes (scheduler.py).
+
+A FakeKubeAPI answers log requests after --log-delay seconds. --background loops keep asking for
+compacted pod logs (cluster calls that are never cached) while /api/describe-pod?fresh=true is
+probed --probes times. "unlabelled" sends no X-Priority header, so flood and probes share one
+class and queue together; "prioritised" marks the flood background and the probes interactive.
+The flood's 429s (refused or dropped by the scheduler) are counted, not retried early.
+
+Usage:
+    python benchmarks/bench_priority.py [--background 24] [--log-delay 1] [--probes 30]
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fakes import BridgeServer, FakeKubeAPI
+from load_slow_logs import percentile
+
+import config
+import kubectl_utils
+
+
+def flood(url: str, headers: dict, stop: threading.Event, counts: dict, lock: threading.Lock) -> None:
+    with requests.Session() as session:
+        while not stop.is_set():
+            response = session.get(f"{url}/api/get-logs", params={"pod_name": "backend-pod-0", "compact": "true"},
+                                   headers=headers)
+            with lock:
+                counts[response.status_code] = counts.get(response.status_code, 0) + 1
+            if response.status_code == 429:
+                stop.wait(float(response.headers.get("Retry-After", 1)))
+
+
+def run(url: str, background: int, probes: int, prioritised: bool) -> tuple:
+    flood_headers = {config.PRIORITY_HEADER: "background"} if prioritised else {}
+    probe_headers = {config.PRIORITY_HEADER: "interactive"} if prioritised else {}
+    stop, lock, counts = threading.Event(), threading.Lock(), {}
+    samples = []
+    with ThreadPoolExecutor(max_workers=background) as pool:
+        for _ in range(background):
+            pool.submit(flood, url, flood_headers, stop, counts, lock)
+        time.sleep(1.0)  # Let the flood fill the queues
+        with requests.Session() as session:
+            for _ in range(probes):
+                start = time.perf_counter()
+                session.get(f"{url}/api/describe-pod", params={"pod_name": "backend-pod-1", "fresh": "true"},
+                            headers=probe_headers).raise_for_status()
+                samples.append((time.perf_counter() - start) * 1000)
+        stop.set()
+    return samples, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--background", type=int, default=24, help="Concurrent loops of background log fetches")
+    parser.add_argument("--log-delay", type=float, default=1.0, help="Seconds each log fetch takes")
+    parser.add_argument("--probes", type=int, default=30, help="Interactive describes measured")
+    args = parser.parse_args()
+
+    api = FakeKubeAPI(log_delay=args.log_delay).start()
+    config.KUBE_API_URL = api.url
+    config.KUBE_TOKEN_FILE = None
+    kubectl_utils.set_backend("native")
+    bridge = BridgeServer().start()
+
+    print(f"{'mode':<13}{'probe p50':>12}{'probe p99':>12}{'flood ok':>10}{'flood 429':>11}")
+    for mode in ("unlabelled", "prioritised"):
+        samples, counts = run(bridge.url, args.background, args.probes, prioritised=mode == "prioritised")
+        print(f"{mode:<13}{percentile(samples, 0.5):>9.1f} ms{percentile(samples, 0.99):>9.1f} ms"
+              f"{counts.get(200, 0):>10}{counts.get(429, 0):>11}")
+
+    bridge.stop()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
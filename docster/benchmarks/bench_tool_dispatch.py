@@ -0,0 +1,154 @@
+# bench_tool_dispatch.py
+
+"""
+What starting tool calls while the LLM is still generating saves, and which malformed outputs the
+incremental parser (tool_call_parser.py) accepts that a regex + json.loads parse rejected.
+
+The turn's first half (tool decision plus tool results) is timed three ways, against a FakeOllama
+whose reply mixes three tool calls with prose (as LLMs tend to; once with the calls first, once
+with them last) and a bridge whose FakeKubeAPI answers after --delay:
+    - after: wait for the whole reply, parse it, then run the calls in one /api/batch,
+    - dispatch: chat_terminal's streamed path, each call started as soon as it is complete,
+    - prefetch: the same, with the calls guessed from the question (prefetch.py) started before
+      the LLM is asked; the prefetcher's hit rate is printed after it.
+
+Usage:
+    python benchmarks/bench_tool_dispatch.py [--delay 0.3] [--tokens-per-second 40] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fakes import BridgeServer, FakeKubeAPI, FakeOllama
+
+import chat_terminal
+import config
+import kubectl_utils
+from tool_call_parser import FunctionCallParser
+
+
+def _call(name, **arguments):
+    return json.dumps({"function_call": {"name": name, "arguments": arguments}})
+
+
+CALLS = (
+    "[" + _call("describe_pod_api", pod_name="backend-pod-0", namespace="default")
+    + ",\n" + _call("get_logs_api", pod_name="backend-pod-0", namespace="default", since_time="5m", tail_lines=100)
+    + ",\n" + _call("get_events_api", namespace="default", event_type="Warning") + "]\n"
+)
+REASONING = (
+    "The description shows whether the containers are restarting, the logs should contain the error "
+    "that made the last container exit, and the Warning events tell us whether the kubelet had trouble "
+    "pulling the image or passing the probes."
+)
+# The same three calls, written before the reasoning (dispatch can overlap the rest) or after it (it cannot).
+DECISIONS = {
+    "calls first": "Let me look at the pod first.\n" + CALLS + REASONING,
+    "calls last": REASONING + " Let me look at the pod.\n" + CALLS,
+}
+
+# Usual LLM mistakes, each with the number of calls the output holds.
+MALFORMED = {
+    "prose brackets": ("Checking [pod status] now: [" + _call("describe_pod_api", pod_name="a") + "] (see [1])", 1),
+    "semicolons": ('[{"function_call": {"name": "describe_pod_api", "arguments": {"pod_name": "a"; "namespace": "b"}}}]', 1),
+    "trailing comma": ('[{"function_call": {"name": "describe_pod_api", "arguments": {"pod_name": "a",}},}]', 1),
+    "single quotes": ("[{'function_call': {'name': 'describe_pod_api', 'arguments': {'pod_name': 'a'}}}]", 1),
+    "unquoted keys": ('[{function_call: {name: "describe_pod_api", arguments: {pod_name: "a"}}}]', 1),
+    "missing brackets": ('[{"function_call": {"name": "describe_pod_api", "arguments": {"pod_name": "a"}}', 1),
+    "string arguments": ('[{"function_call": {"name": "get_logs_api", "arguments": "{\\"pod_name\\": \\"a\\"}"}}]', 1),
+    "no list": (_call("describe_pod_api", pod_name="a") + "\n" + _call("get_logs_api", pod_name="a"), 2),
+}
+
+
+def regex_parse(text):
+    # The parse the chat client used before: greedy [.*] match, ';' -> ',', json.loads.
+    match = re.search(r"(\[.*\])", text, re.DOTALL)
+    if not match:
+        return []
+    try:
+        calls = json.loads(match.group(1).replace(";", ","))
+        return [call["function_call"] for call in calls if "function_call" in call]
+    except (ValueError, TypeError):
+        return []
+
+
+def after_generation(prompt):
+    start = time.perf_counter()
+    text = chat_terminal.call_llm(prompt, on_token=lambda token: None)
+    calls = chat_terminal.parse_function_call(text)
+    results = chat_terminal.run_tool_batch(calls)
+    return (time.perf_counter() - start) * 1000, len(results)
+
+
+def with_dispatch(prompt):
+    chat_terminal.prefetcher = None
+    start = time.perf_counter()
+    with ThreadPoolExecutor(chat_terminal.MAX_TOOL_DISPATCH) as pool:
+        _, calls, results = chat_terminal._decide_and_run_tools(prompt, lambda token: None, None, pool)
+    return (time.perf_counter() - start) * 1000, len(results)
+
+
+def with_prefetch(prompt):
+    chat_terminal.prefetcher = prefetcher
+    start = time.perf_counter()
+    with ThreadPoolExecutor(chat_terminal.MAX_TOOL_DISPATCH) as pool:
+        _, calls, results = chat_terminal._decide_and_run_tools(prompt, lambda token: None, None, pool)
+    return (time.perf_counter() - start) * 1000, len(results)
+
+
+prefetcher = chat_terminal.prefetcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay", type=float, default=0.3, help="Simulated API server latency per request (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'output':<18}{'regex calls':>12}{'parser calls':>13}{'expected':>10}")
+    for name, (text, expected) in MALFORMED.items():
+        parser_calls = FunctionCallParser(names=chat_terminal.tool_functions)
+        found = len(parser_calls.feed(text) + parser_calls.close())
+        print(f"{name:<18}{len(regex_parse(text)):>12}{found:>13}{expected:>10}")
+
+    api = FakeKubeAPI(pods=2, delay=args.delay).start()
+    config.KUBE_API_URL = api.url
+    config.KUBE_TOKEN_FILE = None
+    config.CACHE_TTLS = {}  # Every tool call reaches the (slow) API server
+    kubectl_utils.set_backend("native")
+    bridge = BridgeServer().start()
+    decision = [None]
+    ollama = FakeOllama(reply=lambda prompt: decision[0], ttft=0.2, tokens_per_second=args.tokens_per_second).start()
+    chat_terminal.BRIDGE_BASE_URL = f"{bridge.url}/api"
+    chat_terminal.llm_config.update(base_url=ollama.url, stream=True)
+
+    runs = (("after generation", after_generation), ("dispatch", with_dispatch), ("prefetch", with_prefetch))
+    for order, text in DECISIONS.items():
+        decision[0] = text
+        print(f"\ntool decision ({order}) + results, {args.delay * 1000:.0f} ms per API request, "
+              f"{args.tokens_per_second:.0f} tokens/s:")
+        for label, run in runs:
+            times = []
+            for _ in range(args.repeat):
+                chat_terminal.conversation.clear()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    elapsed, calls = run("Why is backend-pod-0 failing?")
+                times.append(elapsed)
+            print(f"  {label:<18} best {min(times):>8.0f} ms  ({calls} calls)")
+    stats = prefetcher.stats()
+    print(f"prefetch: {stats['issued']} calls guessed, {stats['used']} used ({stats['ready']} finished when asked "
+          f"for), hit rate {stats['hit_rate']:.0%}, precision {stats['precision']:.0%}")
+
+    bridge.stop()
+    ollama.stop()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# bench_workload_logs.py
+
+"""
+Measures /api/get-workload-logs, which merges the logs of every pod of a deployment by timestamp,
+against a FakeKubeAPI with simulated API latency.
+
+Reports:
+    - the whole deployment's log through one /get-workload-logs request (time to the first chunk
+      and in total), next to one /get-logs request per pod as the chat client did before,
+    - whether the merged lines are in timestamp order and complete,
+    - peak memory of the k-way merge next to reading every log and sorting the lines.
+
+Usage:
+    python benchmarks/bench_workload_logs.py [--pods 20] [--containers 2] [--tail 2000] [--delay 0.05]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import requests
+
+from fakes import BridgeServer, FakeKubeAPI, make_deployment, make_pod
+
+import config
+import kubectl_utils
+from backends import normalize_timestamp
+
+
+def timed_stream(session, url, params):
+    start = time.perf_counter()
+    first, lines = None, []
+    with session.get(url, params=params, stream=True) as response:
+        response.raise_for_status()
+        for record in response.iter_lines():
+            data = json.loads(record)
+            if "lines" in data:
+                first = first or time.perf_counter() - start
+                lines.extend(data["lines"])
+    return first, time.perf_counter() - start, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pods", type=int, default=20)
+    parser.add_argument("--containers", type=int, default=2, help="Containers per pod")
+    parser.add_argument("--tail", type=int, default=2000, help="Lines per container")
+    parser.add_argument("--delay", type=float, default=0.05, help="Simulated API server latency in seconds")
+    args = parser.parse_args()
+
+    api = FakeKubeAPI(pods=0).start()
+    containers = tuple(["app"] + [f"sidecar-{i}" for i in range(1, args.containers)])
+    for i in range(args.pods):
+        pod = make_pod(f"web-{i}", containers=containers)
+        pod["metadata"]["labels"] = {"app": "web"}
+        api.upsert("pods", pod)
+    api.upsert("deployments", make_deployment("web", replicas=args.pods, labels={"app": "web"}))
+    api.log_interval = 0.01
+    api.log_lines = args.tail
+    api.log_epoch = time.time() - args.tail * api.log_interval
+    api.delay = args.delay
+    config.KUBE_API_URL = api.url
+    config.KUBE_TOKEN_FILE = None
+    config.WORKLOAD_LOG_MAX_CONTAINERS = max(config.WORKLOAD_LOG_MAX_CONTAINERS, args.pods * args.containers)
+    kubectl_utils.set_backend("native")
+    bridge = BridgeServer().start()
+    session = requests.Session()
+    since = f"{int(args.tail * api.log_interval) + 60}s"
+
+    first, total, lines = timed_stream(session, f"{bridge.url}/api/get-workload-logs",
+                                       {"deployment": "web", "tail_lines": args.tail, "since_time": since})
+    stamps = [line.split(" ", 1)[0] for line in lines]
+    print(f"/get-workload-logs: {len(lines)} lines from {args.pods * args.containers} containers, "
+          f"first chunk {first * 1000:.0f} ms, total {total * 1000:.0f} ms, "
+          f"ordered: {stamps == sorted(stamps)}, complete: {len(lines) == args.pods * args.containers * args.tail}")
+
+    start = time.perf_counter()
+    fetched = 0
+    for i in range(args.pods):
+        response = session.get(f"{bridge.url}/api/get-logs", params={
+            "pod_name": f"web-{i}", "tail_lines": args.tail, "since_time": since, "format": "json"})
+        fetched += sum(len(chunk["lines"]) for chunk in response.json()["logs"])
+    print(f"one /get-logs per pod: {fetched} lines (first container only, unordered across pods), "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    api.delay = 0
+    namespace = config.DEFAULT_NAMESPACE
+    targets = kubectl_utils.list_workload_containers(namespace, "app=web")
+    tracemalloc.start()
+    merged = sum(1 for _ in kubectl_utils.merge_workload_logs(namespace, targets, since, args.tail))
+    merge_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    backend = kubectl_utils.get_backend()
+    everything = []
+    for pod, container in targets:
+        for line in backend.stream_log_records(pod, namespace, container, tail_lines=args.tail):
+            stamp, _, text = line.partition(" ")
+            everything.append((normalize_timestamp(stamp), f"{pod}/{container}", text))
+    everything.sort()
+    sort_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"peak memory: k-way merge {merge_peak / 1e6:.1f} MB ({merged} lines), "
+          f"read all and sort {sort_peak / 1e6:.1f} MB ({len(everything)} lines)")
+
+    bridge.stop()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# fake_kubectl.py
+
+"""
+Stand-in for the kubectl binary, used by the benchmarks.
+
+Like the real kubectl, every invocation is a fresh process that opens a new connection to the
+API server (the FakeKubeAPI at $FAKE_KUBE_API). Only the sub-commands the bridge issues are supported.
+"""
+
+import argparse
+import json
+import os
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import render_events_table, render_object, render_pod_description  # noqa: E402
+from utils import parse_duration  # noqa: E402
+
+RESOURCES = {"pod": "pods", "pods": "pods", "svc": "services", "service": "services",
+             "services": "services", "events": "events", "event": "events"}
+
+
+def fetch(path: str, params: dict = None, raw: bool = False):
+    url = os.environ["FAKE_KUBE_API"] + path
+    if params:
+        url += "?" + urllib.parse.urlencode(params)
+    try:
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode()
+    except urllib.error.HTTPError as e:
+        sys.stderr.write(f"Error from server ({e.code}): {json.loads(e.read()).get('message')}\n")
+        sys.exit(1)
+    return body if raw else json.loads(body)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="kubectl")
+    parser.add_argument("verb")
+    parser.add_argument("args", nargs="*")
+    parser.add_argument("-n", "--namespace", default="default")
+    parser.add_argument("-o", "--output")
+    parser.add_argument("--since")
+    parser.add_argument("--tail")
+    parser.add_argument("-f", "--follow", action="store_true")
+    parser.add_argument("--sort-by")
+    parser.add_argument("--field-selector")
+    parser.add_argument("--raw")
+    parser.add_argument("--timestamps", action="store_true")
+    parser.add_argument("--since-time")
+    parser.add_argument("--previous", action="store_true")
+    parser.add_argument("-c", "--container")
+    opts = parser.parse_args(argv)
+    base = f"/api/v1/namespaces/{opts.namespace}"
+
+    if opts.verb == "logs":
+        params = {}
+        if opts.since and opts.since != "None":
+            params["sinceSeconds"] = parse_duration(opts.since)
+        if opts.tail and opts.tail != "None":
+            params["tailLines"] = opts.tail
+        if opts.timestamps:
+            params["timestamps"] = "true"
+        if opts.since_time:
+            params["sinceTime"] = opts.since_time
+        if opts.previous:
+            params["previous"] = "true"
+        if opts.container:
+            params["container"] = opts.container
+        if opts.follow:
+            params["follow"] = "true"
+            with urllib.request.urlopen(f"{os.environ['FAKE_KUBE_API']}{base}/pods/{opts.args[0]}/log?"
+                                        + urllib.parse.urlencode(params)) as response:
+                for line in response:
+                    sys.stdout.write(line.decode())
+                    sys.stdout.flush()
+            return 0
+        sys.stdout.write(fetch(f"{base}/pods/{opts.args[0]}/log", params, raw=True))
+    elif opts.verb == "describe":
+        name = opts.args[1]
+        pod = fetch(f"{base}/pods/{name}")
+        events = fetch(f"{base}/events", {"fieldSelector": f"involvedObject.name={name}"})["items"]
+        print(render_pod_description(pod, events))
+    elif opts.verb == "get" and opts.raw:
+        sys.stdout.write(fetch(opts.raw, raw=True))
+    elif opts.verb == "get":
+        resource = RESOURCES[opts.args[0]]
+        path = f"{base}/{resource}" + (f"/{opts.args[1]}" if len(opts.args) > 1 else "")
+        params = {"fieldSelector": opts.field_selector} if opts.field_selector else None
+        obj = fetch(path, params)
+        if opts.output == "json":
+            print(json.dumps(obj))
+        elif opts.output == "yaml":
+            print(render_object(obj))
+        else:
+            print(render_events_table(obj.get("items", [])))
+    else:
+        sys.stderr.write(f"fake kubectl: unsupported verb '{opts.verb}'\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,730 @@
+# fakes.py
+
+"""
+Local stand-ins used by the benchmark scripts.
+
+Classes:
+    FakeKubeAPI: A tiny Kubernetes API server (pods, logs, events, services, nodes, deployments, watches)
+        served from memory.
+
+    FakeOllama: Ollama-compatible /api/chat and /api/generate that stream canned answers at a set token rate.
+
+    BridgeServer: Runs main.app under uvicorn in a background thread.
+
+    BridgeProcess: Runs main.app under uvicorn in a child process (memory measured on its own).
+
+Functions:
+    fake_kubectl_path: Path of the fake kubectl wrapper script that proxies to a FakeKubeAPI.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Benchmarks import bridge modules (config, backends, ...) from the parent directory.
+DOCSTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if DOCSTER_DIR not in sys.path:
+    sys.path.insert(0, DOCSTER_DIR)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def make_pod(name: str, namespace: str = "default", restarts: int = 0, phase: str = "Running",
+             containers: tuple = ("main",)) -> dict:
+    return {
+        "kind": "Pod",
+        "apiVersion": "v1",
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "uid": f"uid-pod-{namespace}-{name}",
+            "resourceVersion": "1",
+            "labels": {"app": name.rsplit("-", 1)[0]},
+            "creationTimestamp": _now(),
+        },
+        "spec": {"nodeName": "node-1", "containers": [{"name": container, "image": f"example/{name}-{container}:latest"}
+                                                      for container in containers]},
+        "status": {
+            "phase": phase,
+            "podIP": "10.0.0.10",
+            "startTime": _now(),
+            "conditions": [{"type": "Ready", "status": "True" if phase == "Running" else "False"}],
+            "containerStatuses": [{
+                "name": container,
+                "ready": phase == "Running",
+                "restartCount": restarts,
+                "state": {"running": {"startedAt": _now()}},
+            } for container in containers],
+        },
+    }
+
+
+def make_event(index: int, pod: str, namespace: str = "default", event_type: str = "Normal",
+               reason: str = "Pulled") -> dict:
+    return {
+        "kind": "Event",
+        "apiVersion": "v1",
+        "metadata": {
+            "name": f"{pod}.{index:08x}",
+            "namespace": namespace,
+            "uid": f"uid-event-{namespace}-{index}",
+            "resourceVersion": "1",
+            "creationTimestamp": _now(),
+        },
+        "involvedObject": {"kind": "Pod", "name": pod, "namespace": namespace},
+        "type": event_type,
+        "reason": reason,
+        "message": f"Event {index} for {pod}",
+        "count": 1,
+        "lastTimestamp": _now(),
+    }
+
+
+def make_service(name: str, namespace: str = "default") -> dict:
+    return {
+        "kind": "Service",
+        "apiVersion": "v1",
+        "metadata": {"name": name, "namespace": namespace, "uid": f"uid-svc-{namespace}-{name}",
+                     "resourceVersion": "1", "creationTimestamp": _now()},
+        "spec": {"type": "ClusterIP", "clusterIP": "10.96.0.20", "selector": {"app": name},
+                 "ports": [{"port": 80, "targetPort": 8080, "protocol": "TCP"}]},
+        "status": {"loadBalancer": {}},
+    }
+
+
+def make_node(name: str, ready: bool = True, conditions: dict = None) -> dict:
+    # conditions: extra condition type -> status, e.g. {"MemoryPressure": "True"}
+    statuses = {"Ready": "True" if ready else "False", "MemoryPressure": "False", "DiskPressure": "False",
+                "PIDPressure": "False", **(conditions or {})}
+    return {
+        "kind": "Node",
+        "apiVersion": "v1",
+        "metadata": {"name": name, "uid": f"uid-node-{name}", "resourceVersion": "1",
+                     "labels": {"kubernetes.io/hostname": name}, "creationTimestamp": _now()},
+        "spec": {},
+        "status": {"conditions": [{"type": condition_type, "status": status, "lastTransitionTime": _now(),
+                                   "reason": ("KubeletReady" if status == "True" else "KubeletNotReady")
+                                   if condition_type == "Ready" else f"Kubelet{condition_type}"}
+                                  for condition_type, status in statuses.items()]},
+    }
+
+
+def make_deployment(name: str, namespace: str = "default", replicas: int = 1, available: int = None,
+                    labels: dict = None, kind: str = "Deployment") -> dict:
+    # labels: the pod selector's matchLabels (default {"app": name}); kind "StatefulSet" makes a statefulset
+    available = replicas if available is None else available
+    return {
+        "kind": kind,
+        "apiVersion": "apps/v1",
+        "metadata": {"name": name, "namespace": namespace, "uid": f"uid-{kind.lower()}-{namespace}-{name}",
+                     "resourceVersion": "1", "generation": 1, "creationTimestamp": _now()},
+        "spec": {"replicas": replicas, "selector": {"matchLabels": labels or {"app": name}}},
+        "status": {
+            "observedGeneration": 1, "replicas": replicas, "readyReplicas": available,
+            "availableReplicas": available, "unavailableReplicas": replicas - available,
+            "conditions": [
+                {"type": "Available", "status": "True" if available == replicas else "False"},
+                {"type": "Progressing", "status": "True", "reason": "NewReplicaSetAvailable"},
+            ],
+        },
+    }
+
+
+class FakeKubeAPI:
+    """
+    In-memory Kubernetes API server for benchmarks.
+
+    Supports get/list (with fieldSelector), pod logs and watches (watch=1 with resourceVersion).
+    Mutations made through upsert()/delete() are delivered to open watches; compact() drops the
+    watch history so that watches resuming from an older resourceVersion get 410 Gone.
+
+    Attributes:
+        delay (float): Seconds to sleep before answering each request (simulates API latency).
+        log_lines (int): Number of lines the log endpoint produces per pod (before tailLines).
+        log_delay (float): Extra seconds to sleep before answering log requests only.
+        log_line_bytes (int): Pads each log line to about this many bytes (0 = no padding).
+        follow_interval (float): Seconds between lines on a follow=true log stream.
+        log_interval (float): With timestamps=true, each pod writes one line every log_interval seconds
+            since the server was created and keeps the last log_lines of them; every 97th is an ERROR.
+    """
+
+    KINDS = {"pods": "Pod", "events": "Event", "services": "Service", "nodes": "Node", "deployments": "Deployment",
+             "statefulsets": "StatefulSet"}
+    API_VERSIONS = {"deployments": "apps/v1", "statefulsets": "apps/v1"}  # Others are core v1
+
+    def __init__(self, pods: int = 5, events_per_pod: int = 4, delay: float = 0.0,
+                 log_lines: int = 200, log_delay: float = 0.0, namespace: str = "default",
+                 log_line_bytes: int = 0, nodes: int = 2):
+        self.delay = delay
+        self.log_lines = log_lines
+        self.log_delay = log_delay
+        self.log_line_bytes = log_line_bytes
+        self.follow_interval = 0.2
+        self.log_interval = 0.01
+        self.log_epoch = time.time()
+        self.lock = threading.Condition()
+        self.stores = {resource: {} for resource in self.KINDS}
+        self.resource_version = 0
+        self.history = []          # (resourceVersion, resource, event type, object)
+        self.compacted_version = 0  # watches from before this resourceVersion get 410 Gone
+        self.watch_requests = 0     # watch connections opened so far
+        self.requests_served = 0    # every request, watches included
+        self.watch_generation = 0   # bumped by expire_watches() to end open watches with 410 Gone
+        for i in range(pods):
+            name = f"backend-pod-{i}"
+            self.upsert("pods", make_pod(name, namespace))
+            self.upsert("services", make_service(f"svc-{i}", namespace))
+            for j in range(events_per_pod):
+                self.upsert("events", make_event(i * events_per_pod + j, name, namespace,
+                                                 event_type="Warning" if j % 3 == 2 else "Normal",
+                                                 reason="BackOff" if j % 3 == 2 else "Pulled"))
+        for i in range(nodes):
+            self.upsert("nodes", make_node(f"node-{i + 1}"))
+        if pods:
+            self.upsert("deployments", make_deployment("backend", namespace, replicas=pods,
+                                                       labels={"app": "backend-pod"}))
+        self.compact()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeKubeAPI":
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                api.handle(self)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    # --- mutations ---
+
+    def _record(self, resource: str, event_type: str, obj: dict) -> None:
+        self.resource_version += 1
+        obj["metadata"]["resourceVersion"] = str(self.resource_version)
+        self.history.append((self.resource_version, resource, event_type, obj))
+        self.lock.notify_all()
+
+    def upsert(self, resource: str, obj: dict) -> None:
+        key = (obj["metadata"].get("namespace", ""), obj["metadata"]["name"])
+        with self.lock:
+            event_type = "MODIFIED" if key in self.stores[resource] else "ADDED"
+            self.stores[resource][key] = obj
+            self._record(resource, event_type, obj)
+
+    def delete(self, resource: str, namespace: str, name: str) -> None:
+        with self.lock:
+            obj = self.stores[resource].pop((namespace, name), None)
+            if obj is not None:
+                self._record(resource, "DELETED", obj)
+
+    def compact(self) -> None:
+        with self.lock:
+            self.history.clear()
+            self.compacted_version = self.resource_version
+
+    def expire_watches(self) -> None:
+        """
+        Compacts the history and ends every open watch with 410 Gone, forcing informers to relist.
+        """
+        with self.lock:
+            self.compact()
+            self.watch_generation += 1
+            self.lock.notify_all()
+
+    # --- request handling ---
+
+    def _not_found(self, req, what: str) -> None:
+        _send(req, 404, {"kind": "Status", "status": "Failure", "reason": "NotFound",
+                              "message": f"{what} not found", "code": 404})
+
+    def _list(self, req, resource: str, namespace, params: dict) -> None:
+        with self.lock:
+            items = [obj for (ns, _), obj in self.stores[resource].items() if namespace is None or ns == namespace]
+            version = str(self.resource_version)
+        selector = params.get("fieldSelector", [""])[0]
+        for term in filter(None, selector.split(",")):
+            key, _, value = term.partition("=")
+            items = [obj for obj in items if _field(obj, key) == value]
+        labels = params.get("labelSelector", [""])[0]  # Equality terms only ("k=v", "k!=v")
+        for term in filter(None, labels.split(",")):
+            key, op, value = re.match(r"([^!=]+)(!?=)=?(.*)", term).groups()
+            items = [obj for obj in items
+                     if (obj["metadata"].get("labels", {}).get(key) == value) == (op == "=")]
+        metadata = {"resourceVersion": version}
+        limit = int(params.get("limit", ["0"])[0])
+        if limit:
+            offset = int(params.get("continue", ["0"])[0] or 0)
+            if offset + limit < len(items):
+                metadata["continue"] = str(offset + limit)
+            items = items[offset:offset + limit]
+        _send(req, 200, {"kind": f"{self.KINDS[resource]}List", "apiVersion": self.API_VERSIONS.get(resource, "v1"),
+                              "metadata": metadata, "items": items})
+
+    def _watch(self, req, resource: str, namespace, params: dict) -> None:
+        with self.lock:
+            self.watch_requests += 1
+        since = int(params.get("resourceVersion", ["0"])[0] or 0)
+        generation = self.watch_generation
+        deadline = time.monotonic() + float(params.get("timeoutSeconds", ["30"])[0])
+        req.send_response(200)
+        req.send_header("Content-Type", "application/json")
+        req.send_header("Transfer-Encoding", "chunked")
+        req.end_headers()
+        try:
+            while time.monotonic() < deadline:
+                with self.lock:
+                    if since < self.compacted_version or generation != self.watch_generation:
+                        _write_chunk(req, {"type": "ERROR", "object": {
+                            "kind": "Status", "code": 410, "reason": "Expired",
+                            "message": f"too old resource version: {since} ({self.compacted_version})"}})
+                        break
+                    pending = [h for h in self.history if h[0] > since]
+                    if not pending:
+                        self.lock.wait(timeout=min(1.0, max(0.0, deadline - time.monotonic())))
+                        continue
+                for version, res, event_type, obj in pending:
+                    since = version
+                    if res == resource and (namespace is None or obj["metadata"].get("namespace", "") == namespace):
+                        _write_chunk(req, {"type": event_type, "object": obj})
+            req.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _timestamped_logs(self, req, pod: str, params: dict) -> None:
+        # Lines as written by a pod that logs every log_interval seconds, with sinceTime/previous/container.
+        previous = params.get("previous", [""])[0] == "true"
+        container = params.get("container", ["main"])[0]
+        epoch = self.log_epoch - (3600 if previous else 0)  # The previous container ran an hour earlier
+        epoch += zlib.crc32(f"{pod}/{container}".encode()) % 1000 / 1000 * self.log_interval  # Interleave pods
+        newest = int(((self.log_epoch if previous else time.time()) - epoch) / self.log_interval)
+        first = max(0, newest - self.log_lines + 1)
+        if "tailLines" in params:
+            first = max(first, newest - int(params["tailLines"][0]) + 1)
+        since = params.get("sinceTime", [""])[0]
+        if since:
+            since_epoch = datetime.strptime(since[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+            first = max(first, int((since_epoch - epoch) / self.log_interval))
+        lines = []
+        for k in range(first, newest + 1):
+            written = epoch + k * self.log_interval
+            stamp = datetime.fromtimestamp(written, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + f"{int(written % 1 * 1e9):09d}Z"
+            if k % 97 == 0:
+                text = f"ERROR {pod}/{container} upstream timeout after 30s request_id={k:08x} route=/api/orders"
+            else:
+                text = f"INFO {pod}/{container} handled request id={k} status=200 latency_ms={k % 250}"
+            lines.append(f"{stamp} {text}\n")
+        _send(req, 200, "".join(lines).encode(), content_type="text/plain")
+
+    def _logs(self, req, pod: str, params: dict) -> None:
+        # Streams lines in chunked encoding (like the real API server); follow=true keeps
+        # writing a line every follow_interval seconds until the client goes away.
+        if self.log_delay:
+            time.sleep(self.log_delay)
+        if params.get("timestamps", [""])[0] == "true":
+            return self._timestamped_logs(req, pod, params)
+        total = self.log_lines
+        if "tailLines" in params:
+            total = min(total, int(params["tailLines"][0]))
+        req.send_response(200)
+        req.send_header("Content-Type", "text/plain")
+        req.send_header("Transfer-Encoding", "chunked")
+        req.end_headers()
+
+        def write(data: bytes) -> None:
+            req.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        padding = ""
+        if self.log_line_bytes:
+            padding = " payload=" + "x" * max(0, self.log_line_bytes - len(f"{_now()} INFO {pod} handled request id=0 status=200 payload="))
+        try:
+            batch = []
+            for i in range(total):
+                batch.append(f"{_now()} INFO {pod} handled request id={i} status=200{padding}\n")
+                if len(batch) == 1000:
+                    write("".join(batch).encode())
+                    batch = []
+            if batch:
+                write("".join(batch).encode())
+            i = total
+            while params.get("follow", [""])[0] == "true":
+                time.sleep(self.follow_interval)
+                write(f"{_now()} INFO {pod} handled request id={i} status=200\n".encode())
+                req.wfile.flush()
+                i += 1
+            req.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def handle(self, req) -> None:
+        with self.lock:
+            self.requests_served += 1
+        if self.delay:
+            time.sleep(self.delay)
+        url = urlparse(req.path)
+        params = parse_qs(url.query)
+        if url.path == "/version":
+            return _send(req, 200, {"major": "1", "minor": "30", "gitVersion": "v1.30.0-fake"})
+        parts = [p for p in url.path.split("/") if p]
+        # /api/v1/namespaces/<ns>/<resource>[/<name>[/log]]  or  /api/v1/<resource>  (or /apis/apps/v1/...)
+        if parts[:2] == ["api", "v1"]:
+            rest = parts[2:]
+        elif parts[:3] == ["apis", "apps", "v1"]:
+            rest = parts[3:]
+        else:
+            return self._not_found(req, url.path)
+        namespace = None
+        if len(rest) >= 2 and rest[0] == "namespaces":
+            namespace, rest = rest[1], rest[2:]
+        if not rest or rest[0] not in self.stores:
+            return self._not_found(req, url.path)
+        resource = rest[0]
+        if len(rest) == 1:
+            if params.get("watch", [""])[0] in ("1", "true"):
+                return self._watch(req, resource, namespace, params)
+            return self._list(req, resource, namespace, params)
+        name = rest[1]
+        with self.lock:
+            obj = self.stores[resource].get((namespace or "", name))
+        if obj is None:
+            return self._not_found(req, f'{resource} "{name}"')
+        if len(rest) == 3 and rest[2] == "log":
+            return self._logs(req, name, params)
+        _send(req, 200, obj)
+
+
+def _send(req, status: int, body, content_type: str = "application/json") -> None:
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    req.send_response(status)
+    req.send_header("Content-Type", content_type)
+    req.send_header("Content-Length", str(len(data)))
+    req.end_headers()
+    req.wfile.write(data)
+
+
+def _write_chunk(req, payload: dict) -> None:
+    data = json.dumps(payload).encode() + b"\n"
+    req.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+    req.wfile.flush()
+
+
+def _field(obj: dict, path: str) -> str:
+    for key in path.split("."):
+        if not isinstance(obj, dict):
+            return ""
+        obj = obj.get(key, "")
+    return str(obj)
+
+
+DEFAULT_TOOL_CALL = json.dumps([
+    {"function_call": {"name": "describe_pod_api", "arguments": {"pod_name": "backend-pod-0", "namespace": "default"}}},
+    {"function_call": {"name": "get_events_api", "arguments": {"namespace": "default", "event_type": "Warning"}}},
+])
+DEFAULT_DIAGNOSIS = (
+    "The pod backend-pod-0 is Running but has recent BackOff warnings, which means a container "
+    "restarted after failing. Check the previous container logs for the crash reason, verify the "
+    "image tag and environment variables, and confirm the readiness probe matches the port the "
+    "application listens on. "
+) * 4
+
+
+def default_llm_reply(prompt: str) -> str:
+    """
+    Canned replies following the chat client's two-step turn: a tool call, then a diagnosis once
+    tool results are in the prompt.
+    """
+    if "Based on this information, provide your diagnosis." in prompt:
+        return DEFAULT_DIAGNOSIS
+    return DEFAULT_TOOL_CALL
+
+
+class FakeOllama:
+    """
+    Serves Ollama's POST /api/chat and /api/generate from canned replies, streamed or not.
+
+    Like Ollama, it keeps the last evaluated conversation in a (simulated) KV cache: only the part of
+    a prompt after the prefix shared with the previous request is evaluated again.
+
+    Args:
+        reply (Callable[[str], str]): Maps the latest prompt (or user message) to the reply text.
+            Defaults to default_llm_reply.
+        ttft (float): Seconds before the first token, on top of prompt evaluation.
+        tokens_per_second (float): Generation rate; the reply is split into word-sized tokens.
+        prefill_tokens_per_second (Optional[float]): Prompt evaluation rate for tokens not in the KV
+            cache (about 4 characters per token). None makes evaluation free.
+
+    Attributes:
+        requests (list): Payloads received, in order.
+        prompt_evals (list): Tokens evaluated (not served from the KV cache) per request.
+        disconnects (int): Streamed generations the client abandoned before the end.
+    """
+
+    def __init__(self, reply=None, ttft: float = 0.3, tokens_per_second: float = 40.0,
+                 prefill_tokens_per_second: float = None):
+        self.reply = reply or default_llm_reply
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.requests = []
+        self.prompt_evals = []
+        self.disconnects = 0
+        self._kv = ""
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        ollama = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                ollama.handle(self)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _evaluate(self, prompt: str) -> int:
+        # Tokens of prompt not covered by the prefix shared with the cached conversation.
+        shared = 0
+        for a, b in zip(prompt, self._kv):
+            if a != b:
+                break
+            shared += 1
+        return (len(prompt) - shared) // 4
+
+    def handle(self, req) -> None:
+        payload = json.loads(req.rfile.read(int(req.headers.get("Content-Length", 0))) or b"{}")
+        self.requests.append(payload)
+        path = urlparse(req.path).path
+        if path == "/api/chat":
+            messages = payload.get("messages", [])
+            prompt = "".join(f"<{m['role']}>{m['content']}" for m in messages)
+            latest = messages[-1]["content"] if messages else ""
+        elif path == "/api/generate":
+            prompt = latest = payload.get("prompt", "")
+        else:
+            return _send(req, 404, {"error": f"unknown path {req.path}"})
+
+        reply = self.reply(latest)
+        tokens = re.findall(r"\s*\S+", reply)
+        started = time.perf_counter()
+        evaluated = self._evaluate(prompt)
+        self.prompt_evals.append(evaluated)
+        prefill = evaluated / self.prefill_tokens_per_second if self.prefill_tokens_per_second else 0.0
+        time.sleep(self.ttft + prefill)
+        self._kv = prompt + (f"<assistant>{reply}" if path == "/api/chat" else reply)
+        prompt_eval = time.perf_counter() - started
+
+        def token_record(token: str) -> dict:
+            if path == "/api/chat":
+                return dict(base, message={"role": "assistant", "content": token}, done=False)
+            return dict(base, response=token, done=False)
+
+        base = {"model": payload.get("model", "fake"), "created_at": _now()}
+        final = dict(token_record(""), done=True, done_reason="stop", prompt_eval_count=evaluated,
+                     prompt_eval_duration=int(prompt_eval * 1e9), eval_count=len(tokens))
+
+        if not payload.get("stream", True):
+            time.sleep(len(tokens) / self.tokens_per_second)
+            final.update(token_record(reply), done=True,
+                         eval_duration=int(len(tokens) / self.tokens_per_second * 1e9),
+                         total_duration=int((time.perf_counter() - started) * 1e9))
+            return _send(req, 200, final)
+
+        req.send_response(200)
+        req.send_header("Content-Type", "application/x-ndjson")
+        req.send_header("Transfer-Encoding", "chunked")
+        req.end_headers()
+        try:
+            generating = time.perf_counter()
+            for token in tokens:
+                _write_chunk(req, token_record(token))
+                time.sleep(1 / self.tokens_per_second)
+            final.update(eval_duration=int((time.perf_counter() - generating) * 1e9),
+                         total_duration=int((time.perf_counter() - started) * 1e9))
+            _write_chunk(req, final)
+            req.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.disconnects += 1
+
+
+def fake_kubectl_path() -> str:
+    """
+    Returns the path of fake_kubectl.py. Point config.KUBECTL_BINARY at it and set the
+    FAKE_KUBE_API environment variable to a FakeKubeAPI url.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_kubectl.py")
+
+
+class BridgeServer:
+    """
+    Runs the bridge (main.app) under uvicorn in a background thread on a free local port.
+    Configure config/kubectl_utils before calling start().
+    """
+
+    def __init__(self, port: int = 0):
+        self.port = port or _free_port()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "BridgeServer":
+        import uvicorn
+        from main import app
+
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.05)
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+
+
+class BridgeProcess:
+    """
+    Runs the bridge (main.app) under uvicorn in a child process on a free local port, so that its
+    memory use is not mixed with the load generator's.
+
+    Args:
+        overrides (dict): config attributes set before main is imported (JSON-serialisable values).
+                          With workers, only the settings config.py reads from BRIDGE_CONFIG apply.
+        env (dict): Extra environment variables, e.g. FAKE_KUBE_API for the fake kubectl.
+        workers (int): Run the production mode (python main.py --workers N) instead of one uvicorn process.
+    """
+
+    _BOOT = (
+        "import json, sys\n"
+        "import config\n"
+        "for name, value in json.loads(sys.argv[1]).items():\n"
+        "    setattr(config, name, value)\n"
+        "import uvicorn\n"
+        "from main import app\n"
+        "uvicorn.run(app, host='127.0.0.1', port=int(sys.argv[2]), log_level='warning')\n"
+    )
+
+    def __init__(self, overrides: dict = None, env: dict = None, port: int = 0, workers: int = None):
+        self.overrides = overrides or {}
+        self.env = env or {}
+        self.port = port or _free_port()
+        self.workers = workers
+        self.process = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 20.0) -> "BridgeProcess":
+        import urllib.request
+
+        if self.workers:
+            command = [sys.executable, "main.py", "--workers", str(self.workers), "--host", "127.0.0.1",
+                       "--port", str(self.port), "--log-level", "warning"]
+            env = dict(os.environ, BRIDGE_CONFIG=json.dumps(self.overrides), **self.env)
+        else:
+            command = [sys.executable, "-c", self._BOOT, json.dumps(self.overrides), str(self.port)]
+            env = dict(os.environ, **self.env)
+        self.process = subprocess.Popen(command, cwd=DOCSTER_DIR, env=env)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                urllib.request.urlopen(f"{self.url}/", timeout=1).read()
+                return self
+            except OSError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("bridge process did not start")
+                time.sleep(0.1)
+
+    def memory(self) -> dict:
+        """
+        Current and peak resident set size of the bridge process in KiB, summed over its worker
+        processes in production mode (Linux only; {} elsewhere).
+        """
+        total = {"rss_kb": 0, "peak_rss_kb": 0}
+        pids = [self.process.pid]
+        while pids:
+            pid = pids.pop()
+            try:
+                with open(f"/proc/{pid}/status") as status:
+                    fields = dict(line.split(":", 1) for line in status if ":" in line)
+                with open(f"/proc/{pid}/task/{pid}/children") as children:
+                    pids.extend(int(child) for child in children.read().split())
+            except OSError:
+                if pid == self.process.pid:
+                    return {}
+                continue
+            if "VmRSS" in fields:
+                total["rss_kb"] += int(fields["VmRSS"].split()[0])
+                total["peak_rss_kb"] += int(fields["VmHWM"].split()[0])
+        return total
+
+    def stop(self) -> None:
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def _free_port() -> int:
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
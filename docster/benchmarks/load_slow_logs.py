@@ -0,0 +1,89 @@
+# load_slow_logs.py
+
+"""
+Load test: latency of quick bridge requests while N slow log fetches are in flight.
+
+A FakeKubeAPI answers log requests after --log-delay seconds. The script first measures
+/api/get-events and / with nothing else running, then again while --slow slow /api/get-logs
+requests are in flight. With a non-blocking bridge the p99 of the quick requests stays flat
+(as long as --slow is below config.MAX_CONCURRENT_CLUSTER_CALLS).
+
+Usage:
+    python benchmarks/load_slow_logs.py [--slow 4] [--log-delay 3] [--probes 100] [--backend kubectl]
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fakes import BridgeServer, FakeKubeAPI, fake_kubectl_path
+
+import config
+import kubectl_utils
+
+
+def percentile(samples, pct: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def probe(session: requests.Session, url: str, count: int) -> list:
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        session.get(url).raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list) -> None:
+    print(f"{label:<34}p50={percentile(samples, 0.50):8.2f} ms  p99={percentile(samples, 0.99):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slow", type=int, default=4, help="Number of slow log fetches kept in flight")
+    parser.add_argument("--log-delay", type=float, default=3.0, help="Seconds each log fetch takes")
+    parser.add_argument("--probes", type=int, default=100, help="Quick requests per measurement")
+    parser.add_argument("--backend", choices=["kubectl", "native"], default="native")
+    args = parser.parse_args()
+
+    api = FakeKubeAPI(log_delay=args.log_delay).start()
+    os.environ["FAKE_KUBE_API"] = api.url
+    config.KUBECTL_BINARY = fake_kubectl_path()
+    config.KUBE_API_URL = api.url
+    config.KUBE_TOKEN_FILE = None
+    kubectl_utils.set_backend(args.backend)
+    bridge = BridgeServer().start()
+
+    session = requests.Session()
+    targets = {"/": f"{bridge.url}/", "/api/get-events": f"{bridge.url}/api/get-events"}
+
+    for name, url in targets.items():
+        report(f"idle {name}", probe(session, url, args.probes))
+
+    stop = threading.Event()
+
+    def slow_fetch():
+        with requests.Session() as s:
+            while not stop.is_set():
+                s.get(f"{bridge.url}/api/get-logs", params={"pod_name": "backend-pod-0"})
+
+    with ThreadPoolExecutor(max_workers=args.slow) as pool:
+        for _ in range(args.slow):
+            pool.submit(slow_fetch)
+        time.sleep(0.5)  # let the slow requests reach the cluster
+        for name, url in targets.items():
+            report(f"{args.slow} slow in flight {name}", probe(session, url, args.probes))
+        stop.set()
+
+    bridge.stop()
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
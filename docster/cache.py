@@ -0,0 +1,331 @@
+# cache.py
+
+"""
+This module de-duplicates cluster queries made through the bridge.
+
+Identical requests that arrive while one is already running share that single backend call
+(singleflight). Completed results are kept for a short, per-resource TTL in an LRU-bounded
+cache, so a burst of identical questions costs one cluster call.
+
+With several worker processes (see server.py), each worker has its own in-memory cache, and a
+SQLite file (config.SHARED_CACHE_PATH) is the tier they share. A worker that misses in memory
+looks there; if the result is missing, it takes a lease on the key before calling the cluster, and
+the other workers asking for the same key meanwhile wait for its result instead of calling too.
+
+Classes:
+    TTLCache: LRU-bounded cache whose entries expire after a per-entry TTL.
+    SingleFlight: Collapses concurrent calls with the same key into one.
+    SharedCache: TTL cache and call leases in a SQLite file shared by worker processes.
+    ResultCache: TTLCache + SingleFlight (+ SharedCache) with per-resource hit/miss counters.
+
+Attributes:
+    cluster_cache: The ResultCache shared by the bridge handlers.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import config
+from scheduler import current_priority
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Least-recently-used cache with per-entry expiry.
+
+    Args:
+        max_entries (int): Entries kept before the least recently used one is evicted.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; callers arriving while it runs await the same result.
+    The shared call is cancelled only when every caller waiting on it has gone away.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, list] = {}  # key -> [task, number of waiting callers]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Returns (result, shared), where shared is True if this caller joined a call already running.
+        """
+        entry = self._calls.get(key)
+        shared = entry is not None
+        if entry is None:
+            task = asyncio.ensure_future(factory())
+            entry = self._calls[key] = [task, 0]
+
+            def _forget(_, entry=entry):
+                if self._calls.get(key) is entry:
+                    del self._calls[key]
+
+            task.add_done_callback(_forget)
+
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0]), shared
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not entry[0].done():
+                entry[0].cancel()
+
+
+class SharedCache:
+    """
+    TTL cache in a SQLite file opened by every worker process, plus leases that let one worker
+    call the cluster for a key while the others wait for its result.
+
+    Values are stored as JSON, so only JSON-serialisable results are shared. Expiry uses the
+    wall clock, which all workers on the host share.
+
+    Args:
+        path (str): The SQLite file (created if missing).
+    """
+
+    PURGE_EVERY = 256  # Writes between deletions of expired rows
+
+    def __init__(self, path: str):
+        self.path = path
+        self.owner = f"{os.getpid()}-{id(self)}"
+        self._local = threading.local()
+        self._writes = 0
+        self._db().executescript(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL);")
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per thread (asyncio.to_thread may run us on any executor thread).
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def get(self, key: str, default=None):
+        """
+        Returns (value, seconds until it expires), or default if key is missing or expired.
+        """
+        row = self._db().execute("SELECT value, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+        remaining = row[1] - time.time() if row is not None else 0
+        if remaining <= 0:
+            return default
+        return json.loads(row[0]), remaining
+
+    def set(self, key: str, value: Any, ttl: float) -> bool:
+        """
+        Stores value for ttl seconds. Returns False if the value cannot be stored as JSON.
+        """
+        try:
+            data = json.dumps(value)
+        except (TypeError, ValueError):
+            return False
+        db = self._db()
+        db.execute("INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                   (key, data, time.time() + ttl))
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            db.execute("DELETE FROM results WHERE expires_at < ?", (time.time(),))
+        return True
+
+    def acquire(self, key: str, seconds: float) -> bool:
+        """
+        Takes the lease on key for at most 'seconds' (an expired lease is taken over).
+        Returns False if another worker holds it.
+        """
+        db = self._db()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM leases WHERE key = ? AND expires_at < ?", (key, now))
+            taken = db.execute("INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                               (key, self.owner, now + seconds)).rowcount == 1
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return taken
+
+    def release(self, key: str) -> None:
+        self._db().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def stats(self) -> dict:
+        entries = self._db().execute("SELECT COUNT(*) FROM results WHERE expires_at >= ?", (time.time(),)).fetchone()[0]
+        return {"path": self.path, "entries": entries}
+
+    @staticmethod
+    def remove(path: str) -> None:
+        """
+        Deletes a shared cache file (and its WAL files), e.g. one left behind by an earlier run.
+        """
+        for name in (path, f"{path}-wal", f"{path}-shm"):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
+
+
+class ResultCache:
+    """
+    Short-lived result cache in front of cluster calls, keyed per resource.
+
+    TTLs come from config.CACHE_TTLS (seconds per resource; 0 disables caching but keeps
+    request coalescing). Counters per resource: hits, misses, coalesced, bypassed, and
+    shared_hits (results another worker fetched, found in the shared tier).
+    """
+
+    COUNTERS = ("hits", "misses", "coalesced", "bypassed", "shared_hits")
+    SHARED_POLL_INTERVAL = 0.02  # Seconds between looks for another worker's result
+
+    def __init__(self, max_entries: Optional[int] = None, shared_path: Optional[str] = None):
+        self.cache = TTLCache(max_entries or config.CACHE_MAX_ENTRIES)
+        self.flight = SingleFlight()
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self._shared_path = shared_path
+        self._shared: Optional[SharedCache] = None
+
+    @property
+    def shared(self) -> Optional[SharedCache]:
+        """
+        The shared tier, opened on first use (None unless config.SHARED_CACHE_PATH is set).
+        """
+        path = self._shared_path or config.SHARED_CACHE_PATH
+        if path and (self._shared is None or self._shared.path != path):
+            self._shared = SharedCache(path)
+        return self._shared if path else None
+
+    def _count(self, resource: str, counter: str) -> None:
+        counts = self.counters.setdefault(resource, dict.fromkeys(self.COUNTERS, 0))
+        counts[counter] += 1
+
+    async def call(self, resource: str, key: Hashable, factory: Callable[[], Awaitable[Any]],
+                   fresh: bool = False) -> Any:
+        """
+        Returns the cached result for key, or runs factory() (coalesced with identical calls in flight).
+
+        Args:
+            resource (str): Resource name, used for the TTL lookup and counters (e.g., "events").
+            key (Hashable): Identity of the query (resource plus all of its arguments).
+            factory: Coroutine function performing the cluster call.
+            fresh (bool): Skip the cached result (a call already in flight is still joined).
+
+        Returns:
+            The (possibly shared) result. Callers must treat it as read-only.
+        """
+        ttl = config.CACHE_TTLS.get(resource, 0)
+        full_key = (resource, key)
+        if fresh:
+            self._count(resource, "bypassed")
+        elif ttl > 0:
+            value = self.cache.get(full_key, _MISSING)
+            if value is not _MISSING:
+                self._count(resource, "hits")
+                return value
+
+        async def fetch_and_store():
+            shared = self.shared if ttl > 0 else None
+            if shared is None:
+                result = await factory()
+                if ttl > 0:
+                    self.cache.set(full_key, result, ttl)
+                return result, "misses"
+            return await self._fetch_shared(shared, repr(full_key), full_key, factory, ttl, fresh)
+
+        # Calls are only shared within a priority class, so an operator's query never waits on a
+        # background call that is still queued (or about to be dropped).
+        (value, source), joined = await self.flight.do((full_key, current_priority()), fetch_and_store)
+        self._count(resource, "coalesced" if joined else source)
+        return value
+
+    async def _fetch_shared(self, shared: SharedCache, shared_key: str, full_key: Hashable,
+                            factory: Callable[[], Awaitable[Any]], ttl: float, fresh: bool) -> Tuple[Any, str]:
+        """
+        Looks in the shared tier, waits while another worker fetches the same key, else fetches.
+        Returns (result, counter name).
+        """
+        deadline = time.monotonic() + config.CLUSTER_CALL_TIMEOUT
+        while True:
+            if not fresh:
+                entry = await asyncio.to_thread(shared.get, shared_key)
+                if entry is not None:
+                    value, remaining = entry
+                    self.cache.set(full_key, value, min(ttl, remaining))
+                    return value, "shared_hits"
+            # The lease outlives a call that times out, so a crashed worker's lease cannot block for long.
+            if await asyncio.to_thread(shared.acquire, shared_key, config.CLUSTER_CALL_TIMEOUT + 5):
+                break
+            if time.monotonic() > deadline:
+                break  # Give up waiting and fetch it ourselves.
+            await asyncio.sleep(self.SHARED_POLL_INTERVAL)
+        try:
+            result = await factory()
+            self.cache.set(full_key, result, ttl)
+            await asyncio.to_thread(shared.set, shared_key, result, ttl)
+            return result, "misses"
+        finally:
+            await asyncio.to_thread(shared.release, shared_key)
+
+    def stats(self) -> dict:
+        """
+        Counters and hit ratios per resource, plus cache occupancy.
+        """
+        resources = {}
+        for resource, counts in self.counters.items():
+            served = counts["hits"] + counts["coalesced"] + counts["shared_hits"]
+            total = served + counts["misses"]
+            resources[resource] = dict(counts, hit_ratio=round(served / total, 4) if total else 0.0)
+        shared = self.shared
+        return {
+            "entries": len(self.cache),
+            "max_entries": self.cache.max_entries,
+            "evictions": self.cache.evictions,
+            "in_flight": self.flight.in_flight(),
+            "ttls": dict(config.CACHE_TTLS),
+            "shared": shared.stats() if shared is not None else None,
+            "resources": resources,
+        }
+
+
+cluster_cache = ResultCache()
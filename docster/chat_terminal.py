@@ -1,21 +1,57 @@
 import requests
 import json
+import os
 import threading
 import time
-import re
 import inspect
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import abort_response
+from conversation import ConversationContext, estimate_tokens
+from diagnosis_cache import DiagnosisCache, results_digest
+from log_templates import compact_log_text
+from prefetch import Prefetcher
+from tool_call_parser import FunctionCallParser
+from tracing import TurnTracer
 
 # LLM configuration (adjust as needed)
 llm_config = {
     "model": "llama3.2:latest",  # Ensure this model is available in `ollama list`
-    "base_url": "http://localhost:11434"  # Ensure Ollama is running at this address
+    "base_url": "http://localhost:11434",  # Ensure Ollama is running at this address
+    "stream": True,  # Print tokens as they are generated (Ctrl-C cancels a generation)
+    "num_ctx": 8192,  # Context window requested from Ollama
+    "history_token_budget": 6000,  # Tokens of history sent with each call (rest is left for the reply)
+    "inline_output_tokens": 800,  # Larger tool outputs are stored by reference with an excerpt inline
+    "trace_file": None,  # JSONL file every turn's spans are appended to (see /trace export)
+    # Repeated questions whose tool results have not changed are answered from here (None = off; see /cache)
+    "diagnosis_cache_dir": os.path.join(os.path.expanduser("~"), ".cache", "cluster-doctor", "diagnoses"),
+    "diagnosis_cache_max_bytes": 5_000_000,  # Least recently used diagnoses are deleted beyond this
+    # Tool calls guessed from the objects a question names run while the LLM decides (see /prefetch)
+    "prefetch": True,
+    "prefetch_max_calls": 4,  # Guessed calls started per question
+    "prefetch_names_ttl": 60  # Seconds the cluster's object names are reused before they are listed again
 }
 
+# Timing of recent LLM calls (time to first token, tokens/sec), newest last; see /llmstats
+llm_call_stats = []
+MAX_LLM_CALL_STATS = 50
+
+# Tool calls run at once while the LLM is still writing the rest of its reply
+MAX_TOOL_DISPATCH = 8
+
 # Bridge service configuration (assumes the bridge is running on localhost:8000)
 BRIDGE_BASE_URL = "http://127.0.0.1:8000/api"
 
-# Global conversation history: a list of messages (each with a role and content)
-conversation_history = []
+# Tool calls carry this session id, so a pod or service described again in the same conversation
+# comes back as only what changed (see bridge_session)
+SESSION_HEADER = "X-Session-Id"
+session_id = uuid.uuid4().hex[:12]
+
+# Priority class of the bridge's cluster calls for a request (see the bridge's scheduler.py).
+# The /commands are interactive, the LLM's tool calls are tool calls, the monitor is background.
+PRIORITY_HEADER = "X-Priority"
+INTERACTIVE = {PRIORITY_HEADER: "interactive"}
 
 # Seed the conversation with a detailed system prompt.
 system_message = (
@@ -31,14 +67,17 @@ system_message = (
     "- NEVER return malformed JSON (e.g., no `;`, no missing brackets `{ }`).\n\n"
     
     "### Available Functions:\n"
-    "1️⃣ `describe_pod_api(pod_name, namespace)`: Fetches pod details.\n"
-    "2️⃣ `get_logs_api(pod_name, namespace, since_time, tail_lines)`: Fetches logs.\n"
-    "3️⃣ `get_events_api(namespace, since_time)`: Retrieves recent cluster events.\n"
-    "4️⃣ `get_service_info_api(service_name, namespace)`: Gets service details.\n"
-    "5️⃣ `describe_cluster_api()`: Gets an overall cluster report.\n\n"
+    "1️⃣ `describe_pod_api(pod_name, namespace, fields)`: Fetches pod details (only the given fields, if any).\n"
+    "2️⃣ `get_logs_api(pod_name, namespace, since_time, tail_lines, compact)`: Fetches logs (repeated lines folded into templates).\n"
+    "3️⃣ `get_events_api(namespace, since_time, event_type, involved_object, reason)`: Retrieves recent cluster events.\n"
+    "4️⃣ `get_service_info_api(service_name, namespace, fields)`: Gets service details (only the given fields, if any).\n"
+    "5️⃣ `describe_cluster_api(max_items)`: Gets a ranked health snapshot of the whole cluster.\n"
+    "6️⃣ `search_logs_api(query, selector, namespace, since)`: Searches the stored logs of many pods at once.\n"
+    "7️⃣ `get_workload_logs_api(deployment, statefulset, selector, namespace, since_time, tail_lines)`: Fetches the logs of all pods of a workload, merged by time.\n"
+    "8️⃣ `read_output_api(ref, offset, lines)`: Reads more of a large earlier output stored as \"ref:<n>\".\n\n"
     
     "🔥 Example of a correct response: \n"
-    "[{\"function_call\": {\"name\": \"describe_pod_api\", \"arguments\": {\"pod_name\": \"backend-deployment\", \"namespace\": \"default\"}}}]\n\n"
+    "[{\"function_call\": {\"name\": \"get_workload_logs_api\", \"arguments\": {\"deployment\": \"backend\", \"namespace\": \"default\"}}}]\n\n"
 
     
     "Once you receive the actual pod data, you can analyze it and provide a diagnosis.\n\n"
@@ -47,7 +86,7 @@ system_message = (
     "Format for a function call (must be valid JSON):\n"
     "{\"function_call\": {\"name\": \"<tool_function>\", \"arguments\": {\"arg1\": \"value1\", ...}}}\n\n"
     "Available tool functions with detailed descriptions:\n\n"
-    "1. get_logs_api(pod_name, namespace, since_time, tail_lines):\n"
+    "1. get_logs_api(pod_name, namespace, since_time, tail_lines, compact):\n"
     "   - What it does: Fetches logs from a specific pod.\n"
     "   - When to use: When you suspect issues with a particular pod's behavior (e.g., CrashLoopBackOff).\n"
     "   - Parameters:\n"
@@ -55,40 +94,91 @@ system_message = (
     "       • namespace: The Kubernetes namespace. Defaults to \"default\" if not provided.\n"
     "       • since_time: The time window for logs (e.g., \"5m\" for last 5 minutes).\n"
     "       • tail_lines: How many log lines to return from the end of the log.\n"
+    "       • compact: Defaults to true: repeated lines are shown once as \"[xN first -> last] template\" with \"<*>\" for\n"
+    "         variable parts; rare and error lines are kept verbatim. Set false only if you need every raw line.\n"
     "   - Caveats: Returns an error if the pod is not running or image pulling fails.\n\n"
-    "2. describe_pod_api(pod_name, namespace):\n"
+    "2. describe_pod_api(pod_name, namespace, fields):\n"
     "   - What it does: Retrieves a detailed description of the specified pod (similar to 'kubectl describe pod').\n"
     "   - When to use: To get insights into why a pod might be failing or to inspect its configuration.\n"
     "   - Parameters:\n"
     "       • pod_name: The name of the pod. (Required.)\n"
     "       • namespace: The Kubernetes namespace. Defaults to \"default\" if not provided.\n"
-    "   - Caveats: May return a lot of information; useful for debugging scheduling or configuration issues.\n\n"
-    "3. get_events_api(namespace, since_time):\n"
+    "       • fields: Optional, comma-separated parts of the pod to return as YAML instead of the whole description,\n"
+    "         e.g. \"status.phase,containers.state,containers.lastState,events\" (containers = container statuses).\n"
+    "   - Caveats: May return a lot of information; pass fields when you only need a few of them. A pod described\n"
+    "     earlier in this conversation comes back as only what changed since (\"Changes to pod ...\").\n\n"
+    "3. get_events_api(namespace, since_time, event_type, involved_object, reason):\n"
     "   - What it does: Retrieves recent events for a specified namespace.\n"
     "   - When to use: To check for cluster-wide issues such as failed scheduling or errors.\n"
     "   - Parameters:\n"
     "       • namespace: The Kubernetes namespace. Defaults to \"default\" if not provided.\n"
     "       • since_time: Optional time filter (e.g., \"10m\") for events.\n"
+    "       • event_type: Optional, \"Warning\" or \"Normal\".\n"
+    "       • involved_object: Optional, only events about \"<name>\" or \"<kind>/<name>\" (e.g., \"pod/backend-pod\").\n"
+    "       • reason: Optional event reason (e.g., \"BackOff\").\n"
     "   - Caveats: If no events are found, returns a message stating that; errors may occur if events cannot be fetched.\n\n"
-    "4. get_service_info_api(service_name, namespace):\n"
+    "4. get_service_info_api(service_name, namespace, fields):\n"
     "   - What it does: Fetches details of a Kubernetes service.\n"
     "   - When to use: To diagnose issues with service exposure or connectivity.\n"
     "   - Parameters:\n"
     "       • service_name: The name of the service. (Required.)\n"
     "       • namespace: The Kubernetes namespace. Defaults to \"default\" if not provided.\n"
-    "   - Caveats: Returns the service details in YAML format; may not include dynamic health status.\n\n"
-    "5. describe_cluster_api():\n"
-    "   - What it does: Synthesizes an overall cluster status report by aggregating key events and statuses.\n"
-    "   - When to use: When you need a high-level view of the cluster's health before drilling down into specific pods or services.\n"
-    "   - Parameters: None.\n"
-    "   - Caveats: The summary is based on available events and may not cover every nuance; use other tools for detailed diagnostics.\n\n"
+    "       • fields: Optional, comma-separated parts of the service to return, e.g. \"ports,selector,type\".\n"
+    "   - Caveats: Returns the service details in YAML format; may not include dynamic health status. A service\n"
+    "     fetched earlier in this conversation comes back as only what changed since.\n\n"
+    "5. describe_cluster_api(max_items):\n"
+    "   - What it does: Summarises the health of all namespaces: node conditions, pod phases and restarts, degraded\n"
+    "     deployments and recent Warning events, with the unhealthy objects listed most severe first.\n"
+    "   - When to use: First, when you need a high-level view of the cluster's health before drilling down into specific pods or services.\n"
+    "   - Parameters:\n"
+    "       • max_items: Optional, how many unhealthy objects to list. Defaults to 25.\n"
+    "   - Caveats: Pods of one workload failing the same way are listed once as \"<owner>-*\" with a count; use\n"
+    "     describe_pod_api on one of the example pods for details.\n\n"
+    "6. search_logs_api(query, selector, namespace, since):\n"
+    "   - What it does: Finds log lines containing a text across all pods the bridge keeps logs for, including\n"
+    "     pods that have since been deleted or restarted, newest matches first.\n"
+    "   - When to use: When an error may affect several pods (e.g., \"timeout\" across a deployment) or you do not\n"
+    "     know which pod logged it.\n"
+    "   - Parameters:\n"
+    "       • query: The text to find, case-insensitive (e.g., \"connection refused\"). (Required.)\n"
+    "       • selector: Optional pod label selector (e.g., \"app=backend\").\n"
+    "       • namespace: Optional, only pods in this namespace. Defaults to all.\n"
+    "       • since: Optional time window (e.g., \"1h\").\n"
+    "   - Caveats: Only works when the bridge's log store is enabled; each line is prefixed with its pod and container.\n\n"
+    "7. get_workload_logs_api(deployment, statefulset, selector, namespace, since_time, tail_lines):\n"
+    "   - What it does: Fetches the logs of every pod (and container) of a deployment, statefulset or label selector as\n"
+    "     one log ordered by time, each line prefixed with \"<pod>/<container>:\".\n"
+    "   - When to use: When you know the workload but not which pod misbehaves, or to see how its pods interact.\n"
+    "     Use describe_pod_api and get_logs_api for pod names, not deployment names.\n"
+    "   - Parameters:\n"
+    "       • deployment, statefulset or selector: Exactly one of them (e.g., \"backend\" or \"app=backend\"). (Required.)\n"
+    "       • namespace: The Kubernetes namespace. Defaults to \"default\" if not provided.\n"
+    "       • since_time: The time window for logs (e.g., \"5m\").\n"
+    "       • tail_lines: Lines from the end of each container's log. Defaults to 50.\n"
+    "   - Caveats: Repeated lines are folded into templates like get_logs_api; pod names vary as \"<*>\".\n\n"
+    "8. read_output_api(ref, offset, lines):\n"
+    "   - What it does: Returns lines of a large earlier output that appears in the conversation only as an excerpt.\n"
+    "   - When to use: When an excerpt marked \"[Large output stored as ref:<n> ...]\" is missing the part you need.\n"
+    "   - Parameters:\n"
+    "       • ref: The reference, e.g. \"ref:3\". (Required.)\n"
+    "       • offset: First line to return (0-based). Defaults to 0.\n"
+    "       • lines: Number of lines to return. Defaults to 100.\n\n"
     "When you need data, output a function call exactly as specified. Once you get the data, analyze it and then provide your diagnosis. "
     "Do not answer directly if you require additional data from the cluster. Use multiple function calls if needed to gather complete context."
 )
-conversation_history.append({"role": "system", "content": system_message})
+# Token-budgeted history sent to /api/chat; the system prompt stays pinned.
+conversation = ConversationContext(system_message, token_budget=llm_config["history_token_budget"],
+                                   inline_output_tokens=llm_config["inline_output_tokens"])
+
+# Spans of recent diagnosis turns (prompt, LLM calls, parsing, tool calls); see /trace
+tracer = TurnTracer(export_path=llm_config["trace_file"])
+
+# Earlier diagnoses, keyed by question and checked against fresh tool results; see diagnosis_cache.py
+diagnosis_cache = (DiagnosisCache(llm_config["diagnosis_cache_dir"], llm_config["diagnosis_cache_max_bytes"])
+                   if llm_config["diagnosis_cache_dir"] else None)
 
 # --- Tool Functions with Detailed Docstrings ---
-def get_logs_api(pod_name, namespace="default", since_time="5m", tail_lines=100):
+def get_logs_api(pod_name, namespace="default", since_time="5m", tail_lines=100, compact=True):
     """
     Fetches logs from the specified Kubernetes pod.
     
@@ -97,35 +187,102 @@ def get_logs_api(pod_name, namespace="default", since_time="5m", tail_lines=100)
       - namespace (str): The Kubernetes namespace. Defaults to "default".
       - since_time (str): The time window (e.g., "5m" for the last 5 minutes) for which to fetch logs.
       - tail_lines (int): The number of log lines from the end of the log to retrieve.
+      - compact (bool): Fold repeated lines into templates with counts (done by the bridge). Defaults to True.
     
     Returns:
-      - A string containing the concatenated log lines if successful.
+      - A string containing the (compacted) log lines if successful.
       - An error message string if the logs cannot be fetched (e.g., if the pod is not ready or image pull fails).
     
     Use this tool when you suspect issues with a specific pod's operation.
     """
+    if not compact:
+        return stream_logs_api(pod_name, namespace, since_time, tail_lines)
+    params = {"pod_name": pod_name, "namespace": namespace or "default", "since_time": since_time,
+              "tail_lines": tail_lines, "compact": "true"}
+    try:
+        response = requests.get(f"{BRIDGE_BASE_URL}/get-logs", params=params, headers=INTERACTIVE)
+        response.raise_for_status()
+        return format_logs(response.json())
+    except Exception as e:
+        return f"Error fetching logs: {e}"
+
+def get_workload_logs_api(deployment=None, statefulset=None, selector=None, namespace="default", since_time="5m",
+                          tail_lines=50, compact=True):
+    """
+    Fetches the logs of all pods of a deployment, statefulset or label selector, merged by timestamp.
+
+    Parameters:
+      - deployment / statefulset / selector (str): The workload; pass exactly one.
+      - namespace (str): The Kubernetes namespace. Defaults to "default".
+      - since_time (str): The time window (e.g., "5m").
+      - tail_lines (int): Lines from the end of each container's log. Defaults to 50.
+      - compact (bool): Fold repeated lines into templates with counts. Defaults to True.
+
+    Returns:
+      - A string with the merged lines, each prefixed with its timestamp and "<pod>/<container>:".
+      - An error message string if the workload cannot be resolved or its logs fetched.
+    """
+    params = {"namespace": namespace or "default", "since_time": since_time, "tail_lines": tail_lines,
+              "format": "json", "compact": str(bool(compact)).lower()}
+    for name, value in (("deployment", deployment), ("statefulset", statefulset), ("selector", selector)):
+        if value:
+            params[name] = value
+    try:
+        response = requests.get(f"{BRIDGE_BASE_URL}/get-workload-logs", params=params, headers=INTERACTIVE)
+        response.raise_for_status()
+        return format_workload_logs(response.json())
+    except Exception as e:
+        return f"Error fetching workload logs: {e}"
+
+def stream_logs_api(pod_name, namespace="default", since_time="5m", tail_lines=100, follow=False, on_chunk=None):
+    """
+    Streams logs from the bridge, consuming LogChunks as they arrive (used by get_logs_api and /logs).
+
+    Parameters:
+      - follow (bool): Keep streaming new lines until interrupted with Ctrl-C.
+      - on_chunk (callable, optional): Called with each list of log lines as it arrives.
+
+    Returns:
+      - The concatenated log lines received, or an error message string.
+    """
     params = {
         "pod_name": pod_name,
         "namespace": namespace or "default",
         "since_time": since_time,
-        "tail_lines": tail_lines
+        "tail_lines": tail_lines,
+        "follow": str(bool(follow)).lower()
     }
+    lines = []
     try:
-        response = requests.get(f"{BRIDGE_BASE_URL}/get-logs", params=params)
-        response.raise_for_status()
-        data = response.json()
-        logs = "\n".join(["\n".join(chunk["lines"]) for chunk in data.get("logs", [])])
-        return logs if logs else "No logs found."
+        # The bridge streams NDJSON LogChunks; consume them as they arrive instead of waiting for the full body.
+        with requests.get(f"{BRIDGE_BASE_URL}/get-logs", params=params, stream=True, headers=INTERACTIVE) as response:
+            response.raise_for_status()
+            for raw in response.iter_lines(decode_unicode=True):
+                if not raw:
+                    continue
+                record = json.loads(raw)
+                if "error" in record:
+                    lines.append(f"Error while streaming logs: {record['error']}")
+                    break
+                if "lines" in record:
+                    lines.extend(record["lines"])
+                    if on_chunk:
+                        on_chunk(record["lines"])
+    except KeyboardInterrupt:
+        pass  # Stop following; keep what was received
     except Exception as e:
         return f"Error fetching logs: {e}"
+    logs = "\n".join(lines)
+    return logs if logs else "No logs found."
 
-def describe_pod_api(pod_name, namespace="default"):
+def describe_pod_api(pod_name, namespace="default", fields=None):
     """
     Retrieves a detailed description of the specified pod (like 'kubectl describe pod').
     
     Parameters:
       - pod_name (str): Name of the pod.
       - namespace (str): The Kubernetes namespace. Defaults to "default".
+      - fields (str, optional): Only these parts of the pod, e.g. "status.phase,containers.state,events".
     
     Returns:
       - A string containing detailed pod information if successful.
@@ -134,50 +291,53 @@ def describe_pod_api(pod_name, namespace="default"):
     Use this tool when you need to investigate why a pod is failing or to inspect its configuration.
     """
     params = {"pod_name": pod_name, "namespace": namespace or "default"}
+    if fields:
+        params["fields"] = fields
     try:
-        response = requests.get(f"{BRIDGE_BASE_URL}/describe-pod", params=params)
+        response = requests.get(f"{BRIDGE_BASE_URL}/describe-pod", params=params, headers=INTERACTIVE)
         response.raise_for_status()
-        data = response.json()
-        return data.get("description", "No description available.")
+        return format_pod_description(response.json())
     except Exception as e:
         return f"Error describing pod: {e}"
 
-def get_events_api(namespace="default", since_time=None):
+def get_events_api(namespace="default", since_time=None, event_type=None, involved_object=None, reason=None, limit=100):
     """
-    Retrieves recent Kubernetes cluster events for a given namespace.
+    Retrieves recent Kubernetes cluster events for a given namespace, most recent first.
     
     Parameters:
       - namespace (str): The Kubernetes namespace. Defaults to "default".
       - since_time (str, optional): A time filter (e.g., "10m" for events in the last 10 minutes).
+      - event_type (str, optional): "Warning" or "Normal".
+      - involved_object (str, optional): Only events about "<name>" or "<kind>/<name>" (e.g., "pod/backend-pod").
+      - reason (str, optional): Only events with this reason (e.g., "BackOff").
+      - limit (int, optional): Maximum number of events to fetch (the most recent ones). Defaults to 100.
     
     Returns:
-      - A string containing formatted events if successful.
+      - A string containing formatted events if successful, with a note when older events were left out.
       - An error message string if events cannot be retrieved.
     
     Use this tool to get a high-level view of cluster issues (e.g., scheduling errors, crashes).
     """
-    params = {"namespace": namespace or "default"}
-    if since_time:
-        params["since_time"] = since_time
+    params = {"namespace": namespace or "default", "limit": limit}
+    for key, value in (("since_time", since_time), ("event_type", event_type),
+                       ("involved_object", involved_object), ("reason", reason)):
+        if value:
+            params[key] = value
     try:
-        response = requests.get(f"{BRIDGE_BASE_URL}/get-events", params=params)
+        response = requests.get(f"{BRIDGE_BASE_URL}/get-events", params=params, headers=INTERACTIVE)
         response.raise_for_status()
-        data = response.json()
-        events = "\n".join([
-            f"{evt.get('timestamp','')} {evt.get('event_type','')} {evt.get('reason','')}: {evt.get('message','')}"
-            for evt in data.get("events", [])
-        ])
-        return events if events else "No events found."
+        return format_events(response.json())
     except Exception as e:
         return f"Error fetching events: {e}"
 
-def get_service_info_api(service_name, namespace="default"):
+def get_service_info_api(service_name, namespace="default", fields=None):
     """
     Fetches details of a specific Kubernetes service.
     
     Parameters:
       - service_name (str): Name of the service.
       - namespace (str): The Kubernetes namespace. Defaults to "default".
+      - fields (str, optional): Only these parts of the service, e.g. "ports,selector".
     
     Returns:
       - A string containing the service details (often in YAML format) if successful.
@@ -186,199 +346,665 @@ def get_service_info_api(service_name, namespace="default"):
     Use this tool to diagnose issues related to service exposure or connectivity.
     """
     params = {"service_name": service_name, "namespace": namespace or "default"}
+    if fields:
+        params["fields"] = fields
     try:
-        response = requests.get(f"{BRIDGE_BASE_URL}/get-svc", params=params)
+        response = requests.get(f"{BRIDGE_BASE_URL}/get-svc", params=params, headers=INTERACTIVE)
         response.raise_for_status()
-        data = response.json()
-        return data.get("service_info", "No service info available.")
+        return format_service_info(response.json())
     except Exception as e:
         return f"Error fetching service info: {e}"
 
-def describe_cluster_api():
+def describe_cluster_api(max_items=None):
     """
-    Synthesizes an overall status report for the Kubernetes cluster.
+    Fetches a health snapshot of the whole Kubernetes cluster.
     
-    Parameters: None.
+    Parameters:
+      - max_items (int): Unhealthy objects to list. Defaults to the bridge's setting (25).
     
     Returns:
-      - A string summarizing the overall cluster status by aggregating key information
-        such as events and possibly high-level metrics.
-      - A message indicating if certain data could not be fetched.
+      - A string with node, pod, deployment and Warning event totals across all namespaces,
+        followed by the unhealthy objects, most severe first, each with its reasons.
+      - An error message string if the snapshot cannot be retrieved.
     
     Use this tool when you need a high-level, aggregated view of the cluster's health before
     drilling down into specific components.
-    
-    Caveats:
-      - This report is only as detailed as the underlying tools (e.g., get_events_api).
-      - It may not capture every nuance of the cluster's state.
     """
-    # For this example, we simply fetch recent events and return them as the cluster status.
-    events = get_events_api(namespace="default")
-    status_report = f"Cluster Status Report:\nRecent Events:\n{events}"
-    return status_report
+    params = {"max_items": max_items} if max_items else {}
+    try:
+        response = requests.get(f"{BRIDGE_BASE_URL}/cluster-summary", params=params, headers=INTERACTIVE)
+        response.raise_for_status()
+        return format_cluster_report(response.json())
+    except Exception as e:
+        return f"Error fetching cluster status: {e}"
+
+def search_logs_api(query, selector=None, namespace=None, since=None, limit=100):
+    """
+    Searches the logs the bridge has stored for many pods at once.
+
+    Parameters:
+      - query (str): Text to find (case-insensitive).
+      - selector (str): Optional pod label selector, e.g. "app=backend".
+      - namespace (str): Optional namespace; all ingested namespaces if omitted.
+      - since (str): Optional time window, e.g. "1h".
+      - limit (int): Matching lines to return (the newest). Defaults to 100.
+
+    Returns:
+      - A string with one matching line per row, prefixed with its timestamp, pod and container.
+      - An error message string if the search fails (e.g., the log store is disabled).
+    """
+    params = {"q": query, "limit": limit}
+    for name, value in (("selector", selector), ("namespace", namespace), ("since", since)):
+        if value:
+            params[name] = value
+    try:
+        response = requests.get(f"{BRIDGE_BASE_URL}/search-logs", params=params, headers=INTERACTIVE)
+        response.raise_for_status()
+        return format_log_search(response.json())
+    except Exception as e:
+        return f"Error searching logs: {e}"
+
+def read_output_api(ref, offset=0, lines=100):
+    """
+    Reads part of a large earlier output that the conversation keeps only as an excerpt.
+
+    Parameters:
+      - ref (str): The reference shown in the excerpt, e.g. "ref:3".
+      - offset (int): First line to return (0-based). Defaults to 0.
+      - lines (int): Number of lines to return. Defaults to 100.
+
+    Returns:
+      - The requested lines, or an error message string if the reference is unknown.
+    """
+    try:
+        content = conversation.read_output(str(ref), int(offset), int(lines))
+    except ValueError as e:
+        return f"Error reading output: {e}"
+    if content is None:
+        return f"Error reading output: '{ref}' is not available (it may have been dropped)."
+    return content if content else "No lines in that range."
+
+# --- Formatting of bridge responses (shared by the tools above and run_tool_batch) ---
+def format_logs(data):
+    if "templates" in data:  # CompactLogResponse
+        return data["summary"] if data["templates"] else "No logs found."
+    logs = "\n".join(line for chunk in data.get("logs", []) for line in chunk.get("lines", []))
+    return logs if logs else "No logs found."
+
+def format_workload_logs(data):
+    text = format_logs(data)
+    errors = (data.get("metadata") or {}).get("errors")
+    if errors:
+        text += "\n(Could not read: " + "; ".join(f"{name}: {error}" for name, error in errors.items()) + ")"
+    return text
+
+def format_pod_description(data):
+    return data.get("description", "No description available.")
+
+def format_events(data):
+    events = "\n".join([
+        f"{evt.get('timestamp','')} {evt.get('event_type','')} {evt.get('involved_object','')} {evt.get('reason','')}: {evt.get('message','')}"
+        for evt in data.get("events", [])
+    ])
+    if data.get("continue_token"):
+        # Only the first page is fetched; say so, so that a short list is not read as all there is.
+        shown, total = len(data.get("events", [])), data.get("total")
+        if shown and total is not None:
+            note = f"(List cut short: the {shown} most recent of {total} matching events are shown. "
+        else:
+            note = "(List cut short: more matching events exist than are shown. "
+        events += ("\n" if events else "") + note + "Narrow since_time or the filters to see older ones.)"
+    return events if events else "No events found."
+
+def format_service_info(data):
+    return data.get("service_info", "No service info available.")
+
+def format_cluster_report(data):
+    return f"Cluster Status Report:\n{data.get('text', 'No cluster summary available.')}"
+
+def format_log_search(data):
+    lines = "\n".join(
+        f"{match['timestamp']} {match['namespace']}/{match['pod']}/{match['container']}: {match['line']}"
+        for match in data.get("matches", [])
+    )
+    if lines and data.get("truncated"):
+        lines = "(Older matches left out; narrow the query or the time window to see them.)\n" + lines
+    return lines if lines else "No matching log lines found."
 
 # Map function names to actual functions (ensure names match exactly!)
 tool_functions = {
     "get_logs_api": get_logs_api,
+    "get_workload_logs_api": get_workload_logs_api,
     "describe_pod_api": describe_pod_api,
     "get_events_api": get_events_api,
     "get_service_info_api": get_service_info_api,
-    "describe_cluster_api": describe_cluster_api
+    "describe_cluster_api": describe_cluster_api,
+    "search_logs_api": search_logs_api,
+    "read_output_api": read_output_api
 }
 
-# --- Function Call Parsing and Execution ---
+# Tools answered by the client itself rather than the bridge
+local_tools = {"read_output_api"}
 
-import json
-import re
+# Argument defaults the client's tool functions have but the bridge's do not
+tool_defaults = {"get_logs_api": {"compact": True}, "get_workload_logs_api": {"compact": True, "tail_lines": 50},
+                 "describe_pod_api": {"diff": True}, "get_service_info_api": {"diff": True}}
 
-def parse_function_call(response_text):
+# How each tool's /api/batch result is turned into text for the LLM
+tool_formatters = {
+    "get_logs_api": format_logs,
+    "get_workload_logs_api": format_workload_logs,
+    "describe_pod_api": format_pod_description,
+    "get_events_api": format_events,
+    "get_service_info_api": format_service_info,
+    "describe_cluster_api": format_cluster_report,
+    "search_logs_api": format_log_search
+}
+error_prefixes = {
+    "get_logs_api": "Error fetching logs",
+    "get_workload_logs_api": "Error fetching workload logs",
+    "describe_pod_api": "Error describing pod",
+    "get_events_api": "Error fetching events",
+    "get_service_info_api": "Error fetching service info",
+    "describe_cluster_api": "Error fetching cluster status",
+    "search_logs_api": "Error searching logs"
+}
+
+def list_object_names_api():
     """
-    Extract and parse function call directives from LLM response.
-    
-    - Detects multiple function calls inside a valid JSON list.
-    - Fixes JSON formatting issues before parsing.
-    - Returns a list of function calls with names and arguments.
+    Fetches the names of the cluster's pods, deployments, statefulsets and services from the bridge.
+
+    Returns:
+      - A list of {"kind", "namespace", "name"} dicts. Raises on failure.
     """
-    try:
-        # Use regex to capture a properly formatted JSON list
-        json_match = re.search(r'(\[.*\])', response_text, re.DOTALL)
+    response = requests.get(f"{BRIDGE_BASE_URL}/object-names", timeout=10)
+    response.raise_for_status()
+    return response.json()["objects"]
 
-        if not json_match:
-            print(f"DEBUG: No valid function call detected in response: {response_text}")
-            return []
+def call_key(name, arguments):
+    """
+    Identifies a tool call by the arguments it runs with: the tool's own defaults, then tool_defaults,
+    then the given arguments (unknown ones and None values left out), so that a call written with
+    fewer arguments matches an equivalent one.
+    """
+    function = tool_functions.get(name)
+    if function is None:
+        return json.dumps([name, arguments], sort_keys=True, default=str)
+    parameters = inspect.signature(function).parameters
+    full = {key: p.default for key, p in parameters.items() if p.default is not inspect.Parameter.empty}
+    full.update(tool_defaults.get(name, {}))
+    full.update(with_default_namespace(arguments))
+    full = {key: value for key, value in full.items() if key in parameters and value is not None}
+    return json.dumps([name, full], sort_keys=True, default=str)
 
-        json_str = json_match.group(1)
+# Guesses tool calls from the user's question and runs them while the LLM decides; see prefetch.py
+prefetcher = (Prefetcher(list_object_names_api, call_key, max_calls=llm_config["prefetch_max_calls"],
+                         names_ttl=llm_config["prefetch_names_ttl"]) if llm_config["prefetch"] else None)
 
-        # Fix common JSON errors (e.g., missing closing brackets, invalid separators)
-        json_str = json_str.replace(";", ",")  # Fix semicolon errors
+def bridge_session():
+    """
+    The session id sent with tool calls. Changes are only meaningful against outputs the LLM can still
+    see, so the session changes when they leave the conversation: on /clear and when old turns are summarised.
+    """
+    return f"{session_id}-{conversation.evicted_turns}"
 
-        function_calls = json.loads(json_str)  # Load the corrected JSON
+def run_tool_batch(function_calls, session=True):
+    """
+    Runs all parsed function calls in one /api/batch round trip; the bridge executes them concurrently.
 
-        parsed_calls = []
-        for call in function_calls:
-            if "function_call" in call:
-                func_call = call["function_call"]
-                name = func_call.get("name")
-                arguments = func_call.get("arguments", {})
+    Parameters:
+      - function_calls (list): (name, arguments) pairs as returned by parse_function_call.
+      - session (bool): Send bridge_session(), so pods and services this conversation has already seen
+        come back as their changes. Without it they come back whole.
 
-                # Ensure namespace defaults to "default"
-                if "namespace" not in arguments or not arguments["namespace"]:
-                    arguments["namespace"] = "default"
+    Returns:
+      - A list of (name, arguments, result text) in the same order as function_calls.
+    """
+    function_calls = [(name, dict(tool_defaults.get(name, {}), **arguments)) for name, arguments in function_calls]
+    remote = [(name, arguments) for name, arguments in function_calls if name not in local_tools]
+    results = []
+    if remote:
+        payload = [{"function_call": {"name": name, "arguments": arguments}} for name, arguments in remote]
+        with tracer.span("POST /api/batch", calls=len(remote)) as http_span:
+            try:
+                headers = {PRIORITY_HEADER: "tool", **({SESSION_HEADER: bridge_session()} if session else {})}
+                response = requests.post(f"{BRIDGE_BASE_URL}/batch", json=payload, headers=headers)
+                http_span.attrs.update(status=response.status_code, response_bytes=len(response.content))
+                response.raise_for_status()
+                results = response.json()["results"]
+            except Exception as e:
+                results = [{"error": f"Error running tool calls: {e}", "status_code": None, "arguments": arguments}
+                           for _, arguments in remote]
+        # The bridge runs the calls concurrently and reports each one's time.
+        for (name, _), result in zip(remote, results):
+            if result.get("elapsed_ms") is not None:
+                tracer.add_span(f"tool:{name}", http_span.start, result["elapsed_ms"], parent=http_span,
+                                status=result["status_code"], timed_by="bridge")
+    results = iter(results)
 
-                parsed_calls.append((name, arguments))
+    outputs = []
+    for name, arguments in function_calls:
+        if name in local_tools:
+            function_to_call = tool_functions[name]
+            valid_args = inspect.signature(function_to_call).parameters
+            filtered_args = {key: value for key, value in arguments.items() if key in valid_args}
+            with tracer.span(f"tool:{name}", timed_by="client"):
+                outputs.append((name, filtered_args, function_to_call(**filtered_args)))
+            continue
+        result = next(results)
+        if result["error"] is not None:
+            if result["status_code"] is None:
+                text = result["error"]
+            elif result["status_code"] == 404:
+                text = f"Error: The function '{name}' is not available."
+            else:
+                text = f"{error_prefixes.get(name, 'Error')}: {result['status_code']} {result['error']}"
+        else:
+            text = tool_formatters[name](result["result"])
+        outputs.append((name, result["arguments"], text))
+    return outputs
 
-        return parsed_calls
+# --- Function Call Parsing and Execution ---
 
-    except json.JSONDecodeError as e:
-        print(f"DEBUG: Failed to parse function call JSON: {e}")
-        return []
+def parse_function_call(response_text):
+    """
+    Extract and parse function call directives from a complete LLM response.
+
+    - Finds every {"function_call": ...} object, wherever it is in the text (see tool_call_parser.py;
+      process_llm_response uses the same parser on the streamed reply).
+    - Repairs the usual JSON mistakes (';' separators, trailing commas, single quotes, missing brackets).
+    - Returns a list of function calls with names and arguments.
+    """
+    parser = FunctionCallParser(names=tool_functions)
+    calls = parser.feed(response_text) + parser.close()
+    if not calls:
+        print(f"DEBUG: No valid function call detected in response: {response_text}")
+    return [(name, with_default_namespace(arguments)) for name, arguments in calls]
 
+def with_default_namespace(arguments):
+    # Ensure namespace defaults to "default"
+    return arguments if arguments.get("namespace") else dict(arguments, namespace="default")
 
 
 
-def call_llm(prompt):
+
+def call_llm(prompt, on_token=None):
     """
-    Calls the Ollama LLM API with the entire conversation history plus the latest prompt.
-    
+    Calls the Ollama chat API with the budgeted conversation (see conversation.py) plus the latest prompt.
+    The prompt itself is not recorded; callers add the turns they want to keep.
+
+    Sending the history as /api/chat messages with a stable prefix lets Ollama reuse its KV cache
+    across calls instead of evaluating the whole conversation again.
+
+    With llm_config["stream"], tokens are read as Ollama generates them and passed to on_token.
+    Ctrl-C stops the generation (the connection is dropped, so Ollama stops too) and keeps the
+    partial text. Time to first token and tokens/sec are recorded in llm_call_stats.
+
     Returns the raw text response from the LLM.
     """
-    conversation_text = ""
-    for turn in conversation_history:
-        if turn["role"] == "system":
-            conversation_text += f"System: {turn['content']}\n"
-        elif turn["role"] == "user":
-            conversation_text += f"User: {turn['content']}\n"
-        else:
-            conversation_text += f"Assistant: {turn['content']}\n"
-    conversation_text += f"User: {prompt}\nAssistant:"
-    
-    payload = {
-        "model": llm_config["model"],
-        "prompt": conversation_text,
-        "stream": False
-    }
-    try:
-        response = requests.post(f"{llm_config['base_url']}/api/generate", json=payload)
-        response.raise_for_status()
-        data = response.json()
-        text = data.get("response", "No response from Ollama")
+    with tracer.span("llm_call") as span:
+        with tracer.span("build_prompt") as prompt_span:
+            stream = llm_config.get("stream", True)
+            payload = {
+                "model": llm_config["model"],
+                "messages": conversation.messages(prompt),
+                "stream": stream,
+                "options": {"num_ctx": llm_config["num_ctx"]}
+            }
+            prompt_span.attrs.update(messages=len(payload["messages"]),
+                                     prompt_tokens=sum(estimate_tokens(m["content"]) for m in payload["messages"]))
+        span.attrs.update(prompt_span.attrs)
+        text = _request_llm(payload, stream, on_token)
+        stats = llm_call_stats[-1]
+        span.attrs.update(ttft_ms=stats["ttft_ms"], tokens=stats["tokens"], tokens_per_sec=stats["tokens_per_sec"],
+                          evaluated_tokens=stats.get("evaluated_tokens"), cancelled=stats["cancelled"] or None)
+        if text.startswith("Error calling LLM"):
+            span.attrs["error"] = text
         return text
+
+def _request_llm(payload, stream, on_token):
+    # Sends one /api/chat request (see call_llm) and records its timing in llm_call_stats.
+    start = time.perf_counter()
+    first_token_at = None
+    parts = []
+    final = {}
+    cancelled = False
+    try:
+        with requests.post(f"{llm_config['base_url']}/api/chat", json=payload, stream=stream) as response:
+            response.raise_for_status()
+            if not stream:
+                final = response.json()
+                parts.append(final.get("message", {}).get("content", "No response from Ollama"))
+            else:
+                try:
+                    # Ollama streams one JSON object per line: {"message": {"content": "<token>"}, "done": false}, ...
+                    for raw in response.iter_lines():
+                        if not raw:
+                            continue
+                        data = json.loads(raw)
+                        if "error" in data:
+                            raise RuntimeError(data["error"])
+                        token = data.get("message", {}).get("content", "")
+                        if token:
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                            parts.append(token)
+                            if on_token:
+                                on_token(token)
+                        if data.get("done"):
+                            final = data
+                            break
+                except KeyboardInterrupt:
+                    cancelled = True  # Leaving the with-block closes the connection mid-stream
     except Exception as e:
+        record_llm_stats(start, first_token_at, len(parts), final, cancelled)
         return f"Error calling LLM: {e}"
 
+    record_llm_stats(start, first_token_at, len(parts), final, cancelled)
+    text = "".join(parts)
+    if cancelled:
+        text += " [generation cancelled]"
+    return text
+
+def record_llm_stats(start, first_token_at, chunks, final, cancelled):
+    """
+    Stores timing for one LLM call in llm_call_stats and returns it.
+
+    tokens/sec uses Ollama's own eval_count/eval_duration when the generation finished, else the
+    number of streamed chunks over the time since the first token.
+    """
+    end = time.perf_counter()
+    tokens = final.get("eval_count", chunks)
+    if final.get("eval_duration"):
+        tokens_per_sec = tokens / (final["eval_duration"] / 1e9)
+    elif first_token_at is not None and end > first_token_at:
+        tokens_per_sec = tokens / (end - first_token_at)
+    else:
+        tokens_per_sec = None
+    stats = {
+        "ttft_ms": round((first_token_at - start) * 1000, 1) if first_token_at is not None else None,
+        "total_ms": round((end - start) * 1000, 1),
+        "tokens": tokens,
+        "tokens_per_sec": round(tokens_per_sec, 1) if tokens_per_sec is not None else None,
+        "evaluated_tokens": final.get("prompt_eval_count"),
+        "cancelled": cancelled
+    }
+    llm_call_stats.append(stats)
+    del llm_call_stats[:-MAX_LLM_CALL_STATS]
+    return stats
+
+def format_llm_stats(stats):
+    ttft = f"{stats['ttft_ms']:.0f} ms" if stats["ttft_ms"] is not None else "n/a"
+    rate = f"{stats['tokens_per_sec']:.1f} tok/s" if stats["tokens_per_sec"] is not None else "n/a"
+    note = ", cancelled" if stats["cancelled"] else ""
+    return f"[ttft {ttft}, {rate}, {stats['tokens']} tokens, {stats['total_ms'] / 1000:.1f} s{note}]"
+
+def print_token(token):
+    print(token, end="", flush=True)
+
 import inspect
 
-def process_llm_response(prompt):
+def process_llm_response(prompt, on_token=None):
     """
     Processes LLM responses:
-    - Detects multiple function calls.
-    - Ensures valid arguments.
-    - Calls functions sequentially and accumulates results.
+    - Detects multiple function calls while the tool decision is still being generated.
+    - Starts each call as soon as it is complete (so tool latency overlaps the rest of the
+      generation) and accumulates results in order.
+    - Records the turn in the conversation; large tool outputs are kept there by reference.
+    - Traces the turn (prompt building, LLM calls, parsing, tool calls) for /trace.
+
+    With on_token, both generations (the tool decision and the diagnosis) are streamed through it
+    as they are produced, each followed by its timing line.
+
+    A question asked before (see diagnosis_cache.py) reruns the tool calls chosen last time. If
+    their results have not changed, the earlier diagnosis is returned, marked as cached, without
+    calling the LLM. Otherwise only the diagnosis is generated again.
     """
-    llm_raw_response = call_llm(prompt)
-    print(f"DEBUG: Raw LLM response: {llm_raw_response}")
+    with tracer.turn("turn", prompt_chars=len(prompt)) as turn_span:
+        return _run_turn(prompt, on_token, turn_span)
 
-    function_calls = parse_function_call(llm_raw_response)
+def _dispatched_tool_call(name, arguments, turn_span, span_name="dispatched_call"):
+    # Runs on a dispatch (or prefetch) thread, so the span names its parent explicitly.
+    with tracer.span(span_name, parent=turn_span, tool=name):
+        return run_tool_batch([(name, arguments)])[0]
 
-    if not function_calls:
-        print("DEBUG: LLM did not call any function. Asking it to try again.")
-        return call_llm("You must call a function before answering. Try again.")
+def _speculative(name, arguments):
+    # A guessed describe must not count as seen by the LLM unless the LLM asks for it, so it does not
+    # move the session's last version; a later describe then lists changes since what the LLM did see.
+    return dict(arguments, record=False) if tool_defaults.get(name, {}).get("diff") else arguments
 
-    function_results = []
-    
-    for func_name, arguments in function_calls:
-        if func_name not in tool_functions:
-            print(f"DEBUG: Function '{func_name}' is not recognized. Skipping execution.")
-            function_results.append(f"Error: The function '{func_name}' is not available.")
-            continue
+def _record_seen(call):
+    # The LLM took a guessed describe: fetch it again, now recorded, in the background. The bridge
+    # answers from its result cache, so the recorded version is the one the LLM got.
+    threading.Thread(target=run_tool_batch, args=([call],), daemon=True).start()
+
+def _decide_and_run_tools(prompt, on_token, turn_span, pool):
+    """
+    Asks the LLM which tools to call and starts each call as soon as the parser sees it complete.
+    A call the prefetcher already started for this question (see prefetch.py) is taken over instead.
+
+    Returns (raw LLM response, function calls, tool results), the results in call order.
+    """
+    parser = FunctionCallParser(names=tool_functions)
+    dispatched = []  # (name, arguments, future)
+    started = {}  # Identical calls run once
+    if prefetcher is not None:
+        prefetcher.start(prompt, lambda name, arguments: _dispatched_tool_call(
+            name, _speculative(name, arguments), turn_span, "prefetched_call"))
+
+    def dispatch(calls):
+        for name, arguments in calls:
+            arguments = with_default_namespace(arguments)
+            key = json.dumps([name, arguments], sort_keys=True, default=str)
+            if key not in started:
+                prefetched = prefetcher.take(name, arguments) if prefetcher is not None else None
+                if prefetched is not None and _speculative(name, arguments) is not arguments:
+                    prefetched.add_done_callback(lambda _, call=(name, arguments): _record_seen(call))
+                started[key] = prefetched or pool.submit(_dispatched_tool_call, name, arguments, turn_span)
+            dispatched.append((name, arguments, started[key]))
 
-        # Get the actual function reference
-        function_to_call = tool_functions[func_name]
+    def on_decision_token(token):
+        if on_token:
+            on_token(token)
+        dispatch(parser.feed(token))
 
-        # Validate arguments to match function signature
-        valid_args = inspect.signature(function_to_call).parameters
-        filtered_args = {key: value for key, value in arguments.items() if key in valid_args}
+    streamed = llm_config.get("stream", True)
+    llm_raw_response = call_llm(prompt, on_token=on_decision_token if streamed else on_token)
+    early = len(dispatched)
+    if not streamed:
+        dispatch(parser.feed(llm_raw_response))
+    dispatch(parser.close())  # A call left without its closing brackets
+    if on_token:
+        print(f"\n{format_llm_stats(llm_call_stats[-1])}")
+    else:
+        print(f"DEBUG: Raw LLM response: {llm_raw_response}")
+    if not dispatched:
+        print(f"DEBUG: No valid function call detected in response: {llm_raw_response}")
 
-        # Execute the function and store the result
-        tool_result = function_to_call(**filtered_args)
-        function_results.append(f"Executed {func_name} with arguments {filtered_args}. Result:\n{tool_result}")
+    with tracer.span("tool_calls", calls=len(dispatched), started_during_generation=early) as calls_span:
+        tool_results = [future.result() for _, _, future in dispatched]
+        if prefetcher is not None:
+            prefetched = prefetcher.finish()
+            calls_span.attrs.update(prefetched=prefetched["issued"], prefetched_used=prefetched["used"])
+    return llm_raw_response, [(name, arguments) for name, arguments, _ in dispatched], tool_results
+
+def _run_turn(prompt, on_token, turn_span):
+    # The body of process_llm_response, traced as one turn.
+    entry = diagnosis_cache.lookup(llm_config["model"], prompt) if diagnosis_cache is not None else None
+    if entry is not None:
+        llm_raw_response, function_calls = entry["decision"], entry["calls"]
+        with tracer.span("diagnosis_cache", calls=len(function_calls)) as cache_span:
+            with tracer.span("tool_calls", calls=len(function_calls)):
+                tool_results = run_tool_batch(function_calls, session=False)  # Whole objects, as when stored
+            cache_span.attrs["hit"] = diagnosis_cache.validate(entry, results_digest(tool_results))
+        conversation.add("user", prompt)
+        if cache_span.attrs["hit"]:
+            conversation.add("assistant", entry["diagnosis"])
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created"]))
+            cached_response = f"[Cached diagnosis from {created}; the tool results have not changed since.]\n" + \
+                entry["diagnosis"]
+            if on_token:
+                on_token(cached_response)
+            return cached_response
+        # Same question, changed data: the earlier tool choice stands and only the diagnosis is redone.
+        conversation.add("assistant", llm_raw_response)
+    else:
+        with ThreadPoolExecutor(MAX_TOOL_DISPATCH) as pool:
+            llm_raw_response, function_calls, tool_results = _decide_and_run_tools(prompt, on_token, turn_span, pool)
+        conversation.add("user", prompt)
+        conversation.add("assistant", llm_raw_response)
+
+        if not function_calls:
+            print("DEBUG: LLM did not call any function. Asking it to try again.")
+            final_response = call_llm("You must call a function before answering. Try again.", on_token=on_token)
+            conversation.add("assistant", final_response)
+            return final_response
+    function_results = [f"Executed {func_name} with arguments {arguments}. Result:\n{tool_result}"
+                        for func_name, arguments, tool_result in tool_results]
 
     # Join results into a follow-up prompt for the LLM
     followup_prompt = "Here are the results of the Kubernetes status checks:\n" + "\n\n".join(function_results) + "\n\nBased on this information, provide your diagnosis."
     
-    final_response = call_llm(followup_prompt)
-    conversation_history.append({"role": "assistant", "content": final_response})
+    if on_token:
+        print(f"Ran {len(function_calls)} tool call(s).\n\nLLM: ", end="", flush=True)
+    final_response = call_llm(followup_prompt, on_token=on_token)
+
+    # This call saw the full results; later turns get excerpts and refs for the large ones.
+    with tracer.span("record_turn"):
+        conversation.add("user", "Here are the results of the Kubernetes status checks:\n" + "\n\n".join(
+            f"Executed {func_name} with arguments {arguments}. Result:\n{conversation.compact(tool_result)}"
+            for func_name, arguments, tool_result in tool_results))
+        conversation.add("assistant", final_response)
 
+    if diagnosis_cache is not None and _cacheable(function_calls, tool_results, final_response):
+        diagnosis_cache.store(llm_config["model"], prompt, function_calls, results_digest(tool_results),
+                              final_response, llm_raw_response)
     return final_response
 
+def _cacheable(function_calls, tool_results, final_response):
+    # Failed or cancelled diagnoses, and ones built on tool errors, on outputs stored earlier in
+    # this conversation (read_output_api) or on changes to objects seen earlier, are not reused.
+    if final_response.startswith("Error calling LLM") or final_response.endswith("[generation cancelled]"):
+        return False
+    if any(name in local_tools for name, _ in function_calls):
+        return False
+    return not any(text.startswith(("Error", "Changes to ", "No changes to ")) for _, _, text in tool_results)
 
 
-# --- Optional: Background Monitoring (unchanged) ---
-def monitor_cluster(interval=30):
-    while monitoring_active:
-        events = get_events_api(namespace="default")
-        if events and "No events found" not in events:
-            message = f"Auto-monitor (events):\n{events}"
-            print(f"\n{message}")
-            conversation_history.append({"role": "assistant", "content": message})
-        time.sleep(interval)
 
+# --- Background monitoring: new and changed events pushed by the bridge ---
 monitoring_active = False
+monitor_response = None  # The open subscription, aborted by /monitor stop
+monitor_pending = []  # Event lines received but not yet added to the conversation
+monitor_lock = threading.Lock()
+
+def read_sse(response):
+    """
+    Yields (event, id, data) for each Server-Sent Event of a streamed response, and
+    ("keepalive", None, None) for each comment line.
+    """
+    event, record_id, data = "message", None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line.startswith(":"):
+            yield "keepalive", None, None
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("id:"):
+            record_id = line[3:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+        elif not line and (data or record_id is not None):
+            yield event, record_id, json.loads("\n".join(data)) if data else None
+            event, record_id, data = "message", None, []
+
+def format_event_delta(delta):
+    evt = delta["event"]
+    change = "new" if delta["change"] == "added" else f"again (x{evt.get('count') or '?'})"
+    return (f"{evt.get('timestamp','')} {evt.get('event_type','')} {delta['namespace']}/{evt.get('involved_object','')} "
+            f"{evt.get('reason','')} {change}: {evt.get('message','')}")
+
+def monitor_cluster(namespace="default"):
+    """
+    Follows the bridge's /subscribe-events stream and prints each new or changed event as it arrives.
+
+    Nothing is polled and nothing is repeated: the bridge sends only deltas, and the monitor resumes
+    after its last delta (Last-Event-ID) when it reconnects. Received events are added to the
+    conversation by flush_monitor_events(), once, before the next command.
+    """
+    global monitor_response
+    params = {"all_namespaces": "true"} if namespace == "all" else {"namespace": namespace}
+    last_id, backoff = None, 1
+    while monitoring_active:
+        headers = {PRIORITY_HEADER: "background", **({"Last-Event-ID": last_id} if last_id is not None else {})}
+        try:
+            with requests.get(f"{BRIDGE_BASE_URL}/subscribe-events", params=params, headers=headers,
+                              stream=True, timeout=(5, None)) as response:
+                response.raise_for_status()
+                monitor_response = response
+                backoff = 1
+                for kind, record_id, data in read_sse(response):
+                    if record_id is not None:
+                        last_id = record_id
+                    if kind == "event":
+                        line = format_event_delta(data)
+                        print(f"\n[monitor] {line}", flush=True)
+                        with monitor_lock:
+                            monitor_pending.append(line)
+                    elif kind == "gap":
+                        print("\n[monitor] Some events were missed while disconnected.", flush=True)
+        except Exception as e:
+            if monitoring_active:
+                print(f"\n[monitor] Event stream lost ({e}); reconnecting in {backoff}s.", flush=True)
+        finally:
+            monitor_response = None
+        if monitoring_active:
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+def stop_monitor(monitor_thread):
+    global monitoring_active
+    monitoring_active = False
+    response = monitor_response
+    if response is not None:
+        abort_response(response)
+    if monitor_thread and monitor_thread.is_alive():
+        monitor_thread.join(timeout=5)
+    flush_monitor_events()
+
+def flush_monitor_events():
+    """
+    Adds the events the monitor received since the last call to the conversation, as one message.
+    """
+    with monitor_lock:
+        lines = monitor_pending[:]
+        monitor_pending.clear()
+    if lines:
+        conversation.add("assistant", f"Auto-monitor: {len(lines)} new or changed events:\n" + "\n".join(lines))
 
 def print_help():
     help_text = """
 Available Commands:
     /help                       - Show this help message.
-    /logs <pod_name> [namespace] [since_time] [tail_lines]
-                                - Fetch logs for the given pod.
-    /describe <pod_name> [namespace]
-                                - Get detailed pod description.
+    /logs <pod_name> [namespace] [since_time] [tail_lines] [-f]
+                                - Fetch logs for the given pod (-f follows until Ctrl-C).
+    /describe <pod_name> [namespace] [fields]
+                                - Get detailed pod description (or only fields, e.g. containers.state,events).
     /events [namespace] [since_time]
                                 - Get recent cluster events.
-    /svc <service_name> [namespace]
-                                - Get details of a Kubernetes service.
+    /svc <service_name> [namespace] [fields]
+                                - Get details of a Kubernetes service (or only fields, e.g. ports,selector).
     /cluster                    - Get an overall cluster status report.
-    /monitor start|stop         - Start or stop automatic cluster monitoring.
+    /monitor start [namespace|all]|stop
+                                - Start or stop printing new and changed events as they happen.
+    /llmstats                   - Show time-to-first-token and tokens/sec of recent LLM calls.
+    /context                    - Show how much of the history token budget is in use.
+    /trace [n]                  - Show the timeline of the last (or n-th last) diagnosis turn.
+    /trace export <file>|off    - Append every turn's spans to a JSONL file (or stop).
+    /cache [clear]              - Show (or delete) the diagnoses kept for repeated questions.
+    /prefetch                   - Show how many tool calls guessed from questions the LLM went on to use.
+    /clear                      - Clear the chat history.
     /chat <your message>        - Send a message to the LLM for analysis (supports function calls).
     /exit                       - Exit the chat.
 Simply type your message to chat with the LLM if it doesn't start with '/'.
@@ -386,7 +1012,7 @@ Simply type your message to chat with the LLM if it doesn't start with '/'.
     print(help_text)
 
 def main():
-    global monitoring_active
+    global monitoring_active, session_id
     print("Welcome to the Cluster Doctor Terminal Chat!")
     print("Type /help for available commands.")
     
@@ -396,18 +1022,18 @@ def main():
         user_input = input("\nYou: ").strip()
         if not user_input:
             continue
+        flush_monitor_events()  # Events seen while the user was typing come before this turn
 
         if user_input.startswith("/clear"):
-            conversation_history.clear()  # Clear chat history
+            conversation.clear()  # Clear chat history (the system prompt stays)
+            session_id = uuid.uuid4().hex[:12]  # Describes start over with whole objects
             print("Chat history cleared.")
             continue
 
 
         if user_input.lower() in ["/exit", "exit", "quit"]:
             print("Exiting chat. Goodbye!")
-            monitoring_active = False
-            if monitor_thread and monitor_thread.is_alive():
-                monitor_thread.join()
+            stop_monitor(monitor_thread)
             break
 
         if user_input.startswith("/help"):
@@ -417,55 +1043,60 @@ def main():
         if user_input.startswith("/monitor"):
             parts = user_input.split()
             if len(parts) < 2:
-                print("Usage: /monitor start|stop")
+                print("Usage: /monitor start [namespace|all]|stop")
                 continue
             action = parts[1].lower()
             if action == "start":
                 if not monitoring_active:
+                    namespace = parts[2] if len(parts) >= 3 else "default"
                     monitoring_active = True
-                    monitor_thread = threading.Thread(target=monitor_cluster, daemon=True)
+                    monitor_thread = threading.Thread(target=monitor_cluster, args=(namespace,), daemon=True)
                     monitor_thread.start()
-                    print("Started automatic cluster monitoring.")
+                    print(f"Started monitoring events in {'all namespaces' if namespace == 'all' else namespace}.")
                 else:
                     print("Monitoring is already active.")
             elif action == "stop":
                 if monitoring_active:
-                    monitoring_active = False
-                    if monitor_thread and monitor_thread.is_alive():
-                        monitor_thread.join()
+                    stop_monitor(monitor_thread)
                     print("Stopped automatic cluster monitoring.")
                 else:
                     print("Monitoring is not active.")
             else:
-                print("Usage: /monitor start|stop")
+                print("Usage: /monitor start [namespace|all]|stop")
             continue
 
         if user_input.startswith("/logs"):
             parts = user_input.split()
+            follow = "-f" in parts
+            parts = [p for p in parts if p != "-f"]
             if len(parts) < 2:
-                print("Usage: /logs <pod_name> [namespace] [since_time] [tail_lines]")
+                print("Usage: /logs <pod_name> [namespace] [since_time] [tail_lines] [-f]")
                 continue
             pod_name = parts[1]
             namespace = parts[2] if len(parts) >= 3 else "default"
             since_time = parts[3] if len(parts) >= 4 else "5m"
             tail_lines = int(parts[4]) if len(parts) >= 5 else 100
-            logs = get_logs_api(pod_name, namespace, since_time, tail_lines)
-            print(f"\nLogs for pod '{pod_name}':\n{logs}")
-            conversation_history.append({"role": "user", "content": user_input})
-            conversation_history.append({"role": "assistant", "content": logs})
+            print(f"\nLogs for pod '{pod_name}':" + (" (following, Ctrl-C to stop)" if follow else ""))
+            logs = stream_logs_api(pod_name, namespace, since_time, tail_lines, follow=follow,
+                                   on_chunk=lambda chunk: print("\n".join(chunk), flush=True))
+            if logs.startswith("Error") or logs == "No logs found.":
+                print(logs)
+            conversation.add("user", user_input)
+            conversation.add("assistant", compact_log_text(logs))  # Printed raw above; the LLM gets templates
             continue
 
         if user_input.startswith("/describe"):
             parts = user_input.split()
             if len(parts) < 2:
-                print("Usage: /describe <pod_name> [namespace]")
+                print("Usage: /describe <pod_name> [namespace] [fields]")
                 continue
             pod_name = parts[1]
             namespace = parts[2] if len(parts) >= 3 else "default"
-            description = describe_pod_api(pod_name, namespace)
+            fields = parts[3] if len(parts) >= 4 else None
+            description = describe_pod_api(pod_name, namespace, fields)
             print(f"\nDescription for pod '{pod_name}':\n{description}")
-            conversation_history.append({"role": "user", "content": user_input})
-            conversation_history.append({"role": "assistant", "content": description})
+            conversation.add("user", user_input)
+            conversation.add("assistant", description)
             continue
 
         if user_input.startswith("/events"):
@@ -474,36 +1105,113 @@ def main():
             since_time = parts[2] if len(parts) >= 3 else None
             events = get_events_api(namespace, since_time)
             print(f"\nEvents for namespace '{namespace}':\n{events}")
-            conversation_history.append({"role": "user", "content": user_input})
-            conversation_history.append({"role": "assistant", "content": events})
+            conversation.add("user", user_input)
+            conversation.add("assistant", events)
             continue
 
         if user_input.startswith("/svc"):
             parts = user_input.split()
             if len(parts) < 2:
-                print("Usage: /svc <service_name> [namespace]")
+                print("Usage: /svc <service_name> [namespace] [fields]")
                 continue
             service_name = parts[1]
             namespace = parts[2] if len(parts) >= 3 else "default"
-            svc_info = get_service_info_api(service_name, namespace)
+            fields = parts[3] if len(parts) >= 4 else None
+            svc_info = get_service_info_api(service_name, namespace, fields)
             print(f"\nService info for '{service_name}':\n{svc_info}")
-            conversation_history.append({"role": "user", "content": user_input})
-            conversation_history.append({"role": "assistant", "content": svc_info})
+            conversation.add("user", user_input)
+            conversation.add("assistant", svc_info)
             continue
 
         if user_input.startswith("/cluster"):
             # Call the new tool that describes overall cluster status.
             cluster_status = describe_cluster_api()
             print(f"\nCluster Status:\n{cluster_status}")
-            conversation_history.append({"role": "user", "content": user_input})
-            conversation_history.append({"role": "assistant", "content": cluster_status})
+            conversation.add("user", user_input)
+            conversation.add("assistant", cluster_status)
+            continue
+
+        if user_input.startswith("/llmstats"):
+            if not llm_call_stats:
+                print("No LLM calls yet.")
+                continue
+            for stats in llm_call_stats[-10:]:
+                print(format_llm_stats(stats))
+            ttfts = [stats["ttft_ms"] for stats in llm_call_stats if stats["ttft_ms"] is not None]
+            rates = [stats["tokens_per_sec"] for stats in llm_call_stats if stats["tokens_per_sec"] is not None]
+            if ttfts and rates:
+                print(f"Average over {len(llm_call_stats)} calls: ttft {sum(ttfts) / len(ttfts):.0f} ms, "
+                      f"{sum(rates) / len(rates):.1f} tok/s")
+            continue
+
+        if user_input.startswith("/context"):
+            stats = conversation.stats()
+            print(f"History: ~{stats['tokens']} of {stats['token_budget']} tokens, {stats['turns']} messages kept, "
+                  f"{stats['evicted_turns']} summarised, {stats['stored_outputs']} large outputs stored by reference.")
+            continue
+
+        if user_input.startswith("/cache"):
+            if diagnosis_cache is None:
+                print("The diagnosis cache is off (llm_config['diagnosis_cache_dir'] is None).")
+                continue
+            if user_input.split()[1:2] == ["clear"]:
+                print(f"Deleted {diagnosis_cache.clear()} cached diagnoses.")
+                continue
+            stats = diagnosis_cache.stats()
+            print(f"Diagnosis cache: {stats['entries']} entries, {stats['bytes'] / 1024:.0f} of "
+                  f"{stats['max_bytes'] / 1024:.0f} KiB in {stats['directory']}. This session: {stats['hits']} "
+                  f"reused, {stats['stale']} redone after the cluster changed, {stats['misses']} new.")
+            continue
+
+        if user_input.startswith("/prefetch"):
+            if prefetcher is None:
+                print("Prefetching is off (llm_config['prefetch'] is False).")
+                continue
+            stats = prefetcher.stats()
+            if not stats["questions"]:
+                print("No question asked yet.")
+                continue
+            hit_rate = f"{stats['hit_rate']:.0%}" if stats["hit_rate"] is not None else "n/a"
+            precision = f"{stats['precision']:.0%}" if stats["precision"] is not None else "n/a"
+            print(f"Prefetch over {stats['questions']} questions: {stats['issued']} calls guessed, "
+                  f"{stats['used']} used ({stats['ready']} already finished when asked for), {stats['wasted']} "
+                  f"wasted, {stats['missed']} asked for but not guessed. Hit rate {hit_rate}, precision {precision}.")
+            continue
+
+        if user_input.startswith("/trace"):
+            parts = user_input.split()
+            if len(parts) >= 2 and parts[1] == "export":
+                if len(parts) < 3:
+                    print(f"Exporting to {tracer.export_path}." if tracer.export_path else "Export is off.")
+                elif parts[2] == "off":
+                    tracer.export_path = None
+                    print("Trace export stopped.")
+                else:
+                    tracer.export_path = parts[2]
+                    for turn in tracer.turns:  # Turns already traced go first
+                        tracer.export(turn, tracer.export_path)
+                    print(f"Appending turn spans to {parts[2]} ({len(tracer.turns)} recent turns written).")
+                continue
+            back = int(parts[1]) if len(parts) >= 2 and parts[1].isdigit() else 1
+            if not tracer.turns or back > len(tracer.turns):
+                print("No traced turn yet." if not tracer.turns else f"Only {len(tracer.turns)} turns are kept.")
+                continue
+            print(tracer.timeline(tracer.turns[-back]))
             continue
 
         # For any other input, treat it as a chat message that may include function calls.
-        conversation_history.append({"role": "user", "content": user_input})
-        llm_response = process_llm_response(user_input)
-        print(f"\nLLM: {llm_response}")
-        conversation_history.append({"role": "assistant", "content": llm_response})
+        # process_llm_response records the turn in the conversation.
+        if llm_config.get("stream", True):
+            # Tokens are printed as they arrive (Ctrl-C stops the current generation).
+            print("\nLLM: ", end="", flush=True)
+            last_call = llm_call_stats[-1] if llm_call_stats else None
+            llm_response = process_llm_response(user_input, on_token=print_token)
+            # A cached diagnosis makes no LLM call, so there is no timing to show.
+            print(f"\n{format_llm_stats(llm_call_stats[-1])}" if llm_call_stats and llm_call_stats[-1] is not last_call
+                  else "")
+        else:
+            llm_response = process_llm_response(user_input)
+            print(f"\nLLM: {llm_response}")
 
 if __name__ == "__main__":
     main()
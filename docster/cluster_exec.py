@@ -0,0 +1,246 @@
+# cluster_exec.py
+
+"""
+This module runs blocking cluster calls (kubectl_utils functions) off the event loop.
+
+Calls run in a bounded thread pool, at most config.MAX_CONCURRENT_CLUSTER_CALLS at a time,
+with a per-call timeout. Which waiting call gets a free slot is decided by priority class
+(scheduler.py), as is which waiting log stream may open. Timed-out or cancelled calls fire their
+CancelToken, which kills the kubectl process (or closes the API response) that is still running
+in the worker thread.
+
+Classes:
+    ClientDisconnected: Raised when the HTTP client goes away before the call finishes.
+
+Functions:
+    run_cluster_call: Await a blocking cluster call with priority scheduling and timeout.
+    run_until_disconnect: Await a coroutine, cancelling it if the HTTP client disconnects.
+    stream_cluster_lines: Async-iterate a blocking line stream (e.g., pod logs) in chunks.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Optional
+
+import config
+from backends import CancelToken, ClusterCallTimeout, current_cancel_token
+from scheduler import current_priority, scheduler, stream_scheduler
+
+_executor = ThreadPoolExecutor(max_workers=config.MAX_CONCURRENT_CLUSTER_CALLS, thread_name_prefix="cluster-call")
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client disconnects while its cluster call is still running."""
+
+
+async def run_cluster_call(func, *args, timeout: Optional[float] = None, priority: Optional[str] = None, **kwargs):
+    """
+    Runs a blocking cluster call in the worker pool without blocking the event loop.
+
+    A slot is held until the worker thread actually finishes, so cancelled calls still count
+    against the concurrency cap until their process has been killed.
+
+    Args:
+        func: The blocking function (e.g., kubectl_utils.get_logs).
+        timeout (Optional[float]): Seconds to wait once the call has started.
+                                   Defaults to config.CLUSTER_CALL_TIMEOUT.
+        priority (Optional[str]): Priority class of the call (see scheduler.py).
+                                  Defaults to the current request's class.
+
+    Returns:
+        Whatever func returns.
+
+    Raises:
+        ClusterCallTimeout: If the call does not finish in time.
+        Overloaded: If the scheduler refused the call or dropped it while it waited for a slot.
+    """
+    timeout = config.CLUSTER_CALL_TIMEOUT if timeout is None else timeout
+    priority = priority or current_priority()
+    await scheduler.acquire(priority)
+    started = time.monotonic()
+
+    token = CancelToken()
+    context = contextvars.copy_context()
+    context.run(current_cancel_token.set, token)
+    loop = asyncio.get_running_loop()
+    try:
+        future = loop.run_in_executor(_executor, functools.partial(context.run, func, *args, **kwargs))
+    except BaseException:
+        scheduler.release(priority)
+        raise
+
+    def _finished(f):
+        scheduler.release(priority, time.monotonic() - started)
+        if not f.cancelled():
+            f.exception()  # mark as retrieved; abandoned calls are expected to fail
+
+    future.add_done_callback(_finished)
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError:
+        token.cancel()
+        raise ClusterCallTimeout(f"{getattr(func, '__name__', 'cluster call')} timed out after {timeout}s")
+    except asyncio.CancelledError:
+        token.cancel()
+        raise
+
+
+async def run_until_disconnect(request, awaitable):
+    """
+    Awaits a cluster call, cancelling it as soon as the HTTP client disconnects.
+
+    Args:
+        request (Request): The incoming Starlette/FastAPI request.
+        awaitable: Coroutine to run (typically run_cluster_call(...)).
+
+    Returns:
+        The awaitable's result.
+
+    Raises:
+        ClientDisconnected: If the client went away first.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=config.DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected("Client disconnected before the cluster call finished")
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+
+class _StreamClosed(Exception):
+    """Raised in the reader thread when the consumer has gone away."""
+
+
+class _LineBuffer:
+    """
+    Bounded hand-off of lines from a reader thread to the event loop.
+
+    The reader blocks once max_lines are pending, so a slow client slows the upstream read
+    instead of growing memory. The consumer is woken when a full chunk is ready or the
+    stream ends; partial chunks are picked up on the consumer's flush timeout.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, chunk_size: int, max_lines: int):
+        self.loop = loop
+        self.chunk_size = chunk_size
+        self.max_lines = max_lines
+        self.ready = asyncio.Event()
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self._closed = False
+        self._lines = deque()
+        self._cond = threading.Condition()
+
+    def put(self, line: str) -> None:
+        with self._cond:
+            while len(self._lines) >= self.max_lines and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                raise _StreamClosed()
+            self._lines.append(line)
+            full = len(self._lines) == self.chunk_size
+        if full:
+            self.loop.call_soon_threadsafe(self.ready.set)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self.finished = True
+            self.error = error
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+    def take(self, partial: bool) -> List[str]:
+        with self._cond:
+            if len(self._lines) < self.chunk_size and not (partial or self.finished):
+                return []
+            count = min(self.chunk_size, len(self._lines))
+            batch = [self._lines.popleft() for _ in range(count)]
+            self._cond.notify_all()
+            return batch
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+async def stream_cluster_lines(func, *args, chunk_size: int, priority: Optional[str] = None,
+                               **kwargs) -> AsyncIterator[List[str]]:
+    """
+    Runs a blocking line iterator (e.g., kubectl_utils.stream_logs) in a reader thread and
+    yields its lines in chunks of up to chunk_size.
+
+    A chunk is yielded as soon as it is full, or after config.LOG_STREAM_FLUSH_INTERVAL
+    seconds if fewer lines are pending. At most config.LOG_STREAM_MAX_PENDING_CHUNKS chunks
+    are buffered. Closing the generator (e.g., on client disconnect) cancels the upstream
+    read and kills its kubectl process.
+
+    The stream holds a log-stream slot of its priority class (scheduler.stream_scheduler) from the
+    first chunk asked for until it is closed.
+
+    Args:
+        func: Function returning an iterator of lines.
+        chunk_size (int): Maximum number of lines per yielded chunk.
+        priority (Optional[str]): Priority class of the stream. Defaults to the current request's class.
+
+    Returns:
+        AsyncIterator[List[str]]: Chunks of lines.
+
+    Raises:
+        Overloaded: If the scheduler refused the stream or dropped it while it waited for a slot
+                    (raised by the first iteration).
+    """
+    priority = priority or current_priority()
+    await stream_scheduler.acquire(priority)
+
+    loop = asyncio.get_running_loop()
+    buffer = _LineBuffer(loop, chunk_size, chunk_size * config.LOG_STREAM_MAX_PENDING_CHUNKS)
+    token = CancelToken()
+    context = contextvars.copy_context()
+    context.run(current_cancel_token.set, token)
+
+    def read():
+        try:
+            for line in func(*args, **kwargs):
+                buffer.put(line)
+        except _StreamClosed:
+            buffer.finish()
+        except BaseException as e:
+            buffer.finish(e)
+        else:
+            buffer.finish()
+
+    reader = threading.Thread(target=context.run, args=(read,), name="log-stream", daemon=True)
+    reader.start()
+    try:
+        partial = False
+        while True:
+            buffer.ready.clear()
+            batch = buffer.take(partial)
+            if batch:
+                partial = False
+                yield batch
+                continue
+            if buffer.finished:
+                if buffer.error is not None:
+                    raise buffer.error
+                return
+            try:
+                await asyncio.wait_for(buffer.ready.wait(), config.LOG_STREAM_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                partial = True
+    finally:
+        buffer.close()
+        token.cancel()
+        stream_scheduler.release(priority)
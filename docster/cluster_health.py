@@ -0,0 +1,421 @@
+# cluster_health.py
+
+"""
+This module reduces cluster state to a compact, ranked summary of unhealthy objects.
+
+Nodes, pods and deployments are scored on their own status. Some examples:
+    - NotReady node: 100
+    - CrashLoopBackOff container: 90
+    - deployment with unavailable replicas: 50-80
+    - pod Pending for too long: 50
+Warning events are aggregated per involved object and add to its score. An object with only
+warnings is listed too. Pods of the same owner failing for the same reason are folded into one
+entry, so a crash-looping deployment with 20 replicas takes one line, not twenty.
+
+ClusterHealth is incremental: apply() re-scores only the object that changed and adjusts running
+totals. The informers feed it watch events, so a summary costs time in proportion to the number of
+unhealthy objects, not the size of the cluster. For a one-off summary, reset() it with full lists.
+
+Classes:
+    ClusterHealth: Incrementally maintained health state and its ranked summary.
+
+Functions:
+    node_health / pod_health / deployment_health: Score one object.
+    summarize_objects: One-off summary of full object lists.
+    render_summary: The summary as a few lines of text for an LLM prompt.
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import config
+from backends import event_timestamp, format_age, parse_timestamp
+from utils import parse_duration
+
+# Waiting reasons that mean a container cannot run, with their scores.
+_WAITING_SCORES = {
+    "CrashLoopBackOff": 90,
+    "ImagePullBackOff": 70,
+    "ErrImagePull": 70,
+    "InvalidImageName": 70,
+    "CreateContainerConfigError": 70,
+    "CreateContainerError": 70,
+    "RunContainerError": 70,
+}
+_NODE_PRESSURE_SCORES = {"NetworkUnavailable": 80, "MemoryPressure": 60, "DiskPressure": 60, "PIDPressure": 60}
+_MAX_REASONS = 4
+
+# Informer resource -> kind label used in summaries (and in involvedObject.kind, lowercased).
+SUMMARY_KINDS = {"nodes": "node", "pods": "pod", "deployments": "deployment"}
+
+
+def _condition(obj: dict, condition_type: str) -> Optional[dict]:
+    for condition in obj.get("status", {}).get("conditions") or []:
+        if condition.get("type") == condition_type:
+            return condition
+    return None
+
+
+def _short(text: Optional[str], limit: int = 120) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def node_health(node: dict) -> dict:
+    """
+    Scores a node: NotReady, pressure conditions, cordoned.
+
+    Returns:
+        dict: {"score": int, "reasons": [str], "totals": {counter: amount}}.
+    """
+    score, reasons = 0, []
+    ready = _condition(node, "Ready")
+    is_ready = ready is not None and ready.get("status") == "True"
+    if not is_ready:
+        score = 100
+        reasons.append(f"NotReady ({ready.get('reason')})" if ready and ready.get("reason") else "NotReady")
+    for condition_type, condition_score in _NODE_PRESSURE_SCORES.items():
+        condition = _condition(node, condition_type)
+        if condition is not None and condition.get("status") == "True":
+            score = max(score, condition_score)
+            reasons.append(condition_type)
+    if node.get("spec", {}).get("unschedulable"):
+        score = max(score, 20)
+        reasons.append("cordoned")
+    return {"score": score, "reasons": reasons, "totals": {"nodes": 1, "nodes_ready": int(is_ready)}}
+
+
+def _pod_owner(pod: dict) -> Optional[str]:
+    # Deployment name for ReplicaSet-owned pods (ReplicaSet name minus its hash), else the owner's name.
+    for owner in pod.get("metadata", {}).get("ownerReferences") or []:
+        name = owner.get("name", "")
+        if owner.get("kind") == "ReplicaSet" and "-" in name:
+            return name.rsplit("-", 1)[0]
+        return name
+    return None
+
+
+def pod_health(pod: dict) -> dict:
+    """
+    Scores a pod: failed/unknown phase, waiting containers (CrashLoopBackOff, image pulls),
+    OOM kills and non-zero exits, running but not ready, and restarts. Pending pods are scored
+    when the summary is built, once they have been Pending for config.CLUSTER_SUMMARY_PENDING_AFTER.
+
+    Returns:
+        dict: {"score", "reasons", "totals", "restarts", "owner", "pending_since"}.
+    """
+    status = pod.get("status", {})
+    phase = status.get("phase") or "Unknown"
+    score, reasons = 0, []
+    if phase == "Failed":
+        score = 80
+        reasons.append("Failed" + (f" ({status['reason']})" if status.get("reason") else ""))
+    elif phase == "Unknown":
+        score = 70
+        reasons.append("phase Unknown")
+
+    restarts = 0
+    if phase != "Succeeded":
+        containers = (status.get("initContainerStatuses") or []) + (status.get("containerStatuses") or [])
+        for container in containers:
+            name = container.get("name", "?")
+            restarts += container.get("restartCount", 0) or 0
+            waiting = (container.get("state") or {}).get("waiting") or {}
+            terminated = (container.get("state") or {}).get("terminated") or {}
+            last = (container.get("lastState") or {}).get("terminated") or {}
+            if waiting.get("reason") in _WAITING_SCORES:
+                score = max(score, _WAITING_SCORES[waiting["reason"]])
+                reasons.append(f"{waiting['reason']} ({name})")
+            elif terminated and terminated.get("exitCode", 0) != 0:
+                score = max(score, 60)
+                reasons.append(f"{name} exited {terminated.get('exitCode')} ({terminated.get('reason', 'Error')})")
+            if last.get("reason") == "OOMKilled":
+                score = max(score, 60)
+                reasons.append(f"OOMKilled ({name})")
+        if phase == "Running" and not score:
+            ready = _condition(pod, "Ready")
+            if ready is not None and ready.get("status") != "True":
+                score = 40
+                reasons.append("Running but not ready")
+    if restarts >= config.CLUSTER_SUMMARY_MIN_RESTARTS:
+        score = max(score, 20) + min(restarts, 20)
+        reasons.append(f"{restarts} restarts")
+
+    pending_since = None
+    if phase == "Pending":
+        pending_since = pod.get("metadata", {}).get("creationTimestamp")
+        scheduled = _condition(pod, "PodScheduled")
+        if scheduled is not None and scheduled.get("status") == "False":
+            reasons.append(f"{scheduled.get('reason', 'Unschedulable')}: {_short(scheduled.get('message'), 80)}")
+    return {"score": score, "reasons": reasons, "restarts": restarts, "owner": _pod_owner(pod),
+            "pending_since": pending_since,
+            "totals": {"pods": 1, f"pods_{phase.lower()}": 1, "pod_restarts": restarts}}
+
+
+def deployment_health(deployment: dict) -> dict:
+    """
+    Scores a deployment: unavailable replicas, stalled rollout (Progressing=False), ReplicaFailure.
+
+    Returns:
+        dict: {"score": int, "reasons": [str], "totals": {counter: amount}}.
+    """
+    spec, status = deployment.get("spec", {}), deployment.get("status", {})
+    desired = spec.get("replicas", 1)
+    available = status.get("availableReplicas") or 0
+    score, reasons = 0, []
+    if desired and available < desired:
+        score = 50 + (30 * (desired - available)) // desired
+        reasons.append(f"{available}/{desired} replicas available")
+    progressing = _condition(deployment, "Progressing")
+    if progressing is not None and progressing.get("status") == "False":
+        score = max(score, 80)
+        reasons.append(f"rollout stalled ({progressing.get('reason', 'unknown')})")
+    failure = _condition(deployment, "ReplicaFailure")
+    if failure is not None and failure.get("status") == "True":
+        score = max(score, 70)
+        reasons.append(f"ReplicaFailure: {_short(failure.get('message'), 80)}")
+    return {"score": score, "reasons": reasons, "totals": {"deployments": 1, "deployments_degraded": int(score > 0)}}
+
+
+_SCORERS = {"nodes": node_health, "pods": pod_health, "deployments": deployment_health}
+
+
+def _object_key(obj: dict) -> Tuple[str, str]:
+    meta = obj.get("metadata", {})
+    return meta.get("namespace", ""), meta.get("name", "")
+
+
+class ClusterHealth:
+    """
+    Health of nodes, pods and deployments plus recent Warning events, maintained incrementally.
+
+    Only objects with something to report (score > 0 or Pending) are kept whole; for the others
+    only their contribution to the running totals is kept, so summary() does not walk them. Their
+    warnings are tracked separately. summary() is memoised until the state changes.
+
+    Attributes:
+        version (int): Incremented on every change that can alter the summary.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._health: Dict[str, Dict[Tuple[str, str], dict]] = {resource: {} for resource in _SCORERS}
+        self._healthy: Dict[str, Dict[Tuple[str, str], dict]] = {resource: {} for resource in _SCORERS}  # -> totals
+        self._totals: Counter = Counter()
+        self._warnings: Dict[Tuple[str, str, str], Dict[str, tuple]] = {}  # involved -> event key -> record
+        self._event_index: Dict[str, Tuple[str, str, str]] = {}  # event key -> involved
+        self.version = 0
+        self._memo = None
+
+    # --- updates ---
+
+    def apply(self, resource: str, event_type: str, obj: dict) -> None:
+        """
+        Applies one watch event ("ADDED", "MODIFIED", "DELETED") for nodes, pods, deployments or events.
+        """
+        with self._lock:
+            if resource == "events":
+                self._apply_event(event_type, obj)
+            elif resource in _SCORERS:
+                self._apply_object(resource, obj, deleted=event_type == "DELETED")
+            else:
+                return
+            self.version += 1
+
+    def reset(self, resource: str, objects: List[dict]) -> None:
+        """
+        Replaces all state for a resource (after a list or relist).
+        """
+        with self._lock:
+            if resource == "events":
+                self._warnings.clear()
+                self._event_index.clear()
+                for event in objects:
+                    self._apply_event("ADDED", event)
+            elif resource in _SCORERS:
+                for health in self._health[resource].values():
+                    self._totals.subtract(health["totals"])
+                for totals in self._healthy[resource].values():
+                    self._totals.subtract(totals)
+                self._health[resource].clear()
+                self._healthy[resource].clear()
+                for obj in objects:
+                    self._apply_object(resource, obj, deleted=False)
+            else:
+                return
+            self.version += 1
+
+    def _apply_object(self, resource: str, obj: dict, deleted: bool) -> None:
+        key = _object_key(obj)
+        old = self._health[resource].pop(key, None)
+        old_totals = old["totals"] if old is not None else self._healthy[resource].pop(key, None)
+        if old_totals is not None:
+            self._totals.subtract(old_totals)
+        if deleted:
+            return
+        health = _SCORERS[resource](obj)
+        self._totals.update(health["totals"])
+        if health["score"] or health.get("pending_since"):
+            self._health[resource][key] = health
+        else:
+            self._healthy[resource][key] = health["totals"]
+
+    def _apply_event(self, event_type: str, event: dict) -> None:
+        meta = event.get("metadata", {})
+        event_key = meta.get("uid") or f"{meta.get('namespace')}/{meta.get('name')}"
+        old_involved = self._event_index.pop(event_key, None)
+        if old_involved is not None:
+            records = self._warnings.get(old_involved, {})
+            records.pop(event_key, None)
+            if not records:
+                self._warnings.pop(old_involved, None)
+        if event_type == "DELETED" or event.get("type") != "Warning":
+            return
+        involved = event.get("involvedObject", {})
+        involved_key = ((involved.get("kind") or "").lower(), involved.get("namespace") or "", involved.get("name", ""))
+        record = (event.get("reason", ""), event.get("count") or 1, event_timestamp(event), _short(event.get("message")))
+        self._warnings.setdefault(involved_key, {})[event_key] = record
+        self._event_index[event_key] = involved_key
+
+    # --- summary ---
+
+    def summary(self, max_items: Optional[int] = None) -> dict:
+        """
+        Returns the ranked summary: totals, the top unhealthy objects and a rendered text.
+
+        Args:
+            max_items (Optional[int]): Entries listed; defaults to config.CLUSTER_SUMMARY_MAX_ITEMS.
+
+        Returns:
+            dict: {"totals", "unhealthy": [entries], "truncated": int, "text", "version", "generated_at"}.
+        """
+        max_items = max_items or config.CLUSTER_SUMMARY_MAX_ITEMS
+        now = time.time()
+        # Warning windows and Pending ages move with time, so a memo is good for one minute at most.
+        memo_key = (self.version, max_items, int(now // 60))
+        with self._lock:
+            if self._memo is not None and self._memo[0] == memo_key:
+                return self._memo[1]
+            entries, warning_count = self._entries(now)
+            totals = {name: count for name, count in self._totals.items() if count}
+        entries.sort(key=lambda e: (-e["score"], e["kind"], e["namespace"], e["name"]))
+        totals["warning_events"] = warning_count
+        totals["unhealthy_objects"] = sum(e.get("count", 1) for e in entries)
+        result = {"totals": totals, "unhealthy": entries[:max_items],
+                  "truncated": max(0, len(entries) - max_items), "version": self.version,
+                  "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}
+        result["text"] = render_summary(result)
+        with self._lock:
+            self._memo = (memo_key, result)
+        return result
+
+    def _entries(self, now: float) -> Tuple[List[dict], int]:
+        cutoff = now - parse_duration(config.CLUSTER_SUMMARY_EVENT_WINDOW)
+        pending_after = config.CLUSTER_SUMMARY_PENDING_AFTER
+
+        # Warning events in the window, per involved object
+        warnings, warning_count = {}, 0
+        for involved_key, records in self._warnings.items():
+            reasons = Counter()
+            last = None
+            for reason, count, timestamp, message in records.values():
+                ts = parse_timestamp(timestamp)
+                if ts is None or ts.timestamp() < cutoff:
+                    continue
+                reasons[reason] += count
+                if last is None or timestamp > last[0]:
+                    last = (timestamp, message)
+            if reasons:
+                warnings[involved_key] = (reasons, last[1])
+                warning_count += sum(reasons.values())
+
+        entries = {}
+        for resource, store in self._health.items():
+            kind = SUMMARY_KINDS[resource]
+            for (namespace, name), health in store.items():
+                score, reasons = health["score"], list(health["reasons"])
+                pending_since = parse_timestamp(health.get("pending_since"))
+                if pending_since is not None and now - pending_since.timestamp() >= pending_after:
+                    score = max(score, 50)
+                    reasons.insert(0, f"Pending for {format_age(health['pending_since'])}")
+                if score or (kind, namespace, name) in warnings:
+                    entries[(kind, namespace, name)] = {
+                        "kind": kind, "namespace": namespace or None, "name": name, "score": score,
+                        "reasons": reasons, "restarts": health.get("restarts"), "owner": health.get("owner"),
+                    }
+        for involved_key, (reasons, message) in warnings.items():
+            entry = entries.get(involved_key)
+            if entry is None:
+                kind, namespace, name = involved_key
+                entry = entries[involved_key] = {"kind": kind or "object", "namespace": namespace or None,
+                                                 "name": name, "score": 0, "reasons": [], "restarts": None,
+                                                 "owner": None}
+            total = sum(reasons.values())
+            entry["score"] += 10 + min(total, 20) if not entry["score"] else min(total // 5, 10)
+            entry["warnings"] = total
+            entry["reasons"].append("warnings: " + ", ".join(f"{r} x{c}" for r, c in reasons.most_common(2))
+                                    + f' (last: "{message}")')
+        return _fold_replicas(list(entries.values())), warning_count
+
+
+def _fold_replicas(entries: List[dict]) -> List[dict]:
+    # Pods with the same owner and the same leading reason become one entry.
+    groups, result = {}, []
+    for entry in entries:
+        if entry["kind"] == "pod" and entry.get("owner") and entry["reasons"]:
+            key = (entry["namespace"], entry["owner"], entry["reasons"][0].split(" (")[0])
+            groups.setdefault(key, []).append(entry)
+        else:
+            result.append(entry)
+    for (namespace, owner, _), pods in groups.items():
+        if len(pods) == 1:
+            result.append(pods[0])
+            continue
+        top = max(pods, key=lambda e: e["score"])
+        result.append(dict(top, name=f"{owner}-*", count=len(pods),
+                           restarts=sum(p.get("restarts") or 0 for p in pods),
+                           warnings=sum(p.get("warnings") or 0 for p in pods) or None,
+                           examples=sorted(p["name"] for p in pods)[:3]))
+    for entry in result:
+        entry["reasons"] = entry["reasons"][:_MAX_REASONS]
+        entry.pop("owner", None)
+    return result
+
+
+def render_summary(summary: dict) -> str:
+    """
+    Renders a summary as a few lines of text for an LLM prompt.
+    """
+    t = summary["totals"]
+    phases = ", ".join(f"{t[key]} {key[5:].capitalize()}" for key in
+                       ("pods_running", "pods_pending", "pods_failed", "pods_unknown", "pods_succeeded") if t.get(key))
+    lines = [
+        f"Nodes: {t.get('nodes_ready', 0)}/{t.get('nodes', 0)} Ready. "
+        f"Pods: {t.get('pods', 0)} ({phases or 'none'}), {t.get('pod_restarts', 0)} restarts. "
+        f"Deployments: {t.get('deployments', 0)}, {t.get('deployments_degraded', 0)} degraded. "
+        f"Warning events ({config.CLUSTER_SUMMARY_EVENT_WINDOW}): {t.get('warning_events', 0)}."
+    ]
+    if not summary["unhealthy"]:
+        lines.append("No unhealthy objects.")
+        return "\n".join(lines)
+    lines.append(f"Unhealthy objects, most severe first ({t.get('unhealthy_objects', 0)} in total):")
+    for i, entry in enumerate(summary["unhealthy"], 1):
+        where = f"{entry['namespace']}/{entry['name']}" if entry["namespace"] else entry["name"]
+        count = f" ({entry['count']} pods)" if entry.get("count") else ""
+        lines.append(f"{i}. {entry['kind']} {where}{count} [{entry['score']}]: {'; '.join(entry['reasons'])}")
+    if summary["truncated"]:
+        lines.append(f"... and {summary['truncated']} more.")
+    return "\n".join(lines)
+
+
+def summarize_objects(objects: Dict[str, List[dict]], max_items: Optional[int] = None) -> dict:
+    """
+    Builds a summary from full lists of objects, e.g. {"nodes": [...], "pods": [...], ...}.
+    """
+    health = ClusterHealth()
+    for resource, items in objects.items():
+        health.reset(resource, items)
+    return health.summary(max_items)
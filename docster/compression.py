@@ -0,0 +1,146 @@
+# compression.py
+
+"""
+This module compresses bridge responses for clients that accept it (Accept-Encoding).
+
+The encoding is the first of config.COMPRESSION_ENCODINGS that the client accepts: zstd (only if
+the optional 'zstandard' package is installed) or gzip. Buffered responses smaller than
+config.COMPRESSION_MIN_BYTES are sent as they are. Streamed responses (NDJSON/SSE logs, event
+subscriptions) are compressed message by message with a flush after each, so every chunk reaches
+the client as soon as it would have uncompressed.
+
+The middleware sits inside the metrics middleware (which then records the bytes sent) and outside
+secret masking (which must see the plain text).
+
+Classes:
+    CompressionMiddleware: ASGI middleware compressing text response bodies.
+
+Functions:
+    choose_encoding: Pick the response encoding for an Accept-Encoding header.
+"""
+
+import zlib
+from typing import Dict, Optional
+
+import config
+
+try:
+    import zstandard
+except ImportError:  # Optional; gzip is always available
+    zstandard = None
+
+# Bodies worth compressing (same set the masking middleware treats as text).
+_TEXT_TYPES = (b"application/json", b"application/x-ndjson", b"text/")
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._stream = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip header and trailer
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._stream.compress(data) + self._stream.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _Zstd:
+    def __init__(self, level: int):
+        self._stream = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._stream.compress(data) + self._stream.flush(flush)
+
+
+_ENCODERS = {"gzip": _Gzip}
+if zstandard is not None:
+    _ENCODERS["zstd"] = _Zstd
+
+
+def _accepted(header: str) -> Dict[str, float]:
+    """
+    Parses Accept-Encoding into encoding -> q value.
+    """
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(header: Optional[str]) -> Optional[str]:
+    """
+    Returns the first of config.COMPRESSION_ENCODINGS that is available here and accepted
+    by the client (explicitly or through "*"), or None to send the body uncompressed.
+    """
+    if not header:
+        return None
+    accepted = _accepted(header)
+    for name in config.COMPRESSION_ENCODINGS:
+        if name in _ENCODERS and accepted.get(name, accepted.get("*", 0)) > 0:
+            return name
+    return None
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses text response bodies with the encoding the client prefers.
+
+    Responses that already carry a Content-Encoding are left alone. A buffered body is compressed
+    in one go with a new Content-Length; a streamed body is compressed per message and flushed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.COMPRESSION_ENABLED:
+            return await self.app(scope, receive, send)
+        request_headers = dict(scope.get("headers", []))
+        encoding = choose_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        state = {"start": None, "encoder": None}
+
+        async def compressed_send(message):
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                if headers.get(b"content-type", b"").startswith(_TEXT_TYPES) and b"content-encoding" not in headers:
+                    state["start"] = message  # Held until the first body part tells us its size
+                    return
+                return await send(message)
+
+            if message["type"] != "http.response.body" or state["start"] is None and state["encoder"] is None:
+                return await send(message)
+
+            body, more = message.get("body", b""), message.get("more_body", False)
+            if state["encoder"] is None:
+                start, state["start"] = state["start"], None
+                headers = [(k, v) for k, v in start.get("headers", []) if k != b"content-length"]
+                headers.append((b"vary", b"Accept-Encoding"))
+                if not more and len(body) < config.COMPRESSION_MIN_BYTES:
+                    headers.append((b"content-length", str(len(body)).encode()))
+                    await send(dict(start, headers=headers))
+                    return await send(message)
+                encoder = _ENCODERS[encoding](config.COMPRESSION_LEVELS.get(encoding, 3))
+                headers.append((b"content-encoding", encoding.encode()))
+                if not more:
+                    data = encoder.compress(body, final=True)
+                    headers.append((b"content-length", str(len(data)).encode()))
+                    await send(dict(start, headers=headers))
+                    return await send({"type": "http.response.body", "body": data, "more_body": False})
+                await send(dict(start, headers=headers))
+                state["encoder"] = encoder
+
+            await send({"type": "http.response.body", "body": state["encoder"].compress(body, final=not more),
+                        "more_body": more})
+
+        await self.app(scope, receive, compressed_send)
@@ -1,5 +1,8 @@
 # config.py
 
+import json as _json
+import os as _os
+
 # Server configuration for the Bridge API
 SERVER_HOST = "127.0.0.1"  # Use "0.0.0.0" if you want the server accessible from external hosts
 SERVER_PORT = 8000         # Port where the API server will listen
@@ -9,5 +12,147 @@ DEFAULT_NAMESPACE = "default"   # The Kubernetes namespace to use by default
 LOG_CHUNK_SIZE = 100            # Number of log lines per chunk (for large log outputs)
 DEFAULT_LOG_SINCE_TIME = "5m"   # Default time window for fetching logs (e.g., last 5 minutes)
 
+# Cluster access backend
+# "kubectl" forks the kubectl binary for every call (the original behaviour).
+# "native" keeps one long-lived, connection-pooled HTTP client to the Kubernetes API server.
+CLUSTER_BACKEND = "kubectl"
+KUBECTL_BINARY = "kubectl"      # Binary used by the "kubectl" backend (can point to a wrapper script)
+
+# Settings for the "native" backend
+KUBE_API_URL = None             # e.g. "https://10.0.0.1:6443". None = in-cluster service account, else `kubectl proxy` on :8001
+KUBE_TOKEN_FILE = "/var/run/secrets/kubernetes.io/serviceaccount/token"  # Bearer token, used if the file exists
+KUBE_CA_FILE = "/var/run/secrets/kubernetes.io/serviceaccount/ca.crt"    # CA bundle, used if the file exists
+KUBE_VERIFY_TLS = True          # Set to False only for local test clusters with self-signed certs
+KUBE_POOL_SIZE = 10             # Max pooled keep-alive connections to the API server
+KUBE_REQUEST_TIMEOUT = 30       # Seconds before a single API request is abandoned
+
+# Async execution of cluster calls (handlers never block the event loop)
+MAX_CONCURRENT_CLUSTER_CALLS = 8  # Cap on cluster calls running at once; extra requests wait for a slot
+CLUSTER_CALL_TIMEOUT = 30         # Seconds before a cluster call is abandoned (HTTP 504) and its process killed
+DISCONNECT_POLL_INTERVAL = 0.5    # Seconds between client-disconnect checks while a call is running
+
+# Request coalescing and result cache (identical in-flight queries share one cluster call)
+CACHE_MAX_ENTRIES = 1024     # LRU bound on cached results
+CACHE_TTLS = {               # Seconds a result is reused, per resource (0 = coalesce only, no caching)
+    "describe_pod": 5,
+    "events": 3,
+    "service": 30,
+    "cluster_summary": 10,
+    "workload_selector": 30,  # Pod selector of a deployment/statefulset (/get-workload-logs)
+    "object_names": 30,       # Object names per resource (/object-names)
+}
+
+# Batch tool calls (/api/batch)
+BATCH_MAX_CALLS = 32         # Calls accepted in one batch
+BATCH_MAX_CONCURRENCY = 8    # Calls of one batch running at the same time
+
+# Events API (/get-events returns structured, server-side filtered, paginated events)
+EVENTS_DEFAULT_LIMIT = 500   # Events returned per page unless the caller asks for fewer
+EVENTS_MAX_LIMIT = 5000      # Largest page a caller may request
+EVENTS_LISTING_TTL = 300     # Seconds a listing with more pages is kept for its continue tokens
+EVENTS_MAX_LISTINGS = 32     # Paged listings kept at once (LRU); an evicted one's next page is HTTP 410
+
+# Streaming logs (/get-logs emits LogChunks of LOG_CHUNK_SIZE lines as they are read)
+MAX_CONCURRENT_LOG_STREAMS = 16    # Open log streams (including follow=true tails) allowed at once
+LOG_STREAM_MAX_PENDING_CHUNKS = 4  # Chunks buffered per stream before the reader waits for the client
+LOG_STREAM_FLUSH_INTERVAL = 0.5    # Seconds before a partial chunk is sent anyway (keeps live tails responsive)
+
+# Secret masking (applied to every bridge response; see masking.py for the rules)
+SECRET_MASKING_ENABLED = True
+SECRET_MASK = "***"               # Replacement text for masked secrets
+SECRET_MASK_RULES = ["key_value", "bearer", "jwt", "aws_access_key", "url_credentials", "base64_env"]
+SECRET_MASK_EXTRA_RULES = {}      # name -> regex; a (?P<secret>...) group masks only that part of the match
+SECRET_MASK_EXTRA_TRIGGERS = {}   # name -> lowercase regexes, one of which occurs on every line the rule matches
+
+# Metrics (GET /metrics, Prometheus text format; see metrics.py)
+METRICS_ENABLED = True
+METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]  # Seconds
+METRICS_SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216]  # Bytes
+
+# Cluster health snapshot (/cluster-summary; see cluster_health.py for the scoring)
+CLUSTER_SUMMARY_MAX_ITEMS = 25      # Unhealthy objects listed, most severe first
+CLUSTER_SUMMARY_EVENT_WINDOW = "1h" # Warning events older than this are ignored
+CLUSTER_SUMMARY_MIN_RESTARTS = 3    # Container restarts before a pod is reported for restarting
+CLUSTER_SUMMARY_PENDING_AFTER = 300 # Seconds a pod may be Pending before it is reported
+
+# Event subscriptions (/subscribe-events pushes new and changed events over SSE; see event_hub.py)
+MAX_EVENT_SUBSCRIBERS = 64     # Open subscriptions allowed at once
+EVENT_STREAM_BUFFER = 1000     # Recent deltas kept so a reconnecting subscriber (Last-Event-ID) misses nothing
+EVENT_STREAM_QUEUE = 256       # Deltas queued per subscriber before a slow one is disconnected
+EVENT_STREAM_KEEPALIVE = 15    # Seconds between keepalive comments on an idle stream
+
+# On-disk log store (/search-logs searches pod logs copied to local disk; see log_store.py)
+LOG_STORE_ENABLED = False
+LOG_STORE_DIR = "log_data"           # Directory of the segment files
+LOG_STORE_NAMESPACE = None           # Namespace whose pods are ingested (None = all namespaces)
+LOG_STORE_SELECTOR = ""              # Label selector of the ingested pods, e.g. "app=backend" ("" = all)
+LOG_STORE_INTERVAL = 15              # Seconds between ingestion passes
+LOG_STORE_INITIAL_SINCE = "1h"       # How far back the log of a newly seen container is read
+LOG_STORE_FETCH_CONCURRENCY = 4      # Container logs read at the same time during a pass
+LOG_STORE_SEGMENT_BYTES = 64 * 1024 * 1024  # Size at which a segment is sealed and a new one started
+LOG_STORE_MAX_BYTES = 1024 * 1024 * 1024    # Retention: the oldest segments are deleted beyond this
+LOG_STORE_BLOCK_BYTES = 32 * 1024    # Granularity of the time and word indexes (smaller = less read per search)
+LOG_SEARCH_MAX_RESULTS = 1000        # Largest 'limit' a search may ask for
+
+# Workload logs (/get-workload-logs merges the logs of all pods of a deployment, statefulset or selector)
+WORKLOAD_LOG_MAX_CONTAINERS = 100   # Containers one request may merge
+WORKLOAD_LOG_CONCURRENCY = 8        # Container logs being opened at the same time
+WORKLOAD_LOG_BUFFER_LINES = 256     # Lines read ahead per container (bounds the merge's memory)
+
+# Response compression (gzip, or zstd if the 'zstandard' package is installed; see compression.py)
+COMPRESSION_ENABLED = True
+COMPRESSION_ENCODINGS = ["zstd", "gzip"]     # Server preference among those the client accepts
+COMPRESSION_LEVELS = {"zstd": 3, "gzip": 6}  # Higher = smaller but slower
+COMPRESSION_MIN_BYTES = 1024                 # Smaller buffered responses are sent uncompressed
+
+# Production server mode (python main.py --workers N; see server.py and health.py)
+SERVER_WORKERS = None           # None = development server with auto-reload; N = N worker processes, no reload
+SERVER_GRACEFUL_SHUTDOWN = 20   # Seconds in-flight requests get after SIGTERM before they are cancelled
+SHARED_CACHE_PATH = None        # SQLite file through which workers share cached results (None = per process;
+                                # with several workers the launcher picks a file in the temp directory)
+HEALTH_CHECK_INTERVAL = 5       # Seconds a backend probe result is reused by /readyz
+HEALTH_CHECK_TIMEOUT = 3        # Seconds before a backend probe counts as failed
+
+# Object names (/object-names; the chat client matches questions against them to prefetch tool data)
+OBJECT_NAME_RESOURCES = ["pods", "deployments", "statefulsets", "services"]  # Resources a caller may ask for
+
+# Change-only describes (/describe-pod and /get-svc with diff=true or since_version; see object_diff.py)
+SESSION_HEADER = "X-Session-Id"  # Identifies the caller whose last-seen versions diff=true compares with
+SNAPSHOT_MAX_ENTRIES = 4096      # Snapshots and per-session last versions kept in memory (LRU)
+SNAPSHOT_TTL = 3600              # Seconds a snapshot or last version is kept after it was written
+
+# Priority scheduling of cluster calls and log streams (see scheduler.py; all classes share
+# MAX_CONCURRENT_CLUSTER_CALLS, and for streams MAX_CONCURRENT_LOG_STREAMS)
+PRIORITY_HEADER = "X-Priority"  # Request header naming the class: interactive, tool or background
+DEFAULT_PRIORITY = "tool"       # Class of requests without the header
+SCHEDULER_LIMITS = {"interactive": 8, "tool": 5, "background": 2}         # Calls of a class running at once
+SCHEDULER_STREAM_LIMITS = {"interactive": 16, "tool": 10, "background": 4}  # Log streams of a class open at once
+SCHEDULER_QUEUE_LIMITS = {"interactive": 64, "tool": 64, "background": 16}  # Calls (or streams) waiting per class;
+                                                                            # more get HTTP 429
+SCHEDULER_MAX_WAIT = {"interactive": None, "tool": 30, "background": 5}     # Seconds a call may wait for a slot
+                                                                            # before it is dropped (HTTP 429; None = no limit)
+SCHEDULER_MAX_RETRY_AFTER = 30  # Upper bound of the Retry-After seconds sent with HTTP 429
+
+# Watch-driven informer cache (serves /get-events, /describe-pod and /get-svc from memory)
+# Informers always use the API server directly (see the "native" backend settings above).
+INFORMER_ENABLED = False
+INFORMER_RESOURCES = ["pods", "events", "services", "nodes", "deployments"]
+INFORMER_MAX_OBJECTS = {"pods": 20000, "events": 50000, "services": 5000,  # Per-resource memory bound
+                        "nodes": 5000, "deployments": 10000}
+INFORMER_LIST_PAGE_SIZE = 500   # Objects per page when (re)listing
+INFORMER_WATCH_TIMEOUT = 300    # Seconds per watch request before it is re-established
+INFORMER_STALE_AFTER = 30       # Seconds without a watch connection before cached data is considered stale
+INFORMER_MAX_BACKOFF = 30       # Max seconds between retries after list/watch errors
+
+# Settings the multi-worker launcher passes to its worker processes, as JSON (see server.py).
+# Only the settings read here can be passed; other names in BRIDGE_CONFIG are ignored.
+_launcher = _json.loads(_os.environ.get("BRIDGE_CONFIG") or "{}")
+SERVER_WORKERS = _launcher.get("SERVER_WORKERS", SERVER_WORKERS)
+SHARED_CACHE_PATH = _launcher.get("SHARED_CACHE_PATH", SHARED_CACHE_PATH)
+CLUSTER_BACKEND = _launcher.get("CLUSTER_BACKEND", CLUSTER_BACKEND)
+KUBECTL_BINARY = _launcher.get("KUBECTL_BINARY", KUBECTL_BINARY)
+KUBE_API_URL = _launcher.get("KUBE_API_URL", KUBE_API_URL)
+KUBE_TOKEN_FILE = _launcher.get("KUBE_TOKEN_FILE", KUBE_TOKEN_FILE)
+
 # Additional configurations can be added here if needed
 # For example, you might include paths to your kubeconfig file, authentication tokens, etc.
@@ -0,0 +1,186 @@
+# conversation.py
+
+"""
+This module keeps the chat client's conversation within a token budget.
+
+The system prompt is pinned. Older turns are evicted into a one-line-per-turn summary once the
+history exceeds its budget, and large tool outputs are stored by reference (an excerpt stays
+inline) so a single /logs dump does not crowd out the rest of the conversation.
+
+The messages are meant for Ollama's /api/chat. Eviction trims the history down to a low-water
+mark rather than one turn at a time, so the message prefix stays identical for several turns and
+the server can keep reusing its KV cache for it.
+
+Classes:
+    ConversationContext: Token-budgeted message history with pinned system prompt and stored outputs.
+
+Functions:
+    estimate_tokens: Cheap token estimate for budgeting (about 4 characters per token).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the token count of text without a tokenizer (about 4 characters per token).
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: Estimated number of tokens.
+    """
+    return len(text) // 4 + 1
+
+
+class ConversationContext:
+    """
+    Conversation history for /api/chat with a token budget.
+
+    Args:
+        system_prompt (str): Pinned first message; never evicted.
+        token_budget (int): Tokens allowed for history (system prompt, summary and turns).
+        inline_output_tokens (int): Messages larger than this are stored by reference with an excerpt inline.
+        summary_tokens (int): Tokens allowed for the summary of evicted turns.
+        low_water (float): Fraction of token_budget kept after an eviction.
+        max_stored_outputs (int): Stored outputs kept; the oldest are dropped first.
+    """
+
+    EXCERPT_LINES = 8  # Lines kept inline from each end of a stored output
+
+    def __init__(self, system_prompt: str, token_budget: int = 6000, inline_output_tokens: int = 800,
+                 summary_tokens: int = 400, low_water: float = 0.75, max_stored_outputs: int = 50):
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.inline_output_tokens = inline_output_tokens
+        self.summary_tokens = summary_tokens
+        self.low_water = low_water
+        self.max_stored_outputs = max_stored_outputs
+        self.turns: List[dict] = []  # {"role", "content", "tokens"}
+        self.summary_lines: List[str] = []
+        self.outputs: "OrderedDict[str, str]" = OrderedDict()
+        self.evicted_turns = 0
+        self._next_ref = 1
+        self._lock = threading.Lock()  # The monitor thread appends concurrently with the chat loop
+
+    # --- recording ---
+
+    def add(self, role: str, content: str) -> str:
+        """
+        Appends a turn, storing it by reference if it is large, and evicts old turns if over budget.
+
+        Args:
+            role (str): "user", "assistant" or "tool".
+            content (str): Message text.
+
+        Returns:
+            str: The content as recorded (the excerpt and reference for large messages).
+        """
+        with self._lock:
+            content = self._compact(content)
+            self.turns.append({"role": role, "content": content, "tokens": estimate_tokens(content)})
+            if self.tokens() > self.token_budget:
+                self._evict(int(self.token_budget * self.low_water))
+            return content
+
+    def compact(self, content: str) -> str:
+        """
+        Returns content unchanged if it is small, else an excerpt plus a "ref:<n>" to the stored full text.
+        """
+        with self._lock:
+            return self._compact(content)
+
+    def _compact(self, content: str) -> str:
+        if estimate_tokens(content) <= self.inline_output_tokens:
+            return content
+        ref = f"ref:{self._next_ref}"
+        self._next_ref += 1
+        self.outputs[ref] = content
+        while len(self.outputs) > self.max_stored_outputs:
+            self.outputs.popitem(last=False)
+        lines = content.splitlines()
+        if len(lines) > 2 * self.EXCERPT_LINES:
+            excerpt = lines[:self.EXCERPT_LINES] + [f"... ({len(lines) - 2 * self.EXCERPT_LINES} lines omitted) ..."] \
+                + lines[-self.EXCERPT_LINES:]
+        else:
+            excerpt = [content[:self.inline_output_tokens * 2] + " ..."]
+        header = f"[Large output stored as {ref}: {len(lines)} lines. Use read_output_api(\"{ref}\") to read more.]"
+        return "\n".join([header] + excerpt)
+
+    def read_output(self, ref: str, offset: int = 0, lines: int = 100) -> Optional[str]:
+        """
+        Returns lines [offset, offset + lines) of a stored output, or None if the reference is unknown.
+        """
+        with self._lock:
+            content = self.outputs.get(ref)
+        if content is None:
+            return None
+        all_lines = content.splitlines()
+        return "\n".join(all_lines[offset:offset + lines])
+
+    # --- eviction ---
+
+    def _evict(self, target_tokens: int) -> None:
+        while self.turns and self.tokens() > target_tokens:
+            turn = self.turns.pop(0)
+            self.evicted_turns += 1
+            first_line = next((line.strip() for line in turn["content"].splitlines() if line.strip()), "")
+            if len(first_line) > 120:
+                first_line = first_line[:117] + "..."
+            self.summary_lines.append(f"- {turn['role']}: {first_line}")
+            while self.summary_lines and estimate_tokens("\n".join(self.summary_lines)) > self.summary_tokens:
+                self.summary_lines.pop(0)
+
+    def summary(self) -> Optional[str]:
+        if not self.summary_lines:
+            return None
+        return f"Earlier in this conversation ({self.evicted_turns} older messages, summarised):\n" \
+            + "\n".join(self.summary_lines)
+
+    def tokens(self) -> int:
+        """
+        Estimated tokens of everything sent with each request (system prompt, summary and turns).
+        """
+        summary = self.summary()
+        return estimate_tokens(self.system_prompt) + (estimate_tokens(summary) if summary else 0) \
+            + sum(turn["tokens"] for turn in self.turns)
+
+    # --- output ---
+
+    def messages(self, prompt: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Returns /api/chat messages: system prompt, summary of evicted turns, kept turns and, if
+        given, the prompt as a final user message (not recorded).
+        """
+        with self._lock:
+            messages = [{"role": "system", "content": self.system_prompt}]
+            summary = self.summary()
+            if summary:
+                messages.append({"role": "system", "content": summary})
+            messages.extend({"role": turn["role"], "content": turn["content"]} for turn in self.turns)
+        if prompt is not None:
+            messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def clear(self) -> None:
+        """
+        Drops all turns, the summary and stored outputs; the system prompt stays.
+        """
+        with self._lock:
+            self.turns.clear()
+            self.summary_lines.clear()
+            self.outputs.clear()
+            self.evicted_turns = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tokens": self.tokens(),
+                "token_budget": self.token_budget,
+                "turns": len(self.turns),
+                "evicted_turns": self.evicted_turns,
+                "stored_outputs": len(self.outputs),
+            }
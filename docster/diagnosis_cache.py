@@ -0,0 +1,214 @@
+# diagnosis_cache.py
+
+"""
+This module keeps the chat client's diagnoses on disk. When the same question is asked again and
+the cluster data behind it has not changed, the client can return the earlier diagnosis at once
+instead of making a turn's two LLM calls.
+
+An entry is keyed by the model and the question's intent (the prompt, lowercased, with punctuation
+and extra whitespace removed). It holds the tool calls the LLM chose for that question, a digest of
+their results, and the diagnosis. When the question comes again, the client runs the same tool
+calls (one /api/batch round trip) and compares digests. Results are normalised before hashing, so
+that values which change while the cluster stays the same do not count: timestamps, ages ("5m",
+"3h"), event repeat counts ("x12 over 10m") and the line counts of compacted logs.
+
+An entry is only used for a question that names every object its tool calls look at. A follow-up
+such as "why?" depends on the conversation, not only on the question, and so is never served
+from the cache.
+
+Entries are JSON files in one directory. Once the directory grows beyond max_bytes, the least
+recently used entries are deleted.
+
+Classes:
+    DiagnosisCache: Size-bounded on-disk store of diagnoses.
+
+Functions:
+    intent_key: Normalise a question into its intent.
+    normalize_output: Strip volatile values from a tool result.
+    results_digest: Content hash of a turn's normalised tool results.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from typing import List, Optional, Tuple
+
+# Tool arguments that name the object a call looks at
+TARGET_ARGUMENTS = ("pod_name", "service_name", "deployment", "statefulset", "selector", "query")
+
+_PUNCTUATION = re.compile(r"[^\w\s./:=-]+")
+_DATETIME = re.compile(r"\d{4}[-/]\d{2}[-/]\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?")
+_TIME = re.compile(r"\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b")
+_DURATION = r"\d+(?:ms|[smhd])(?:\d+[smh])*"
+_VOLATILE = [
+    (re.compile(rf"\(x\d+ over {_DURATION}\)"), "(x* over *)"),       # kubectl describe: "3m (x12 over 10m)"
+    (re.compile(rf"(?<=  ){_DURATION}(?=  | \(x\*)"), "<age>"),       # Age columns ("Warning  BackOff  5m  ...")
+    (re.compile(rf"\b{_DURATION} ago\b"), "<age> ago"),
+    (re.compile(rf"(?<=\bfor ){_DURATION}\b"), "<age>"),               # "Pending for 5m"
+    (re.compile(r"^\[x\d+", re.MULTILINE), "[x*"),                     # Compacted logs: "[x42 ...] template"
+    (re.compile(r"^\[\d+ log lines compacted into", re.MULTILINE), "[* log lines compacted into"),
+]
+
+
+def intent_key(prompt: str) -> str:
+    """
+    Returns the question's intent: the prompt lowercased, without punctuation (object names keep
+    their '-', '.', '/' and ':') and with whitespace runs collapsed.
+    """
+    return " ".join(_PUNCTUATION.sub(" ", prompt.lower()).split()).strip(" .:")
+
+
+def normalize_output(text: str) -> str:
+    """
+    Replaces timestamps, ages and repeat counts in a tool result with placeholders.
+    """
+    text = _DATETIME.sub("<time>", text)
+    text = _TIME.sub("<time>", text)
+    for pattern, replacement in _VOLATILE:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def results_digest(tool_results: List[Tuple[str, dict, str]]) -> str:
+    """
+    Hashes (name, arguments, result text) triples after normalize_output.
+    """
+    normalized = [[name, arguments, normalize_output(text)] for name, arguments, text in tool_results]
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _names_targets(intent: str, calls: List[Tuple[str, dict]]) -> bool:
+    # Whether the question itself names every object the calls look at.
+    for _, arguments in calls:
+        for name in TARGET_ARGUMENTS:
+            value = arguments.get(name)
+            if value and intent_key(str(value)) not in intent:
+                return False
+    return True
+
+
+class DiagnosisCache:
+    """
+    Diagnoses on disk, keyed by model and question intent, LRU-bounded by total size.
+
+    Counters: hits (served from the cache), stale (an entry was found but the tool results had
+    changed), misses (no usable entry).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 5_000_000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.counters = {"hits": 0, "stale": 0, "misses": 0}
+
+    def _path(self, model: str, intent: str) -> str:
+        key = hashlib.sha256(f"{model}\0{intent}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def lookup(self, model: str, prompt: str) -> Optional[dict]:
+        """
+        Returns the entry for this question (keys: calls, digest, diagnosis, decision, created), or
+        None if there is none or the question does not name the objects its tool calls look at.
+        """
+        intent = intent_key(prompt)
+        path = self._path(model, intent)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)  # Recently used
+        except (OSError, ValueError):
+            entry = None
+        if entry is None or entry.get("intent") != intent or not _names_targets(intent, entry["calls"]):
+            self.counters["misses"] += 1
+            return None
+        entry["calls"] = [(name, arguments) for name, arguments in entry["calls"]]
+        return entry
+
+    def validate(self, entry: dict, digest: str) -> bool:
+        """
+        Whether the entry still applies to tool results with this digest (counted as a hit or stale).
+        """
+        fresh = entry["digest"] == digest
+        self.counters["hits" if fresh else "stale"] += 1
+        return fresh
+
+    def store(self, model: str, prompt: str, calls: List[Tuple[str, dict]], digest: str, diagnosis: str,
+              decision: str) -> bool:
+        """
+        Saves a diagnosis, then deletes the least recently used entries beyond max_bytes.
+        Questions that do not name their tool calls' objects are not stored.
+
+        Args:
+            model (str): The LLM that answered.
+            prompt (str): The question.
+            calls (list): (name, arguments) of the tool calls the LLM chose.
+            digest (str): results_digest of their results.
+            diagnosis (str): The LLM's answer.
+            decision (str): The LLM's tool-call message, replayed into the conversation on reuse.
+
+        Returns:
+            bool: Whether the entry was saved.
+        """
+        intent = intent_key(prompt)
+        if not _names_targets(intent, calls):
+            return False
+        entry = {"intent": intent, "model": model, "calls": calls, "digest": digest, "diagnosis": diagnosis,
+                 "decision": decision, "created": time.time()}
+        path = self._path(model, intent)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + ".tmp", "w") as f:
+                json.dump(entry, f)
+            os.replace(path + ".tmp", path)  # Readers never see a partial entry
+        except (OSError, TypeError, ValueError):
+            return False
+        self._evict()
+        return True
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        # (last use, size, path) of every entry, oldest first.
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Deleted by another client meanwhile
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self) -> int:
+        """
+        Deletes every entry. Returns how many there were.
+        """
+        entries = self._entries()
+        for _, _, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return len(entries)
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return dict(self.counters, entries=len(entries), bytes=sum(size for _, size, _ in entries),
+                    max_bytes=self.max_bytes, directory=self.directory)
@@ -0,0 +1,234 @@
+# event_hub.py
+
+"""
+This module pushes new and changed cluster events to subscribers (GET /subscribe-events).
+
+One watch on the API server feeds every subscriber. It is the events informer when informers
+are enabled, or else a private events informer that the hub starts for its first subscriber.
+Deltas are deduplicated before they fan out: an event is delivered when its uid is new or when
+its count, last timestamp or message changes. A relist after 410 Gone, or a watch update that
+only bumps the resourceVersion, therefore delivers nothing twice.
+
+Each delta is encoded once and numbered. Its SSE id is "<boot id>:<number>", where the boot id
+is random per hub, so ids from another worker (or from before a restart) are never mistaken for
+this hub's numbers. The last config.EVENT_STREAM_BUFFER deltas are kept, so a subscriber that
+reconnects to the same hub with its last id (SSE Last-Event-ID) gets exactly what it missed;
+with an id of another hub it gets a gap. A subscriber that falls more than config.EVENT_STREAM_QUEUE deltas behind is
+disconnected and can resume the same way.
+
+Classes:
+    Subscription: One subscriber's filters and queue.
+    EventHub: Deduplicates informer events into numbered deltas and fans them out.
+
+Functions:
+    get_hub: The process-wide hub.
+    stop_hub: Detach the hub from its informer (stopping a private one).
+"""
+
+import asyncio
+import json
+import threading
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import config
+import informer
+from backends import NativeBackend, event_timestamp
+from kubectl_utils import filter_events, to_event
+
+class Subscription:
+    """
+    One subscriber: its filters, its event loop and a bounded queue of encoded deltas.
+
+    Args:
+        namespace (Optional[str]): Only events in this namespace (None = all namespaces).
+        filters (dict): event_type / involved_object / reason, as for filter_events.
+    """
+
+    def __init__(self, namespace: Optional[str], filters: dict):
+        self.namespace = namespace
+        self.filters = {key: value for key, value in filters.items() if value}
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=config.EVENT_STREAM_QUEUE)
+        self.overflowed = False
+
+    def matches(self, namespace: str, event: dict) -> bool:
+        if self.namespace is not None and namespace != self.namespace:
+            return False
+        return not self.filters or bool(filter_events([event], **self.filters))
+
+    def offer(self, delta: Tuple[int, str]) -> None:
+        # Runs on the subscriber's event loop.
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(delta)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)  # Tells the stream to close; the client resumes from its last id
+
+
+class EventHub:
+    """
+    Turns events informer notifications into numbered, deduplicated deltas for subscribers.
+
+    Attributes:
+        seq (int): Number of the last delta published.
+        boot_id (str): Random id of this hub, the prefix of its delta ids.
+        upstream (Optional[informer.Informer]): The informer feeding the hub.
+    """
+
+    def __init__(self, buffer_size: Optional[int] = None):
+        self.seq = 0
+        self.boot_id = uuid.uuid4().hex[:12]
+        self.upstream = None
+        self._lock = threading.Lock()
+        self._seen: Dict[str, tuple] = {}  # uid -> (count, last timestamp, message) last delivered
+        self._buffer = deque(maxlen=buffer_size or config.EVENT_STREAM_BUFFER)  # (seq, namespace, event, data)
+        self._subscribers: List[Subscription] = []
+        self._owns_upstream = False
+        self._primed = False  # Set by the first list: events that existed before the hub are not news
+
+    # --- upstream ---
+
+    def _ensure_upstream(self) -> None:
+        with self._lock:
+            if self.upstream is not None:
+                return
+            shared = informer.running_informer("events")
+            if shared is not None:
+                self.upstream = shared
+            else:
+                self.upstream = informer.Informer("events", NativeBackend(),
+                                                  config.INFORMER_MAX_OBJECTS.get("events", 50000))
+                self._owns_upstream = True
+            self.upstream.listeners.append(self._on_informer_event)
+        if self._owns_upstream:
+            self.upstream.start()
+        elif self.upstream.synced:
+            # The shared informer listed before the hub existed; its store is history, not news.
+            self._relisted(self.upstream.store.list())
+
+    def stop(self) -> None:
+        with self._lock:
+            upstream, owned = self.upstream, self._owns_upstream
+            self.upstream, self._owns_upstream = None, False
+        if upstream is not None:
+            if self._on_informer_event in upstream.listeners:
+                upstream.listeners.remove(self._on_informer_event)
+            if owned:
+                upstream.stop()
+
+    def _on_informer_event(self, resource: str, kind: str, payload) -> None:
+        # Called from the informer thread.
+        if kind == "RESET":
+            self._relisted(payload)
+        elif kind == "DELETED":
+            with self._lock:
+                self._seen.pop(payload.get("metadata", {}).get("uid"), None)
+        else:
+            self._publish([payload])
+
+    def _relisted(self, events: List[dict]) -> None:
+        # The first list primes the hub; later lists (after 410 Gone) deliver only what changed meanwhile.
+        uids = {event.get("metadata", {}).get("uid") for event in events}
+        with self._lock:
+            for uid in [uid for uid in self._seen if uid not in uids]:
+                del self._seen[uid]
+            if not self._primed:
+                self._primed = True
+                for event in events:
+                    self._seen[event.get("metadata", {}).get("uid")] = _signature(event)
+                return
+        self._publish(sorted(events, key=event_timestamp))
+
+    def _publish(self, events: List[dict]) -> None:
+        deltas = []
+        with self._lock:
+            for event in events:
+                uid = event.get("metadata", {}).get("uid")
+                signature = _signature(event)
+                previous = self._seen.get(uid)
+                if previous == signature:
+                    continue
+                self._seen[uid] = signature
+                self.seq += 1
+                namespace = event.get("metadata", {}).get("namespace", "")
+                data = json.dumps({"change": "updated" if previous else "added", "namespace": namespace,
+                                   "event": to_event(event)})
+                delta = (self.seq, namespace, event, data)
+                self._buffer.append(delta)
+                deltas.append(delta)
+            subscribers = list(self._subscribers)
+        for seq, namespace, event, data in deltas:
+            for subscription in subscribers:
+                if subscription.matches(namespace, event):
+                    subscription.loop.call_soon_threadsafe(subscription.offer, (seq, data))
+
+    # --- subscribers ---
+
+    def event_id(self, seq: int) -> str:
+        """
+        The SSE id of delta number 'seq'.
+        """
+        return f"{self.boot_id}:{seq}"
+
+    def subscribe(self, namespace: Optional[str], last_id: Optional[str] = None, **filters) -> Subscription:
+        """
+        Registers a subscriber (call from the event loop). With last_id (an event_id), buffered
+        deltas numbered after it are queued first; if some of them have already left the buffer,
+        or last_id is not one of this hub's ids, the subscription starts with a (last_id, None)
+        marker and the caller reports the gap.
+        """
+        seq = None
+        if last_id is not None:
+            boot_id, _, number = last_id.partition(":")
+            seq = int(number) if boot_id == self.boot_id and number.isdigit() else None
+        self._ensure_upstream()
+        subscription = Subscription(namespace, filters)
+        with self._lock:
+            if last_id is not None:
+                # Another hub's numbering, or deltas were dropped from the buffer.
+                if seq is None or seq > self.seq or (self._buffer and seq < self._buffer[0][0] - 1):
+                    subscription.queue.put_nowait((last_id, None))  # Gap marker
+                if seq is not None:
+                    for number, ns, event, data in self._buffer:
+                        if number > seq and subscription.matches(ns, event):
+                            subscription.offer((number, data))
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"subscribers": len(self._subscribers), "boot_id": self.boot_id, "seq": self.seq,
+                    "buffered": len(self._buffer),
+                    "tracked_events": len(self._seen),
+                    "upstream": None if self.upstream is None else ("private" if self._owns_upstream else "informer")}
+
+
+def _signature(event: dict) -> tuple:
+    return event.get("count"), event_timestamp(event), event.get("message")
+
+
+_hub: Optional[EventHub] = None
+
+
+def get_hub() -> EventHub:
+    global _hub
+    if _hub is None:
+        _hub = EventHub()
+    return _hub
+
+
+def stop_hub() -> None:
+    global _hub
+    if _hub is not None:
+        _hub.stop()
+        _hub = None
@@ -1,78 +1,870 @@
 # handlers.py
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, validate_call
+from pydantic_core import to_json
+from typing import Annotated, List, Optional, Tuple, Union
+import asyncio
+import inspect
+import json
+import time
+import uuid
 
 # Import configuration to use default namespace and log settings
 import config
 
 # Import Kubernetes utilities (we'll implement these functions in kubectl_utils.py)
 from kubectl_utils import (
-    get_logs,
+    stream_logs,
+    get_log_templates,
     describe_pod,
-    get_events,
-    get_service_info
+    list_matching_events,
+    page_events,
+    parse_page_token,
+    get_service_info,
+    get_pod_with_events,
+    get_service,
+    list_all,
+    list_workload_containers,
+    merge_workload_logs,
+    workload_selector,
+)
+from backends import ClusterCallTimeout, parse_fields, render_object, render_pod_description
+from cluster_health import summarize_objects
+from cluster_exec import ClientDisconnected, run_cluster_call, run_until_disconnect, stream_cluster_lines
+from cache import TTLCache, cluster_cache
+from event_hub import get_hub
+from health import is_draining
+from log_templates import mine_lines
+from log_store import get_store, parse_label_selector, parse_time_bound, search_logs
+from scheduler import Overloaded
+from utils import parse_duration
+from object_diff import pod_snapshot, render_changes, service_snapshot, snapshot_store
+from models import (
+    BatchResponse,
+    BatchResult,
+    ClusterSummary,
+    CompactLogResponse,
+    DescribeResponse,
+    EventResponse,
+    LogChunk,
+    LogResponse,
+    LogSearchResponse,
+    ObjectNamesResponse,
+    ServiceResponse,
+    ToolCall,
+    WorkloadLogResponse,
+)
+from informer import (
+    CACHE_TOKEN_PREFIX,
+    cached_cluster_summary,
+    cached_events,
+    cached_object_names,
+    cached_pod,
+    cached_pod_description,
+    cached_service,
+    cached_service_info,
+    live_freshness,
 )
 
 router = APIRouter()
 
-@router.get("/get-logs")
+
+async def call_cluster(request: Request, func, resource: Optional[str] = None, fresh: bool = False, **kwargs):
+    """
+    Runs a blocking kubectl_utils function off the event loop and maps failures to HTTP errors.
+    The call is cancelled (and its kubectl process killed) if the client disconnects.
+
+    With a resource name, identical concurrent calls share one backend call and results are
+    cached for config.CACHE_TTLS[resource] seconds; fresh=True skips the cached result.
+    """
+    if resource is None:
+        awaitable = run_cluster_call(func, **kwargs)
+    else:
+        key = (func.__name__, tuple(sorted(kwargs.items())))
+        awaitable = cluster_cache.call(resource, key, lambda: run_cluster_call(func, **kwargs), fresh=fresh)
+    return await _await_cluster(request, awaitable)
+
+
+async def _await_cluster(request: Request, awaitable):
+    """
+    Awaits cluster work until the client disconnects, mapping failures to HTTP errors.
+    """
+    try:
+        return await run_until_disconnect(request, awaitable)
+    except ClusterCallTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ClientDisconnected as e:
+        raise HTTPException(status_code=499, detail=str(e))
+    except Overloaded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _stream_error(e: Exception) -> HTTPException:
+    """
+    Maps a log-stream failure, before any of the response was sent, to an HTTP error: 429 with
+    Retry-After when the scheduler refused or dropped the stream, else 500.
+    """
+    if isinstance(e, Overloaded):
+        return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return HTTPException(status_code=500, detail=str(e))
+
+
+def _log_record(kind: str, payload: dict, fmt: str) -> str:
+    """
+    Encodes one streamed record as an NDJSON line or an SSE event.
+    """
+    data = to_json(payload).decode()
+    if fmt == "sse":
+        return f"event: {kind}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def fetch_logs(
+    request: Request,
+    pod_name: str,
+    namespace: str = config.DEFAULT_NAMESPACE,
+    since_time: Optional[str] = config.DEFAULT_LOG_SINCE_TIME,
+    tail_lines: Optional[int] = 100,
+    compact: bool = False,
+) -> Union[LogResponse, CompactLogResponse]:
+    """
+    Reads a pod's log tail into a single LogResponse (chunks of config.LOG_CHUNK_SIZE lines), or
+    with compact=True into line templates with counts (CompactLogResponse).
+    """
+    if compact:
+        miner = await call_cluster(request, get_log_templates, pod_name=pod_name, namespace=namespace,
+                                   since_time=since_time, tail_lines=tail_lines)
+        metadata = {"since_time": since_time, "tail_lines": tail_lines, "total_lines": miner.total_lines,
+                    "total_templates": len(miner.clusters)}
+        return CompactLogResponse(pod_name=pod_name, namespace=namespace, summary=miner.render(), metadata=metadata,
+                                  templates=[cluster.to_dict() for cluster in miner.ordered()])
+
+    logs = []
+    chunks = stream_cluster_lines(stream_logs, pod_name=pod_name, namespace=namespace, since_time=since_time,
+                                  tail_lines=tail_lines, follow=False, chunk_size=config.LOG_CHUNK_SIZE)
+    try:
+        async for lines in chunks:
+            logs.append(LogChunk(chunk_index=len(logs), lines=lines))
+    except Exception as e:
+        raise _stream_error(e)
+    finally:
+        await chunks.aclose()
+    metadata = {"since_time": since_time, "tail_lines": tail_lines, "follow": False, "total_chunks": len(logs)}
+    return LogResponse(pod_name=pod_name, namespace=namespace, logs=logs, metadata=metadata)
+
+
+def _field_paths(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parses a 'fields' parameter (None if absent), mapping malformed paths to 400.
+    """
+    if not fields:
+        return None
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _check_diff_arguments(fields: Optional[str]) -> None:
+    """
+    Rejects a 'fields' selection on a diff request (diff=true or since_version) with 400.
+
+    Args:
+        fields (Optional[str]): The request's 'fields' parameter.
+
+    Raises:
+        HTTPException: 400 if fields is given.
+    """
+    if fields:
+        raise HTTPException(status_code=400, detail="fields cannot be combined with diff or since_version")
+
+
+async def _pod_changes(request: Request, pod_name: str, namespace: str, fresh: bool, since_version: Optional[str],
+                       record: bool, session: Optional[str]) -> DescribeResponse:
+    """
+    A pod's changes since a version, or its whole description when that version is unknown.
+    """
+    cached = None if fresh else cached_pod(pod_name, namespace)
+    if cached is not None:
+        pod, events, freshness = cached
+    else:
+        pod, events = await call_cluster(request, get_pod_with_events, resource="describe_pod", fresh=fresh,
+                                         pod_name=pod_name, namespace=namespace)
+        freshness = live_freshness()
+    version, base_version, changes = await asyncio.to_thread(
+        snapshot_store.compare, session, "pod", namespace, pod_name, pod_snapshot(pod, events), since_version, record)
+    if changes is None:
+        description = render_pod_description(pod, events)
+    else:
+        description = render_changes("pod", pod_name, base_version, version, changes)
+    return DescribeResponse(pod_name=pod_name, namespace=namespace, description=description, freshness=freshness,
+                            version=version, since_version=base_version, changes=changes)
+
+
+async def fetch_pod_description(
+    request: Request,
+    pod_name: str,
+    namespace: str = config.DEFAULT_NAMESPACE,
+    fresh: bool = False,
+    fields: Optional[str] = None,
+    diff: bool = False,
+    since_version: Optional[str] = None,
+    record: bool = True,
+    session: Optional[str] = None,
+) -> DescribeResponse:
+    """
+    Describes a pod, from the informer cache when it is enabled and fresh, else from a short-TTL result cache.
+    With fields (e.g. "status,containers.state,events"), only those parts of the pod are returned, as YAML.
+
+    With diff=true, only what changed since the session (the 'session' argument or the
+    config.SESSION_HEADER header) last described this pod is returned; with since_version, what
+    changed since that version. See object_diff.py. record=false leaves the session's last version
+    as it was (for speculative reads).
+    """
+    if diff or since_version:
+        _check_diff_arguments(fields)
+        return await _pod_changes(request, pod_name, namespace, fresh, since_version, record,
+                                  session or request.headers.get(config.SESSION_HEADER))
+    paths = _field_paths(fields)
+    cached = None if fresh else cached_pod_description(pod_name, namespace, paths)
+    if cached is not None:
+        description, freshness = cached
+    else:
+        description = await call_cluster(request, describe_pod, resource="describe_pod", fresh=fresh,
+                                         pod_name=pod_name, namespace=namespace, fields=paths)
+        freshness = live_freshness()
+    return DescribeResponse(pod_name=pod_name, namespace=namespace, description=description, freshness=freshness)
+
+
+async def fetch_events(
+    request: Request,
+    namespace: str = config.DEFAULT_NAMESPACE,
+    since_time: Optional[str] = None,
+    event_type: Optional[Annotated[str, Field(pattern="^(Normal|Warning)$")]] = None,
+    involved_object: Optional[str] = None,
+    reason: Optional[str] = None,
+    limit: Annotated[int, Field(ge=1, le=config.EVENTS_MAX_LIMIT)] = config.EVENTS_DEFAULT_LIMIT,
+    continue_token: Optional[str] = None,
+    fresh: bool = False,
+) -> EventResponse:
+    """
+    Lists one page of events, most recent first, from the informer cache when it is enabled and
+    fresh, else from the cluster. Every page of a listing is cut from the same list of matching
+    events, so the time window and filters apply before the limit. A live listing that needs
+    more than one page is kept under its own id (see _save_listing) and its continue tokens name
+    that id, so later pages neither list the namespace again nor shift when new events arrive.
+    """
+    from_cache = bool(continue_token) and continue_token.startswith(CACHE_TOKEN_PREFIX)
+    listing = None if from_cache or not continue_token else continue_token.partition(":")[0]
+    try:
+        parse_page_token(continue_token, CACHE_TOKEN_PREFIX if from_cache else f"{listing}:")
+        if since_time:
+            parse_duration(since_time)  # A bad window is a 400 before anything is listed
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filters = dict(namespace=namespace, since_time=since_time, event_type=event_type,
+                   involved_object=involved_object, reason=reason)
+    try:
+        cached = None if fresh else cached_events(**filters, limit=limit, continue_token=continue_token)
+        if cached is not None:
+            page, freshness = cached
+        elif from_cache:
+            raise HTTPException(status_code=410, detail="continue_token has expired; restart the listing")
+        elif listing is not None:
+            matched = await _load_listing(listing)
+            if matched is None:
+                raise HTTPException(status_code=410, detail="continue_token has expired; restart the listing")
+            page = page_events(matched, limit, continue_token, f"{listing}:")
+            freshness = live_freshness()
+        else:
+            listing = uuid.uuid4().hex
+            matched = await call_cluster(request, list_matching_events, resource="events", fresh=fresh, **filters)
+            page = page_events(matched, limit, None, f"{listing}:")
+            if page["continue_token"]:
+                await _save_listing(listing, matched)
+            freshness = live_freshness()
+    except ValueError as e:  # An offset past the end of the listing
+        raise HTTPException(status_code=400, detail=str(e))
+    return EventResponse(namespace=namespace, events=page["events"], continue_token=page["continue_token"],
+                         total=page["total"], freshness=freshness)
+
+
+# Live event listings with more pages to come: listing id -> matching events, oldest first.
+_event_listings = TTLCache(config.EVENTS_MAX_LISTINGS)
+
+
+async def _save_listing(listing: str, events: List[dict]) -> None:
+    """
+    Keeps a paged listing for config.EVENTS_LISTING_TTL seconds; with several workers, also in
+    the result cache's shared tier, so the next page may hit any worker.
+    """
+    _event_listings.set(listing, events, config.EVENTS_LISTING_TTL)
+    shared = cluster_cache.shared
+    if shared is not None:
+        await asyncio.to_thread(shared.set, json.dumps(["event_listings", listing]), events,
+                                config.EVENTS_LISTING_TTL)
+
+
+async def _load_listing(listing: str) -> Optional[List[dict]]:
+    """
+    Returns a listing kept by _save_listing, or None if it is unknown or expired.
+    """
+    events = _event_listings.get(listing)
+    shared = cluster_cache.shared
+    if events is None and shared is not None:
+        found = await asyncio.to_thread(shared.get, json.dumps(["event_listings", listing]))
+        events = found[0] if found is not None else None
+    return events
+
+
+async def _service_changes(request: Request, service_name: str, namespace: str, fresh: bool,
+                           since_version: Optional[str], record: bool, session: Optional[str]) -> ServiceResponse:
+    """
+    A service's changes since a version, or its whole manifest when that version is unknown.
+    """
+    cached = None if fresh else cached_service(service_name, namespace)
+    if cached is not None:
+        service, freshness = cached
+    else:
+        service = await call_cluster(request, get_service, resource="service", fresh=fresh,
+                                     service_name=service_name, namespace=namespace)
+        freshness = live_freshness()
+    version, base_version, changes = await asyncio.to_thread(
+        snapshot_store.compare, session, "service", namespace, service_name, service_snapshot(service),
+        since_version, record)
+    if changes is None:
+        service_info = render_object(service)
+    else:
+        service_info = render_changes("service", service_name, base_version, version, changes)
+    return ServiceResponse(service_name=service_name, namespace=namespace, service_info=service_info,
+                           freshness=freshness, version=version, since_version=base_version, changes=changes)
+
+
+async def fetch_service_info(
+    request: Request,
+    service_name: str,
+    namespace: str = config.DEFAULT_NAMESPACE,
+    fresh: bool = False,
+    fields: Optional[str] = None,
+    diff: bool = False,
+    since_version: Optional[str] = None,
+    record: bool = True,
+    session: Optional[str] = None,
+) -> ServiceResponse:
+    """
+    Fetches a service, from the informer cache when it is enabled and fresh, else from a short-TTL result cache.
+    With fields (e.g. "ports,selector,status"), only those parts of the service are returned.
+    diff, since_version, record and session work as for fetch_pod_description.
+    """
+    if diff or since_version:
+        _check_diff_arguments(fields)
+        return await _service_changes(request, service_name, namespace, fresh, since_version, record,
+                                      session or request.headers.get(config.SESSION_HEADER))
+    paths = _field_paths(fields)
+    cached = None if fresh else cached_service_info(service_name, namespace, paths)
+    if cached is not None:
+        svc_info, freshness = cached
+    else:
+        svc_info = await call_cluster(request, get_service_info, resource="service", fresh=fresh,
+                                      service_name=service_name, namespace=namespace, fields=paths)
+        freshness = live_freshness()
+    return ServiceResponse(service_name=service_name, namespace=namespace, service_info=svc_info, freshness=freshness)
+
+
+@router.get("/get-logs", response_model=Union[LogResponse, CompactLogResponse])
 async def api_get_logs(
+    request: Request,
     pod_name: str,
     namespace: str = Query(config.DEFAULT_NAMESPACE, description="Kubernetes namespace"),
     since_time: Optional[str] = Query(config.DEFAULT_LOG_SINCE_TIME, description="Time window for logs, e.g., '5m'"),
-    tail_lines: Optional[int] = Query(100, description="Number of tail lines to retrieve")
+    tail_lines: Optional[int] = Query(100, description="Number of tail lines to retrieve"),
+    follow: bool = Query(False, description="Keep streaming new log lines as they are written"),
+    format: str = Query("ndjson", pattern="^(ndjson|sse|json)$",
+                        description="'ndjson' or 'sse' stream LogChunks as they are read; 'json' returns one LogResponse"),
+    compact: bool = Query(False, description="Return line templates with counts (CompactLogResponse) instead of raw lines")
 ):
     """
     Endpoint to fetch logs for a specified pod.
+    Logs are streamed as LogChunks of config.LOG_CHUNK_SIZE lines while they are being read.
+    With compact=true, repeated lines are folded into templates while the log is read.
     """
+    if format == "json" or compact:
+        if follow:
+            raise HTTPException(status_code=400, detail="follow=true requires format 'ndjson' or 'sse' without compact")
+        return await fetch_logs(request, pod_name, namespace, since_time, tail_lines, compact)
+
+    chunks = stream_cluster_lines(stream_logs, pod_name=pod_name, namespace=namespace, since_time=since_time,
+                                  tail_lines=tail_lines, follow=follow, chunk_size=config.LOG_CHUNK_SIZE)
+    # Wait for the first chunk so that errors such as a missing pod still map to an HTTP status.
     try:
-        logs = get_logs(pod_name=pod_name, namespace=namespace, since_time=since_time, tail_lines=tail_lines)
-        return {"pod_name": pod_name, "namespace": namespace, "logs": logs}
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _stream_error(e)
 
+    metadata = {"since_time": since_time, "tail_lines": tail_lines, "follow": follow}
 
-@router.get("/describe-pod")
-async def api_describe_pod(
-    pod_name: str,
-    namespace: str = Query(config.DEFAULT_NAMESPACE, description="Kubernetes namespace")
+    async def body():
+        index = total_lines = 0
+        try:
+            if first is not None:
+                yield _log_record("chunk", LogChunk(chunk_index=0, lines=first).model_dump(), format)
+                index, total_lines = 1, len(first)
+                async for lines in chunks:
+                    yield _log_record("chunk", LogChunk(chunk_index=index, lines=lines).model_dump(), format)
+                    index += 1
+                    total_lines += len(lines)
+        except Exception as e:
+            yield _log_record("error", {"error": str(e)}, format)
+            return
+        finally:
+            await chunks.aclose()
+        metadata.update(total_chunks=index, total_lines=total_lines)
+        yield _log_record("end", {"metadata": metadata}, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type)
+
+
+async def _workload_merge(request: Request, deployment: Optional[str], statefulset: Optional[str],
+                          selector: Optional[str], namespace: str, container: Optional[str],
+                          since_time: Optional[str], tail_lines: Optional[int]):
+    """
+    Resolves a workload (or label selector) to its pods' containers and prepares their merged log.
+    Returns (workload description, "<pod>/<container>" list, LogMerge).
+    """
+    named = [(kind, name) for kind, name in (("deployment", deployment), ("statefulset", statefulset)) if name]
+    if len(named) + bool(selector) != 1:
+        raise HTTPException(status_code=400, detail="Pass exactly one of deployment, statefulset or selector")
+    try:
+        if since_time:
+            parse_duration(since_time)  # A bad window is a 400 before any pod is listed
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if named:
+        kind, name = named[0]
+        selector = await call_cluster(request, workload_selector, resource="workload_selector",
+                                      kind=kind, name=name, namespace=namespace)
+        workload = f"{kind}/{name}"
+    else:
+        workload = f"selector {selector}"
+    targets = await call_cluster(request, list_workload_containers, namespace=namespace, label_selector=selector,
+                                 container=container)
+    if not targets:
+        raise HTTPException(status_code=404, detail=f"No pods match {workload} in namespace {namespace}")
+    if len(targets) > config.WORKLOAD_LOG_MAX_CONTAINERS:
+        raise HTTPException(status_code=400, detail=f"{len(targets)} containers match {workload}; at most "
+                            f"{config.WORKLOAD_LOG_MAX_CONTAINERS} can be merged (narrow the selector or pick a container)")
+    merge = merge_workload_logs(namespace, targets, since_time, tail_lines)
+    return workload, [f"{pod}/{name}" for pod, name in targets], merge
+
+
+async def fetch_workload_logs(
+    request: Request,
+    deployment: Optional[str] = None,
+    statefulset: Optional[str] = None,
+    selector: Optional[str] = None,
+    namespace: str = config.DEFAULT_NAMESPACE,
+    container: Optional[str] = None,
+    since_time: Optional[str] = config.DEFAULT_LOG_SINCE_TIME,
+    tail_lines: Optional[int] = 100,
+    compact: bool = False,
+) -> Union[WorkloadLogResponse, CompactLogResponse]:
+    """
+    Reads the logs of all pods of a deployment, statefulset or label selector, merged by timestamp,
+    into one WorkloadLogResponse, or with compact=True into line templates (CompactLogResponse).
+    """
+    workload, containers, merge = await _workload_merge(request, deployment, statefulset, selector, namespace,
+                                                        container, since_time, tail_lines)
+    metadata = {"since_time": since_time, "tail_lines": tail_lines, "containers": len(containers)}
+    if compact:
+        miner = await call_cluster(request, mine_lines, lines=merge)
+        metadata.update(total_lines=miner.total_lines, total_templates=len(miner.clusters), errors=merge.errors)
+        return CompactLogResponse(pod_name=workload, namespace=namespace, summary=miner.render(), metadata=metadata,
+                                  templates=[cluster.to_dict() for cluster in miner.ordered()])
+
+    logs = []
+    chunks = stream_cluster_lines(iter, merge, chunk_size=config.LOG_CHUNK_SIZE)
+    try:
+        async for lines in chunks:
+            logs.append(LogChunk(chunk_index=len(logs), lines=lines))
+    except Exception as e:
+        raise _stream_error(e)
+    finally:
+        await chunks.aclose()
+    metadata.update(total_chunks=len(logs), total_lines=merge.total_lines, errors=merge.errors)
+    return WorkloadLogResponse(workload=workload, namespace=namespace, containers=containers, logs=logs,
+                               metadata=metadata)
+
+
+@router.get("/get-workload-logs", response_model=Union[WorkloadLogResponse, CompactLogResponse])
+async def api_get_workload_logs(
+    request: Request,
+    deployment: Optional[str] = Query(None, description="Deployment whose pods' logs are merged"),
+    statefulset: Optional[str] = Query(None, description="StatefulSet whose pods' logs are merged"),
+    selector: Optional[str] = Query(None, description="Label selector of the pods, e.g. 'app=backend'"),
+    namespace: str = Query(config.DEFAULT_NAMESPACE, description="Kubernetes namespace"),
+    container: Optional[str] = Query(None, description="Only this container of each pod"),
+    since_time: Optional[str] = Query(config.DEFAULT_LOG_SINCE_TIME, description="Time window for logs, e.g., '5m'"),
+    tail_lines: Optional[int] = Query(100, description="Lines retrieved from the end of each container's log"),
+    format: str = Query("ndjson", pattern="^(ndjson|sse|json)$",
+                        description="'ndjson' or 'sse' stream LogChunks as they are merged; 'json' returns one WorkloadLogResponse"),
+    compact: bool = Query(False, description="Return line templates with counts (CompactLogResponse) instead of raw lines")
 ):
     """
-    Endpoint to return detailed description of a specific pod.
+    Endpoint to fetch the logs of every pod of a deployment, statefulset or label selector as one
+    stream ordered by timestamp, each line tagged with its pod and container.
     """
+    if format == "json" or compact:
+        return await fetch_workload_logs(request, deployment, statefulset, selector, namespace, container,
+                                         since_time, tail_lines, compact)
+
+    workload, containers, merge = await _workload_merge(request, deployment, statefulset, selector, namespace,
+                                                        container, since_time, tail_lines)
+    chunks = stream_cluster_lines(iter, merge, chunk_size=config.LOG_CHUNK_SIZE)
+    # Wait for the first chunk so that a refused stream (or a failure) still maps to an HTTP status.
     try:
-        description = describe_pod(pod_name=pod_name, namespace=namespace)
-        return {"pod_name": pod_name, "namespace": namespace, "description": description}
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _stream_error(e)
+    metadata = {"workload": workload, "namespace": namespace, "containers": containers,
+                "since_time": since_time, "tail_lines": tail_lines}
+
+    async def body():
+        index = 0
+        try:
+            if first is not None:
+                yield _log_record("chunk", LogChunk(chunk_index=0, lines=first).model_dump(), format)
+                index = 1
+                async for lines in chunks:
+                    yield _log_record("chunk", LogChunk(chunk_index=index, lines=lines).model_dump(), format)
+                    index += 1
+        except Exception as e:
+            yield _log_record("error", {"error": str(e)}, format)
+            return
+        finally:
+            await chunks.aclose()
+        metadata.update(total_chunks=index, total_lines=merge.total_lines, errors=merge.errors)
+        yield _log_record("end", {"metadata": metadata}, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type)
 
 
-@router.get("/get-events")
+@router.get("/describe-pod", response_model=DescribeResponse)
+async def api_describe_pod(
+    request: Request,
+    pod_name: str,
+    namespace: str = Query(config.DEFAULT_NAMESPACE, description="Kubernetes namespace"),
+    fresh: bool = Query(False, description="Bypass cached results and query the cluster"),
+    fields: Optional[str] = Query(None, description="Only these fields, e.g. 'status,containers.state,events'"),
+    diff: bool = Query(False, description="Only what changed since this session last described the pod"),
+    since_version: Optional[str] = Query(None, description="Only what changed since this version"),
+    record: bool = Query(True, description="Remember this version as the session's last"),
+    session: Optional[str] = Query(None, description=f"Session id (default: the {config.SESSION_HEADER} header)")
+):
+    """
+    Endpoint to return detailed description of a specific pod, or only its changes (diff, since_version).
+    """
+    return await fetch_pod_description(request, pod_name, namespace, fresh, fields, diff, since_version,
+                                       record, session)
+
+
+@router.get("/get-events", response_model=EventResponse)
 async def api_get_events(
+    request: Request,
     namespace: str = Query(config.DEFAULT_NAMESPACE, description="Kubernetes namespace"),
-    since_time: Optional[str] = Query(None, description="Time window for events, e.g., '10m'")
+    since_time: Optional[str] = Query(None, description="Time window for events, e.g., '10m'"),
+    event_type: Optional[str] = Query(None, pattern="^(Normal|Warning)$", description="Only events of this type"),
+    involved_object: Optional[str] = Query(None, description="Only events about '<name>' or '<kind>/<name>'"),
+    reason: Optional[str] = Query(None, description="Only events with this reason, e.g., 'BackOff'"),
+    limit: int = Query(config.EVENTS_DEFAULT_LIMIT, ge=1, le=config.EVENTS_MAX_LIMIT, description="Page size"),
+    continue_token: Optional[str] = Query(None, description="continue_token from the previous page"),
+    fresh: bool = Query(False, description="Bypass cached results and query the cluster")
 ):
     """
     Endpoint to fetch recent cluster events, optionally filtered by namespace and time.
+    Type, reason and involved object are filtered by the API server; pages are bounded by 'limit'.
     """
-    try:
-        events = get_events(namespace=namespace, since_time=since_time)
-        return {"namespace": namespace, "events": events}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await fetch_events(request, namespace, since_time, event_type, involved_object, reason,
+                              limit, continue_token, fresh)
 
 
-@router.get("/get-svc")
+@router.get("/get-svc", response_model=ServiceResponse)
 async def api_get_service_info(
+    request: Request,
     service_name: str,
-    namespace: str = Query(config.DEFAULT_NAMESPACE, description="Kubernetes namespace")
+    namespace: str = Query(config.DEFAULT_NAMESPACE, description="Kubernetes namespace"),
+    fresh: bool = Query(False, description="Bypass cached results and query the cluster"),
+    fields: Optional[str] = Query(None, description="Only these fields, e.g. 'ports,selector,status'"),
+    diff: bool = Query(False, description="Only what changed since this session last fetched the service"),
+    since_version: Optional[str] = Query(None, description="Only what changed since this version"),
+    record: bool = Query(True, description="Remember this version as the session's last"),
+    session: Optional[str] = Query(None, description=f"Session id (default: the {config.SESSION_HEADER} header)")
 ):
     """
-    Endpoint to return details of a Kubernetes service.
+    Endpoint to return details of a Kubernetes service, or only its changes (diff, since_version).
     """
+    return await fetch_service_info(request, service_name, namespace, fresh, fields, diff, since_version,
+                                    record, session)
+
+
+# What a live cluster summary lists, across all namespaces: resource -> field selector
+SUMMARY_LISTS = {"nodes": None, "pods": None, "deployments": None, "events": "type=Warning"}
+
+
+async def _live_cluster_summary(max_items: int) -> dict:
+    # The four lists run concurrently in the worker pool; scoring them runs there too.
+    lists = await asyncio.gather(*(run_cluster_call(list_all, resource, field_selector=selector)
+                                   for resource, selector in SUMMARY_LISTS.items()))
+    return await run_cluster_call(summarize_objects, dict(zip(SUMMARY_LISTS, lists)), max_items)
+
+
+async def fetch_cluster_summary(
+    request: Request,
+    max_items: Annotated[int, Field(ge=1, le=500)] = config.CLUSTER_SUMMARY_MAX_ITEMS,
+    fresh: bool = False,
+) -> ClusterSummary:
+    """
+    Health snapshot of the whole cluster, the data behind describe_cluster_api. Served from the
+    incrementally maintained informer state when it is enabled and fresh, else built from concurrent
+    lists of nodes, pods, deployments and Warning events and kept in a short-TTL result cache.
+    """
+    cached = None if fresh else cached_cluster_summary(max_items)
+    if cached is not None:
+        summary, freshness = cached
+    else:
+        summary = await _await_cluster(request, cluster_cache.call(
+            "cluster_summary", ("cluster_summary", max_items), lambda: _live_cluster_summary(max_items), fresh=fresh))
+        freshness = live_freshness()
+    return ClusterSummary(**summary, freshness=freshness)
+
+
+@router.get("/cluster-summary", response_model=ClusterSummary)
+async def api_cluster_summary(
+    request: Request,
+    max_items: int = Query(config.CLUSTER_SUMMARY_MAX_ITEMS, ge=1, le=500, description="Unhealthy objects listed"),
+    fresh: bool = Query(False, description="Bypass cached results and query the cluster")
+):
+    """
+    Endpoint to return a ranked health snapshot of all namespaces: node conditions, pod phases and
+    restarts, degraded deployments and recent Warning events, with only the unhealthy objects listed.
+    """
+    return await fetch_cluster_summary(request, max_items, fresh)
+
+
+async def fetch_log_search(
+    request: Request,
+    query: Annotated[str, Field(min_length=2)],
+    selector: Optional[str] = None,
+    namespace: Optional[str] = None,
+    pod: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: Annotated[int, Field(ge=1, le=config.LOG_SEARCH_MAX_RESULTS)] = 100,
+) -> LogSearchResponse:
+    """
+    Lines containing 'query' in the on-disk log store, across all ingested pods (optionally only
+    those matching a namespace, pod name or label selector) and within [since, until].
+    """
+    if get_store() is None:
+        raise HTTPException(status_code=503, detail="The log store is disabled (LOG_STORE_ENABLED in config.py)")
     try:
-        svc_info = get_service_info(service_name=service_name, namespace=namespace)
-        return {"service_name": service_name, "namespace": namespace, "service_info": svc_info}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        parse_label_selector(selector)
+        parse_time_bound(since)
+        parse_time_bound(until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result = await _await_cluster(request, run_cluster_call(
+        search_logs, query, namespace=namespace, pod=pod, selector=selector, since=since, until=until, limit=limit))
+    return LogSearchResponse(**result)
+
+
+@router.get("/search-logs", response_model=LogSearchResponse)
+async def api_search_logs(
+    request: Request,
+    q: str = Query(..., min_length=2, description="Text to find (case-insensitive)"),
+    selector: Optional[str] = Query(None, description="Pod label selector, e.g. 'app=backend,tier!=db'"),
+    namespace: Optional[str] = Query(None, description="Only pods in this namespace (default: all ingested)"),
+    pod: Optional[str] = Query(None, description="Only this pod"),
+    since: Optional[str] = Query(None, description="Duration before now (e.g., '2h') or RFC3339 time"),
+    until: Optional[str] = Query(None, description="Duration before now or RFC3339 time"),
+    limit: int = Query(100, ge=1, le=config.LOG_SEARCH_MAX_RESULTS, description="Matches returned (the newest)")
+):
+    """
+    Endpoint to search the logs of many pods at once, including pods that no longer exist, from
+    the local log store instead of fetching each pod's log from the cluster.
+    """
+    return await fetch_log_search(request, q, selector, namespace, pod, since, until, limit)
+
+
+def _object_names(resource: str, namespace: Optional[str]) -> List[Tuple[str, str]]:
+    # Runs in the worker pool; only the names are kept, not the listed objects.
+    return [(obj["metadata"].get("namespace", ""), obj["metadata"]["name"]) for obj in list_all(resource, namespace)]
+
+
+@router.get("/object-names", response_model=ObjectNamesResponse)
+async def api_object_names(
+    request: Request,
+    kinds: str = Query(",".join(config.OBJECT_NAME_RESOURCES),
+                       description="Comma-separated resources, e.g. 'pods,deployments'"),
+    namespace: Optional[str] = Query(None, description="Only this namespace (default: all)"),
+    fresh: bool = Query(False, description="Bypass cached results and query the cluster")
+):
+    """
+    Endpoint to list the names of pods, deployments, statefulsets and services, which the chat
+    client matches questions against to prefetch tool data. Each resource is served from its
+    informer when one is running and fresh, else listed and kept in a result cache.
+    """
+    resources = [kind.strip() for kind in kinds.split(",") if kind.strip()]
+    unknown = [kind for kind in resources if kind not in config.OBJECT_NAME_RESOURCES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown kinds {unknown}; expected some of "
+                                                    f"{config.OBJECT_NAME_RESOURCES}")
+
+    async def names(resource: str):
+        cached = None if fresh else cached_object_names(resource, namespace)
+        if cached is not None:
+            return cached
+        listed = await cluster_cache.call("object_names", ("object_names", resource, namespace),
+                                          lambda: run_cluster_call(_object_names, resource, namespace), fresh=fresh)
+        return listed, live_freshness()
+
+    listed = await _await_cluster(request, asyncio.gather(*(names(resource) for resource in resources)))
+    objects = [{"kind": resource, "namespace": ns, "name": name}
+               for resource, (pairs, _) in zip(resources, listed) for ns, name in pairs]
+    return ObjectNamesResponse(objects=objects,
+                               freshness={resource: freshness for resource, (_, freshness) in zip(resources, listed)})
+
+
+# Tool names the LLM emits, mapped to the fetchers above. Arguments are validated against
+# each fetcher's signature, like query parameters are for the GET endpoints.
+_validated = ConfigDict(arbitrary_types_allowed=True)
+BATCH_TOOLS = {
+    "get_logs_api": validate_call(fetch_logs, config=_validated),
+    "get_workload_logs_api": validate_call(fetch_workload_logs, config=_validated),
+    "describe_pod_api": validate_call(fetch_pod_description, config=_validated),
+    "get_events_api": validate_call(fetch_events, config=_validated),
+    "get_service_info_api": validate_call(fetch_service_info, config=_validated),
+    "describe_cluster_api": validate_call(fetch_cluster_summary, config=_validated),
+    "search_logs_api": validate_call(fetch_log_search, config=_validated),
+}
+
+
+async def _run_batch_call(request: Request, index: int, call: ToolCall, slots: asyncio.Semaphore) -> BatchResult:
+    """
+    Runs one tool call of a batch; failures are reported in its BatchResult instead of raised.
+    """
+    name, arguments = call.function_call.name, dict(call.function_call.arguments)
+    result = BatchResult(index=index, name=name, arguments=arguments, status_code=200)
+    tool = BATCH_TOOLS.get(name)
+    if tool is None:
+        result.status_code, result.error = 404, f"The function '{name}' is not available."
+        return result
+
+    # Drop arguments the tool does not take, as the chat client always has.
+    accepted = inspect.signature(tool).parameters
+    kwargs = {key: value for key, value in arguments.items() if key in accepted and key != "request"}
+    async with slots:
+        start = time.perf_counter()
+        try:
+            output = await tool(request, **kwargs)
+            result.result = output.model_dump() if isinstance(output, BaseModel) else output
+        except ValidationError as e:
+            result.status_code, result.error = 422, str(e)
+        except HTTPException as e:
+            result.status_code, result.error = e.status_code, str(e.detail)
+        except Exception as e:
+            result.status_code, result.error = 500, str(e)
+        result.elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def api_batch(request: Request, calls: List[ToolCall]):
+    """
+    Endpoint to run several tool calls (the list of {"function_call": ...} the LLM emits) in one round trip.
+    Calls run concurrently, at most config.BATCH_MAX_CONCURRENCY at a time, and results are returned
+    in request order with a per-call status code and error.
+    """
+    if len(calls) > config.BATCH_MAX_CALLS:
+        raise HTTPException(status_code=413, detail=f"At most {config.BATCH_MAX_CALLS} calls per batch")
+    start = time.perf_counter()
+    slots = asyncio.Semaphore(config.BATCH_MAX_CONCURRENCY)
+    results = await asyncio.gather(*(_run_batch_call(request, i, call, slots) for i, call in enumerate(calls)))
+    return BatchResponse(results=results, elapsed_ms=round((time.perf_counter() - start) * 1000, 2))
+
+
+@router.get("/subscribe-events")
+async def api_subscribe_events(
+    request: Request,
+    namespace: str = Query(config.DEFAULT_NAMESPACE, description="Kubernetes namespace"),
+    all_namespaces: bool = Query(False, description="Events of every namespace (namespace is ignored)"),
+    event_type: Optional[str] = Query(None, pattern="^(Normal|Warning)$", description="Only events of this type"),
+    involved_object: Optional[str] = Query(None, description="Only events about '<name>' or '<kind>/<name>'"),
+    reason: Optional[str] = Query(None, description="Only events with this reason, e.g., 'BackOff'"),
+    last_event_id: Optional[str] = Query(None, description="Resume after this delta (same as the Last-Event-ID header)")
+):
+    """
+    Endpoint to stream new and changed events as Server-Sent Events, without polling.
+    Each 'event' record carries {"change": "added"|"updated", "namespace", "event"} and an id to resume from.
+    The stream starts with a 'ready' record, may send 'gap' if deltas were lost between connections
+    (or the id is from another worker), and ends with 'overflow' if the client reads too slowly.
+    Idle streams get keepalive comments.
+    """
+    hub = get_hub()
+    if hub.stats()["subscribers"] >= config.MAX_EVENT_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many event subscriptions; try again later")
+    last_event_id = request.headers.get("last-event-id") or last_event_id
+    subscription = hub.subscribe(None if all_namespaces else namespace, last_event_id,
+                                 event_type=event_type, involved_object=involved_object, reason=reason)
+
+    async def body():
+        try:
+            # A client resuming from another worker's id switches to this hub's numbering here.
+            resumed = last_event_id is not None and last_event_id.startswith(f"{hub.boot_id}:")
+            ready = {"seq": hub.seq, "resumed": resumed}
+            yield ("" if resumed else f"id: {hub.event_id(hub.seq)}\n") + f"event: ready\ndata: {json.dumps(ready)}\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), config.EVENT_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if is_draining():
+                        return  # The client reconnects to a worker that is not shutting down
+                    yield ": keepalive\n\n"
+                    continue
+                # Send everything already queued in one write.
+                records = []
+                while item is not None:
+                    seq, data = item
+                    if data is None:
+                        records.append(f"event: gap\ndata: {json.dumps({'last_event_id': seq})}\n\n")
+                    else:
+                        records.append(f"id: {hub.event_id(seq)}\nevent: event\ndata: {data}\n\n")
+                    if subscription.queue.empty():
+                        break
+                    item = subscription.queue.get_nowait()
+                if item is None:
+                    records.append("event: overflow\ndata: {}\n\n")
+                yield "".join(records)
+                if item is None:
+                    return
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/cache-stats")
+async def api_cache_stats():
+    """
+    Endpoint to report result-cache and request-coalescing counters, for tuning config.CACHE_TTLS.
+    """
+    return cluster_cache.stats()
@@ -0,0 +1,121 @@
+# health.py
+
+"""
+This module answers the bridge's liveness and readiness probes (GET /livez and GET /readyz).
+
+Liveness only says that the worker's event loop is serving requests. It never depends on the
+cluster, so an API server outage does not get every bridge worker restarted.
+
+Readiness says whether this worker should get traffic. Its checks:
+    - backend: the cluster backend answered a cheap probe (the API server's /version). The result
+      is reused for config.HEALTH_CHECK_INTERVAL seconds, so frequent probes do not load the cluster.
+    - informers: when enabled, every informer has completed its first list.
+    - shared_cache: when configured, the SQLite file shared by the workers can be read.
+    - draining: the worker has been asked to shut down (SIGTERM/SIGINT) and is finishing its requests.
+
+Functions:
+    liveness: Payload of /livez.
+    readiness: (ready, payload) for /readyz.
+    install_drain_handler: Mark the worker as draining as soon as it is asked to shut down.
+    is_draining: Whether shutdown has begun.
+"""
+
+import asyncio
+import os
+import signal
+import threading
+import time
+from typing import Optional, Tuple
+
+import config
+from cache import SingleFlight, cluster_cache
+from cluster_exec import run_cluster_call
+from informer import running_informer
+from kubectl_utils import get_backend
+
+_started = time.monotonic()
+_draining = threading.Event()
+_probe_flight = SingleFlight()
+_last_probe: Optional[dict] = None
+
+
+def is_draining() -> bool:
+    return _draining.is_set()
+
+
+def install_drain_handler() -> None:
+    """
+    Wraps the server's SIGTERM/SIGINT handlers so that /readyz fails as soon as shutdown begins,
+    while the server goes on to finish in-flight requests as before.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return  # Signal handlers can only be set from the main thread (not, e.g., in a test server thread)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            _draining.set()
+            previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+
+def liveness() -> dict:
+    return {"status": "alive", "pid": os.getpid(), "uptime_seconds": round(time.monotonic() - _started, 1)}
+
+
+async def _probe_backend() -> dict:
+    start = time.monotonic()
+    try:
+        # Interactive, so the probe does not queue behind background cluster calls.
+        version = await asyncio.wait_for(run_cluster_call(get_backend().server_version, priority="interactive",
+                                                          timeout=config.HEALTH_CHECK_TIMEOUT),
+                                         config.HEALTH_CHECK_TIMEOUT)
+        result = {"ok": True, "version": version.get("gitVersion")}
+    except asyncio.TimeoutError:
+        result = {"ok": False, "error": f"no answer within {config.HEALTH_CHECK_TIMEOUT}s"}
+    except Exception as e:
+        result = {"ok": False, "error": str(e)}
+    result.update(latency_ms=round((time.monotonic() - start) * 1000, 1), checked_at=time.time())
+    return result
+
+
+async def _backend_check() -> dict:
+    global _last_probe
+    if _last_probe is None or time.time() - _last_probe["checked_at"] > config.HEALTH_CHECK_INTERVAL:
+        # Concurrent probes share one backend call.
+        _last_probe, _ = await _probe_flight.do("backend", _probe_backend)
+    return _last_probe
+
+
+def _informer_check() -> dict:
+    pending = []
+    for resource in config.INFORMER_RESOURCES:
+        informer = running_informer(resource)
+        if informer is None or not informer.synced:
+            pending.append(resource)
+    return {"ok": not pending, "pending": pending}
+
+
+def _shared_cache_check() -> dict:
+    try:
+        return dict(cluster_cache.shared.stats(), ok=True)
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+
+async def readiness() -> Tuple[bool, dict]:
+    """
+    Runs the readiness checks. Returns (ready, payload); the payload lists each check's outcome.
+    """
+    checks = {"draining": {"ok": not is_draining()}}
+    if not is_draining():
+        checks["backend"] = await _backend_check()
+        if config.INFORMER_ENABLED:
+            checks["informers"] = _informer_check()
+        if config.SHARED_CACHE_PATH:
+            checks["shared_cache"] = _shared_cache_check()
+    ready = all(check["ok"] for check in checks.values())
+    return ready, {"status": "ready" if ready else "not ready", "pid": os.getpid(), "checks": checks}
@@ -0,0 +1,503 @@
+# informer.py
+
+"""
+This module keeps an in-memory, watch-driven copy of cluster objects for the bridge.
+
+Each Informer lists a resource once, then watches it from the returned resourceVersion and
+applies ADDED/MODIFIED/DELETED events to an indexed Store. If the API server answers a watch
+with 410 Gone (our resourceVersion was compacted away), the informer relists. Handlers read
+from the stores instead of calling the cluster, and report how fresh the data is.
+
+Classes:
+    Store: Bounded, indexed object store keyed by (namespace, name).
+    Informer: List+watch loop for one resource, running in a background thread.
+
+Functions:
+    start_informers: Start the informers listed in config.INFORMER_RESOURCES.
+    stop_informers: Stop all running informers.
+    get_informer: Return the running, synced informer for a resource (or None).
+    running_informer: Return the running informer for a resource, synced or not (or None).
+    cached_pod_description / cached_events / cached_service_info / cached_cluster_summary /
+    cached_object_names:
+        Endpoint payloads served from the stores, or None when the caller must go to the cluster.
+    cached_pod / cached_service: The stored objects themselves (for change-only describes).
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+from cluster_health import ClusterHealth
+from kubectl_utils import filter_events, page_events, project_pod
+from backends import (
+    ClusterCallError,
+    NativeBackend,
+    abort_response,
+    project_object,
+    render_object,
+    render_pod_description,
+    render_yaml,
+    resource_path,
+)
+
+logger = logging.getLogger(__name__)
+
+# Heavy metadata we never serve, dropped before objects are stored.
+_DROPPED_ANNOTATIONS = ("kubectl.kubernetes.io/last-applied-configuration",)
+
+
+def slim_object(obj: dict) -> dict:
+    """
+    Removes fields that cost memory but are never served (managedFields, last-applied annotation).
+    """
+    meta = obj.get("metadata")
+    if meta:
+        meta.pop("managedFields", None)
+        annotations = meta.get("annotations")
+        if annotations:
+            for key in _DROPPED_ANNOTATIONS:
+                annotations.pop(key, None)
+    return obj
+
+
+def _key(obj: dict) -> Tuple[str, str]:
+    meta = obj.get("metadata", {})
+    return meta.get("namespace", ""), meta.get("name", "")
+
+
+class Store:
+    """
+    Thread-safe object store keyed by (namespace, name), with a namespace index and
+    optional extra indexes.
+
+    The store holds at most max_objects; when full, the least recently updated object is
+    evicted and the store is marked incomplete, so a missing key is no longer proof that
+    the object does not exist.
+
+    Args:
+        max_objects (int): Upper bound on stored objects.
+        indexers (Optional[Dict[str, Callable]]): Extra indexes, name -> function(obj) -> key.
+    """
+
+    def __init__(self, max_objects: int, indexers: Optional[Dict[str, Callable[[dict], object]]] = None):
+        self.max_objects = max_objects
+        self.indexers = indexers or {}
+        self.complete = True
+        self._lock = threading.RLock()
+        self._objects: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        self._by_namespace: Dict[str, set] = {}
+        self._indexes: Dict[str, Dict[object, set]] = {name: {} for name in self.indexers}
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def _index(self, key, obj: dict, add: bool) -> None:
+        entries = [(self._by_namespace, key[0])]
+        entries += [(self._indexes[name], func(obj)) for name, func in self.indexers.items()]
+        for index, value in entries:
+            if add:
+                index.setdefault(value, set()).add(key)
+            else:
+                bucket = index.get(value)
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del index[value]
+
+    def upsert(self, obj: dict) -> None:
+        key = _key(obj)
+        with self._lock:
+            old = self._objects.pop(key, None)
+            if old is not None:
+                self._index(key, old, add=False)
+            self._objects[key] = obj
+            self._index(key, obj, add=True)
+            while len(self._objects) > self.max_objects:
+                evicted_key, evicted = self._objects.popitem(last=False)
+                self._index(evicted_key, evicted, add=False)
+                self.complete = False
+
+    def delete(self, obj: dict) -> None:
+        key = _key(obj)
+        with self._lock:
+            old = self._objects.pop(key, None)
+            if old is not None:
+                self._index(key, old, add=False)
+
+    def replace(self, objects: List[dict]) -> None:
+        with self._lock:
+            self._objects.clear()
+            self._by_namespace.clear()
+            for index in self._indexes.values():
+                index.clear()
+            self.complete = True
+            for obj in objects:
+                self.upsert(obj)
+
+    def get(self, namespace: str, name: str) -> Optional[dict]:
+        with self._lock:
+            return self._objects.get((namespace, name))
+
+    def list(self, namespace: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            if namespace is None:
+                return list(self._objects.values())
+            return [self._objects[k] for k in self._by_namespace.get(namespace, ())]
+
+    def by_index(self, index_name: str, value) -> List[dict]:
+        with self._lock:
+            return [self._objects[k] for k in self._indexes[index_name].get(value, ())]
+
+
+class Informer:
+    """
+    Lists and then watches one resource ("pods", "events", "services", "nodes", "deployments", ...)
+    across all namespaces, keeping a Store up to date.
+
+    Listeners are called from the informer thread as listener(resource, "RESET", objects) after
+    every list, and as listener(resource, event type, object) for every watch event applied.
+
+    Attributes:
+        store (Store): The in-memory objects.
+        resource_version (Optional[str]): Last resourceVersion seen (from list, event or bookmark).
+        synced (bool): True once the first list has completed.
+        watching (bool): True while a watch connection is open (the store is live).
+        last_contact (float): time.monotonic() of the last message from the API server.
+    """
+
+    def __init__(self, resource: str, backend: NativeBackend, max_objects: int,
+                 indexers: Optional[Dict[str, Callable[[dict], object]]] = None):
+        self.resource = resource
+        self.backend = backend
+        self.store = Store(max_objects, indexers)
+        self.resource_version: Optional[str] = None
+        self.synced = False
+        self.watching = False
+        self.last_contact = 0.0
+        self.relists = 0
+        self.listeners: List[Callable[[str, str, object], None]] = []
+        self._stop = threading.Event()
+        self._response = None
+        self._thread = threading.Thread(target=self._run, name=f"informer-{resource}", daemon=True)
+
+    @property
+    def path(self) -> str:
+        return resource_path(self.resource)
+
+    def start(self) -> "Informer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        response = self._response
+        if response is not None:
+            abort_response(response)
+        self._thread.join(timeout=5)
+
+    def wait_for_sync(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.synced and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return self.synced
+
+    def freshness(self) -> dict:
+        """
+        Describes how current the store is, for inclusion in API responses.
+        While a watch is open the store is live (age 0); otherwise the age is the time since
+        the API server was last heard from, and the store turns stale after INFORMER_STALE_AFTER.
+        """
+        if self.watching:
+            age = 0.0
+        elif self.last_contact:
+            age = time.monotonic() - self.last_contact
+        else:
+            age = None
+        return {
+            "source": "cache",
+            "resource_version": self.resource_version,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "stale": not self.synced or age is None or age > config.INFORMER_STALE_AFTER,
+            "complete": self.store.complete,
+        }
+
+    def is_fresh(self) -> bool:
+        return self.synced and not self.freshness()["stale"]
+
+    # --- list/watch loop ---
+
+    def _list(self) -> None:
+        items, params = [], {"limit": config.INFORMER_LIST_PAGE_SIZE}
+        while True:
+            page = self.backend.get_json(self.path, params=params)
+            items.extend(slim_object(obj) for obj in page.get("items", []))
+            token = page.get("metadata", {}).get("continue")
+            if not token:
+                break
+            params = {"limit": config.INFORMER_LIST_PAGE_SIZE, "continue": token}
+        self.store.replace(items)
+        self._notify("RESET", items)
+        self.resource_version = page.get("metadata", {}).get("resourceVersion")
+        self.last_contact = time.monotonic()
+        self.synced = True
+        logger.info("informer %s: listed %d objects at resourceVersion %s", self.resource, len(items), self.resource_version)
+
+    def _watch(self) -> bool:
+        """
+        Runs one watch request. Returns False if the informer must relist (410 Gone).
+        """
+        params = {
+            "watch": "1",
+            "resourceVersion": self.resource_version,
+            "allowWatchBookmarks": "true",
+            "timeoutSeconds": config.INFORMER_WATCH_TIMEOUT,
+        }
+        try:
+            self._response = self.backend.request(self.path, params=params, stream=True,
+                                                  timeout=config.INFORMER_WATCH_TIMEOUT + 30)
+        except ClusterCallError as e:
+            if e.status_code == 410:
+                return False
+            raise
+        self.last_contact = time.monotonic()
+        self.watching = True
+        try:
+            for line in self._response.iter_lines():
+                if self._stop.is_set():
+                    return True
+                if not line:
+                    continue
+                if not self._apply(json.loads(line)):
+                    return False
+        finally:
+            self.watching = False
+            self.last_contact = time.monotonic()
+            self._response.close()
+            self._response = None
+        return True
+
+    def _apply(self, event: dict) -> bool:
+        self.last_contact = time.monotonic()
+        kind, obj = event.get("type"), event.get("object", {})
+        if kind == "ERROR":
+            if obj.get("code") == 410:
+                return False
+            raise ClusterCallError(f"watch {self.resource} failed: {obj.get('message')}", obj.get("code"))
+        rv = obj.get("metadata", {}).get("resourceVersion")
+        if rv:
+            self.resource_version = rv
+        if kind in ("ADDED", "MODIFIED"):
+            self.store.upsert(slim_object(obj))
+            self._notify(kind, obj)
+        elif kind == "DELETED":
+            self.store.delete(obj)
+            self._notify(kind, obj)
+        return True
+
+    def _notify(self, kind: str, payload) -> None:
+        for listener in self.listeners:
+            try:
+                listener(self.resource, kind, payload)
+            except Exception:
+                logger.exception("informer %s: listener failed", self.resource)
+
+    def _run(self) -> None:
+        backoff = 1.0
+        need_list = True
+        while not self._stop.is_set():
+            try:
+                if need_list:
+                    self._list()
+                    need_list = False
+                if not self._watch():
+                    logger.info("informer %s: resourceVersion %s expired, relisting", self.resource, self.resource_version)
+                    self.relists += 1
+                    need_list = True
+                backoff = 1.0
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning("informer %s: %s (retrying in %.0fs)", self.resource, e, backoff)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, config.INFORMER_MAX_BACKOFF)
+
+
+def _event_involved_key(event: dict):
+    involved = event.get("involvedObject", {})
+    return involved.get("namespace", ""), involved.get("name", "")
+
+
+INDEXERS = {
+    "events": {"involved": _event_involved_key},
+}
+
+_informers: Dict[str, Informer] = {}
+
+# Health of nodes, pods and deployments plus Warning events, fed by the informers' watch events.
+cluster_health = ClusterHealth()
+HEALTH_RESOURCES = ("nodes", "pods", "deployments", "events")
+
+# Prefix of continue tokens handed out for pages served from the event store.
+CACHE_TOKEN_PREFIX = "cache:"
+
+
+def start_informers(backend: Optional[NativeBackend] = None) -> Dict[str, Informer]:
+    """
+    Starts one informer per resource in config.INFORMER_RESOURCES.
+    Informers always talk to the API server directly, whatever config.CLUSTER_BACKEND is.
+    """
+    backend = backend or NativeBackend()
+    for resource in config.INFORMER_RESOURCES:
+        if resource not in _informers:
+            max_objects = config.INFORMER_MAX_OBJECTS.get(resource, 10000)
+            informer = Informer(resource, backend, max_objects, INDEXERS.get(resource))
+            if resource in HEALTH_RESOURCES:
+                informer.listeners.append(_update_health)
+            _informers[resource] = informer.start()
+    return _informers
+
+
+def _update_health(resource: str, kind: str, payload) -> None:
+    if kind == "RESET":
+        cluster_health.reset(resource, payload)
+    else:
+        cluster_health.apply(resource, kind, payload)
+
+
+def stop_informers() -> None:
+    for informer in _informers.values():
+        informer.stop()
+    _informers.clear()
+
+
+def get_informer(resource: str) -> Optional[Informer]:
+    """
+    Returns the informer for a resource if it is running, synced and not stale; otherwise None,
+    meaning the caller should go to the cluster.
+    """
+    informer = _informers.get(resource)
+    if informer is not None and informer.is_fresh():
+        return informer
+    return None
+
+
+def running_informer(resource: str) -> Optional[Informer]:
+    """
+    Returns the informer for a resource if one was started, whether or not it has synced
+    (for consumers that attach listeners rather than read the store).
+    """
+    return _informers.get(resource)
+
+
+def live_freshness() -> dict:
+    """
+    Freshness marker for data fetched from the cluster for this request.
+    """
+    return {"source": "live"}
+
+
+def cached_pod_description(pod_name: str, namespace: str,
+                           fields: Optional[Tuple[str, ...]] = None) -> Optional[Tuple[str, dict]]:
+    """
+    Returns (description, freshness) from the pod and event stores, or None on a cache miss.
+    With fields, the description is only those fields (see kubectl_utils.describe_pod).
+    """
+    cached = cached_pod(pod_name, namespace)
+    if cached is None:
+        return None
+    pod, pod_events, freshness = cached
+    if fields:
+        return project_pod(pod, pod_events, fields), freshness
+    return render_pod_description(pod, pod_events), freshness
+
+
+def cached_pod(pod_name: str, namespace: str) -> Optional[Tuple[dict, List[dict], dict]]:
+    """
+    Returns (pod, its events, freshness) from the pod and event stores, or None on a cache miss.
+    """
+    pods, events = get_informer("pods"), get_informer("events")
+    if pods is None or events is None:
+        return None
+    pod = pods.store.get(namespace, pod_name)
+    if pod is None:
+        # Not proof of absence (the object may be new or evicted); let the cluster answer.
+        return None
+    return pod, events.store.by_index("involved", (namespace, pod_name)), pods.freshness()
+
+
+def cached_events(namespace: str, since_time: Optional[str] = None, event_type: Optional[str] = None,
+                  involved_object: Optional[str] = None, reason: Optional[str] = None,
+                  limit: Optional[int] = None, continue_token: Optional[str] = None) -> Optional[Tuple[dict, dict]]:
+    """
+    Returns (page, freshness) from the event store, shaped like kubectl_utils.page_events,
+    or None if the store is not usable. Continue tokens from the cache look like "cache:<offset>".
+
+    Raises:
+        ValueError: If continue_token is a malformed cache token or points past the end of the listing.
+    """
+    if continue_token and not continue_token.startswith(CACHE_TOKEN_PREFIX):
+        return None  # A page of a live listing; keep paging against the cluster.
+    events = get_informer("events")
+    if events is None:
+        return None
+    matched = filter_events(events.store.list(namespace), since_time, event_type, involved_object, reason)
+    return page_events(matched, limit, continue_token, CACHE_TOKEN_PREFIX), events.freshness()
+
+
+def cached_service_info(service_name: str, namespace: str,
+                        fields: Optional[Tuple[str, ...]] = None) -> Optional[Tuple[str, dict]]:
+    """
+    Returns (service manifest, freshness) from the service store, or None on a cache miss.
+    With fields, only those fields are rendered (see kubectl_utils.get_service_info).
+    """
+    cached = cached_service(service_name, namespace)
+    if cached is None:
+        return None
+    service, freshness = cached
+    if fields:
+        return render_yaml(project_object(service, fields)), freshness
+    return render_object(service), freshness
+
+
+def cached_service(service_name: str, namespace: str) -> Optional[Tuple[dict, dict]]:
+    """
+    Returns (service, freshness) from the service store, or None on a cache miss.
+    """
+    services = get_informer("services")
+    if services is None:
+        return None
+    service = services.store.get(namespace, service_name)
+    if service is None:
+        return None
+    return service, services.freshness()
+
+
+def cached_object_names(resource: str, namespace: Optional[str] = None) -> Optional[Tuple[List[Tuple[str, str]], dict]]:
+    """
+    Returns ((namespace, name) pairs, freshness) of a resource's objects from its store, or None
+    if the resource has no fresh informer.
+    """
+    informer = get_informer(resource)
+    if informer is None:
+        return None
+    objects = informer.store.list(namespace)
+    names = [(obj["metadata"].get("namespace", ""), obj["metadata"]["name"]) for obj in objects]
+    return names, informer.freshness()
+
+
+def cached_cluster_summary(max_items: Optional[int] = None) -> Optional[Tuple[dict, dict]]:
+    """
+    Returns (summary, freshness) from the incrementally maintained cluster health, or None unless
+    the node, pod, deployment and event informers are all fresh. The freshness is the stalest of the four.
+    """
+    informers = [get_informer(resource) for resource in HEALTH_RESOURCES]
+    if any(informer is None for informer in informers):
+        return None
+    markers = [informer.freshness() for informer in informers]
+    freshness = max(markers, key=lambda marker: marker["age_seconds"] or 0.0)
+    freshness = dict(freshness, resource_version=None, complete=True)
+    return cluster_health.summary(max_items), freshness
@@ -1,17 +1,56 @@
 # kubectl_utils.py
 
-import subprocess
-from typing import Optional
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
 
-def run_command(command: list) -> str:
+# Backends live in backends.py; run_command is re-exported here for existing callers.
+from backends import (
+    ClusterBackend,
+    ClusterCallError,
+    FIELD_ALIASES,
+    create_backend,
+    event_line,
+    event_timestamp,
+    format_timestamp,
+    parse_timestamp,
+    project_object,
+    render_yaml,
+    run_command,
+)
+from log_merge import LogMerge
+from log_templates import LogTemplateMiner, mine_lines
+from utils import parse_duration
+
+_backend: Optional[ClusterBackend] = None
+
+
+def get_backend() -> ClusterBackend:
+    """
+    Returns the process-wide cluster backend, creating it on first use.
+    The backend is chosen by config.CLUSTER_BACKEND.
+    """
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(name: Optional[str] = None) -> ClusterBackend:
     """
-    Helper function to run a command via subprocess.
-    Raises an exception if the command fails.
+    Replaces the process-wide backend (closing the previous one).
+
+    Args:
+        name (Optional[str]): "kubectl" or "native". Defaults to config.CLUSTER_BACKEND.
+
+    Returns:
+        ClusterBackend: The newly created backend.
     """
-    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if result.returncode != 0:
-        raise Exception(f"Command '{' '.join(command)}' failed with error: {result.stderr.strip()}")
-    return result.stdout.strip()
+    global _backend
+    if _backend is not None:
+        _backend.close()
+    _backend = create_backend(name)
+    return _backend
 
 
 def get_logs(pod_name: str, namespace: str, since_time: str, tail_lines: int) -> str:
@@ -27,73 +66,402 @@ def get_logs(pod_name: str, namespace: str, since_time: str, tail_lines: int) ->
     Returns:
         str: Logs output.
     """
-    # Construct the command:
-    # Example: kubectl logs <pod_name> -n <namespace> --since=5m --tail=100
-    command = [
-        "kubectl", "logs", pod_name,
-        "-n", namespace,
-        f"--since={since_time}",
-        f"--tail={tail_lines}"
-    ]
-    return run_command(command)
+    return get_backend().get_logs(pod_name, namespace, since_time, tail_lines)
 
 
-def describe_pod(pod_name: str, namespace: str) -> str:
+def stream_logs(pod_name: str, namespace: str, since_time: str, tail_lines: int, follow: bool = False) -> Iterator[str]:
     """
-    Get detailed description of a pod.
-    
+    Stream logs for a specified pod, one line at a time, as they are read.
+
     Args:
         pod_name (str): Name of the pod.
         namespace (str): Kubernetes namespace.
-    
+        since_time (str): Time window for logs (e.g., "5m").
+        tail_lines (int): Number of tail lines to retrieve.
+        follow (bool): Keep streaming new lines as the pod writes them.
+
+    Returns:
+        Iterator[str]: Log lines (without trailing newlines).
+    """
+    return get_backend().stream_logs(pod_name, namespace, since_time, tail_lines, follow)
+
+
+def get_log_templates(pod_name: str, namespace: str, since_time: str, tail_lines: int) -> LogTemplateMiner:
+    """
+    Mine line templates from a pod's logs while they are streamed (see log_templates.py).
+
+    Args:
+        pod_name (str): Name of the pod.
+        namespace (str): Kubernetes namespace.
+        since_time (str): Time window for logs (e.g., "5m").
+        tail_lines (int): Number of tail lines to retrieve.
+
     Returns:
-        str: Output of 'kubectl describe pod'.
+        LogTemplateMiner: Templates with counts, time ranges and kept sample lines.
     """
-    command = [
-        "kubectl", "describe", "pod", pod_name,
-        "-n", namespace
-    ]
-    return run_command(command)
+    return mine_lines(stream_logs(pod_name, namespace, since_time, tail_lines))
 
 
-def get_events(namespace: str, since_time: Optional[str] = None) -> str:
+def describe_pod(pod_name: str, namespace: str, fields: Optional[Tuple[str, ...]] = None) -> str:
     """
-    Retrieve cluster events for a namespace.
+    Get detailed description of a pod.
     
     Args:
+        pod_name (str): Name of the pod.
         namespace (str): Kubernetes namespace.
-        since_time (Optional[str]): Time window for events (e.g., "10m").
-                                     (Note: Filtering by time may need additional parsing.)
+        fields (Optional[Tuple[str, ...]]): Only these fields (see backends.parse_fields), e.g.
+            ("status", "containers.state", "events"); the pod's events are only listed if asked for.
     
     Returns:
-        str: Output of 'kubectl get events'.
+        str: 'kubectl describe pod'-style description, or the selected fields as YAML.
     """
-    # Base command to get events sorted by creation timestamp.
-    command = [
-        "kubectl", "get", "events",
-        "-n", namespace,
-        "--sort-by=.metadata.creationTimestamp"
-    ]
-    
-    # If since_time is provided, you might add filtering in the future.
-    # For now, we return all events sorted by time.
-    return run_command(command)
+    if not fields:
+        return get_backend().describe_pod(pod_name, namespace)
+    if any(path.split(".")[0] == "events" for path in fields):
+        pod, events = get_pod_with_events(pod_name, namespace)
+    else:
+        pod, events = get_pod(pod_name, namespace), None
+    return project_pod(pod, events, fields)
+
+
+def project_pod(pod: dict, events: Optional[List[dict]], fields: Tuple[str, ...]) -> str:
+    """
+    Renders the selected fields of a pod as YAML; "events" selects its events, one line each as in describe_pod.
+    """
+    extra = None
+    if events is not None:
+        extra = {"events": [event_line(event) for event in sorted(events, key=event_timestamp)]}
+    return render_yaml(project_object(pod, fields, FIELD_ALIASES["pods"], extra))
+
 
+# Canonical kinds for involvedObject.kind field selectors (which are case-sensitive).
+_KINDS = {
+    "pod": "Pod", "node": "Node", "service": "Service", "deployment": "Deployment",
+    "replicaset": "ReplicaSet", "statefulset": "StatefulSet", "daemonset": "DaemonSet",
+    "job": "Job", "cronjob": "CronJob", "persistentvolumeclaim": "PersistentVolumeClaim",
+}
 
-def get_service_info(service_name: str, namespace: str) -> str:
+
+def build_event_selector(event_type: Optional[str] = None, involved_object: Optional[str] = None,
+                         reason: Optional[str] = None) -> Optional[str]:
+    """
+    Build a server-side field selector for events.
+
+    Args:
+        event_type (Optional[str]): "Warning" or "Normal".
+        involved_object (Optional[str]): "<name>" or "<kind>/<name>" (e.g., "pod/backend-pod").
+        reason (Optional[str]): Event reason (e.g., "BackOff").
+
+    Returns:
+        Optional[str]: The field selector, or None if no filter was given.
+    """
+    terms = []
+    if event_type:
+        terms.append(f"type={event_type}")
+    if reason:
+        terms.append(f"reason={reason}")
+    if involved_object:
+        kind, _, name = involved_object.rpartition("/")
+        if kind:
+            terms.append(f"involvedObject.kind={_KINDS.get(kind.lower(), kind)}")
+        terms.append(f"involvedObject.name={name}")
+    return ",".join(terms) or None
+
+
+def filter_events(events: List[dict], since_time: Optional[str] = None, event_type: Optional[str] = None,
+                  involved_object: Optional[str] = None, reason: Optional[str] = None) -> List[dict]:
+    """
+    Apply the event filters locally (used for the time window, which the API cannot select on,
+    and for events served from the informer cache).
+
+    Returns:
+        List[dict]: The matching raw events, oldest first.
+    """
+    cutoff = None
+    if since_time:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=parse_duration(since_time))
+    kind, name = None, None
+    if involved_object:
+        kind, _, name = involved_object.rpartition("/")
+        kind = _KINDS.get(kind.lower(), kind) if kind else None
+
+    matched = []
+    for event in events:
+        if event_type and event.get("type") != event_type:
+            continue
+        if reason and event.get("reason") != reason:
+            continue
+        involved = event.get("involvedObject", {})
+        if name and (involved.get("name") != name or (kind and involved.get("kind") != kind)):
+            continue
+        if cutoff is not None:
+            ts = parse_timestamp(event_timestamp(event))
+            if ts is None or ts < cutoff:
+                continue
+        matched.append(event)
+    matched.sort(key=event_timestamp)
+    return matched
+
+
+def to_event(event: dict) -> dict:
+    """
+    Convert a raw Kubernetes event into the shape of models.Event.
+    """
+    involved = event.get("involvedObject", {})
+    meta = event.get("metadata", {})
+    return {
+        "event_type": event.get("type", ""),
+        "reason": event.get("reason", ""),
+        "message": (event.get("message") or "").strip(),
+        "timestamp": event_timestamp(event) or None,
+        "involved_object": f"{involved.get('kind', '').lower()}/{involved.get('name', '')}",
+        "count": event.get("count"),
+        "uid": meta.get("uid"),
+        "resource_version": meta.get("resourceVersion"),
+    }
+
+
+def list_matching_events(namespace: str, since_time: Optional[str] = None, event_type: Optional[str] = None,
+                         involved_object: Optional[str] = None, reason: Optional[str] = None) -> List[dict]:
+    """
+    List every event of a namespace that matches the filters, following the API's continue tokens.
+    Type, reason and involved object are selected by the API server, the time window locally.
+
+    Args:
+        namespace (str): Kubernetes namespace (None for all namespaces).
+        since_time (Optional[str]): Only events from this time window (e.g., "10m").
+        event_type (Optional[str]): "Warning" or "Normal".
+        involved_object (Optional[str]): "<name>" or "<kind>/<name>".
+        reason (Optional[str]): Event reason (e.g., "BackOff").
+
+    Returns:
+        List[dict]: The matching raw events, oldest first.
+    """
+    selector = build_event_selector(event_type, involved_object, reason)
+    return filter_events(list_all("events", namespace, selector), since_time=since_time)
+
+
+def parse_page_token(continue_token: Optional[str], prefix: str = "") -> int:
+    """
+    Returns the offset in a continue token of page_events ("<prefix><offset>"); 0 for no token.
+
+    Raises:
+        ValueError: If the token is not one page_events returned.
+    """
+    if not continue_token:
+        return 0
+    offset = continue_token[len(prefix):] if continue_token.startswith(prefix) else ""
+    if not offset.isdigit():
+        raise ValueError(f"Invalid continue_token {continue_token!r}; pass back the one the previous page returned")
+    return int(offset)
+
+
+def page_events(events: List[dict], limit: Optional[int] = None, continue_token: Optional[str] = None,
+                token_prefix: str = "") -> dict:
+    """
+    Cut one page, newest first, from the events that matched the filters.
+
+    Args:
+        events (List[dict]): The matching raw events, oldest first (filter_events).
+        limit (Optional[int]): Events per page (None for all of them).
+        continue_token (Optional[str]): Token from the previous page.
+        token_prefix (str): Marks the tokens of this listing (see informer.CACHE_TOKEN_PREFIX).
+
+    Returns:
+        dict: {"events": [models.Event-shaped dicts, newest first], "continue_token": str or None,
+               "total": number of matching events on all pages}.
+
+    Raises:
+        ValueError: If continue_token is not a token of this listing.
+    """
+    offset = parse_page_token(continue_token, token_prefix)
+    if offset and offset >= len(events):
+        raise ValueError(f"Invalid continue_token {continue_token!r}; it points past the end of the listing")
+    end = offset + limit if limit else len(events)
+    newest_first = events[::-1]
+    return {
+        "events": [to_event(event) for event in newest_first[offset:end]],
+        "continue_token": f"{token_prefix}{end}" if end < len(events) else None,
+        "total": len(events),
+    }
+
+
+def get_service_info(service_name: str, namespace: str, fields: Optional[Tuple[str, ...]] = None) -> str:
     """
     Get details about a specific Kubernetes service.
     
     Args:
         service_name (str): Name of the service.
         namespace (str): Kubernetes namespace.
+        fields (Optional[Tuple[str, ...]]): Only these fields (see backends.parse_fields), e.g. ("ports", "selector").
         
     Returns:
-        str: Output of 'kubectl get svc'.
+        str: Service manifest (YAML), or the selected fields as YAML.
+    """
+    if not fields:
+        return get_backend().get_service_info(service_name, namespace)
+    return render_yaml(project_object(get_service(service_name, namespace), fields))
+
+
+def get_pod(pod_name: str, namespace: str) -> dict:
+    """
+    Get a pod as a structured Kubernetes API object.
+
+    Args:
+        pod_name (str): Name of the pod.
+        namespace (str): Kubernetes namespace.
+
+    Returns:
+        dict: The decoded Pod object.
+    """
+    return get_backend().get_pod(pod_name, namespace)
+
+
+def get_pod_with_events(pod_name: str, namespace: str) -> Tuple[dict, List[dict]]:
+    """
+    Get a pod and the events about it as structured Kubernetes API objects.
+
+    Args:
+        pod_name (str): Name of the pod.
+        namespace (str): Kubernetes namespace.
+
+    Returns:
+        Tuple[dict, List[dict]]: The decoded Pod object and its events.
+    """
+    pod = get_pod(pod_name, namespace)
+    events = list_events(namespace, field_selector=f"involvedObject.name={pod_name}").get("items", [])
+    return pod, events
+
+
+def get_service(service_name: str, namespace: str) -> dict:
+    """
+    Get a service as a structured Kubernetes API object.
+
+    Args:
+        service_name (str): Name of the service.
+        namespace (str): Kubernetes namespace.
+
+    Returns:
+        dict: The decoded Service object.
+    """
+    return get_backend().get_service(service_name, namespace)
+
+
+def list_events(namespace: Optional[str], field_selector: Optional[str] = None,
+                limit: Optional[int] = None, continue_token: Optional[str] = None) -> dict:
+    """
+    List one page of events as raw Kubernetes API objects.
+
+    Args:
+        namespace (Optional[str]): Kubernetes namespace, or None for all namespaces.
+        field_selector (Optional[str]): Server-side field selector (e.g., "type=Warning").
+        limit (Optional[int]): Page size.
+        continue_token (Optional[str]): Token from the previous page.
+
+    Returns:
+        dict: The decoded EventList.
     """
-    command = [
-        "kubectl", "get", "svc", service_name,
-        "-n", namespace,
-        "-o", "yaml"  # Return output in YAML format for better readability
-    ]
-    return run_command(command)
+    return get_backend().list_events(namespace, field_selector, limit, continue_token)
+
+
+def list_all(resource: str, namespace: Optional[str] = None, field_selector: Optional[str] = None,
+             page_size: int = 500, label_selector: Optional[str] = None) -> List[dict]:
+    """
+    List every object of a resource, following continue tokens.
+
+    Args:
+        resource (str): Plural resource name (e.g., "nodes", "pods", "deployments", "events").
+        namespace (Optional[str]): Kubernetes namespace, or None for all namespaces.
+        field_selector (Optional[str]): Server-side field selector.
+        page_size (int): Objects requested per page.
+        label_selector (Optional[str]): Server-side label selector (e.g., "app=backend").
+
+    Returns:
+        List[dict]: The decoded objects.
+    """
+    items, token = [], None
+    while True:
+        page = get_backend().list_objects(resource, namespace, field_selector, page_size, token, label_selector)
+        items.extend(page.get("items") or [])
+        token = page.get("metadata", {}).get("continue")
+        if not token:
+            return items
+
+
+# Workload kinds whose pods can be selected by name, mapped to their plural resource
+WORKLOAD_KINDS = {"deployment": "deployments", "statefulset": "statefulsets", "daemonset": "daemonsets",
+                  "replicaset": "replicasets"}
+
+
+def workload_selector(kind: str, name: str, namespace: str) -> str:
+    """
+    Get the label selector of a workload's pods, from its spec.selector.
+
+    Args:
+        kind (str): "deployment", "statefulset", "daemonset" or "replicaset".
+        name (str): Name of the workload.
+        namespace (str): Kubernetes namespace.
+
+    Returns:
+        str: Label selector in API syntax (e.g., "app=backend,tier in (web,api)").
+    """
+    workload = get_backend().get_object(WORKLOAD_KINDS[kind], name, namespace)
+    selector = workload.get("spec", {}).get("selector") or {}
+    terms = [f"{key}={value}" for key, value in sorted((selector.get("matchLabels") or {}).items())]
+    for expression in selector.get("matchExpressions") or []:
+        key, operator, values = expression["key"], expression["operator"], expression.get("values") or []
+        if operator == "In":
+            terms.append(f"{key} in ({','.join(values)})")
+        elif operator == "NotIn":
+            terms.append(f"{key} notin ({','.join(values)})")
+        elif operator == "Exists":
+            terms.append(key)
+        elif operator == "DoesNotExist":
+            terms.append(f"!{key}")
+    if not terms:
+        raise ClusterCallError(f"{kind} {name} has no pod selector")
+    return ",".join(terms)
+
+
+def list_workload_containers(namespace: str, label_selector: str, container: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    List the (pod, container) pairs whose logs make up a workload's log.
+
+    Args:
+        namespace (str): Kubernetes namespace.
+        label_selector (str): Label selector of the pods.
+        container (Optional[str]): Only this container of each pod (default: all containers).
+
+    Returns:
+        List[Tuple[str, str]]: (pod name, container name), sorted. All of them; the caller enforces
+        config.WORKLOAD_LOG_MAX_CONTAINERS.
+    """
+    targets = []
+    for pod in list_all("pods", namespace, label_selector=label_selector):
+        for spec in pod.get("spec", {}).get("containers") or []:
+            if container is None or spec["name"] == container:
+                targets.append((pod["metadata"]["name"], spec["name"]))
+    return sorted(targets)
+
+
+def merge_workload_logs(namespace: str, targets: List[Tuple[str, str]], since_time: Optional[str],
+                        tail_lines: Optional[int]) -> LogMerge:
+    """
+    Merge the logs of several containers by timestamp (see log_merge.py).
+
+    Args:
+        namespace (str): Kubernetes namespace.
+        targets (List[Tuple[str, str]]): (pod, container) pairs, e.g. from list_workload_containers.
+        since_time (Optional[str]): Time window for logs (e.g., "5m").
+        tail_lines (Optional[int]): Lines retrieved from the end of each container's log.
+
+    Returns:
+        LogMerge: Iterate it for "<timestamp> <pod>/<container>: <line>" lines, oldest first.
+    """
+    since = format_timestamp(time.time() - parse_duration(since_time)) if since_time else None
+    backend = get_backend()
+
+    def reader(pod: str, container: str):
+        return lambda: backend.stream_log_records(pod, namespace, container, since=since, tail_lines=tail_lines)
+
+    return LogMerge({f"{pod}/{container}": reader(pod, container) for pod, container in targets})
@@ -0,0 +1,158 @@
+# log_merge.py
+
+"""
+This module merges the logs of many containers into one stream ordered by timestamp.
+
+Each container's log (read with timestamps) is read ahead by its own thread into a queue of
+at most config.WORKLOAD_LOG_BUFFER_LINES lines. heapq.merge then repeatedly takes the oldest
+head line across the queues, so the merge holds about that many lines per container however
+long the logs are, and lines go out as soon as every container has produced its next one.
+At most config.WORKLOAD_LOG_CONCURRENCY logs are being opened (kubectl started, or the API
+request sent) at the same time.
+
+A container whose log cannot be read (not started yet, pod gone) does not fail the merge; its
+error is recorded in LogMerge.errors and the other containers go on.
+
+Classes:
+    PrefetchedLog: One container's log, read ahead by a thread.
+    LogMerge: k-way merge of PrefetchedLogs by timestamp.
+"""
+
+import contextvars
+import heapq
+import queue
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import config
+from backends import normalize_timestamp
+
+_END = object()
+
+
+class _Closed(Exception):
+    """Raised in a reader thread when the merge has been closed."""
+
+
+class PrefetchedLog:
+    """
+    Reads one container's timestamped log lines in a background thread.
+
+    The thread runs in a copy of the starting thread's context, so a cancelled call
+    (current_cancel_token) also kills this container's kubectl process or closes its API response.
+
+    Args:
+        tag (str): "<pod>/<container>", prefixed to every merged line.
+        open_log (Callable[[], Iterator[str]]): Returns the log lines, each "<RFC3339Nano> <text>".
+        opening (threading.Semaphore): Bounds how many logs are being opened at once.
+        buffer_lines (int): Lines read ahead before the reader waits for the merge.
+    """
+
+    def __init__(self, tag: str, open_log: Callable[[], Iterator[str]], opening: threading.Semaphore,
+                 buffer_lines: int):
+        self.tag = tag
+        self.error: Optional[BaseException] = None
+        self.lines = 0
+        self._open_log = open_log
+        self._opening = opening
+        self._queue: queue.Queue = queue.Queue(maxsize=buffer_lines)
+        self._closed = threading.Event()
+
+    def start(self) -> "PrefetchedLog":
+        # Started from the thread that iterates the merge, so the copy carries its cancel token.
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(self._read,), name=f"log-{self.tag}", daemon=True).start()
+        return self
+
+    def _read(self) -> None:
+        lines = None
+        try:
+            # The slot covers starting the read and waiting for the first line, the slow part.
+            with self._opening:
+                if self._closed.is_set():
+                    return
+                lines = iter(self._open_log())
+                first = next(lines, None)
+            if first is not None:
+                self._put(first)
+                for line in lines:
+                    self._put(line)
+        except _Closed:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            if lines is not None and hasattr(lines, "close"):
+                lines.close()
+            try:
+                self._put(_END)
+            except _Closed:
+                pass
+
+    def _put(self, item) -> None:
+        while True:
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                if self._closed.is_set():
+                    raise _Closed()
+
+    def records(self) -> Iterator[Tuple[str, str, str]]:
+        """
+        Yields (normalized timestamp, tag, text) in log order. A line without a timestamp
+        (which kubectl --timestamps never writes) keeps the timestamp of the line before it.
+        """
+        last = ""
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            stamp, _, text = item.partition(" ")
+            try:
+                last = normalize_timestamp(stamp)
+            except ValueError:
+                text = item
+            self.lines += 1
+            yield last, self.tag, text
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+class LogMerge:
+    """
+    Merges container logs by timestamp. Iterate it for the merged lines
+    ("<timestamp> <pod>/<container>: <text>"), and close() it to stop early.
+
+    Args:
+        logs (Dict[str, Callable[[], Iterator[str]]]): "<pod>/<container>" -> function returning its lines.
+        concurrency (Optional[int]): Logs opened at the same time (config.WORKLOAD_LOG_CONCURRENCY).
+        buffer_lines (Optional[int]): Lines read ahead per log (config.WORKLOAD_LOG_BUFFER_LINES).
+    """
+
+    def __init__(self, logs: Dict[str, Callable[[], Iterator[str]]], concurrency: Optional[int] = None,
+                 buffer_lines: Optional[int] = None):
+        opening = threading.Semaphore(concurrency or config.WORKLOAD_LOG_CONCURRENCY)
+        buffer_lines = buffer_lines or config.WORKLOAD_LOG_BUFFER_LINES
+        self.logs: List[PrefetchedLog] = [PrefetchedLog(tag, open_log, opening, buffer_lines)
+                                          for tag, open_log in logs.items()]
+        self.total_lines = 0
+
+    def __iter__(self) -> Iterator[str]:
+        for log in self.logs:
+            log.start()
+        try:
+            for stamp, tag, text in heapq.merge(*(log.records() for log in self.logs)):
+                self.total_lines += 1
+                yield f"{stamp} {tag}: {text}"
+        finally:
+            self.close()
+
+    @property
+    def errors(self) -> Dict[str, str]:
+        return {log.tag: str(log.error) for log in self.logs if log.error is not None}
+
+    def close(self) -> None:
+        for log in self.logs:
+            log.close()
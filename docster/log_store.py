@@ -0,0 +1,688 @@
+# log_store.py
+
+"""
+This module keeps a local, indexed copy of pod logs so they can be searched across pods and
+time ranges (GET /search-logs) without fetching every pod's log from the cluster again.
+
+A background LogIngester lists the pods to keep (config.LOG_STORE_NAMESPACE / LOG_STORE_SELECTOR)
+every config.LOG_STORE_INTERVAL seconds and appends each container's new lines to the store,
+reading from the last timestamp stored for it (sinceTime). When a container restarts, the
+tail of the previous container is read first, so crash output is kept.
+
+The store appends records ("<timestamp>\\t<namespace>/<pod>/<container>\\t<line>\\n") to segment
+files. Each segment is cut into blocks of about config.LOG_STORE_BLOCK_BYTES; per block it keeps
+the byte range, the time range and the sources written to it, plus an inverted index from words
+to blocks. A search reads only the blocks whose time range, sources and words can match, through
+an mmap of the segment, and confirms each candidate line with a substring match. Full segments
+are sealed (their index is written next to them as JSON) and the oldest are deleted once the
+store grows past config.LOG_STORE_MAX_BYTES.
+
+Classes:
+    Segment: One append-only segment file with its block, time and word indexes.
+    LogStore: The segments of a directory, with rotation, retention and search.
+    LogIngester: Background thread that copies pod logs into a LogStore.
+
+Functions:
+    parse_time_bound: Search bound ("2h" before now, or an RFC3339 time) as a normalized timestamp.
+    query_terms: The indexed words a matching line must contain.
+    parse_label_selector / match_labels: Equality-based label selectors.
+    get_store: The process-wide store (or None when disabled).
+    start_ingestion / stop_ingestion: Start and stop the background ingester.
+    search_logs: Search the process-wide store.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import config
+import informer
+import kubectl_utils
+from backends import ClusterCallError, format_timestamp, normalize_timestamp
+from utils import parse_duration
+
+logger = logging.getLogger(__name__)
+
+# Words of 3-32 letters (plus - and _) are indexed; anything with digits (ids, counters,
+# durations) would only bloat the index, so queries fall back to scanning for those.
+_WORD = re.compile(r"[a-z][a-z_-]{2,31}")
+_SEGMENT_NAME = re.compile(r"^seg-(\d{8})\.log$")
+
+
+def parse_time_bound(value: Optional[str]) -> Optional[str]:
+    """
+    Converts a search bound, either a duration before now ("2h") or an RFC3339 time, to a
+    normalized timestamp. Raises ValueError if it is neither.
+    """
+    if not value:
+        return None
+    try:
+        seconds = parse_duration(value)
+    except ValueError:
+        return normalize_timestamp(value)
+    return format_timestamp(time.time() - seconds)
+
+
+def words(text: str) -> Set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+def query_terms(query: str) -> List[Tuple[str, bool, bool]]:
+    """
+    The words a line must contain to match 'query' as a substring, as (word, open start, open end).
+    A word touching an end of the query may be part of a longer word in the line: "timeo" matches
+    "timeout", so it stands for every indexed word that starts with it.
+    """
+    query = query.lower()
+    terms = []
+    for match in _WORD.finditer(query):
+        start, end = match.span()
+        open_start = start == 0 or query[start - 1] in "_-"
+        open_end = end == len(query) or end - start == 32 or query[end] in "_-"
+        terms.append((match.group(), open_start, open_end))
+    return terms
+
+
+def parse_label_selector(selector: Optional[str]) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Parses an equality-based label selector ("app=backend,tier!=db,canary") into
+    (key, operator, value) requirements; the operators are "=", "!=" and "exists".
+
+    Raises:
+        ValueError: If a requirement is malformed.
+    """
+    requirements = []
+    for part in (selector or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r"([\w./-]+)\s*(!=|==|=)\s*([\w.-]*)", part)
+        if match:
+            key, op, value = match.groups()
+            requirements.append((key, "!=" if op == "!=" else "=", value))
+        elif re.fullmatch(r"[\w./-]+", part):
+            requirements.append((part, "exists", None))
+        else:
+            raise ValueError(f"Invalid label selector requirement: {part!r}")
+    return requirements
+
+
+def match_labels(labels: Dict[str, str], requirements: List[Tuple[str, str, Optional[str]]]) -> bool:
+    for key, op, value in requirements:
+        if op == "exists":
+            if key not in labels:
+                return False
+        elif op == "=":
+            if labels.get(key) != value:
+                return False
+        elif labels.get(key) == value:
+            return False
+    return True
+
+
+def _lines_containing(chunk: bytes, query: str, stats: dict) -> Iterator[str]:
+    """
+    The lines of a block in which 'query' occurs (case-insensitively), found by searching the
+    whole block rather than each line; non-ASCII queries fall back to checking every line.
+    """
+    stats["blocks_read"] += 1
+    stats["bytes_scanned"] += len(chunk)
+    if not query.isascii():
+        for raw in chunk.splitlines():
+            yield raw.decode("utf-8", "replace")
+        return
+    needle = query.lower().encode("ascii")
+    haystack = chunk.lower()
+    position = haystack.find(needle)
+    while position != -1:
+        line_start = haystack.rfind(b"\n", 0, position) + 1
+        line_end = haystack.find(b"\n", position)
+        if line_end == -1:
+            line_end = len(haystack)
+        yield chunk[line_start:line_end].decode("utf-8", "replace")
+        position = haystack.find(needle, line_end)
+
+
+class Segment:
+    """
+    One segment file and its indexes.
+
+    Attributes:
+        blocks (list): [start offset, end offset, first ts, last ts, set of sources] per block.
+        words (dict): word -> set of block numbers containing it.
+        sources (dict): source -> [first ts, last ts, lines, lines at the last ts] for the lines in
+            this segment.
+        sealed (bool): True once the segment is full and its index is on disk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path[:-len(".log")] + ".idx"
+        self.blocks: List[list] = []
+        self.words: Dict[str, Set[int]] = {}
+        self.sources: Dict[str, list] = {}
+        self.size = 0
+        self.sealed = False
+        self._file = None
+
+    @classmethod
+    def open(cls, path: str) -> "Segment":
+        """
+        Opens an existing segment: a sealed one from its index, an active one (or one whose
+        index is missing) by rescanning the file.
+        """
+        segment = cls(path)
+        if os.path.exists(segment.index_path):
+            try:
+                with open(segment.index_path, encoding="utf-8") as f:
+                    index = json.load(f)
+                segment.blocks = [[*block[:4], set(block[4])] for block in index["blocks"]]
+                segment.words = {word: set(blocks) for word, blocks in index["words"].items()}
+                segment.sources = index["sources"]
+                segment.size = index["size"]
+                segment.sealed = True
+                return segment
+            except (OSError, ValueError, KeyError):
+                logger.warning("log store: rebuilding unreadable index %s", segment.index_path)
+        segment._rescan()
+        return segment
+
+    def _rescan(self) -> None:
+        with open(self.path, "rb") as f:
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # Drop a record cut short by a crash
+        if end < len(data):
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+        offset = 0
+        for raw in data[:end].splitlines(keepends=True):
+            ts, source, text = raw.decode("utf-8", "replace").rstrip("\n").split("\t", 2)
+            self._index(offset, len(raw), ts, source, text)
+            offset += len(raw)
+        self.size = end
+
+    def append(self, ts: str, source: str, text: str) -> None:
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        record = f"{ts}\t{source}\t{text}\n".encode("utf-8", "replace")
+        self._file.write(record)
+        self._index(self.size, len(record), ts, source, text)
+        self.size += len(record)
+
+    def _index(self, offset: int, length: int, ts: str, source: str, text: str) -> None:
+        if not self.blocks or self.blocks[-1][1] - self.blocks[-1][0] >= config.LOG_STORE_BLOCK_BYTES:
+            self.blocks.append([offset, offset, ts, ts, set()])
+        block = self.blocks[-1]
+        block[1] = offset + length
+        block[2] = min(block[2], ts)
+        block[3] = max(block[3], ts)
+        block[4].add(source)
+        number = len(self.blocks) - 1
+        for word in words(text):
+            self.words.setdefault(word, set()).add(number)
+        stats = self.sources.get(source)
+        if stats is None:
+            self.sources[source] = [ts, ts, 1, 1]
+            return
+        if len(stats) < 4:  # Index written before the lines at the last timestamp were counted
+            stats.append(1)
+        if ts > stats[1]:
+            stats[3] = 1
+        elif ts == stats[1]:
+            stats[3] += 1
+        stats[0], stats[1], stats[2] = min(stats[0], ts), max(stats[1], ts), stats[2] + 1
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def seal(self) -> None:
+        """
+        Closes the file and writes the index next to it; the segment is read-only afterwards.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        index = {
+            "size": self.size,
+            "blocks": [[*block[:4], sorted(block[4])] for block in self.blocks],
+            "words": {word: sorted(blocks) for word, blocks in self.words.items()},
+            "sources": self.sources,
+        }
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp, self.index_path)
+        self.sealed = True
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def delete(self) -> None:
+        self.close()
+        for path in (self.path, self.index_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def postings(self, word: str, open_start: bool, open_end: bool) -> Set[int]:
+        """
+        Blocks containing 'word', or with open ends, any indexed word that ends with, starts with
+        or contains it.
+        """
+        if not open_start and not open_end:
+            return self.words.get(word, set())
+        blocks: Set[int] = set()
+        for indexed, numbers in self.words.items():
+            if (word in indexed if open_start and open_end else
+                    indexed.endswith(word) if open_start else indexed.startswith(word)):
+                blocks |= numbers
+        return blocks
+
+    def candidate_blocks(self, terms: List[Tuple[str, bool, bool]], sources: Optional[Set[str]],
+                         since: Optional[str], until: Optional[str], blocks: int) -> List[int]:
+        """
+        Numbers of the first 'blocks' blocks that may hold a match: every query term occurs in
+        them, they contain one of the sources, and their time range overlaps [since, until].
+        """
+        candidates: Optional[Set[int]] = None
+        for term in terms:
+            postings = self.postings(*term)
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        numbers = range(blocks) if candidates is None else sorted(n for n in candidates if n < blocks)
+        selected = []
+        for number in numbers:
+            _, _, first, last, block_sources = self.blocks[number]
+            if since and last < since or until and first > until:
+                continue
+            if sources is not None and not sources & block_sources:
+                continue
+            selected.append(number)
+        return selected
+
+
+class LogStore:
+    """
+    Segment files in one directory: appends, rotation, retention and search.
+
+    Args:
+        root (str): Directory of the segment files (created if missing).
+        segment_bytes (int): Size at which the active segment is sealed and a new one started.
+        max_bytes (int): Size of all segments beyond which the oldest are deleted.
+    """
+
+    def __init__(self, root: Optional[str] = None, segment_bytes: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        self.root = root or config.LOG_STORE_DIR
+        self.segment_bytes = segment_bytes or config.LOG_STORE_SEGMENT_BYTES
+        self.max_bytes = max_bytes or config.LOG_STORE_MAX_BYTES
+        self.deleted_segments = 0
+        self._lock = threading.Lock()
+        self._labels: Dict[str, Dict[str, str]] = {}  # "<namespace>/<pod>" -> pod labels
+        self._last: Dict[str, Tuple[str, int]] = {}   # source -> (newest timestamp stored, lines at it)
+        os.makedirs(self.root, exist_ok=True)
+        self.segments: List[Segment] = []
+        for name in sorted(os.listdir(self.root)):
+            if _SEGMENT_NAME.match(name):
+                self.segments.append(Segment.open(os.path.join(self.root, name)))
+        labels_path = os.path.join(self.root, "labels.json")
+        if os.path.exists(labels_path):
+            with open(labels_path, encoding="utf-8") as f:
+                self._labels = json.load(f)
+        for segment in self.segments:
+            for source, stats in segment.sources.items():
+                last, count = stats[1], stats[3] if len(stats) > 3 else 1
+                known = self._last.get(source)
+                if known is None or last > known[0]:
+                    self._last[source] = (last, count)
+                elif last == known[0]:  # Lines of one timestamp on both sides of a rotation
+                    self._last[source] = (last, known[1] + count)
+        for segment in self.segments[:-1]:
+            if not segment.sealed:  # Rotated, but the index was not written before a crash
+                segment.seal()
+        if not self.segments or self.segments[-1].sealed:
+            self._new_segment()
+
+    def _new_segment(self) -> None:
+        number = int(_SEGMENT_NAME.match(os.path.basename(self.segments[-1].path)).group(1)) + 1 if self.segments else 1
+        path = os.path.join(self.root, f"seg-{number:08d}.log")
+        open(path, "ab").close()
+        self.segments.append(Segment(path))
+
+    @property
+    def size(self) -> int:
+        return sum(segment.size for segment in self.segments)
+
+    def last_timestamp(self, source: str) -> Optional[str]:
+        with self._lock:
+            last = self._last.get(source)
+            return last[0] if last is not None else None
+
+    def set_labels(self, pod: str, labels: Dict[str, str]) -> None:
+        with self._lock:
+            self._labels[pod] = dict(labels)
+
+    def append(self, source: str, records: List[Tuple[str, str]]) -> int:
+        """
+        Appends (normalized timestamp, line) records of one source, oldest first, skipping those
+        already stored: records older than the newest stored timestamp, and as many records at
+        that timestamp as are stored for it (a re-read from a second-precision sinceTime returns
+        them again). Lines of one multi-line write share a timestamp and are all kept.
+        Returns the number of records written.
+        """
+        written = 0
+        with self._lock:
+            last, stored = self._last.get(source, (None, 0))
+            seen = 0  # Records at the 'last' timestamp in this batch
+            for ts, text in records:
+                if last is not None and ts < last:
+                    continue
+                if ts == last:
+                    seen += 1
+                    if seen <= stored:
+                        continue
+                    stored += 1
+                else:
+                    last, stored, seen = ts, 1, 1
+                active = self.segments[-1]
+                active.append(ts, source, text.replace("\n", " "))
+                written += 1
+                if active.size >= self.segment_bytes:
+                    self._rotate()
+            if last is not None:
+                self._last[source] = (last, stored)
+            self.segments[-1].flush()
+        return written
+
+    def _rotate(self) -> None:
+        self.segments[-1].seal()
+        self._save_labels()
+        self._new_segment()
+        total = self.size
+        while total > self.max_bytes and len(self.segments) > 1:
+            oldest = self.segments.pop(0)
+            total -= oldest.size
+            oldest.delete()
+            self.deleted_segments += 1
+            logger.info("log store: retention deleted %s", oldest.path)
+
+    def _save_labels(self) -> None:
+        tmp = os.path.join(self.root, "labels.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._labels, f)
+        os.replace(tmp, os.path.join(self.root, "labels.json"))
+
+    def close(self) -> None:
+        with self._lock:
+            self._save_labels()
+            for segment in self.segments:
+                segment.close()
+
+    def sources(self, namespace: Optional[str] = None, pod: Optional[str] = None,
+                selector: Optional[str] = None) -> Optional[Set[str]]:
+        """
+        The stored sources matching namespace / pod name / label selector, or None when nothing
+        restricts them.
+        """
+        requirements = parse_label_selector(selector)
+        if not (namespace or pod or requirements):
+            return None
+        with self._lock:
+            known = {source for segment in self.segments for source in segment.sources}
+            labels = dict(self._labels)
+        selected = set()
+        for source in known:
+            ns, name, _ = source.split("/", 2)
+            if namespace and ns != namespace or pod and name != pod:
+                continue
+            if requirements and not match_labels(labels.get(f"{ns}/{name}", {}), requirements):
+                continue
+            selected.add(source)
+        return selected
+
+    def search(self, query: str, namespace: Optional[str] = None, pod: Optional[str] = None,
+               selector: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+               limit: int = 100) -> dict:
+        """
+        Finds stored lines containing 'query' (case-insensitive).
+
+        Args:
+            query (str): Text to find.
+            namespace / pod / selector: Restrict the search to these pods (selector: pod labels).
+            since / until (Optional[str]): Time bounds, a duration before now ("2h") or an RFC3339 time.
+            limit (int): Maximum number of matches; the newest are kept.
+
+        Returns:
+            dict: "matches" (oldest first: timestamp, namespace, pod, container, line), "truncated",
+                and "stats" (segments and blocks read, bytes scanned, time taken).
+        """
+        started = time.perf_counter()
+        since, until = parse_time_bound(since), parse_time_bound(until)
+        sources = self.sources(namespace, pod, selector)
+        terms = query_terms(query)
+        # Candidate blocks (last timestamp, segment, byte range, size), newest first by their last
+        # timestamp: once 'limit' matches are kept, a block whose lines are all older than the
+        # oldest of them cannot contribute. The active segment's indexes change under the
+        # ingester, so its blocks are selected under the lock; sealed segments are read-only.
+        blocks = []
+        wanted = sources is None or bool(sources)
+        with self._lock:
+            snapshot = [(segment, len(segment.blocks), segment.size, segment.sealed) for segment in self.segments]
+            if wanted:
+                for segment, block_count, size, sealed in snapshot:
+                    if not sealed:
+                        blocks.extend(self._candidates(segment, terms, sources, since, until, block_count, size))
+        stats = {"segments": len(snapshot), "segments_read": 0, "blocks_read": 0, "bytes_scanned": 0}
+        if wanted:
+            for segment, block_count, size, sealed in snapshot:
+                if sealed:
+                    blocks.extend(self._candidates(segment, terms, sources, since, until, block_count, size))
+        blocks.sort(key=lambda block: block[0], reverse=True)
+        newest: List[tuple] = []  # Heap of (timestamp, n, match): the 'limit' newest matches
+        order = itertools.count()
+        truncated = False
+        maps: Dict[str, mmap.mmap] = {}
+        try:
+            for last, segment, start, end, size in blocks:
+                if len(newest) >= limit and last < newest[0][0]:
+                    truncated = True
+                    break
+                data = self._map(segment, maps, stats)
+                if data is None:
+                    continue
+                for line in _lines_containing(data[start:min(end, size)], query, stats):
+                    ts, source, text = line.split("\t", 2)
+                    if since and ts < since or until and ts > until or query.lower() not in text.lower():
+                        continue
+                    if sources is not None and source not in sources:
+                        continue
+                    ns, name, container = source.split("/", 2)
+                    match = {"timestamp": ts, "namespace": ns, "pod": name, "container": container, "line": text}
+                    heapq.heappush(newest, (ts, next(order), match))
+                    if len(newest) > limit:
+                        heapq.heappop(newest)
+                        truncated = True
+        finally:
+            for data in maps.values():
+                data.close()
+        stats["seconds"] = round(time.perf_counter() - started, 6)
+        matches = [match for _, _, match in sorted(newest, key=lambda entry: entry[:2])]
+        return {"query": query, "matches": matches, "truncated": truncated, "stats": stats}
+
+    @staticmethod
+    def _candidates(segment: Segment, terms: List[Tuple[str, bool, bool]], sources: Optional[Set[str]],
+                    since: Optional[str], until: Optional[str], block_count: int, size: int) -> List[tuple]:
+        selected = []
+        for number in segment.candidate_blocks(terms, sources, since, until, block_count):
+            start, end, _, last, _ = segment.blocks[number]
+            selected.append((last, segment, start, end, size))
+        return selected
+
+    @staticmethod
+    def _map(segment: Segment, maps: Dict[str, mmap.mmap], stats: dict) -> Optional[mmap.mmap]:
+        # One read-only mapping per segment and search; it stays valid if retention deletes the file.
+        if segment.path not in maps:
+            try:
+                with open(segment.path, "rb") as f:
+                    maps[segment.path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):  # Deleted, or still empty
+                return None
+            stats["segments_read"] += 1
+        return maps[segment.path]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"segments": len(self.segments), "bytes": self.size, "sources": len(self._last),
+                    "deleted_segments": self.deleted_segments}
+
+
+class LogIngester:
+    """
+    Copies the logs of the selected pods into a LogStore every 'interval' seconds.
+
+    Args:
+        store (LogStore): Where the lines go.
+        namespace (Optional[str]): Namespace of the pods to keep (None = all namespaces).
+        selector (Optional[str]): Label selector of the pods to keep.
+        interval (Optional[float]): Seconds between ingestion passes.
+    """
+
+    def __init__(self, store: LogStore, namespace: Optional[str] = None, selector: Optional[str] = None,
+                 interval: Optional[float] = None):
+        self.store = store
+        self.namespace = namespace
+        self.requirements = parse_label_selector(selector)
+        self.interval = interval if interval is not None else config.LOG_STORE_INTERVAL
+        self.passes = 0
+        self.lines = 0
+        self._restarts: Dict[str, int] = {}  # source -> restartCount at the last pass
+        self._stop = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=config.LOG_STORE_FETCH_CONCURRENCY,
+                                        thread_name_prefix="log-ingest")
+        self._thread = threading.Thread(target=self._run, name="log-ingester", daemon=True)
+
+    def start(self) -> "LogIngester":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self._pool.shutdown(wait=False)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.ingest_once()
+            except Exception as e:
+                logger.warning("log store: ingestion pass failed: %s", e)
+            self._stop.wait(self.interval)
+
+    def _pods(self) -> List[dict]:
+        cached = informer.get_informer("pods")
+        if cached is not None:
+            pods = cached.store.list()
+            return [pod for pod in pods if self.namespace is None or pod["metadata"].get("namespace") == self.namespace]
+        return kubectl_utils.list_all("pods", self.namespace)
+
+    def ingest_once(self) -> int:
+        """
+        Runs one ingestion pass over the selected pods. Returns the number of lines stored.
+        """
+        targets = []
+        for pod in self._pods():
+            metadata = pod.get("metadata", {})
+            labels = metadata.get("labels") or {}
+            if not match_labels(labels, self.requirements):
+                continue
+            namespace, name = metadata.get("namespace", ""), metadata.get("name", "")
+            self.store.set_labels(f"{namespace}/{name}", labels)
+            for status in pod.get("status", {}).get("containerStatuses") or []:
+                source = f"{namespace}/{name}/{status['name']}"
+                restarts = status.get("restartCount", 0)
+                restarted = restarts > self._restarts.get(source, restarts)
+                self._restarts[source] = restarts
+                started = "running" in status.get("state", {}) or "terminated" in status.get("state", {})
+                if started or restarted:
+                    targets.append((namespace, name, status["name"], restarted, started))
+        stored = sum(self._pool.map(self._ingest_container, targets))
+        self.passes += 1
+        self.lines += stored
+        return stored
+
+    def _ingest_container(self, target: tuple) -> int:
+        namespace, pod, container, restarted, started = target
+        source = f"{namespace}/{pod}/{container}"
+        stored = 0
+        # The previous container's tail first: its lines are older than the current container's.
+        for previous in ((True,) if restarted else ()) + ((False,) if started else ()):
+            last = self.store.last_timestamp(source)
+            # sinceTime has second precision; lines already stored are skipped by append().
+            since = last[:19] + "Z" if last else parse_time_bound(config.LOG_STORE_INITIAL_SINCE)[:19] + "Z"
+            records = []
+            try:
+                for line in kubectl_utils.get_backend().stream_log_records(pod, namespace, container, since, previous):
+                    ts, _, text = line.rstrip("\n").partition(" ")
+                    try:
+                        records.append((normalize_timestamp(ts), text))
+                    except ValueError:
+                        continue
+            except ClusterCallError as e:
+                logger.debug("log store: %s%s: %s", source, " (previous)" if previous else "", e)
+            stored += self.store.append(source, records)
+        return stored
+
+
+_store: Optional[LogStore] = None
+_ingester: Optional[LogIngester] = None
+
+
+def get_store() -> Optional[LogStore]:
+    return _store
+
+
+def start_ingestion() -> LogIngester:
+    """
+    Opens the store in config.LOG_STORE_DIR and starts ingesting the configured pods.
+    """
+    global _store, _ingester
+    if _store is None:
+        _store = LogStore()
+    if _ingester is None:
+        _ingester = LogIngester(_store, config.LOG_STORE_NAMESPACE, config.LOG_STORE_SELECTOR).start()
+    return _ingester
+
+
+def stop_ingestion() -> None:
+    global _store, _ingester
+    if _ingester is not None:
+        _ingester.stop()
+        _ingester = None
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+def search_logs(query: str, **kwargs) -> dict:
+    """
+    Searches the process-wide store (see LogStore.search).
+
+    Raises:
+        RuntimeError: If the log store is not enabled.
+    """
+    if _store is None:
+        raise RuntimeError("The log store is disabled (set LOG_STORE_ENABLED in config.py).")
+    return _store.search(query, **kwargs)
@@ -0,0 +1,242 @@
+# log_templates.py
+
+"""
+This module compacts logs before they reach the LLM by mining line templates online.
+
+Lines are clustered with a Drain-style fixed-depth parse tree: variables (numbers, ids, addresses)
+are masked, lines are grouped by token count and leading tokens, and each line joins the most
+similar template in its leaf or starts a new one. A crash-looping pod that prints the same stack
+trace a hundred times becomes a handful of templates with counts and first/last timestamps.
+Rare lines and lines that look like errors are kept verbatim.
+
+Work per line is bounded (tree depth and leaf size are capped), so mining is linear in the
+number of lines, and the miner's state is incremental: feed it chunks as they are read.
+
+Classes:
+    LogCluster: One template with its count, time range and kept sample lines.
+    LogTemplateMiner: Online template miner.
+
+Functions:
+    mine_lines: Feeds an iterable of lines to a new miner.
+    compact_log_text: Compacts a log string into rendered template text.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+WILDCARD = "<*>"
+
+# Leading timestamps: ISO-8601 / RFC 3339 (as kubectl --timestamps and most loggers print them),
+# optionally bracketed.
+_TIMESTAMP = re.compile(r"^\[?(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)\]?\s*")
+_HAS_DIGIT = re.compile(r"\d")
+# Tokens with digits hold variables. Keep a leading "key=" / "key:" and trailing punctuation; a
+# value with no letters beyond hex digits (ids, IPs, hashes, sizes) is masked whole, otherwise
+# only its digit runs are (so "Handler.java:42)" keeps its file name).
+_VARIABLE_TOKEN = re.compile(r"^([A-Za-z_][\w.-]*[=:])?(.*?)([,;:)\]}\"']*)$")
+_OPAQUE_VALUE = re.compile(r"^(?:[^A-Za-z]*|0x[0-9a-fA-F]+|[0-9a-fA-F-]{6,})$")
+_DIGITS = re.compile(r"\d+")
+_ERROR = re.compile(r"(?i)\b(error|err|fatal|critical|panic|exception|traceback|fail(?:ed|ure)?|oomkilled)\b")
+
+
+class LogCluster:
+    """
+    A mined template and the lines it stands for.
+
+    Attributes:
+        template (List[str]): Template tokens; WILDCARD marks variable positions.
+        count (int): Lines matched.
+        first_timestamp / last_timestamp (Optional[str]): Time range of the matched lines.
+        first_index (int): Line number of the first match (for ordering output).
+        is_error (bool): The template looks like an error.
+        samples (List[str]): Raw lines kept verbatim (the first max_samples, then the last one).
+    """
+
+    __slots__ = ("template", "count", "first_timestamp", "last_timestamp", "first_index", "is_error", "samples")
+
+    def __init__(self, tokens: List[str], index: int, timestamp: Optional[str], line: str, is_error: bool):
+        self.template = tokens
+        self.count = 1
+        self.first_timestamp = self.last_timestamp = timestamp
+        self.first_index = index
+        self.is_error = is_error
+        self.samples = [line]
+
+    def text(self) -> str:
+        return " ".join(self.template)
+
+    def to_dict(self) -> dict:
+        return {
+            "template": self.text(),
+            "count": self.count,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "is_error": self.is_error,
+            "samples": list(self.samples),
+        }
+
+
+class LogTemplateMiner:
+    """
+    Drain-style online log template miner.
+
+    Args:
+        similarity (float): Fraction of matching non-variable tokens needed to join a template.
+        depth (int): Leading tokens used to route a line in the parse tree.
+        max_children (int): Distinct leading tokens per tree node before new ones share a wildcard branch.
+        max_leaf_clusters (int): Templates per leaf; when full, a line joins its most similar template.
+        max_samples (int): Raw lines kept per template (the last line seen is kept as well).
+        rare_count (int): Templates matched at most this many times are rendered verbatim.
+    """
+
+    def __init__(self, similarity: float = 0.5, depth: int = 3, max_children: int = 100,
+                 max_leaf_clusters: int = 64, max_samples: int = 2, rare_count: int = 2):
+        self.similarity = similarity
+        self.depth = depth
+        self.max_children = max_children
+        self.max_leaf_clusters = max_leaf_clusters
+        self.max_samples = max(max_samples, rare_count)  # Rare templates are rendered from their samples
+        self.rare_count = rare_count
+        self.clusters: List[LogCluster] = []
+        self.total_lines = 0
+        self.total_chars = 0
+        self._tree: Dict[int, dict] = {}  # token count -> nested dicts of leading tokens -> [LogCluster]
+        self._last_timestamp: Optional[str] = None
+
+    # --- mining ---
+
+    def add(self, line: str) -> LogCluster:
+        """
+        Adds one line and returns the template it was assigned to.
+        """
+        index = self.total_lines
+        self.total_lines += 1
+        self.total_chars += len(line) + 1
+        match = _TIMESTAMP.match(line)
+        if match:
+            timestamp = self._last_timestamp = match.group(1)
+            body = line[match.end():]
+        else:
+            timestamp = self._last_timestamp  # Continuation lines (stack frames) inherit the last timestamp
+            body = line
+        tokens = [self._mask(token) for token in body.split()]
+
+        leaf = self._leaf(tokens)
+        cluster = self._best_match(leaf, tokens)
+        if cluster is None:
+            cluster = LogCluster(tokens, index, timestamp, line, bool(_ERROR.search(body)))
+            leaf.append(cluster)
+            self.clusters.append(cluster)
+            return cluster
+
+        cluster.count += 1
+        cluster.last_timestamp = timestamp
+        if len(cluster.samples) <= self.max_samples:
+            cluster.samples.append(line)
+        else:
+            cluster.samples[-1] = line  # The slot after the first max_samples tracks the latest line
+        if cluster.template != tokens:
+            cluster.template = [t if t == u else WILDCARD for t, u in zip(cluster.template, tokens)]
+        return cluster
+
+    def add_lines(self, lines: Iterable[str]) -> "LogTemplateMiner":
+        for line in lines:
+            self.add(line)
+        return self
+
+    @staticmethod
+    def _mask(token: str) -> str:
+        if not _HAS_DIGIT.search(token):
+            return token
+        prefix, value, suffix = _VARIABLE_TOKEN.match(token).groups()
+        value = WILDCARD if _OPAQUE_VALUE.match(value) else _DIGITS.sub(WILDCARD, value)
+        return f"{prefix or ''}{value}{suffix}"
+
+    def _leaf(self, tokens: List[str]) -> list:
+        node = self._tree.setdefault(len(tokens), {})
+        for token in tokens[:self.depth]:
+            child = node.get(token)
+            if child is None:
+                if token != WILDCARD and len(node) >= self.max_children:
+                    token = WILDCARD
+                    child = node.get(token)
+                if child is None:
+                    child = node[token] = {}
+            node = child
+        return node.setdefault(None, [])
+
+    def _best_match(self, leaf: list, tokens: List[str]) -> Optional[LogCluster]:
+        best, best_score, best_params = None, -1.0, 0
+        for cluster in leaf:
+            same = params = 0
+            for t, u in zip(cluster.template, tokens):
+                if t == WILDCARD:
+                    params += 1
+                elif t == u:
+                    same += 1
+            score = same / len(tokens) if tokens else 1.0
+            if score > best_score or (score == best_score and params > best_params):
+                best, best_score, best_params = cluster, score, params
+        if best is not None and (best_score >= self.similarity or len(leaf) >= self.max_leaf_clusters):
+            return best
+        return None
+
+    # --- output ---
+
+    def ordered(self) -> List[LogCluster]:
+        """
+        Templates in order of first appearance.
+        """
+        return sorted(self.clusters, key=lambda c: c.first_index)
+
+    def render(self) -> str:
+        """
+        Renders the compacted log: verbatim lines for rare templates, "[xN first -> last] template"
+        for repeated ones, with the first and last raw lines of repeated error templates.
+        """
+        out = [f"[{self.total_lines} log lines compacted into {len(self.clusters)} templates]"]
+        for cluster in self.ordered():
+            if cluster.count <= self.rare_count:
+                out.extend(cluster.samples)
+                continue
+            span = cluster.first_timestamp or ""
+            if cluster.last_timestamp and cluster.last_timestamp != cluster.first_timestamp:
+                span += f" -> {cluster.last_timestamp}"
+            out.append(f"[x{cluster.count}{' ' + span if span else ''}] {cluster.text()}")
+            if cluster.is_error and WILDCARD in cluster.template:
+                out.extend(f"    e.g. {sample}" for sample in (cluster.samples[0], cluster.samples[-1]))
+        return "\n".join(out)
+
+    def stats(self) -> Tuple[int, int]:
+        return self.total_lines, len(self.clusters)
+
+
+def mine_lines(lines: Iterable[str], **options) -> LogTemplateMiner:
+    """
+    Mines templates from an iterable of lines (consumed lazily, e.g. a log stream).
+
+    Args:
+        lines (Iterable[str]): Log lines without trailing newlines.
+        **options: LogTemplateMiner arguments.
+
+    Returns:
+        LogTemplateMiner: The miner holding the templates.
+    """
+    return LogTemplateMiner(**options).add_lines(lines)
+
+
+def compact_log_text(text: str, **options) -> str:
+    """
+    Compacts a log string into rendered template text (see LogTemplateMiner.render).
+    Logs that do not compress (e.g., a handful of distinct lines) are returned unchanged.
+
+    Args:
+        text (str): Raw log output.
+        **options: LogTemplateMiner arguments.
+
+    Returns:
+        str: The compacted log, or text itself if compaction would not make it shorter.
+    """
+    miner = mine_lines(text.splitlines(), **options)
+    rendered = miner.render()
+    return rendered if len(rendered) < len(text) else text
@@ -1,20 +1,59 @@
 # main.py
 
-from fastapi import FastAPI
-import uvicorn
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
+import argparse
 import logging
 
 # Import configuration and our API routes from handlers
 import config
+import event_hub
+import health
+import informer
+import log_store
+import metrics
+import server
+from scheduler import PriorityMiddleware
 from handler import router as api_router
+from compression import CompressionMiddleware
+from masking import SecretMaskingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fail /readyz as soon as a shutdown signal arrives, while in-flight requests finish
+    health.install_drain_handler()
+    # Start background informers (list+watch) so handlers can answer from memory
+    if config.INFORMER_ENABLED:
+        informer.start_informers()
+    # Copy pod logs to the on-disk store searched by /search-logs
+    if config.LOG_STORE_ENABLED:
+        log_store.start_ingestion()
+    yield
+    log_store.stop_ingestion()
+    event_hub.stop_hub()
+    informer.stop_informers()
+
 
 # Create a FastAPI app instance
 app = FastAPI(
     title="Kubernetes Cluster Doctor Bridge",
     description="A bridge to access Kubernetes logs, events, and more for LLM-based cluster diagnosis.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Priority class of the request's cluster calls, from its X-Priority header (see scheduler.py)
+app.add_middleware(PriorityMiddleware)
+# Mask secrets (passwords, tokens, keys) in every response body, streamed or not
+app.add_middleware(SecretMaskingMiddleware)
+# gzip/zstd for clients that accept it (outside masking, which needs plain text)
+app.add_middleware(CompressionMiddleware)
+# Per-route latency, status, response size and in-flight requests (outermost, so sizes are as sent)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include API routes from handlers with a common prefix
 app.include_router(api_router, prefix="/api")
 
@@ -23,10 +62,34 @@ app.include_router(api_router, prefix="/api")
 async def root():
     return {"message": "Cluster Doctor Bridge API is running."}
 
+# Liveness probe: the worker is serving requests (never depends on the cluster)
+@app.get("/livez", include_in_schema=False)
+async def livez():
+    return health.liveness()
+
+# Readiness probe: backend reachable, informers synced, shared cache usable, not shutting down
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    ready, payload = await health.readiness()
+    return JSONResponse(payload, status_code=200 if ready else 503)
+
+# Prometheus scrape endpoint: HTTP, cluster-call and cache metrics (see metrics.py)
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # Main entry point to run the server
 if __name__ == "__main__":
     # Setup basic logging configuration
     logging.basicConfig(level=logging.INFO)
-    
-    # Start the server on host and port from config.py
-    uvicorn.run("main:app", host=config.SERVER_HOST, port=config.SERVER_PORT, reload=True)
+
+    parser = argparse.ArgumentParser(description="Kubernetes Cluster Doctor Bridge")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Production mode with this many worker processes (default: development server with reload)")
+    parser.add_argument("--host", default=None, help=f"Listen address (default {config.SERVER_HOST})")
+    parser.add_argument("--port", type=int, default=None, help=f"Listen port (default {config.SERVER_PORT})")
+    parser.add_argument("--log-level", default="info", help="uvicorn log level ('warning' drops the access log)")
+    args = parser.parse_args()
+
+    # Start the server on host and port from config.py (see server.py for the production mode)
+    server.run(args.workers, args.host, args.port, args.log_level)
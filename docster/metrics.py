@@ -0,0 +1,330 @@
+# metrics.py
+
+"""
+This module collects the bridge's metrics and renders them in the Prometheus text format
+(served at GET /metrics). No client library is needed.
+
+What is measured:
+    - HTTP: requests, latency, time to first byte and response size per route, requests in flight.
+    - Cluster calls: duration, in-flight count and outcome per backend and verb. The outcome is
+      the kubectl exit status, the API server's HTTP status, or cancelled/closed/error.
+    - Result cache: hits, misses, coalesced, bypassed and shared-tier lookups, hit ratio, occupancy.
+    - Scheduler: running and waiting cluster calls and log streams, admitted, refused and dropped
+      ones and time spent waiting, per pool (calls, streams) and priority class.
+
+Metrics are updated from the event loop and from cluster-call worker threads, so every family
+takes a lock.
+
+Classes:
+    Counter: Monotonic counter family.
+    Gauge: Gauge family (inc/dec/set).
+    Histogram: Cumulative-bucket histogram family.
+    MetricsMiddleware: ASGI middleware recording the HTTP metrics.
+
+Functions:
+    cluster_call: Context manager timing one backend call.
+    render: Every metric in the Prometheus text exposition format.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import config
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_families: List["_Family"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+        _families.append(self)
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+            lines.extend(self._render_series(key, value) for key, value in series)
+        return lines
+
+    def _render_series(self, key, value) -> str:
+        return f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+
+class Counter(_Family):
+    """
+    A monotonically increasing count per label set.
+    """
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(_Family):
+    """
+    A value that can go up and down per label set.
+    """
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+
+class Histogram(_Family):
+    """
+    Observations counted into cumulative buckets, plus their sum and count, per label set.
+
+    Args:
+        buckets (Sequence[float]): Upper bounds, ascending; +Inf is added.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = ()):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                labels = _labels(self.label_names, key, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+# --- Metric families ---
+
+HTTP_REQUESTS = Counter("bridge_http_requests_total", "HTTP requests answered, by route, method and status.",
+                        ["route", "method", "status"])
+HTTP_LATENCY = Histogram("bridge_http_request_duration_seconds",
+                         "Time from request to the last response byte (whole stream for streamed responses).",
+                         ["route", "method"], config.METRICS_LATENCY_BUCKETS)
+HTTP_FIRST_BYTE = Histogram("bridge_http_time_to_first_byte_seconds",
+                            "Time from request to the first response body byte.",
+                            ["route", "method"], config.METRICS_LATENCY_BUCKETS)
+HTTP_RESPONSE_BYTES = Histogram("bridge_http_response_bytes", "Response body size in bytes, by route.",
+                                ["route"], config.METRICS_SIZE_BUCKETS)
+HTTP_IN_FLIGHT = Gauge("bridge_http_requests_in_flight", "HTTP requests being handled right now.")
+
+CLUSTER_CALLS = Counter("bridge_cluster_calls_total",
+                        "Backend calls by verb and outcome (kubectl exit status, API HTTP status, "
+                        "or cancelled/closed/error).", ["backend", "verb", "status"])
+CLUSTER_CALL_LATENCY = Histogram("bridge_cluster_call_duration_seconds",
+                                 "Backend call duration (streams: until the last line was read).",
+                                 ["backend", "verb"], config.METRICS_LATENCY_BUCKETS)
+CLUSTER_CALLS_IN_FLIGHT = Gauge("bridge_cluster_calls_in_flight", "Backend calls running right now.", ["backend"])
+
+
+class cluster_call:
+    """
+    Times one backend call and records its outcome.
+
+    Set `status` inside the block (e.g., the kubectl exit status). If it is left unset, the status
+    is "ok", or it is derived from the exception that ended the block.
+
+    Args:
+        backend (str): Backend name ("kubectl", "native").
+        verb (str): Low-cardinality call name, e.g. "describe pod" or "list events".
+    """
+
+    def __init__(self, backend: str, verb: str):
+        self.backend = backend
+        self.verb = verb
+        self.status: Optional[str] = None
+        self._start = 0.0
+
+    def __enter__(self) -> "cluster_call":
+        CLUSTER_CALLS_IN_FLIGHT.inc(backend=self.backend)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self._start
+        CLUSTER_CALLS_IN_FLIGHT.dec(backend=self.backend)
+        status = self.status
+        if status is None:
+            if exc_type is None:
+                status = "ok"
+            elif issubclass(exc_type, GeneratorExit):
+                status = "closed"  # Stream abandoned by the reader
+            elif getattr(exc, "status_code", None):
+                status = str(exc.status_code)
+            else:
+                status = "error"
+        CLUSTER_CALL_LATENCY.observe(elapsed, backend=self.backend, verb=self.verb)
+        CLUSTER_CALLS.inc(backend=self.backend, verb=self.verb, status=status)
+        return False
+
+
+def _cache_lines() -> List[str]:
+    # Read from the cache's own counters at scrape time rather than counting twice.
+    from cache import ResultCache, cluster_cache
+
+    stats = cluster_cache.stats()
+    lines = ["# HELP bridge_cache_lookups_total Result-cache lookups by resource and result.",
+             "# TYPE bridge_cache_lookups_total counter"]
+    for resource, counts in sorted(stats["resources"].items()):
+        for result in ResultCache.COUNTERS:
+            lines.append(f'bridge_cache_lookups_total{{resource="{_escape(resource)}",result="{result}"}} {counts[result]}')
+    lines += ["# HELP bridge_cache_hit_ratio Share of non-bypassed lookups served from the cache or a shared call.",
+              "# TYPE bridge_cache_hit_ratio gauge"]
+    for resource, counts in sorted(stats["resources"].items()):
+        lines.append(f'bridge_cache_hit_ratio{{resource="{_escape(resource)}"}} {_number(counts["hit_ratio"])}')
+    lines += ["# HELP bridge_cache_entries Results held in the cache.", "# TYPE bridge_cache_entries gauge",
+              f"bridge_cache_entries {stats['entries']}",
+              "# HELP bridge_cache_evictions_total Results evicted by the LRU bound.",
+              "# TYPE bridge_cache_evictions_total counter", f"bridge_cache_evictions_total {stats['evictions']}",
+              "# HELP bridge_cache_in_flight Distinct cluster calls in flight behind the cache.",
+              "# TYPE bridge_cache_in_flight gauge", f"bridge_cache_in_flight {stats['in_flight']}"]
+    return lines
+
+
+def _scheduler_lines() -> List[str]:
+    from scheduler import ClusterScheduler, scheduler, stream_scheduler
+
+    pools = {"calls": scheduler.stats(), "streams": stream_scheduler.stats()}
+    rows = [(f'pool="{pool}",priority="{p}"', counts) for pool, stats in pools.items() for p, counts in stats.items()]
+    lines = ["# HELP bridge_scheduler_running Cluster calls or log streams holding a slot, by pool and priority class.",
+             "# TYPE bridge_scheduler_running gauge"]
+    lines += [f"bridge_scheduler_running{{{labels}}} {counts['running']}" for labels, counts in rows]
+    lines += ["# HELP bridge_scheduler_queued Cluster calls or log streams waiting for a slot, by pool and priority class.",
+              "# TYPE bridge_scheduler_queued gauge"]
+    lines += [f"bridge_scheduler_queued{{{labels}}} {counts['queued']}" for labels, counts in rows]
+    lines += ["# HELP bridge_scheduler_calls_total Calls or streams admitted, rejected (queue full) or dropped "
+              "(waited too long), by pool and priority class.", "# TYPE bridge_scheduler_calls_total counter"]
+    for labels, counts in rows:
+        for result in ClusterScheduler.COUNTERS:
+            lines.append(f'bridge_scheduler_calls_total{{{labels},result="{result}"}} {counts[result]}')
+    lines += ["# HELP bridge_scheduler_wait_seconds_total Time admitted calls or streams spent waiting for a slot.",
+              "# TYPE bridge_scheduler_wait_seconds_total counter"]
+    lines += [f"bridge_scheduler_wait_seconds_total{{{labels}}} {_number(counts['wait_seconds'])}"
+              for labels, counts in rows]
+    return lines
+
+
+def render() -> str:
+    """
+    Returns every metric in the Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    for family in _families:
+        lines.extend(family.render())
+    lines.extend(_cache_lines())
+    lines.extend(_scheduler_lines())
+    return "\n".join(lines) + "\n"
+
+
+def _route_label(scope) -> str:
+    # The matched route's template with its prefix: the request path with path parameters put back
+    # as "{name}". Routes of included routers do not carry their prefix, so the path is used.
+    if scope.get("route") is None:
+        return "unmatched"
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        path = path.replace(str(value), "{" + name + "}")
+    return path
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route HTTP metrics: request count by status, latency to the
+    last byte and to the first byte, response size, and requests in flight.
+
+    Routes are labelled by their path template (e.g. "/api/get-logs"). Requests that match
+    no route share the label "unmatched", which keeps the number of series bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        state = {"status": 500, "bytes": 0, "first_byte": None}
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                if body and state["first_byte"] is None:
+                    state["first_byte"] = time.perf_counter() - start
+                state["bytes"] += len(body)
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, counting_send)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = _route_label(scope)
+            method = scope.get("method", "")
+            HTTP_REQUESTS.inc(route=route, method=method, status=str(state["status"]))
+            HTTP_LATENCY.observe(time.perf_counter() - start, route=route, method=method)
+            if state["first_byte"] is not None:
+                HTTP_FIRST_BYTE.observe(state["first_byte"], route=route, method=method)
+            HTTP_RESPONSE_BYTES.observe(state["bytes"], route=route)
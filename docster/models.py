@@ -9,14 +9,27 @@ These models are used to define the structure of the JSON responses returned by
 Classes:
     LogChunk: Pydantic model for a single chunk of log lines.
     LogResponse: Pydantic model for the log response.
+    LogTemplate: Pydantic model for one mined log line template.
+    CompactLogResponse: Pydantic model for the compacted (template) log response.
+    WorkloadLogResponse: Pydantic model for the merged logs of a workload's pods.
     DescribeResponse: Pydantic model for the pod description response.
     Event: Pydantic model for a single event.
     EventResponse: Pydantic model for the event response.
     ServiceResponse: Pydantic model for the service response.
+    UnhealthyObject: Pydantic model for one entry of the cluster health snapshot.
+    ClusterSummary: Pydantic model for the cluster health snapshot response.
+    LogMatch: Pydantic model for one line found in the log store.
+    LogSearchResponse: Pydantic model for the log search response.
+    ObjectName: Pydantic model for the name of one cluster object.
+    ObjectNamesResponse: Pydantic model for the object names response.
+    FunctionCall: Pydantic model for a tool call emitted by the LLM.
+    ToolCall: Pydantic model wrapping a FunctionCall, as the LLM emits it.
+    BatchResult: Pydantic model for the outcome of one call in a batch.
+    BatchResponse: Pydantic model for the batch response.
 """
 
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, List, Optional
 
 class LogChunk(BaseModel):
     chunk_index: int
@@ -28,22 +41,122 @@ class LogResponse(BaseModel):
     logs: List[LogChunk]
     metadata: Optional[dict] = None  # e.g., {"since_time": "5m", "total_chunks": 3}
 
+class LogTemplate(BaseModel):
+    template: str  # "<*>" marks variable positions
+    count: int
+    first_timestamp: Optional[str] = None
+    last_timestamp: Optional[str] = None
+    is_error: bool = False
+    samples: List[str]  # Raw lines kept verbatim (first ones and the latest)
+
+class CompactLogResponse(BaseModel):
+    pod_name: str
+    namespace: str
+    templates: List[LogTemplate]  # In order of first appearance
+    summary: str  # Rendered compact text, ready for an LLM prompt
+    metadata: Optional[dict] = None  # e.g., {"total_lines": 5000, "total_templates": 12}
+
+class WorkloadLogResponse(BaseModel):
+    workload: str  # e.g., "deployment/backend" or "selector app=backend"
+    namespace: str
+    containers: List[str]  # "<pod>/<container>" merged, sorted
+    logs: List[LogChunk]  # Lines "<timestamp> <pod>/<container>: <line>", oldest first
+    metadata: Optional[dict] = None  # e.g., {"total_lines": 900, "errors": {"<pod>/<container>": "..."}}
+
 class DescribeResponse(BaseModel):
     pod_name: str
     namespace: str
-    description: str
+    description: str  # 'kubectl describe'-style text, YAML of the requested fields, or the changes (diff mode)
+    freshness: Optional[dict] = None
+    version: Optional[str] = None  # Diff mode: this state's version, to pass back as 'since_version'
+    since_version: Optional[str] = None  # Diff mode: the version 'description' lists changes against (None = full)
+    changes: Optional[dict] = None  # Diff mode: {"changed": {path: [old, new]}, "added": {...}, "removed": {...}}
 
 class Event(BaseModel):
     event_type: str
     reason: str
     message: str
     timestamp: Optional[str] = None
+    involved_object: Optional[str] = None  # e.g., "pod/backend-pod"
+    count: Optional[int] = None
+    uid: Optional[str] = None
+    resource_version: Optional[str] = None
 
 class EventResponse(BaseModel):
     namespace: str
-    events: List[Event]
+    events: List[Event]  # Most recent first
+    continue_token: Optional[str] = None  # Pass back as 'continue_token' to fetch the next (older) page
+    total: Optional[int] = None  # Events matching the filters, on all pages
+    freshness: Optional[dict] = None
 
 class ServiceResponse(BaseModel):
     service_name: str
     namespace: str
-    service_info: str
+    service_info: str  # YAML manifest, only the requested fields, or the changes (diff mode)
+    freshness: Optional[dict] = None
+    version: Optional[str] = None  # Diff mode, as in DescribeResponse
+    since_version: Optional[str] = None
+    changes: Optional[dict] = None
+
+class UnhealthyObject(BaseModel):
+    kind: str  # "node", "pod", "deployment", or the kind of an object with Warning events
+    namespace: Optional[str] = None  # None for cluster-scoped objects
+    name: str  # "<owner>-*" for pods folded into one entry
+    score: int  # Severity, higher is worse (see cluster_health.py)
+    reasons: List[str]
+    restarts: Optional[int] = None
+    warnings: Optional[int] = None  # Warning events in the window
+    count: Optional[int] = None  # Pods folded into this entry
+    examples: Optional[List[str]] = None  # A few of the folded pod names
+
+class ClusterSummary(BaseModel):
+    totals: dict  # e.g., {"nodes": 3, "nodes_ready": 2, "pods": 40, "pods_running": 37, ...}
+    unhealthy: List[UnhealthyObject]  # Most severe first
+    truncated: int  # Unhealthy objects left out of the list
+    text: str  # Compact rendering for an LLM prompt
+    version: int  # Changes whenever the underlying state does
+    generated_at: str
+    freshness: Optional[dict] = None
+
+class LogMatch(BaseModel):
+    timestamp: str  # RFC3339 with nanoseconds, as written by the container runtime
+    namespace: str
+    pod: str
+    container: str
+    line: str
+
+class LogSearchResponse(BaseModel):
+    query: str
+    matches: List[LogMatch]  # Oldest first
+    truncated: bool  # More lines matched than 'limit'; the newest were kept
+    stats: dict  # Segments and blocks read, bytes scanned, seconds taken
+
+class ObjectName(BaseModel):
+    kind: str  # Plural resource name, e.g. "pods", "deployments"
+    namespace: str
+    name: str
+
+class ObjectNamesResponse(BaseModel):
+    objects: List[ObjectName]
+    freshness: Optional[dict] = None  # resource -> freshness of its names
+
+
+class FunctionCall(BaseModel):
+    name: str
+    arguments: dict = {}
+
+class ToolCall(BaseModel):
+    function_call: FunctionCall
+
+class BatchResult(BaseModel):
+    index: int
+    name: str
+    arguments: dict
+    status_code: int  # HTTP status the equivalent GET endpoint would have returned
+    result: Optional[Any] = None  # Same body as the equivalent GET endpoint
+    error: Optional[str] = None
+    elapsed_ms: Optional[float] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]  # In request order
+    elapsed_ms: float
@@ -0,0 +1,222 @@
+# object_diff.py
+
+"""
+This module lets /describe-pod and /get-svc answer with what changed instead of the whole object.
+
+A snapshot is the part of a pod or service that matters for a diagnosis, as a flat dict of dotted
+paths: a pod's phase, conditions, container states and restart counts, and its events (count and
+last time, not ages); a service's type, addresses, ports and selector. Its version is a hash of
+its content, so the same state has the same version in every worker process.
+
+SnapshotStore keeps snapshots by version, and per session the version it last returned for each
+object. A describe with diff=true is compared with the session's last version, one with
+since_version=<v> with that version. When there is nothing to compare with, the whole object is
+returned, as without diff.
+
+Classes:
+    SnapshotStore: Snapshots by version and the last version each session saw, LRU- and TTL-bounded.
+
+Functions:
+    pod_snapshot: Flat snapshot of a pod and its events.
+    service_snapshot: Flat snapshot of a service.
+    snapshot_version: Content hash of a snapshot.
+    diff_snapshots: Changed, added and removed paths between two snapshots.
+    render_changes: Text of a diff for the LLM.
+
+Attributes:
+    snapshot_store: The SnapshotStore shared by the bridge handlers.
+"""
+
+import hashlib
+import json
+import threading
+from typing import List, Optional, Tuple
+
+import config
+from backends import container_state, event_timestamp
+from cache import TTLCache, cluster_cache
+
+EVENTS_PREFIX = "events."
+
+
+def _container_entries(prefix: str, statuses: List[dict]) -> dict:
+    entries = {}
+    for status in statuses or []:
+        path = f"{prefix}.{status.get('name')}"
+        entries[f"{path}.ready"] = status.get("ready", False)
+        entries[f"{path}.restarts"] = status.get("restartCount", 0)
+        entries[f"{path}.state"] = container_state(status.get("state", {}))
+        if status.get("lastState"):
+            entries[f"{path}.last_state"] = container_state(status["lastState"])
+        entries[f"{path}.image"] = status.get("image", "")
+    return entries
+
+
+def _event_entry(event: dict) -> str:
+    count = event.get("count") or event.get("series", {}).get("count") or 1
+    return (f"{event.get('type', '')}  {event.get('reason', '')}  x{count} (last {event_timestamp(event)})  "
+            f"{(event.get('message') or '').strip()}")
+
+
+def pod_snapshot(pod: dict, events: Optional[List[dict]] = None) -> dict:
+    """
+    Returns the diagnosis-relevant state of a pod and its events as {dotted path: value}.
+    """
+    spec, status = pod.get("spec", {}), pod.get("status", {})
+    snapshot = {
+        "phase": status.get("phase", "Unknown"),
+        "reason": status.get("reason"),
+        "message": status.get("message"),
+        "node": spec.get("nodeName"),
+        "ip": status.get("podIP"),
+    }
+    for condition in status.get("conditions", []):
+        value = condition.get("status", "Unknown")
+        if condition.get("reason"):
+            value += f" ({condition['reason']})"
+        snapshot[f"conditions.{condition.get('type')}"] = value
+    snapshot.update(_container_entries("init_containers", status.get("initContainerStatuses")))
+    snapshot.update(_container_entries("containers", status.get("containerStatuses")))
+    for event in events or []:
+        meta = event.get("metadata", {})
+        snapshot[EVENTS_PREFIX + (meta.get("uid") or meta.get("name", ""))] = _event_entry(event)
+    return {path: value for path, value in snapshot.items() if value is not None}
+
+
+def service_snapshot(service: dict) -> dict:
+    """
+    Returns the diagnosis-relevant state of a service as {dotted path: value}.
+    """
+    spec, status = service.get("spec", {}), service.get("status", {})
+    snapshot = {
+        "type": spec.get("type", "ClusterIP"),
+        "cluster_ip": spec.get("clusterIP"),
+        "external_ips": ",".join(spec.get("externalIPs", [])) or None,
+        "load_balancer": ",".join(ingress.get("ip") or ingress.get("hostname", "")
+                                  for ingress in status.get("loadBalancer", {}).get("ingress", [])) or None,
+    }
+    for port in spec.get("ports", []):
+        key = port.get("name") or f"{port.get('port')}/{port.get('protocol', 'TCP')}"
+        value = f"{port.get('port')}->{port.get('targetPort', port.get('port'))}/{port.get('protocol', 'TCP')}"
+        if port.get("nodePort"):
+            value += f" (nodePort {port['nodePort']})"
+        snapshot[f"ports.{key}"] = value
+    for label, value in (spec.get("selector") or {}).items():
+        snapshot[f"selector.{label}"] = value
+    return {path: value for path, value in snapshot.items() if value is not None}
+
+
+def snapshot_version(snapshot: dict) -> str:
+    """
+    Returns a short content hash of a snapshot.
+    """
+    return hashlib.sha256(json.dumps(snapshot, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def diff_snapshots(old: dict, new: dict) -> dict:
+    """
+    Compares two snapshots.
+
+    Returns:
+        dict: {"changed": {path: [old, new]}, "added": {path: new}, "removed": {path: old}};
+        all three are empty when nothing changed.
+    """
+    return {
+        "changed": {path: [old[path], value] for path, value in new.items() if path in old and old[path] != value},
+        "added": {path: value for path, value in new.items() if path not in old},
+        "removed": {path: value for path, value in old.items() if path not in new},
+    }
+
+
+def render_changes(kind: str, name: str, base_version: str, version: str, changes: dict) -> str:
+    """
+    Renders a diff for the LLM: changed fields as "path: old -> new", then new, updated and gone events.
+    """
+    if not any(changes.values()):
+        return f"No changes to {kind} {name} since version {base_version}."
+    lines = [f"Changes to {kind} {name} since version {base_version} (now {version}):"]
+    events = {"New events": [], "Updated events": [], "Events gone": []}
+    for path, (old, new) in changes["changed"].items():
+        if path.startswith(EVENTS_PREFIX):
+            events["Updated events"].append(new)
+        else:
+            lines.append(f"  {path}: {old} -> {new}")
+    for path, value in changes["added"].items():
+        if path.startswith(EVENTS_PREFIX):
+            events["New events"].append(value)
+        else:
+            lines.append(f"  {path}: (none) -> {value}")
+    for path, value in changes["removed"].items():
+        if path.startswith(EVENTS_PREFIX):
+            events["Events gone"].append(value)
+        else:
+            lines.append(f"  {path}: {value} -> (none)")
+    for title, entries in events.items():
+        if entries:
+            lines.append(f"{title}:")
+            lines.extend(f"  {entry}" for entry in entries)
+    return "\n".join(lines)
+
+
+class SnapshotStore:
+    """
+    Snapshots keyed by (kind, namespace, name, version), and the version each session last received
+    per object. Entries expire config.SNAPSHOT_TTL seconds after they were last written. With several
+    workers, both also go to the result cache's shared tier, so a session may hit any worker.
+    compare() runs on worker threads, so the in-memory cache is only touched under a lock.
+
+    Args:
+        max_entries (Optional[int]): Entries kept in memory (LRU); defaults to config.SNAPSHOT_MAX_ENTRIES.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.cache = TTLCache(max_entries or config.SNAPSHOT_MAX_ENTRIES)
+        self._lock = threading.Lock()
+
+    def _get(self, key: Tuple[str, ...]):
+        with self._lock:
+            value = self.cache.get(key)
+        shared = cluster_cache.shared
+        if value is None and shared is not None:
+            found = shared.get(json.dumps(["snapshots", *key]))
+            value = found[0] if found is not None else None
+        return value
+
+    def _set(self, key: Tuple[str, ...], value) -> None:
+        with self._lock:
+            self.cache.set(key, value, config.SNAPSHOT_TTL)
+        shared = cluster_cache.shared
+        if shared is not None:
+            shared.set(json.dumps(["snapshots", *key]), value, config.SNAPSHOT_TTL)
+
+    def compare(self, session: Optional[str], kind: str, namespace: str, name: str, snapshot: dict,
+                since_version: Optional[str] = None, record: bool = True) -> Tuple[str, Optional[str], Optional[dict]]:
+        """
+        Stores a snapshot and compares it with an earlier one. Blocking (it may use the shared tier).
+
+        Args:
+            session (Optional[str]): The caller's session, or None.
+            kind (str): "pod" or "service".
+            namespace (str): The object's namespace.
+            name (str): The object's name.
+            snapshot (dict): Its current snapshot.
+            since_version (Optional[str]): Compare with this version instead of the session's last one.
+            record (bool): Remember the version as the session's last (False for speculative reads).
+
+        Returns:
+            Tuple[str, Optional[str], Optional[dict]]: (version, base version, diff_snapshots result);
+            the last two are None when the base version is unknown (or expired).
+        """
+        version = snapshot_version(snapshot)
+        self._set(("snapshot", kind, namespace, name, version), snapshot)
+        last_key = ("last", session, kind, namespace, name)
+        base_version = since_version or (self._get(last_key) if session else None)
+        if session and record:
+            self._set(last_key, version)
+        base = self._get(("snapshot", kind, namespace, name, base_version)) if base_version else None
+        if base is None:
+            return version, None, None
+        return version, base_version, diff_snapshots(base, snapshot)
+
+
+snapshot_store = SnapshotStore()
@@ -0,0 +1,214 @@
+# prefetch.py
+
+"""
+This module guesses, from the user's question alone, which tool calls the LLM will ask for, and
+runs them while the LLM is still generating its tool decision.
+
+The question is matched against the names of the cluster's pods, deployments, statefulsets and
+services (the bridge's /api/object-names, kept here for names_ttl seconds). Every object it names
+gets the calls PREFETCH_PLAN lists for its kind, with the arguments the LLM is most likely to use
+(the tools' defaults). At most max_calls calls are started per question.
+
+When the LLM asks for a call that was prefetched with the same arguments, the chat client takes
+the running (often finished) call instead of starting it again. Calls nobody asked for are counted
+as wasted; the counters show whether the guessing pays off.
+
+Namespaces in the question pick the namespace of objects whose name exists in several. A question
+that names a namespace but no object in it prefetches that namespace's Warning events. Because
+"default" is an ordinary word, the default namespace only counts next to "namespace" or "ns".
+
+Classes:
+    Prefetcher: Starts the guessed calls for a question and hands them to the chat client.
+
+Functions:
+    find_objects: The objects and namespaces a question names.
+    plan_calls: The tool calls to prefetch for them.
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Calls prefetched per kind of object named: (tool, argument taking the object's name, other arguments).
+# "namespaces" applies to a namespace named without any object in it.
+PREFETCH_PLAN = {
+    "pods": [("describe_pod_api", "pod_name", {}), ("get_logs_api", "pod_name", {}),
+             ("get_events_api", None, {"event_type": "Warning"})],
+    "deployments": [("get_workload_logs_api", "deployment", {}), ("get_events_api", None, {"event_type": "Warning"})],
+    "statefulsets": [("get_workload_logs_api", "statefulset", {}), ("get_events_api", None, {"event_type": "Warning"})],
+    "services": [("get_service_info_api", "service_name", {})],
+    "namespaces": [("get_events_api", None, {"event_type": "Warning"})],
+}
+
+DEFAULT_NAMESPACE = "default"
+_NAMESPACE_WORDS = {"namespace", "namespaces", "ns"}
+_NAME = re.compile(r"[a-z0-9](?:[a-z0-9.-]*[a-z0-9])?")
+
+
+def find_objects(prompt: str, objects: List[dict]) -> Tuple[List[Tuple[str, str, str]], List[str]]:
+    """
+    Finds the objects and namespaces a question names, in the order it names them.
+
+    Args:
+        prompt (str): The user's question.
+        objects (List[dict]): {"kind", "namespace", "name"} of every known object.
+
+    Returns:
+        Tuple[list, list]: (kind, namespace, name) of each object named, and the namespaces named.
+    """
+    words = _NAME.findall(prompt.lower())
+    by_name = {}
+    for obj in objects:
+        by_name.setdefault(obj["name"], []).append((obj["kind"], obj["namespace"]))
+    known_namespaces = {obj["namespace"] for obj in objects}
+
+    namespaces = []
+    for i, word in enumerate(words):
+        if word not in known_namespaces or word in namespaces:
+            continue
+        near_keyword = bool(_NAMESPACE_WORDS & set(words[max(i - 1, 0):i] + words[i + 1:i + 2]))
+        if word != DEFAULT_NAMESPACE or near_keyword:
+            namespaces.append(word)
+
+    found = []
+    for word in words:
+        candidates = by_name.get(word, [])
+        for kind in {kind for kind, _ in candidates}:
+            in_kind = [namespace for k, namespace in candidates if k == kind]
+            chosen = [namespace for namespace in in_kind if namespace in namespaces]
+            if not chosen:
+                # Ambiguous without a namespace; the LLM would assume the default one.
+                chosen = in_kind if len(in_kind) == 1 else [ns for ns in in_kind if ns == DEFAULT_NAMESPACE]
+            for namespace in chosen:
+                if (kind, namespace, word) not in found:
+                    found.append((kind, namespace, word))
+    return found, namespaces
+
+
+def plan_calls(found: List[Tuple[str, str, str]], namespaces: List[str]) -> List[Tuple[str, dict]]:
+    """
+    Returns the (name, arguments) of the calls PREFETCH_PLAN lists for the objects and namespaces
+    found, most likely first (in the order the question names them), without duplicates.
+    """
+    targets = list(found) + [("namespaces", namespace, None) for namespace in namespaces
+                             if not any(ns == namespace for _, ns, _ in found)]
+    calls = []
+    for kind, namespace, name in targets:
+        for tool, name_argument, extra in PREFETCH_PLAN.get(kind, []):
+            arguments = dict(extra, namespace=namespace)
+            if name_argument:
+                arguments[name_argument] = name
+            if (tool, arguments) not in calls:
+                calls.append((tool, arguments))
+    return calls
+
+
+class Prefetcher:
+    """
+    Runs the tool calls a question suggests in the background and hands them out when the LLM asks.
+
+    Args:
+        list_objects (Callable[[], List[dict]]): Fetches the object names (the bridge's /api/object-names).
+        call_key (Callable[[str, dict], str]): Identifies a call by the arguments it runs with, so
+            that a call the LLM writes with fewer arguments still matches the prefetched one.
+        max_calls (int): Calls started per question at most.
+        names_ttl (float): Seconds the object names are reused before they are fetched again.
+
+    Counters: questions, issued (calls started), used (asked for by the LLM), ready (of those, already
+    finished when asked for), wasted (not asked for), missed (asked for but not prefetched).
+    """
+
+    def __init__(self, list_objects: Callable[[], List[dict]], call_key: Callable[[str, dict], str],
+                 max_calls: int = 4, names_ttl: float = 60.0):
+        self.list_objects = list_objects
+        self.call_key = call_key
+        self.max_calls = max_calls
+        self.names_ttl = names_ttl
+        self.counters = {"questions": 0, "issued": 0, "used": 0, "ready": 0, "wasted": 0, "missed": 0}
+        self._pool = ThreadPoolExecutor(max_calls + 1, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._objects = None
+        self._objects_at = 0.0
+        self._planning = None  # Future of the current question's planning
+        self._question = 0  # Bumped by finish(), so a late planning of an earlier question issues nothing
+        self._issued = {}  # call key -> [name, arguments, future, used]
+
+    def start(self, prompt: str, run_call: Callable[[str, dict], tuple]) -> None:
+        """
+        Starts prefetching for a question, in the background. An earlier question's calls that
+        were not taken are counted as wasted.
+
+        Args:
+            prompt (str): The user's question.
+            run_call (Callable[[str, dict], tuple]): Runs one tool call, returning (name, arguments, text).
+        """
+        self.finish()
+        with self._lock:
+            self.counters["questions"] += 1
+            self._planning = self._pool.submit(self._plan, prompt, run_call, self._question)
+
+    def _plan(self, prompt: str, run_call: Callable[[str, dict], tuple], question: int) -> List[Tuple[str, dict]]:
+        if self._objects is None or time.monotonic() - self._objects_at > self.names_ttl:
+            try:
+                self._objects, self._objects_at = self.list_objects(), time.monotonic()
+            except Exception:
+                return []  # No guesses this time; the LLM's calls run as usual
+        calls = plan_calls(*find_objects(prompt, self._objects or []))[:self.max_calls]
+        with self._lock:
+            if question != self._question:
+                return []
+            for name, arguments in calls:
+                future = self._pool.submit(run_call, name, arguments)
+                self._issued[self.call_key(name, arguments)] = [name, arguments, future, False]
+            self.counters["issued"] += len(calls)
+        return calls
+
+    def take(self, name: str, arguments: dict) -> Optional[Future]:
+        """
+        Returns the prefetched call with these arguments (its future gives (name, arguments, text)),
+        or None if it was not prefetched (counted as missed). Never waits for the planning.
+        """
+        key = self.call_key(name, arguments)
+        with self._lock:
+            entry = self._issued.get(key)
+            if entry is None:
+                self.counters["missed"] += 1
+                return None
+            if not entry[3]:
+                entry[3] = True
+                self.counters["used"] += 1
+                self.counters["ready"] += entry[2].done()
+            return entry[2]
+
+    def finish(self) -> Dict[str, int]:
+        """
+        Ends the current question: calls not taken are counted as wasted (and dropped if they have
+        not started). Returns this question's issued and used counts.
+        """
+        with self._lock:
+            issued = list(self._issued.values())
+            self._issued = {}
+            self._question += 1
+            if self._planning is not None:
+                self._planning.cancel()  # Not yet planned: nothing was issued
+                self._planning = None
+            wasted = [entry for entry in issued if not entry[3]]
+            for _, _, future, _ in wasted:
+                future.cancel()
+            self.counters["wasted"] += len(wasted)
+        return {"issued": len(issued), "used": len(issued) - len(wasted)}
+
+    def stats(self) -> dict:
+        """
+        Returns the counters with hit_rate (share of the LLM's calls that were prefetched) and
+        precision (share of prefetched calls the LLM asked for), as fractions or None.
+        """
+        with self._lock:
+            counters = dict(self.counters)
+        asked = counters["used"] + counters["missed"]
+        settled = counters["used"] + counters["wasted"]
+        return dict(counters, hit_rate=counters["used"] / asked if asked else None,
+                    precision=counters["used"] / settled if settled else None,
+                    objects=len(self._objects) if self._objects is not None else None)
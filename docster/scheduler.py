@@ -0,0 +1,227 @@
+# scheduler.py
+
+"""
+This module decides which cluster call or log stream starts next when more are waiting than
+there are slots.
+
+Every cluster call (cluster_exec.run_cluster_call) and log stream (cluster_exec.stream_cluster_lines)
+belongs to a priority class, most urgent first:
+
+    interactive   an operator's own command (/describe, /logs, ... in the chat client)
+    tool          a tool call the LLM asked for (/api/batch), and requests that do not say
+    background    monitoring, sweeps and other work nobody is waiting on
+
+Calls and streams have separate slots, since a followed log stream holds its slot for as long as
+it is open. At most config.SCHEDULER_LIMITS[class] calls of a class run at once, and at most
+config.MAX_CONCURRENT_CLUSTER_CALLS in total; for streams, config.SCHEDULER_STREAM_LIMITS[class]
+and config.MAX_CONCURRENT_LOG_STREAMS. When a slot frees up, the oldest waiting call of the most
+urgent class that is below its limit takes it, so an operator's query waits for one running call
+to finish, never for a queue of background work. The tool and background limits add up to less
+than the total, so some slots are only ever used by interactive calls.
+
+Admission control: a call is refused at once when config.SCHEDULER_QUEUE_LIMITS[class] calls of
+its class are already waiting, and dropped when it has waited config.SCHEDULER_MAX_WAIT[class]
+seconds without a slot (a stale background result is not worth one). Both raise Overloaded, which
+the handlers turn into HTTP 429 with a Retry-After estimate.
+
+A request's class is its X-Priority header (config.PRIORITY_HEADER), which PriorityMiddleware
+puts in a context variable for cluster_exec. The schedulers live on the event loop and are per
+worker process.
+
+Classes:
+    Overloaded: Raised when a call is refused or dropped; carries the Retry-After estimate.
+    ClusterScheduler: Per-class slots and queues in front of one kind of cluster work.
+    PriorityMiddleware: ASGI middleware setting the priority class of a request's cluster calls.
+
+Functions:
+    current_priority: The priority class of the cluster calls made in the current context.
+
+Attributes:
+    PRIORITIES: The priority classes, most urgent first.
+    scheduler: The ClusterScheduler of cluster calls (run_cluster_call).
+    stream_scheduler: The ClusterScheduler of log streams (stream_cluster_lines).
+"""
+
+import asyncio
+import contextvars
+import math
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import config
+
+PRIORITIES = ("interactive", "tool", "background")
+
+_priority: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("cluster_call_priority", default=None)
+
+
+def current_priority() -> str:
+    """
+    Returns the priority class of cluster calls made in the current context (config.DEFAULT_PRIORITY
+    outside a request that named one).
+    """
+    return _priority.get() or config.DEFAULT_PRIORITY
+
+
+class Overloaded(Exception):
+    """
+    Raised when a cluster call is refused (its class's queue is full) or dropped (it waited too long).
+
+    Args:
+        priority (str): The call's priority class.
+        retry_after (int): Seconds after which a retry is likely to be admitted.
+        reason (str): What happened, for the error message.
+        work (str): What was refused, for the error message.
+    """
+
+    def __init__(self, priority: str, retry_after: int, reason: str, work: str = "cluster calls"):
+        super().__init__(f"Too many {priority} {work}: {reason}; retry after {retry_after}s")
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+class ClusterScheduler:
+    """
+    Grants slots by priority class. Must only be used from the event loop.
+
+    Limits are read from config on every decision, so they can be changed at runtime.
+
+    Args:
+        work (str): What a slot is for, e.g. "cluster calls" (metrics label and error messages).
+        total_setting (str): Name of the config setting capping all classes together.
+        limits_setting (str): Name of the config setting with the per-class limits.
+
+    Counters per class: admitted (calls that got a slot), rejected (refused, queue full), dropped
+    (waited past SCHEDULER_MAX_WAIT), wait_seconds (total time admitted calls spent waiting).
+    """
+
+    COUNTERS = ("admitted", "rejected", "dropped")
+
+    def __init__(self, work: str, total_setting: str, limits_setting: str):
+        self.work = work
+        self.total_setting = total_setting
+        self.limits_setting = limits_setting
+        self.running: Dict[str, int] = {priority: 0 for priority in PRIORITIES}
+        self.queues: Dict[str, deque] = {priority: deque() for priority in PRIORITIES}
+        self.counters = {priority: dict.fromkeys(self.COUNTERS, 0) for priority in PRIORITIES}
+        self.wait_seconds: Dict[str, float] = dict.fromkeys(PRIORITIES, 0.0)
+        # Moving average of call durations per class, for the Retry-After estimate
+        self._call_seconds: Dict[str, float] = dict.fromkeys(PRIORITIES, 1.0)
+
+    def _total(self) -> int:
+        return getattr(config, self.total_setting)
+
+    def _limit(self, priority: str) -> int:
+        return getattr(config, self.limits_setting)[priority]
+
+    def _runnable(self, priority: str) -> bool:
+        return sum(self.running.values()) < self._total() and self.running[priority] < self._limit(priority)
+
+    def _grant(self, priority: str) -> None:
+        self.running[priority] += 1
+        self.counters[priority]["admitted"] += 1
+
+    def _dispatch(self) -> None:
+        # Most urgent class first; a class at its own limit lets less urgent ones use the free slots.
+        for priority in PRIORITIES:
+            queue = self.queues[priority]
+            while queue and self._runnable(priority):
+                waiter = queue.popleft()
+                if not waiter.done():  # Cancelled waiters are skipped
+                    self._grant(priority)
+                    waiter.set_result(None)
+
+    def retry_after(self, priority: str) -> int:
+        """
+        Estimates the seconds until a new call of this class would get a slot: the calls already
+        waiting, at the class's limit and average call duration.
+        """
+        limit = max(1, min(self._limit(priority), self._total()))
+        estimate = self._call_seconds[priority] * (len(self.queues[priority]) + 1) / limit
+        return max(1, min(config.SCHEDULER_MAX_RETRY_AFTER, math.ceil(estimate)))
+
+    async def acquire(self, priority: str) -> None:
+        """
+        Waits for a slot for one call (or stream) of this class. Every successful acquire must be
+        followed by one release.
+
+        Raises:
+            ValueError: If priority is not one of PRIORITIES.
+            Overloaded: If the class's queue is full, or no slot came up within its maximum wait.
+        """
+        if priority not in self.running:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {list(PRIORITIES)}")
+        queue = self.queues[priority]
+        if not queue and self._runnable(priority):
+            self._grant(priority)
+            return
+        if len(queue) >= config.SCHEDULER_QUEUE_LIMITS[priority]:
+            self.counters[priority]["rejected"] += 1
+            raise Overloaded(priority, self.retry_after(priority), f"{len(queue)} already waiting", self.work)
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, config.SCHEDULER_MAX_WAIT.get(priority))
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                self.release(priority)  # Granted just as the wait ended; hand the slot on
+            elif waiter in queue:
+                queue.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.counters[priority]["dropped"] += 1
+                raise Overloaded(priority, self.retry_after(priority),
+                                 f"no slot within {config.SCHEDULER_MAX_WAIT[priority]}s", self.work)
+            raise
+        self.wait_seconds[priority] += time.monotonic() - start
+
+    def release(self, priority: str, call_seconds: Optional[float] = None) -> None:
+        """
+        Gives back a slot and hands it to the next waiting call.
+
+        Args:
+            priority (str): The class the slot was acquired for.
+            call_seconds (Optional[float]): How long the call ran (updates the Retry-After estimate;
+                                            not given for streams, whose length says nothing about load).
+        """
+        self.running[priority] -= 1
+        if call_seconds is not None:
+            self._call_seconds[priority] = 0.8 * self._call_seconds[priority] + 0.2 * call_seconds
+        self._dispatch()
+
+    def stats(self) -> dict:
+        """
+        Returns running and queued calls and the counters, per class.
+        """
+        return {priority: dict(self.counters[priority], running=self.running[priority],
+                               queued=len(self.queues[priority]),
+                               wait_seconds=round(self.wait_seconds[priority], 3))
+                for priority in PRIORITIES}
+
+
+scheduler = ClusterScheduler("cluster calls", "MAX_CONCURRENT_CLUSTER_CALLS", "SCHEDULER_LIMITS")
+stream_scheduler = ClusterScheduler("log streams", "MAX_CONCURRENT_LOG_STREAMS", "SCHEDULER_STREAM_LIMITS")
+
+
+class PriorityMiddleware:
+    """
+    ASGI middleware: runs each HTTP request with the priority class named by its
+    config.PRIORITY_HEADER header. A missing or unknown class means config.DEFAULT_PRIORITY.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = config.PRIORITY_HEADER.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        value = dict(scope.get("headers") or []).get(self.header, b"").decode("latin-1").strip().lower()
+        token = _priority.set(value if value in PRIORITIES else None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _priority.reset(token)
@@ -0,0 +1,95 @@
+# server.py
+
+"""
+This module starts the bridge, either as the development server (one process with auto-reload,
+as before) or in production mode with several worker processes.
+
+In production mode uvicorn's supervisor starts config.SERVER_WORKERS processes. They share the
+listening socket, and a worker that dies is replaced. On SIGTERM each worker stops accepting
+connections and fails /readyz (see health.py). Its in-flight requests then get
+config.SERVER_GRACEFUL_SHUTDOWN seconds to finish.
+
+Worker processes import config afresh, so the launcher passes its settings to them as JSON in
+the BRIDGE_CONFIG environment variable, from which config.py reads the settings it names
+(SERVER_WORKERS, SHARED_CACHE_PATH and the cluster backend settings) on import. With more than one
+worker, the result cache gets a tier shared by all workers (config.SHARED_CACHE_PATH; see
+cache.py), so a result one worker fetched is not fetched again by the others.
+
+The log store (log_store.py) is written by a single process, so it requires a single worker.
+
+Functions:
+    run: Start the bridge in development or production mode.
+"""
+
+import json
+import os
+import socket
+import tempfile
+from typing import Optional
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+import config
+from cache import SharedCache
+
+CONFIG_ENV = "BRIDGE_CONFIG"  # Read by config.py
+
+
+def _export_config(overrides: dict) -> None:
+    settings = json.loads(os.environ.get(CONFIG_ENV) or "{}")
+    settings.update(overrides)
+    os.environ[CONFIG_ENV] = json.dumps(settings)
+
+
+def _listening_socket(server_config: uvicorn.Config) -> socket.socket:
+    """
+    Binds the socket the workers share. uvicorn creates it with protocol 0, and asyncio only turns
+    off Nagle's algorithm (TCP_NODELAY) on connections accepted from a socket whose protocol is TCP.
+    Without it, a response written as headers and then body waits ~40 ms for the client's delayed ACK.
+    """
+    sock = server_config.bind_socket()
+    if sock.family in (socket.AF_INET, socket.AF_INET6):
+        sock = socket.socket(sock.family, sock.type, socket.IPPROTO_TCP, fileno=sock.detach())
+    return sock
+
+
+def run(workers: Optional[int] = None, host: Optional[str] = None, port: Optional[int] = None,
+        log_level: str = "info") -> None:
+    """
+    Runs the bridge until it is stopped.
+
+    Args:
+        workers (Optional[int]): Worker processes; defaults to config.SERVER_WORKERS.
+                                 None or 0 runs the development server with auto-reload.
+        host (Optional[str]): Defaults to config.SERVER_HOST.
+        port (Optional[int]): Defaults to config.SERVER_PORT.
+        log_level (str): uvicorn's log level ("warning" leaves out the access log).
+
+    Raises:
+        ValueError: If several workers are asked for while the log store is enabled.
+    """
+    workers = config.SERVER_WORKERS if workers is None else workers
+    host = host or config.SERVER_HOST
+    port = port or config.SERVER_PORT
+    if not workers:
+        uvicorn.run("main:app", host=host, port=port, reload=True, log_level=log_level)
+        return
+
+    if workers > 1 and config.LOG_STORE_ENABLED:
+        raise ValueError("The log store is written by one process; run it with a single worker")
+    overrides = {"SERVER_WORKERS": workers}
+    if workers > 1:
+        path = config.SHARED_CACHE_PATH or os.path.join(tempfile.gettempdir(), f"bridge-cache-{port}.sqlite")
+        SharedCache.remove(path)  # Results and leases of an earlier run
+        overrides["SHARED_CACHE_PATH"] = path
+    _export_config(overrides)
+    server_config = uvicorn.Config("main:app", host=host, port=port, workers=workers, log_level=log_level,
+                                   timeout_graceful_shutdown=config.SERVER_GRACEFUL_SHUTDOWN)
+    if workers == 1:
+        uvicorn.Server(server_config).run()
+        return
+    try:
+        Multiprocess(server_config, sockets=[_listening_socket(server_config)]).run()
+    except KeyboardInterrupt:
+        pass
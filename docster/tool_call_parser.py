@@ -0,0 +1,210 @@
+# tool_call_parser.py
+
+"""
+This module finds the LLM's tool calls in its output while the output is still being generated.
+
+FunctionCallParser is fed the generated text piece by piece. It tracks JSON nesting (outside
+string literals) and returns each {"function_call": {"name": ..., "arguments": ...}} object as
+soon as its closing brace arrives. The chat client can then start that tool call while the rest
+of the reply is generated. Text outside braces (prose, code fences, the surrounding list) is
+ignored, so stray brackets in prose do not matter.
+
+Objects that are not valid JSON are repaired before they are given up on. The repairs cover the
+mistakes LLMs usually make:
+    - ';' instead of ',' between items,
+    - trailing commas,
+    - single-quoted strings and Python literals (True/False/None),
+    - unquoted keys,
+    - "arguments" sent as a JSON string instead of an object,
+    - closing brackets missing at the end of the output (see close()).
+
+Classes:
+    FunctionCallParser: Incremental extraction of tool calls from streamed LLM output.
+
+Functions:
+    repair_json: Fix common LLM JSON mistakes in one object's text.
+"""
+
+import ast
+import json
+from typing import Container, List, Optional, Tuple
+
+_CLOSERS = {"{": "}", "[": "]"}
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def repair_json(text: str) -> str:
+    """
+    Rewrites one JSON-like object so json.loads accepts the usual LLM mistakes: ';' separators,
+    trailing commas, single-quoted strings, Python literals and unquoted keys.
+    """
+    out = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch in "\"'":
+            # A string literal; single-quoted ones are re-quoted with double quotes.
+            j = i + 1
+            chars = []
+            while j < len(text) and text[j] != ch:
+                if text[j] == "\\" and j + 1 < len(text):
+                    escaped = text[j + 1]
+                    chars.append(escaped if ch == "'" and escaped == "'" else text[j:j + 2])
+                    j += 2
+                    continue
+                chars.append('\\"' if ch == "'" and text[j] == '"' else text[j])
+                j += 1
+            out.append('"' + "".join(chars) + '"')
+            i = j + 1
+        elif ch == ";":
+            out.append(",")
+            i += 1
+        elif ch in "}]":
+            while out and (out[-1].isspace() or out[-1] == ","):
+                out.pop()  # Trailing comma (and the whitespace around it)
+            out.append(ch)
+            i += 1
+        elif ch.isalpha() or ch == "_":
+            j = i
+            while j < len(text) and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            rest = text[j:].lstrip()
+            if word in ("true", "false", "null"):
+                out.append(word)
+            elif rest.startswith(":"):
+                out.append(f'"{word}"')  # Unquoted key
+            else:
+                out.append(_PYTHON_LITERALS.get(word, word))
+            i = j
+        else:
+            out.append(ch)
+            i += 1
+    return "".join(out)
+
+
+def _loads_lenient(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        return json.loads(repair_json(text))
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(text)  # A Python dict literal
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def _missing_closers(text: str) -> str:
+    # The brackets text leaves open, in the order they must be closed.
+    stack = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch in "}]" and stack and stack[-1] == ch:
+            stack.pop()
+    return ('"' if in_string else "") + "".join(reversed(stack))
+
+
+class FunctionCallParser:
+    """
+    Extracts tool calls from LLM output fed to it in pieces, each as soon as it is complete.
+
+    Args:
+        names (Optional[Container[str]]): Known tool names. With it, a bare {"name": ..., "arguments": ...}
+            object naming a known tool is taken as a call too.
+
+    Attributes:
+        calls (list): Every (name, arguments) found so far, in order.
+    """
+
+    def __init__(self, names: Optional[Container[str]] = None):
+        self.names = names
+        self.calls = []
+        self._text = ""
+        self._pos = 0
+        self._open = []  # [start offset, holds an emitted call] per unclosed '{'
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Tuple[str, dict]]:
+        """
+        Adds generated text. Returns the calls completed by it.
+        """
+        self._text += text
+        found = []
+        while self._pos < len(self._text):
+            ch = self._text[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"' and self._open:
+                self._in_string = True  # Quotes only matter inside an object; prose has its own
+            elif ch == "{":
+                self._open.append([self._pos, False])
+            elif ch == "}" and self._open:
+                start, holds_call = self._open.pop()
+                if not holds_call:
+                    call = self._to_call(self._text[start:self._pos + 1])
+                    if call is not None:
+                        found.append(call)
+                        for enclosing in self._open:
+                            enclosing[1] = True  # Its call is out; do not report it again
+            self._pos += 1
+        if not self._open:
+            self._text, self._pos = "", 0  # Nothing before this can be part of a call
+        self.calls.extend(found)
+        return found
+
+    def close(self) -> List[Tuple[str, dict]]:
+        """
+        Ends the output. An object still open is completed with its missing closing brackets and
+        returned if it is a call. Returns the calls found this way.
+        """
+        found = []
+        for start, holds_call in self._open:
+            if holds_call:
+                continue
+            candidate = self._text[start:]
+            call = self._to_call(candidate.rstrip().rstrip(",;") + _missing_closers(candidate))
+            if call is not None:
+                found.append(call)
+                break  # Objects further in are part of this one
+        self._open = []
+        self._text, self._pos = "", 0
+        self.calls.extend(found)
+        return found
+
+    def _to_call(self, text: str) -> Optional[Tuple[str, dict]]:
+        obj = _loads_lenient(text)
+        if not isinstance(obj, dict):
+            return None
+        call = obj.get("function_call")
+        if not isinstance(call, dict):
+            if self.names is None or obj.get("name") not in self.names:
+                return None
+            call = obj
+        name = call.get("name")
+        arguments = call.get("arguments", call.get("parameters")) or {}
+        if isinstance(arguments, str):
+            arguments = _loads_lenient(arguments) or {}
+        if not isinstance(name, str) or not isinstance(arguments, dict):
+            return None
+        return name, arguments
@@ -0,0 +1,177 @@
+# tracing.py
+
+"""
+This module records where the time of a chat diagnosis turn goes.
+
+A turn is a tree of spans: prompt construction, each LLM request, each tool call (started while
+the LLM is still generating) and the wait for the tool results. Each span has a start offset within the turn, a duration and a few
+attributes (prompt size, tokens, HTTP status, ...). The last turns are kept in memory for the
+chat client's /trace command. With an export path, every finished turn is also appended to a
+JSONL file (one span per line) so slow turns can be analysed offline.
+
+Spans opened outside a turn are not recorded, so the tool functions can be traced
+unconditionally.
+
+Classes:
+    Span: One timed step of a turn.
+    TurnTracer: Records turns of spans, renders timelines and exports JSONL.
+"""
+
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+
+class Span:
+    """
+    One timed step of a turn.
+
+    Attributes:
+        name (str): What was done, e.g. "llm_call" or "tool:describe_pod_api".
+        span_id / parent_id (int / Optional[int]): Position in the turn's tree (the root has no parent).
+        start / end (float): perf_counter() times; end is None while the span is open.
+        attrs (dict): Extra details; set them while the span is open.
+    """
+
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attrs")
+
+    def __init__(self, name: str, span_id: int, parent_id: Optional[int], start: float, attrs: dict):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = start
+        self.end = None
+        self.attrs = attrs
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end if self.end is not None else time.perf_counter()) - self.start) * 1000
+
+    def to_dict(self, turn_start: float) -> dict:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.start - turn_start) * 1000, 2),
+            "duration_ms": round(self.duration_ms, 2),
+            "attrs": self.attrs,
+        }
+
+
+class TurnTracer:
+    """
+    Records the spans of chat turns.
+
+    Args:
+        max_turns (int): Finished turns kept in memory.
+        export_path (Optional[str]): JSONL file each finished turn is appended to (None = no export).
+    """
+
+    def __init__(self, max_turns: int = 20, export_path: Optional[str] = None):
+        self.turns = deque(maxlen=max_turns)  # (turn id, wall-clock start, [Span])
+        self.export_path = export_path
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._current = None  # [turn id, wall-clock start, spans] of the turn in progress
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def turn(self, name: str = "turn", **attrs) -> Iterator[Span]:
+        """
+        Opens a turn with a root span. Nested span() calls are recorded until it closes.
+        """
+        with self._lock:
+            self._current = [next(self._ids), datetime.now(timezone.utc).isoformat(), []]
+        try:
+            with self.span(name, **attrs) as root:
+                yield root
+        finally:
+            with self._lock:
+                finished, self._current = self._current, None
+            self.turns.append(tuple(finished))
+            if self.export_path:
+                self.export(finished, self.export_path)
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attrs) -> Iterator[Span]:
+        """
+        Times the enclosed block as a child of the innermost open span of this thread, or of parent
+        (for work started on another thread). Outside a turn the span is handed out but not recorded.
+        """
+        stack = self._stack()
+        if parent is None and stack:
+            parent = stack[-1]
+        with self._lock:
+            current = self._current
+            span = Span(name, len(current[2]) if current else -1, parent.span_id if parent else None,
+                        time.perf_counter(), attrs)
+            if current:
+                current[2].append(span)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs.setdefault("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end = time.perf_counter()
+            stack.pop()
+
+    def add_span(self, name: str, start: float, duration_ms: float, parent: Optional[Span] = None, **attrs) -> None:
+        """
+        Records a span that was timed elsewhere (e.g., a tool call timed by the bridge).
+        """
+        with self._lock:
+            if not self._current:
+                return
+            span = Span(name, len(self._current[2]), parent.span_id if parent else None, start, attrs)
+            span.end = start + duration_ms / 1000
+            self._current[2].append(span)
+
+    def last_turn(self) -> Optional[tuple]:
+        return self.turns[-1] if self.turns else None
+
+    @staticmethod
+    def export(turn, path: str) -> None:
+        """
+        Appends a turn to a JSONL file, one span per line, tagged with the turn id and start time.
+        """
+        turn_id, started_at, spans = turn
+        turn_start = spans[0].start if spans else 0.0
+        with open(path, "a") as f:
+            for span in spans:
+                f.write(json.dumps(dict(span.to_dict(turn_start), turn_id=turn_id, turn_started_at=started_at),
+                                   default=str) + "\n")
+
+    @staticmethod
+    def timeline(turn, width: int = 40) -> str:
+        """
+        Renders a turn as an indented timeline with offsets, durations and bars to scale.
+        """
+        turn_id, started_at, spans = turn
+        if not spans:
+            return "Empty turn."
+        turn_start = spans[0].start
+        total_ms = max(spans[0].duration_ms, 0.001)
+        depth = {}
+        lines = [f"Turn {turn_id} at {started_at}: {total_ms / 1000:.2f} s"]
+        for span in spans:
+            depth[span.span_id] = depth.get(span.parent_id, -1) + 1
+            offset_ms = (span.start - turn_start) * 1000
+            first = min(width - 1, int(offset_ms / total_ms * width))
+            length = max(1, min(width - first, round(span.duration_ms / total_ms * width)))
+            bar = " " * first + "#" * length
+            attrs = ", ".join(f"{key}={value}" for key, value in span.attrs.items() if value is not None)
+            label = "  " * depth[span.span_id] + span.name
+            lines.append(f"{offset_ms:>9.0f} ms {span.duration_ms:>9.0f} ms  {label:<34} |{bar:<{width}}| {attrs}")
+        return "\n".join(lines)
@@ -24,8 +24,8 @@ def chunk_logs(log_data: str, chunk_size: int) -> list:
 
 def mask_sensitive_data(text: str) -> str:
     """
-    Masks sensitive data (e.g., passwords, tokens) in the provided text.
-    This is a simple implementation that replaces common patterns with '***'.
+    Masks sensitive data (e.g., passwords, tokens, keys) in the provided text.
+    Uses the compiled rule set from masking.py (config.SECRET_MASK_RULES) in a single scan.
 
     Args:
         text (str): The text to be processed.
@@ -33,10 +33,9 @@ def mask_sensitive_data(text: str) -> str:
     Returns:
         str: The text with sensitive data masked.
     """
-    # Mask patterns such as "password: somevalue" or "token: somevalue"
-    text = re.sub(r'(?i)(password\s*:\s*)(\S+)', r'\1***', text)
-    text = re.sub(r'(?i)(token\s*:\s*)(\S+)', r'\1***', text)
-    return text
+    from masking import get_masker  # masking imports config; keep utils importable on its own
+
+    return get_masker().mask(text)
 
 
 def summarize_output(text: str, max_lines: int = 10) -> str:
@@ -54,3 +53,26 @@ def summarize_output(text: str, max_lines: int = 10) -> str:
     lines = text.splitlines()
     summary = "\n".join(lines[:max_lines])
     return summary
+
+
+def parse_duration(value: str) -> int:
+    """
+    Converts a kubectl-style duration (e.g., "30s", "5m", "2h", "1h30m") into seconds.
+
+    Args:
+        value (str): The duration string. A bare number is treated as seconds.
+
+    Returns:
+        int: The duration in seconds.
+
+    Raises:
+        ValueError: If the string is not a valid duration.
+    """
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    parts = re.findall(r'(\d+)([smhd])', value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        raise ValueError(f"Invalid duration: '{value}'")
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    return sum(int(n) * units[u] for n, u in parts)